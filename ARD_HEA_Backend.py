@@ -0,0 +1,469 @@
+# ---------------------------------------------------------------------------
+# NAME: ARD_HEA_Backend.py
+# Version: 2.0 (ArcGIS 10.2)
+# Author: Research Planning, Inc.
+#
+# Usage: import ARD_HEA_Backend
+#        ARD_HEA_Backend.initialize(("Data Management Tools.tbx",), ("spatial",))
+#        backend = ARD_HEA_Backend.get_backend()
+#
+# Description: Geoprocessing environment set up and the engines that HEA jobs run
+#              on.  initialize() checks out licences and loads toolboxes only the
+#              first time they are asked for in a process, so tool scripts run
+#              repeatedly inside one worker (ARD_HEA_Worker) skip the start up work.
+#              ArcpyBackend runs the tool scripts in-process; LocalBackend stands in
+#              on machines without ArcGIS and runs the NumPy functions only.
+#
+# Notes:  The HEA_BACKEND environment variable picks the default backend, otherwise
+#         arcpy is used whenever it can be imported.  LocalBackend treats a
+#         geodatabase as a folder: tables are structured arrays saved as <NAME>.npy
+#         and rasters are <NAME>.npz files holding the values and their origin.
+#
+# Date Created: October 19, 2026
+#
+# ---------------------------------------------------------------------------
+
+import os
+import re
+import sys
+import time
+import runpy
+import importlib
+import traceback
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+try:
+    basestring
+except NameError:
+    basestring = str
+
+# Toolboxes and licences used by the HEA tool scripts
+TOOLBOXES = ("Spatial Analyst Tools.tbx", "Spatial Statistics Tools.tbx", "Data Management Tools.tbx",
+             "Analysis Tools.tbx", "Conversion Tools.tbx")
+EXTENSIONS = ("spatial",)
+
+# Folder holding the tool scripts
+HOME = os.path.dirname(os.path.abspath(__file__))
+
+# What has been initialized in this process
+_loaded = {"toolboxes": set(), "extensions": set(), "home": None, "version": None}
+
+
+class unsupported(Exception):
+    pass
+
+
+# True when running in a Python interpreter rather than inside ArcMap or ArcCatalog
+def standalone():
+    return os.path.basename(sys.executable).lower().startswith("python")
+
+
+# Check out licences and load toolboxes not already loaded in this process
+def initialize(toolboxes=(), extensions=()):
+    import arcpy
+    for extension in extensions:
+        if extension not in _loaded["extensions"]:
+            arcpy.CheckOutExtension(extension)
+            _loaded["extensions"].add(extension)
+    for toolbox in toolboxes:
+        if toolbox in _loaded["toolboxes"]:
+            continue
+        if _loaded["home"] is None:
+            install_dir = arcpy.GetInstallInfo("desktop")['InstallDir'].replace("\\", "/")
+            _loaded["home"] = os.path.join(install_dir, "ArcToolbox/Toolboxes/")
+        arcpy.AddToolbox(_loaded["home"] + toolbox)
+        _loaded["toolboxes"].add(toolbox)
+
+
+# ARD HEA Tools version, looked up once per process
+def version():
+    if _loaded["version"] is None:
+        import ARD_HEA_Tools
+        _loaded["version"] = ARD_HEA_Tools.version()
+    return _loaded["version"]
+
+
+# Path of a tool script, relative names are found next to this module
+def script_path(script):
+    if not script.lower().endswith(".py"):
+        script += ".py"
+    if not os.path.isabs(script):
+        script = os.path.join(HOME, script)
+    return script
+
+
+# Look up "module:function", limited to the public functions of the ARD_HEA_ modules
+def resolve(name):
+    module, func = str(name).partition(":")[::2]
+    if not re.match(r"^ARD_HEA_[A-Za-z0-9_]+$", module) or not re.match(r"^[A-Za-z][A-Za-z0-9_]*$", func):
+        raise unsupported("Cannot call " + str(name) + ", only ARD_HEA_<module>:<function> can be called")
+    target = getattr(importlib.import_module(module), func, None)
+    if not callable(target):
+        raise unsupported("No function " + func + " in " + module)
+    return target
+
+
+class Backend(object):
+    name = None
+
+    def __init__(self):
+        self.ready = False
+        self.messages = []
+
+    def initialize(self):
+        self.ready = True
+
+    # Run func, returning (result, printed output, error text)
+    def _run(self, func, *args, **kwargs):
+        if not self.ready:
+            self.initialize()
+        self.messages = []
+        out = StringIO()
+        stdout = sys.stdout
+        sys.stdout = out
+        result = None
+        error = None
+        try:
+            result = func(*args, **kwargs)
+        except SystemExit as e:
+            if e.code not in (None, 0):
+                error = "Exited with status " + str(e.code)
+        except Exception:
+            error = traceback.format_exc()
+        finally:
+            sys.stdout = stdout
+        return result, out.getvalue(), error
+
+    def call(self, name, args=(), kwargs=None):
+        try:
+            func = resolve(name)
+        except (unsupported, ImportError) as e:
+            return None, "", str(e)
+        return self._run(func, *args, **(kwargs or {}))
+
+    def run_script(self, script, args=()):
+        raise unsupported(self.name + " backend cannot run tool scripts")
+
+    def message(self, text, level="AddMessage"):
+        self.messages.append((level, str(text)))
+        print(str(text))
+
+
+class ArcpyBackend(Backend):
+    name = "arcpy"
+
+    def initialize(self):
+        initialize(TOOLBOXES, EXTENSIONS)
+        version()
+        self.ready = True
+
+    # Run a tool script as __main__ with sys.argv set, capturing its messages.
+    # The tool scripts report errors with AddError rather than raising.
+    def run_script(self, script, args=()):
+        import arcpy
+        script = script_path(script)
+        argv = sys.argv
+        sys.argv = [script] + [str(a) for a in args]
+        hooks = {}
+        for level in ("AddMessage", "AddWarning", "AddError"):
+            hooks[level] = getattr(arcpy, level)
+        def hook(level):
+            def add(message):
+                self.messages.append((level, str(message)))
+                hooks[level](message)
+            return add
+        for level in hooks:
+            setattr(arcpy, level, hook(level))
+        try:
+            result, output, error = self._run(runpy.run_path, script, run_name="__main__")
+        finally:
+            sys.argv = argv
+            for level in hooks:
+                setattr(arcpy, level, hooks[level])
+        if error is None:
+            errors = [m for level, m in self.messages if level == "AddError"]
+            if errors:
+                error = "\n".join(errors)
+        return None, output, error
+
+
+    # Messages go to the geoprocessor, and are also printed by a standalone Python
+    # interpreter where the geoprocessor messages are not shown
+    def message(self, text, level="AddMessage"):
+        import arcpy
+        self.messages.append((level, str(text)))
+        getattr(arcpy, level)(text)
+        if standalone():
+            print(str(text))
+
+    def exists(self, dataset):
+        import arcpy
+        return arcpy.Exists(dataset)
+
+    def delete(self, dataset):
+        import arcpy
+        if arcpy.Exists(dataset):
+            arcpy.Delete_management(dataset)
+
+    def has_field(self, table, field):
+        import arcpy
+        return len(arcpy.ListFields(table, field)) > 0
+
+    # Rows of a table as a structured array, where is a {field: value} filter
+    def read_table(self, table, fields, where=None, null_value=None):
+        import arcpy
+        return arcpy.da.TableToNumPyArray(table, list(fields), where_clause(table, where), null_value=null_value)
+
+    # Append the rows of a structured array or ARD_HEA_Tables.TypedTable, NaN is written as NULL
+    def append_rows(self, table, records):
+        import arcpy
+        if hasattr(records, "rows"):
+            with arcpy.da.InsertCursor(table, records.fields) as cursor:
+                for row in records.rows():
+                    cursor.insertRow(row)
+            return
+        fields = records.dtype.names
+        with arcpy.da.InsertCursor(table, fields) as cursor:
+            for row in records.tolist():
+                cursor.insertRow([None if isinstance(v, float) and v != v else v for v in row])
+
+    def delete_rows(self, table, where=None):
+        import arcpy
+        with arcpy.da.UpdateCursor(table, ("OID@",), where_clause(table, where)) as cursor:
+            for row in cursor:
+                cursor.deleteRow()
+
+    def load_grid(self, geoDB):
+        import ARD_HEA_Grid
+        return ARD_HEA_Grid.load_grid(geoDB)
+
+    def read_samples(self, geoDB, COCName):
+        import ARD_HEA_Interpolate
+        return ARD_HEA_Interpolate.read_samples(geoDB, COCName)
+
+    def register_surface(self, geoDB, COCName, layerName, interpType, logTransform):
+        import ARD_HEA_Interpolate
+        ARD_HEA_Interpolate.register_surface(geoDB, COCName, layerName, interpType, logTransform)
+
+    # Record the method a surface was resampled with in COC_INVENTORY
+    def record_resample(self, geoDB, COCName, method):
+        import arcpy
+        table = geoDB + "\\COC_INVENTORY"
+        if not arcpy.ListFields(table, "RESAMPLE_METHOD"):
+            arcpy.AddField_management(table, "RESAMPLE_METHOD", "TEXT", "", "", "10", "", "NULLABLE", "NON_REQUIRED", "")
+        with arcpy.da.UpdateCursor(table, ("RESAMPLE_METHOD",), where_clause(table, {"COC_NAME": COCName})) as cursor:
+            for row in cursor:
+                cursor.updateRow((method,))
+
+    def create_injury_table(self, geoDB):
+        import ARD_HEA_Overlay
+        ARD_HEA_Overlay.create_table(geoDB)
+
+    # Grid shaped values of a raster, read through the project raster cache and
+    # resampled with method (see ARD_HEA_Resample)
+    def read_raster(self, geoDB, grid, raster, method="NEAREST"):
+        import ARD_HEA_RasterCache
+        return grid.sample_raster(raster, ARD_HEA_RasterCache.project_cache(geoDB), method)
+
+    def write_raster(self, geoDB, grid, values, raster):
+        import ARD_HEA_RasterCache
+        self.delete(raster)
+        return grid.write_raster(values, raster, cache=ARD_HEA_RasterCache.project_cache(geoDB))
+
+
+# SQL where clause for a {field: value} filter
+def where_clause(table, where):
+    if not where:
+        return None
+    import arcpy
+    terms = []
+    for field, value in sorted(where.items()):
+        if isinstance(value, basestring):
+            value = "'" + value.replace("'", "''") + "'"
+        terms.append(arcpy.AddFieldDelimiters(table, field) + " = " + str(value))
+    return " AND ".join(terms)
+
+
+class LocalBackend(Backend):
+    name = "local"
+
+    # File system path of a geodatabase dataset ("geoDB\\NAME" -> geoDB/NAME)
+    @staticmethod
+    def path(dataset):
+        return dataset.replace("\\", os.sep)
+
+    def _files(self, dataset):
+        path = self.path(dataset)
+        return [path + ".npy", path + ".npz"]
+
+    def exists(self, dataset):
+        return any(os.path.exists(f) for f in self._files(dataset))
+
+    def delete(self, dataset):
+        for f in self._files(dataset):
+            if os.path.exists(f):
+                os.remove(f)
+
+    def load_table(self, table):
+        import numpy
+        filename = self.path(table) + ".npy"
+        if not os.path.exists(filename):
+            raise IOError("Table does not exist: " + table)
+        return numpy.load(filename)
+
+    def save_table(self, table, records):
+        import numpy
+        path = self.path(table)
+        folder = os.path.dirname(path)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder)
+        with open(path + ".npy", "wb") as f:
+            numpy.save(f, records)
+
+    def has_field(self, table, field):
+        return field in self.load_table(table).dtype.names
+
+    # Rows of a table as a structured array, where is a {field: value} filter.
+    # NULLs are held as NaN; null_value replaces them like TableToNumPyArray.
+    def read_table(self, table, fields, where=None, null_value=None):
+        import numpy
+        rows = self.load_table(table)
+        rows = rows[_matches(rows, where)]
+        out = numpy.zeros(len(rows), dtype=[(f, rows.dtype[f]) for f in fields])
+        for field in fields:
+            out[field] = rows[field]
+            if null_value is not None and out.dtype[field].kind == "f":
+                value = null_value.get(field) if isinstance(null_value, dict) else null_value
+                if value is not None:
+                    out[field][numpy.isnan(out[field])] = value
+        return out
+
+    # Append the rows of a structured array or ARD_HEA_Tables.TypedTable, fields
+    # missing from records are NULL
+    def append_rows(self, table, records):
+        import numpy
+        if hasattr(records, "to_array"):
+            records = records.to_array()
+        if not self.exists(table):
+            self.save_table(table, numpy.array(records))
+            return
+        rows = self.load_table(table)
+        new = numpy.zeros(len(records), dtype=rows.dtype)
+        for field in rows.dtype.names:
+            if field in records.dtype.names:
+                new[field] = records[field]
+            elif rows.dtype[field].kind == "f":
+                new[field] = numpy.nan
+        self.save_table(table, numpy.concatenate((rows, new)))
+
+    def delete_rows(self, table, where=None):
+        rows = self.load_table(table)
+        self.save_table(table, rows[~_matches(rows, where)])
+
+    # Update the rows matching where with {field: value}
+    def update_rows(self, table, values, where=None):
+        rows = self.load_table(table)
+        keep = _matches(rows, where)
+        for field, value in values.items():
+            rows[field][keep] = value
+        self.save_table(table, rows)
+
+    def load_grid(self, geoDB):
+        import ARD_HEA_Grid
+        return ARD_HEA_Grid.AnalysisGrid.load(ARD_HEA_Grid.grid_file(geoDB))
+
+    # Filtered samples are a table of X, Y and <STAT_TYPE>_ value fields
+    def read_samples(self, geoDB, COCName):
+        import ARD_HEA_Interpolate
+        fields = ("FILTER_LAYER_NAME", "STAT_TYPE", "AVG_DIST", "MAX_DIST", "LOG_TRANSFORM")
+        rows = self.read_table(geoDB + "\\COC_INVENTORY", fields, {"COC_NAME": COCName})
+        if len(rows) == 0 or not rows["FILTER_LAYER_NAME"][-1]:
+            raise ARD_HEA_Interpolate.nosamples
+        record = dict(zip(fields, rows.tolist()[-1]))
+        filteredFC = geoDB + "\\" + record["FILTER_LAYER_NAME"]
+        if not self.exists(filteredFC):
+            raise ARD_HEA_Interpolate.nosamples
+        samples = self.load_table(filteredFC)
+        prefix = str(record["STAT_TYPE"]).upper() + "_"
+        valueFields = [f for f in samples.dtype.names if f.upper().startswith(prefix)]
+        if not valueFields:
+            raise ARD_HEA_Interpolate.nosamples
+        x, y, values = ARD_HEA_Interpolate.clean_samples(samples["X"], samples["Y"], samples[valueFields[0]])
+        return x, y, values, record
+
+    # A raster registered by reference is replaced too, its SOURCE_ fields are cleared
+    def register_surface(self, geoDB, COCName, layerName, interpType, logTransform):
+        table = geoDB + "\\COC_INVENTORY"
+        values = {"INTERP_LAYER_NAME": layerName, "INTERP_TYPE": interpType,
+                  "LOG_TRANSFORM": "TRUE" if logTransform else "FALSE"}
+        for field in ("SOURCE_PATH", "SOURCE_CHECKSUM"):
+            if self.has_field(table, field):
+                values[field] = ""
+        self.update_rows(table, values, {"COC_NAME": COCName})
+
+    def record_resample(self, geoDB, COCName, method):
+        table = geoDB + "\\COC_INVENTORY"
+        if self.has_field(table, "RESAMPLE_METHOD"):
+            self.update_rows(table, {"RESAMPLE_METHOD": method}, {"COC_NAME": COCName})
+
+    # SCENARIO_INJURY is created by its first append_rows
+    def create_injury_table(self, geoDB):
+        pass
+
+    def raster_source(self, raster):
+        import numpy
+        import ARD_HEA_RasterCache
+        data = numpy.load(self.path(raster) + ".npz")
+        return ARD_HEA_RasterCache.ArraySource(raster, data["values"], float(data["xleft"]), float(data["ytop"]),
+                                               float(data["cellsize"]), nodata=int(data["nodata"]))
+
+    def read_raster(self, geoDB, grid, raster, method="NEAREST"):
+        import ARD_HEA_RasterCache
+        return grid.sample_raster(self.raster_source(raster), ARD_HEA_RasterCache.project_cache(geoDB), method)
+
+    # Save grid shaped values the way write_raster stores them (float32 or int32)
+    def write_raster(self, geoDB, grid, values, raster):
+        import numpy
+        import ARD_HEA_Grid
+        import ARD_HEA_RasterCache
+        ARD_HEA_RasterCache.project_cache(geoDB).invalidate(raster)
+        self.delete(raster)
+        values = numpy.asarray(values).reshape(grid.shape)
+        if values.dtype.kind == "f":
+            values = numpy.where(numpy.isnan(values), ARD_HEA_Grid.NODATA, values).astype(numpy.float32)
+        else:
+            values = values.astype(numpy.int32)
+        path = self.path(raster)
+        with open(path + ".npz", "wb") as f:
+            numpy.savez(f, values=values, xleft=grid.xmin, ytop=grid.ymax, cellsize=grid.cellsize,
+                        nodata=ARD_HEA_Grid.NODATA)
+        return raster
+
+
+# Rows of a structured array matching a {field: value} filter
+def _matches(rows, where):
+    import numpy
+    keep = numpy.ones(len(rows), dtype=bool)
+    for field, value in (where or {}).items():
+        keep &= rows[field] == value
+    return keep
+
+
+BACKENDS = {"arcpy": ArcpyBackend, "local": LocalBackend}
+
+
+def arcpy_available():
+    try:
+        import arcpy
+    except ImportError:
+        return False
+    return True
+
+
+def get_backend(name=None):
+    name = name or os.environ.get("HEA_BACKEND")
+    if not name:
+        name = "arcpy" if arcpy_available() else "local"
+    return BACKENDS[name.lower()]()
@@ -0,0 +1,383 @@
+# ---------------------------------------------------------------------------
+# NAME: ARD_HEA_Benchmark.py
+# Version: 2.0 (ArcGIS 10.2)
+# Author: Research Planning, Inc.
+#
+# Usage: import ARD_HEA_Benchmark
+#        results = ARD_HEA_Benchmark.run_benchmarks([{"cells": 10000}, {"cells": 40000}], "v2.0")
+#        for line in ARD_HEA_Benchmark.report(results):
+#            print(line)
+#
+# Description: Synthetic project benchmarks for the HEA stages.  make_project builds
+#              an analysis geodatabase with the CreateAnalysisDatabase schema, a grid
+#              of the requested number of cells, filtered samples for each COC, injury
+#              thresholds for each scenario, habitat polygons of the requested number
+#              of vertices and a HEA results table.  BenchmarkPipeline runs the
+#              product pipeline stages unchanged on the local backend; the tool script
+#              stages (LoadSiteAttributes spatial join, ImportAnalysisResults scenario
+#              import) need ArcGIS, so they are emulated in NumPy and their records are
+#              flagged as emulated.  The ARD_HEA_Metrics records of every stage are
+#              kept per scale point.
+#
+# Notes:  Scale points are dictionaries of cells, cocs, samples, scenarios and
+#         vertices, missing keys take the DEFAULTS.  Results carry a label (the tool
+#         version or branch being measured) so scaling curves from different
+#         versions can be compared from one results file.
+#
+# Date Created: October 19, 2026
+#
+# ---------------------------------------------------------------------------
+
+import os
+import math
+import json
+import shutil
+import tempfile
+import numpy
+try:
+    from ConfigParser import RawConfigParser
+except ImportError:
+    from configparser import RawConfigParser
+import ARD_HEA_Backend
+import ARD_HEA_Grid
+import ARD_HEA_Pipeline
+import ARD_HEA_Thresholds
+
+DEFAULTS = {"cells": 10000, "cocs": 2, "samples": 200, "scenarios": 3, "vertices": 50}
+PARAMETERS = ("cells", "cocs", "samples", "scenarios", "vertices")
+
+CELL_SIZE = 10.0
+HABITATS = ("MARSH", "MUDFLAT", "CHANNEL", "UPLAND")
+POLYGONS = 8
+YEARS = 5
+PERCENTS = (0, 10, 25, 50, 75, 100)
+QUANTILES = (0.2, 0.4, 0.6, 0.8, 0.95)
+
+# Table layouts from CreateAnalysisDatabase, NULLABLE numbers held as float for NaN
+COC_DATA = [("GRID_ID", numpy.int32), ("COC_NAME", "U20"), ("COC_VALUE", numpy.float64),
+            ("FOOTPRINT_ID", numpy.float64)]
+COC_INVENTORY = [("COC_NAME", "U20"), ("COC_UNITS", "U20"), ("COC_XML", "U600"), ("COC_NOTES", "U20"),
+                 ("INPUT_LAYER_NAME", "U50"), ("FILTER_LAYER_NAME", "U50"), ("STAT_TYPE", "U20"),
+                 ("LOG_TRANSFORM", "U5"), ("MIN_DIST", numpy.float64), ("AVG_DIST", numpy.float64),
+                 ("MAX_DIST", numpy.float64), ("INTERP_LAYER_NAME", "U50"), ("INTERP_TYPE", "U5"),
+                 ("SOURCE_PATH", "U255"), ("SOURCE_CHECKSUM", "U40"), ("RESAMPLE_METHOD", "U10")]
+SITE_ATTRIBUTES = [("GRID_ID", numpy.int32), ("HABITAT_ID", "U50"), ("CONDITION_ID", "U2"),
+                   ("REMEDIATION_ID", "U50"), ("SUBSITE_ID", "U50"), ("DEPTH_ID", "U20")]
+FOOTPRINTS = [("GRID_ID", numpy.int32), ("SCENARIO_ID", numpy.int16), ("COC_NAME", "U20"),
+              ("FOOTPRINT_ID", numpy.float64)]
+PROJECT_ATTRIBUTES = [("CELL_SIZE", numpy.int16), ("TOTAL_CELLS", numpy.int32), ("UNITS", "U10"),
+                      ("ANALYST", "U50")]
+RESULTS = [("Grid_ID", numpy.int32), ("Scenario_ID", numpy.int16), ("ExpYear", numpy.int16),
+           ("DSAY_Injury", numpy.float64)]
+RESULTS_TABLE = "ANALYSIS_DSAY_By_Grid_Year"
+
+
+def scale_point(**kwargs):
+    point = dict(DEFAULTS)
+    point.update((k, int(v)) for k, v in kwargs.items() if v is not None)
+    return point
+
+
+def _empty(fields):
+    return numpy.zeros(0, dtype=fields)
+
+
+# Polygon outline with vertices points around (cx, cy), radius varying by up to jitter
+def star_polygon(rs, cx, cy, radius, vertices, jitter=0.4):
+    angles = numpy.sort(rs.uniform(0, 2 * math.pi, vertices))
+    radii = radius * (1 - jitter * rs.rand(vertices))
+    return cx + radii * numpy.cos(angles), cy + radii * numpy.sin(angles)
+
+
+# Concentration field with a few lognormal hotspots over the grid extent
+def _hotspots(rs, grid, count=4):
+    centres = numpy.column_stack((rs.uniform(grid.xmin, grid.xmax, count), rs.uniform(grid.ymin, grid.ymax, count)))
+    widths = rs.uniform(0.1, 0.3, count) * max(grid.xmax - grid.xmin, grid.ymax - grid.ymin)
+    peaks = rs.lognormal(3, 1, count)
+
+    def field(x, y):
+        out = numpy.full(numpy.shape(x), 0.5)
+        for (cx, cy), width, peak in zip(centres, widths, peaks):
+            out += peak * numpy.exp(-((x - cx) ** 2 + (y - cy) ** 2) / (2 * width ** 2))
+        return out
+    return field
+
+
+# Build a synthetic project in folder, returning the pipeline configuration
+def make_project(folder, point, seed=0, backend=None):
+    backend = backend or ARD_HEA_Backend.LocalBackend()
+    rs = numpy.random.RandomState(seed)
+    geoDB = os.path.join(folder, "Bench_GIS.mdb")
+    resDB = os.path.join(folder, "Thresholds.mdb")
+    heaDB = os.path.join(folder, "Results.mdb")
+    for db in (geoDB, resDB, heaDB):
+        if not os.path.isdir(db):
+            os.makedirs(db)
+
+    # Analysis grid of exactly point["cells"] valid cells
+    cells = point["cells"]
+    ncols = int(math.ceil(math.sqrt(cells)))
+    nrows = int(math.ceil(cells / float(ncols)))
+    mask = numpy.zeros(nrows * ncols, dtype=bool)
+    mask[:cells] = True
+    grid = ARD_HEA_Grid.AnalysisGrid(500000.0, 4000000.0, CELL_SIZE, nrows, ncols, mask=mask)
+    grid.save(ARD_HEA_Grid.grid_file(geoDB))
+
+    table = lambda name: geoDB + "\\" + name
+    project = numpy.zeros(1, dtype=PROJECT_ATTRIBUTES)
+    project[0] = (int(CELL_SIZE), cells, "m", "Benchmark")
+    backend.save_table(table("PROJECT_ATTRIBUTES"), project)
+    backend.save_table(table("COC_DATA"), _empty(COC_DATA))
+    backend.save_table(table("SITE_ATTRIBUTES"), _empty(SITE_ATTRIBUTES))
+    backend.save_table(table("FOOTPRINTS"), _empty(FOOTPRINTS))
+
+    # Filtered samples and injury thresholds for each contaminant
+    COCNames = ["COC" + str(i + 1) for i in range(point["cocs"])]
+    inventory = numpy.zeros(len(COCNames), dtype=COC_INVENTORY)
+    thresholds = numpy.zeros(len(COCNames) * point["scenarios"],
+                             dtype=[("COC_NAME", "U20"), ("Scenario_ID", numpy.int16)] +
+                                   [(f, numpy.float64) for f in ARD_HEA_Thresholds.fields()[2:]])
+    for i, COCName in enumerate(COCNames):
+        field = _hotspots(rs, grid)
+        samples = numpy.zeros(point["samples"], dtype=[("X", numpy.float64), ("Y", numpy.float64),
+                                                      ("MEAN_VALUE", numpy.float64)])
+        samples["X"] = rs.uniform(grid.xmin, grid.xmax, point["samples"])
+        samples["Y"] = rs.uniform(grid.ymin, grid.ymax, point["samples"])
+        samples["MEAN_VALUE"] = field(samples["X"], samples["Y"]) * rs.lognormal(0, 0.2, point["samples"])
+        backend.save_table(table(COCName + "_filtered"), samples)
+        spacing = math.sqrt((grid.xmax - grid.xmin) * (grid.ymax - grid.ymin) / point["samples"])
+        inventory[i] = (COCName, "mg/kg", "", "", COCName, COCName + "_filtered", "MEAN", "FALSE",
+                        spacing / 4, spacing / 2, spacing * 2, "", "", "", "", "")
+        highs = numpy.percentile(samples["MEAN_VALUE"], [q * 100 for q in QUANTILES])
+        for scenario in range(point["scenarios"]):
+            record = thresholds[i * point["scenarios"] + scenario]
+            record["COC_NAME"] = COCName
+            record["Scenario_ID"] = scenario + 1
+            for cat, high in zip(ARD_HEA_Thresholds.CATEGORIES, highs):
+                record["Thres_" + cat + "_High"] = high * (1 + 0.25 * scenario)
+            for cat, perc in zip(ARD_HEA_Thresholds.CATEGORIES, PERCENTS):
+                record["Thres_" + cat + "_Perc"] = perc
+    backend.save_table(table("COC_INVENTORY"), inventory)
+    backend.save_table(resDB + "\\" + ARD_HEA_Pipeline.THRESHOLD_TABLE, thresholds)
+
+    # Habitat polygons, one vertex per row
+    parts = []
+    radius = 0.3 * max(grid.xmax - grid.xmin, grid.ymax - grid.ymin)
+    for fid in range(POLYGONS):
+        x, y = star_polygon(rs, rs.uniform(grid.xmin, grid.xmax), rs.uniform(grid.ymin, grid.ymax), radius,
+                            point["vertices"])
+        part = numpy.zeros(len(x), dtype=[("FID", numpy.int32), ("X", numpy.float64), ("Y", numpy.float64),
+                                          ("HABITAT", "U50")])
+        part["FID"] = fid
+        part["X"] = x
+        part["Y"] = y
+        part["HABITAT"] = HABITATS[fid % len(HABITATS)]
+        parts.append(part)
+    backend.save_table(folder + "\\HABITAT_POLYGONS", numpy.concatenate(parts))
+
+    # HEA results for a fifth of the cells in every scenario and year
+    ids = grid.valid_ids()
+    results = []
+    for scenario in range(point["scenarios"]):
+        injured = numpy.sort(rs.choice(ids, max(1, len(ids) // 5), replace=False))
+        for year in range(YEARS):
+            part = numpy.zeros(len(injured), dtype=RESULTS)
+            part["Grid_ID"] = injured
+            part["Scenario_ID"] = scenario + 1
+            part["ExpYear"] = 2026 + year
+            part["DSAY_Injury"] = rs.exponential(0.01, len(injured))
+            results.append(part)
+    backend.save_table(heaDB + "\\" + RESULTS_TABLE, numpy.concatenate(results))
+
+    config = RawConfigParser()
+    for section in ("project", "interpolate", "load_surfaces", "load_site_attributes", "slice",
+                    "load_footprints", "overlay", "import_results"):
+        config.add_section(section)
+    config.set("project", "geodatabase", geoDB)
+    config.set("project", "threshold_database", resDB)
+    config.set("project", "backend", "local")
+    config.set("interpolate", "contaminants", ", ".join(COCNames))
+    config.set("load_site_attributes", "polygons", folder + "\\HABITAT_POLYGONS")
+    config.set("import_results", "results_database", heaDB)
+    return config
+
+
+# Even-odd test of points against a polygon outline
+def point_in_polygon(px, py, vx, vy):
+    inside = numpy.zeros(len(px), dtype=bool)
+    nx = numpy.roll(vx, -1)
+    ny = numpy.roll(vy, -1)
+    for x0, y0, x1, y1 in zip(vx.tolist(), vy.tolist(), nx.tolist(), ny.tolist()):
+        if y0 == y1:
+            continue
+        crosses = (y0 > py) != (y1 > py)
+        xcross = x0 + (py - y0) * (x1 - x0) / (y1 - y0)
+        inside ^= crosses & (px < xcross)
+    return inside
+
+
+class BenchmarkPipeline(ARD_HEA_Pipeline.Pipeline):
+
+    def __init__(self, config, backend=None):
+        ARD_HEA_Pipeline.Pipeline.__init__(self, config, backend or ARD_HEA_Backend.LocalBackend())
+        self.metrics.tool = "BenchmarkPipeline"
+        # Stage names timed on NumPy emulations instead of the product code
+        self.emulated = set()
+
+    # Tool script stages run their scripts where the backend can, and are otherwise
+    # emulated in NumPy and reported as emulated
+    def run_script(self, stage):
+        if self.backend.name == "arcpy":
+            ARD_HEA_Pipeline.Pipeline.run_script(self, stage)
+            return
+        self.emulated.add(stage)
+        if stage == "load_site_attributes":
+            self.load_site_attributes()
+        elif stage == "import_results":
+            self.import_results()
+        else:
+            raise ARD_HEA_Pipeline.stagefailed(stage + " is not emulated by the benchmark")
+
+    def _emulated_stage(self, name, **counts):
+        self.emulated.add(name)
+        return self.metrics.stage(name, **counts)
+
+    # LoadSiteAttributes: spatial join of the grid points to the habitat polygons
+    def load_site_attributes(self):
+        grid = self.load_grid()
+        polygons = self.backend.load_table(self.option("load_site_attributes", "polygons"))
+        ids = grid.valid_ids()
+        habitat = numpy.full(len(ids), "NA", dtype="U50")
+        with self._emulated_stage("spatial join", rows=len(polygons), cells=grid.total_cells):
+            idx = grid.valid_index()
+            px, py = grid.centers(idx // grid.ncols, idx % grid.ncols)
+            matched = numpy.zeros(len(ids), dtype=bool)
+            for fid in numpy.unique(polygons["FID"]):
+                part = polygons[polygons["FID"] == fid]
+                box = ((px >= part["X"].min()) & (px <= part["X"].max()) &
+                       (py >= part["Y"].min()) & (py <= part["Y"].max()) & ~matched)
+                candidates = numpy.flatnonzero(box)
+                inside = candidates[point_in_polygon(px[candidates], py[candidates], part["X"], part["Y"])]
+                habitat[inside] = part["HABITAT"][0]
+                matched[inside] = True
+        records = numpy.zeros(len(ids), dtype=SITE_ATTRIBUTES)
+        records["GRID_ID"] = ids
+        records["HABITAT_ID"] = habitat
+        for field in ("CONDITION_ID", "REMEDIATION_ID", "SUBSITE_ID", "DEPTH_ID"):
+            records[field] = "NA"
+        with self._emulated_stage("SITE_ATTRIBUTES update", rows=len(records)):
+            self.backend.delete_rows(self.table("SITE_ATTRIBUTES"))
+            self.backend.append_rows(self.table("SITE_ATTRIBUTES"), records)
+
+    # ImportAnalysisResults: sum each scenario's DSAYs onto the grid
+    def import_results(self):
+        grid = self.load_grid()
+        heaDB = self.option("import_results", "results_database")
+        table = heaDB + "\\" + RESULTS_TABLE
+        scenarios = numpy.unique(self.backend.read_table(table, ("Scenario_ID",))["Scenario_ID"])
+        for scen in scenarios.tolist():
+            with self._emulated_stage("scenario import " + str(scen), cells=grid.total_cells) as step:
+                results = self.backend.read_table(table, ("Grid_ID", "DSAY_Injury"), {"Scenario_ID": scen},
+                                                  null_value=0)
+                step.rows = len(results)
+                values = grid.scatter(results["Grid_ID"], results["DSAY_Injury"], "sum")
+                self.backend.write_raster(self.geoDB, grid, values, self.table("SC" + str(scen) + "_DSAY"))
+
+
+# Run one scale point in a scratch folder, returning its stage records
+def run_point(point, label="", seed=0, folder=None, processes=None):
+    scratch = folder or tempfile.mkdtemp(prefix="hea_bench_")
+    try:
+        config = make_project(scratch, point, seed)
+        if processes:
+            config.set("project", "processes", str(processes))
+        pipeline = BenchmarkPipeline(config)
+        pipeline.run()
+        results = []
+        for record in pipeline.metrics.records:
+            record = dict(record)
+            record["label"] = label
+            record["emulated"] = record["stage"] in pipeline.emulated
+            record.update(point)
+            results.append(record)
+        return results
+    finally:
+        if folder is None:
+            import ARD_HEA_RasterCache
+            ARD_HEA_RasterCache.project_cache(os.path.join(scratch, "Bench_GIS.mdb")).close()
+            shutil.rmtree(scratch, True)
+
+
+# Run every scale point, appending the stage records to output as JSON lines
+def run_benchmarks(points, label="", output=None, seed=0, processes=None):
+    results = []
+    for point in points:
+        point = scale_point(**point)
+        records = run_point(point, label, seed, processes=processes)
+        if output:
+            with open(output, "a") as f:
+                for record in records:
+                    f.write(json.dumps(record, sort_keys=True) + "\n")
+        results.extend(records)
+    return results
+
+
+def read_results(filename):
+    with open(filename) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# Column heading of a scale point, naming only the parameters that vary
+def _point_name(key, varying):
+    return " ".join(PARAMETERS[i] + "=" + str(key[i]) for i in varying) or "default"
+
+
+# Scaling table of each stage across scale points and labels.  metric is "seconds",
+# "rows_per_s" or "cells_per_s"; repeated sub-steps of a stage are combined.  Columns
+# are as wide as their longest heading or value, emulated stages are marked with *.
+def report(results, metric="seconds"):
+    totals = {}
+    order = {}
+    emulated = set()
+    for record in results:
+        point = tuple(record[p] for p in PARAMETERS)
+        key = (record["label"], point, record["stage"])
+        total = totals.setdefault(key, {"seconds": 0.0, "rows": 0, "cells": 0})
+        total["seconds"] += record["seconds"]
+        total["rows"] += record["rows"] or 0
+        total["cells"] += record["cells"] or 0
+        order.setdefault(record["stage"], (record["depth"], record["order"]))
+        if record.get("emulated"):
+            emulated.add(record["stage"])
+    labels = sorted(set(key[0] for key in totals))
+    points = sorted(set(key[1] for key in totals))
+    varying = [i for i in range(len(PARAMETERS)) if len(set(p[i] for p in points)) > 1]
+    headings = [_point_name(p, varying) for p in points]
+    stages = sorted(order, key=lambda s: order[s][1])
+    names = dict((stage, "  " * order[stage][0] + stage + (" *" if stage in emulated else "")) for stage in stages)
+    lines = []
+    for label in labels:
+        rows = []
+        for stage in stages:
+            cols = []
+            for point in points:
+                total = totals.get((label, point, stage))
+                if total is None:
+                    cols.append("-")
+                elif metric == "seconds":
+                    cols.append("%.3f" % total["seconds"])
+                else:
+                    count = total["rows" if metric == "rows_per_s" else "cells"]
+                    cols.append("%.0f" % (count / total["seconds"]) if count and total["seconds"] > 0 else "-")
+            rows.append((names[stage], cols))
+        nameWidth = max([len("Stage")] + [len(name) for name, cols in rows])
+        widths = [max([len(heading)] + [len(cols[i]) for name, cols in rows]) for i, heading in enumerate(headings)]
+        lines.append("")
+        lines.append(metric + (" (" + label + ")" if label else ""))
+        lines.append("Stage".ljust(nameWidth) + "".join("  " + h.rjust(w) for h, w in zip(headings, widths)))
+        for name, cols in rows:
+            lines.append(name.ljust(nameWidth) + "".join("  " + c.rjust(w) for c, w in zip(cols, widths)))
+    if emulated:
+        lines.append("")
+        lines.append("* emulated in NumPy on the local backend, not the tool script")
+    return lines
@@ -0,0 +1,139 @@
+# ---------------------------------------------------------------------------
+# NAME: ARD_HEA_Blobs.py
+# Version: 2.0 (ArcGIS 10.2)
+# Author: Research Planning, Inc.
+#
+# Usage: import ARD_HEA_Blobs
+#        row.COC_QMDOC = ARD_HEA_Blobs.put(geoDB, qmText)
+#        qmText = ARD_HEA_Blobs.get(geoDB, row.COC_QMDOC)
+#        ARD_HEA_Blobs.expand(geoDB)
+#
+# Description: Content addressed store for the large documentation texts (the
+#              PROJECT_ATTRIBUTES SITE_*_DOC fields and COC_INVENTORY.COC_QMDOC).
+#              Each distinct document is compressed and kept once in the DOC_BLOBS
+#              table under the SHA-1 of its text; the documentation fields hold a
+#              short "BLOB:" reference that is only resolved when a document is read.
+#
+# Notes:  The external Access model and other readers read the documentation fields
+#         directly, so the store is only used when HEA_DOC_BLOBS=1.  Otherwise put()
+#         returns the text itself and expand() writes the text back over references
+#         left by runs that used the store.  get() returns values that are not
+#         references unchanged.  Documents read in a process are kept in memory.
+#
+# Date Created: October 19, 2026
+#
+# ---------------------------------------------------------------------------
+
+import os
+import zlib
+import hashlib
+
+PREFIX = "BLOB:"
+BLOBS_TABLE = "DOC_BLOBS"
+
+# Documentation fields that may hold references
+DOC_FIELDS = (("PROJECT_ATTRIBUTES", ("SITE_HABITAT_DOC", "SITE_CONDITION_DOC", "SITE_REMEDIATION_DOC",
+                                      "SITE_SUBSITE_DOC", "SITE_DEPTH_DOC")),
+              ("COC_INVENTORY", ("COC_QMDOC",)))
+
+# Geodatabases whose blob table is known to exist, and documents read so far
+_ready = set()
+_loaded = {}
+
+
+def _bytes(text):
+    if isinstance(text, bytes):
+        return text
+    return text.encode("utf-8")
+
+
+def blob_id(text):
+    return hashlib.sha1(_bytes(text)).hexdigest()
+
+
+def is_reference(value):
+    return value is not None and str(value).startswith(PREFIX)
+
+
+def use_blobs():
+    return os.environ.get("HEA_DOC_BLOBS", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def create_table(geoDB):
+    import arcpy
+    table = geoDB + "\\" + BLOBS_TABLE
+    if not arcpy.Exists(table):
+        arcpy.CreateTable_management(geoDB, BLOBS_TABLE, "", "")
+        arcpy.AddField_management(table, "BLOB_ID", "TEXT", "", "", "40", "", "NON_NULLABLE", "REQUIRED", "")
+        arcpy.AddField_management(table, "BLOB_SIZE", "LONG", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
+        arcpy.AddField_management(table, "BLOB_DATA", "BLOB", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
+        arcpy.AddIndex_management(table, "BLOB_ID", "DBLB_BID_IDX", "UNIQUE", "NON_ASCENDING")
+    _ready.add(geoDB)
+
+
+def _where(table, blobID):
+    import arcpy
+    return arcpy.AddFieldDelimiters(table, "BLOB_ID") + " = '" + blobID + "'"
+
+
+# Store a document once and return its reference, the text itself when the store
+# is not used.  None stays None.
+def put(geoDB, text):
+    import arcpy
+    if text is None or not use_blobs():
+        return text
+    if geoDB not in _ready:
+        create_table(geoDB)
+    data = _bytes(text)
+    blobID = blob_id(data)
+    table = geoDB + "\\" + BLOBS_TABLE
+    with arcpy.da.SearchCursor(table, ("BLOB_ID",), _where(table, blobID)) as cursor:
+        stored = any(True for row in cursor)
+    if not stored:
+        with arcpy.da.InsertCursor(table, ("BLOB_ID", "BLOB_SIZE", "BLOB_DATA")) as cursor:
+            cursor.insertRow((blobID, len(data), bytearray(zlib.compress(data, 9))))
+    _loaded[(geoDB, blobID)] = text
+    return PREFIX + blobID
+
+
+# Text of a documentation field value, read from the store when it is a reference
+def get(geoDB, value):
+    import arcpy
+    if not is_reference(value):
+        return value
+    blobID = str(value)[len(PREFIX):]
+    key = (geoDB, blobID)
+    if key not in _loaded:
+        table = geoDB + "\\" + BLOBS_TABLE
+        text = None
+        with arcpy.da.SearchCursor(table, ("BLOB_DATA",), _where(table, blobID)) as cursor:
+            for row in cursor:
+                text = zlib.decompress(bytes(bytearray(row[0])))
+        if text is not None and not isinstance(text, str):
+            text = text.decode("utf-8")
+        _loaded[key] = text
+    return _loaded[key]
+
+
+# Replace the references in the documentation fields with their text, unless the
+# store is used.  Returns the number of fields rewritten.
+def expand(geoDB):
+    import arcpy
+    if use_blobs() or not arcpy.Exists(geoDB + "\\" + BLOBS_TABLE):
+        return 0
+    expanded = 0
+    for name, fields in DOC_FIELDS:
+        table = geoDB + "\\" + name
+        if not arcpy.Exists(table):
+            continue
+        fields = [field for field in fields if arcpy.ListFields(table, field)]
+        if not fields:
+            continue
+        with arcpy.da.UpdateCursor(table, fields) as cursor:
+            for row in cursor:
+                values = [get(geoDB, value) for value in row]
+                changed = sum(1 for old, new in zip(row, values) if new is not old)
+                if changed:
+                    cursor.updateRow(values)
+                    expanded += changed
+    return expanded
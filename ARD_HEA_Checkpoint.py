@@ -0,0 +1,136 @@
+# ---------------------------------------------------------------------------
+# NAME: ARD_HEA_Checkpoint.py
+# Version: 2.0 (ArcGIS 10.2)
+# Author: Research Planning, Inc.
+#
+# Usage: import ARD_HEA_Checkpoint
+#        checkpoints = ARD_HEA_Checkpoint.project_checkpoints(geoDB, "SliceContaminantSurface", exists=arcpy.Exists)
+#        sig = ARD_HEA_Checkpoint.signature(record, surfaceSignature)
+#        if not checkpoints.done((COCName, scenario), sig):
+#            ...
+#            checkpoints.complete((COCName, scenario), sig, (outRaster, outPolygon))
+#
+# Description: Durable per unit checkpoints for the long tool loops (one unit per
+#              scenario in ImportAnalysisResults, per contaminant and scenario in
+#              SliceContaminantSurface).  Each completed unit is appended to a JSON
+#              lines file with a signature of its inputs and the outputs it wrote, and
+#              flushed to disk before the loop moves on.  A rerun skips every unit
+#              whose signature is unchanged and whose outputs still exist, so a run
+#              that fails part way resumes at the first incomplete unit.
+#
+# Notes:  Checkpoint files are kept in a <geodatabase>_CHECKPOINTS folder next to the
+#         analysis geodatabase, one per tool.  Verifying a unit only compares its
+#         signature and checks its outputs exist.  A torn last line from a crash is
+#         ignored.  restart=True discards the checkpoints of the tool.
+#
+# Date Created: October 19, 2026
+#
+# ---------------------------------------------------------------------------
+
+import os
+import json
+import hashlib
+
+
+class badmode(Exception):
+    pass
+
+
+def checkpoint_folder(geoDB):
+    return os.path.splitext(geoDB)[0] + "_CHECKPOINTS"
+
+
+def checkpoint_file(geoDB, tool):
+    return os.path.join(checkpoint_folder(geoDB), tool + ".jsonl")
+
+
+# SHA-1 of JSON serializable input values
+def signature(*values):
+    return hashlib.sha1(json.dumps(values, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+# Cheap change stamp of a file or folder dataset (such as a personal or file
+# geodatabase): the size and latest modification time of its files
+def stamp(path):
+    path = str(path).strip("'")
+    if os.path.isfile(path):
+        return [os.path.getsize(path), os.path.getmtime(path)]
+    size, mtime = 0, 0.0
+    for root, dirs, files in os.walk(path):
+        for name in files:
+            filename = os.path.join(root, name)
+            try:
+                size += os.path.getsize(filename)
+                mtime = max(mtime, os.path.getmtime(filename))
+            except OSError:
+                pass
+    return [size, mtime]
+
+
+class Checkpoints(object):
+
+    def __init__(self, filename, exists=None, restart=False):
+        self.filename = filename
+        self.exists = exists or os.path.exists
+        self.units = {}
+        folder = os.path.dirname(filename)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder)
+        if restart:
+            self.reset()
+        elif os.path.exists(filename):
+            torn = False
+            with open(filename, "r") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        torn = True
+                        continue
+                    self.units[self._key(entry["unit"])] = entry
+            # Rewrite without the torn lines so appends start on a new line
+            if torn:
+                with open(filename, "w") as f:
+                    for entry in self.units.values():
+                        f.write(json.dumps(entry) + "\n")
+
+    @staticmethod
+    def _key(unit):
+        return json.dumps(list(unit) if isinstance(unit, (list, tuple)) else [unit])
+
+    # True when unit completed with the same signature and its outputs still exist
+    def done(self, unit, sig):
+        entry = self.units.get(self._key(unit))
+        if entry is None or entry["signature"] != sig:
+            return False
+        return all(self.exists(artifact) for artifact in entry["artifacts"])
+
+    def artifacts(self, unit):
+        entry = self.units.get(self._key(unit))
+        return list(entry["artifacts"]) if entry else []
+
+    def complete(self, unit, sig, artifacts=()):
+        entry = {"unit": list(unit) if isinstance(unit, (list, tuple)) else [unit], "signature": sig,
+                 "artifacts": [str(a) for a in artifacts]}
+        self.units[self._key(unit)] = entry
+        with open(self.filename, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def reset(self):
+        self.units = {}
+        if os.path.exists(self.filename):
+            os.remove(self.filename)
+
+
+def project_checkpoints(geoDB, tool, restart=False, exists=None):
+    return Checkpoints(checkpoint_file(geoDB, tool), exists, restart)
+
+
+# RESUME (default) or RESTART from a tool argument, True to restart
+def restart_mode(value):
+    mode = str(value or "RESUME").strip().upper()
+    if mode not in ("RESUME", "RESTART", "#", ""):
+        raise badmode("Unknown checkpoint mode " + str(value) + ", use RESUME or RESTART")
+    return mode == "RESTART"
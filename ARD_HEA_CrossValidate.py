@@ -0,0 +1,225 @@
+# ---------------------------------------------------------------------------
+# NAME: ARD_HEA_CrossValidate.py
+# Version: 2.0 (ArcGIS 10.2)
+# Author: Research Planning, Inc.
+#
+# Usage: import ARD_HEA_CrossValidate
+#        settings = ARD_HEA_CrossValidate.settings_grid(("IDW", "OK"), powers=(1, 2, 3), neighbors=(8, 12, 16))
+#        results = ARD_HEA_CrossValidate.cross_validate(x, y, values, settings, folds=0)
+#
+# Description: Leave-one-out or k-fold cross-validation of interpolation settings over
+#              the filtered samples of a contaminant.  One KD-tree is built over all of
+#              the samples and every held-out sample is predicted from its nearest
+#              neighbours outside its own fold, for every setting in turn.  Held-out
+#              samples are split into chunks run across a process pool.  RMSE, bias
+#              and log scale RMSE are reported for each setting and the winning
+#              setting is stored with the contaminant's COC_INVENTORY record.
+#
+# Notes:  Kriging settings use one variogram fitted to all samples, as is usual for
+#         kriging cross-validation.  Log scale errors use the same log transform as
+#         the interpolators.
+#
+# Date Created: October 19, 2026
+#
+# ---------------------------------------------------------------------------
+
+import numpy
+from scipy.spatial import cKDTree
+import ARD_HEA_Parallel
+import ARD_HEA_Interpolate
+import ARD_HEA_Kriging
+
+# Per-process cross-validation state set up by the pool initializer
+_state = {}
+
+
+# Every combination of the requested interpolation settings
+def settings_grid(methods=("IDW",), powers=(2.0,), neighbors=(12,), radius=None, models=("AUTO",),
+                  logTransforms=(False,)):
+    settings = []
+    for logTransform in logTransforms:
+        for method in methods:
+            method = str(method).upper()
+            for k in neighbors:
+                if method == "IDW":
+                    for power in powers:
+                        settings.append({"method": "IDW", "power": float(power), "neighbors": int(k),
+                                         "radius": radius, "logTransform": bool(logTransform)})
+                elif method == "OK":
+                    for model in models:
+                        settings.append({"method": "OK", "model": str(model).upper(), "neighbors": int(k),
+                                         "radius": radius, "logTransform": bool(logTransform)})
+    return settings
+
+
+# Short description of a setting, as stored in COC_INVENTORY
+def label(setting):
+    text = setting["method"]
+    if setting["method"] == "IDW":
+        text += " P%g" % setting["power"]
+    else:
+        text += " " + setting.get("fitted", setting["model"])
+    text += " K%d" % setting["neighbors"]
+    if setting.get("radius"):
+        text += " R%g" % setting["radius"]
+    if setting["logTransform"]:
+        text += " LOG"
+    return text
+
+
+# Fold number of each sample, each sample is its own fold for leave-one-out
+def assign_folds(n, folds=0, seed=0):
+    if folds is None or folds <= 1 or folds >= n:
+        return numpy.arange(n)
+    return numpy.random.RandomState(seed).permutation(n) % int(folds)
+
+
+# Nearest neighbours of samples that lie outside the sample's own fold
+def fold_neighbors(tree, fold, points, neighbors, radius=None):
+    target = min(int(neighbors), tree.n)
+    px = tree.data[points, 0]
+    py = tree.data[points, 1]
+    pfold = fold[points]
+    dist = numpy.full((len(points), target), numpy.inf)
+    idx = numpy.zeros((len(points), target), dtype=numpy.int64)
+    todo = numpy.arange(len(points))
+    kq = min(tree.n, target + 1)
+    while len(todo):
+        d, i = ARD_HEA_Interpolate.query_neighbors(tree, px[todo], py[todo], kq, radius)
+        ok = numpy.isfinite(d) & (fold[i] != pfold[todo][:, None])
+        exhausted = (kq >= tree.n) | ~numpy.isfinite(d[:, -1])
+        done = (ok.sum(axis=1) >= target) | exhausted
+        order = numpy.argsort(~ok[done], axis=1, kind="mergesort")[:, :target]
+        rows = numpy.arange(order.shape[0])[:, None]
+        keep = ok[done][rows, order]
+        dist[todo[done], :order.shape[1]] = numpy.where(keep, d[done][rows, order], numpy.inf)
+        idx[todo[done], :order.shape[1]] = numpy.where(keep, i[done][rows, order], 0)
+        todo = todo[~done]
+        kq = min(tree.n, kq * 2)
+    return dist, idx
+
+
+def _init_cv(x, y, values, fold, settings):
+    _state["tree"] = cKDTree(numpy.column_stack((x, y)))
+    _state["values"] = values
+    _state["logValues"] = ARD_HEA_Interpolate.log_transform(values)
+    _state["fold"] = fold
+    _state["settings"] = settings
+
+
+def _cv_chunk(points):
+    tree = _state["tree"]
+    settings = _state["settings"]
+    out = numpy.full((len(settings), len(points)), numpy.nan)
+    neighborhoods = {}
+    for n, setting in enumerate(settings):
+        key = (setting["neighbors"], setting["radius"])
+        if key not in neighborhoods:
+            neighborhoods[key] = fold_neighbors(tree, _state["fold"], points, setting["neighbors"], setting["radius"])
+        dist, idx = neighborhoods[key]
+        values = _state["logValues"] if setting["logTransform"] else _state["values"]
+        if setting["method"] == "IDW":
+            est = ARD_HEA_Interpolate.idw_estimate(dist, idx, values, setting["power"])
+        else:
+            variogram = ARD_HEA_Kriging.Variogram(*setting["variogram"])
+            est = ARD_HEA_Kriging.krige_estimate(tree.data, values, variogram, dist, idx)[0]
+        if setting["logTransform"]:
+            est = ARD_HEA_Interpolate.back_transform(est)
+        out[n] = est
+    return out
+
+
+# RMSE, bias and log scale RMSE of predictions against observed values
+def scores(observed, predicted):
+    ok = numpy.isfinite(predicted)
+    if not ok.any():
+        return {"rmse": numpy.nan, "bias": numpy.nan, "logRmse": numpy.nan, "count": 0}
+    error = predicted[ok] - observed[ok]
+    logError = ARD_HEA_Interpolate.log_transform(predicted[ok]) - ARD_HEA_Interpolate.log_transform(observed[ok])
+    return {"rmse": float(numpy.sqrt(numpy.mean(error ** 2))),
+            "bias": float(numpy.mean(error)),
+            "logRmse": float(numpy.sqrt(numpy.mean(logError ** 2))),
+            "count": int(ok.sum())}
+
+
+# Cross-validate every setting, returning result dictionaries ordered best (lowest RMSE) first
+def cross_validate(x, y, values, settings, folds=0, lagSize=None, maxDist=None, chunk=2048, processes=None, seed=0):
+    x, y, values = ARD_HEA_Interpolate.clean_samples(x, y, values)
+    if len(values) < 2:
+        raise ARD_HEA_Interpolate.nosamples
+    settings = [dict(setting) for setting in settings]
+    variograms = {}
+    for setting in settings:
+        if setting["method"] == "OK":
+            key = (setting["model"], setting["logTransform"])
+            if key not in variograms:
+                fitValues = ARD_HEA_Interpolate.log_transform(values) if setting["logTransform"] else values
+                variograms[key] = ARD_HEA_Kriging.fit_variogram(x, y, fitValues, lagSize, maxDist, model=setting["model"])
+            setting["variogram"] = variograms[key].params()
+            setting["fitted"] = variograms[key].model
+    fold = assign_folds(len(values), folds, seed)
+    points = numpy.arange(len(values))
+    chunks = [points[start:stop] for start, stop in ARD_HEA_Parallel.chunk_ranges(len(points), chunk)]
+    parts = ARD_HEA_Parallel.map_chunks(_cv_chunk, chunks, processes, _init_cv, (x, y, values, fold, settings))
+    predicted = numpy.concatenate(parts, axis=1)
+    results = []
+    for n, setting in enumerate(settings):
+        result = scores(values, predicted[n])
+        result["setting"] = setting
+        result["label"] = label(setting)
+        results.append(result)
+    results.sort(key=lambda r: (numpy.isnan(r["rmse"]), r["rmse"]))
+    return results
+
+
+# Add the cross-validation fields and table to geodatabases created before they existed
+def ensure_schema(geoDB):
+    import arcpy
+    COCInvent = geoDB + "\\COC_INVENTORY"
+    CVTable = geoDB + "\\COC_CROSSVALIDATION"
+    fieldNames = [fld.name.upper() for fld in arcpy.ListFields(COCInvent)]
+    if "CV_SETTINGS" not in fieldNames:
+        arcpy.AddField_management(COCInvent, "CV_SETTINGS", "TEXT", "", "", "100", "", "NULLABLE", "NON_REQUIRED", "")
+        arcpy.AddField_management(COCInvent, "CV_RMSE", "FLOAT", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
+        arcpy.AddField_management(COCInvent, "CV_BIAS", "FLOAT", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
+        arcpy.AddField_management(COCInvent, "CV_LOG_RMSE", "FLOAT", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
+    if arcpy.Exists(CVTable) == False:
+        arcpy.CreateTable_management(geoDB, "COC_CROSSVALIDATION", "", "")
+        arcpy.AddField_management(CVTable, "COC_NAME", "TEXT", "", "", "20", "", "NON_NULLABLE", "REQUIRED", "")
+        arcpy.AddField_management(CVTable, "CV_RANK", "SHORT", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
+        arcpy.AddField_management(CVTable, "CV_SETTINGS", "TEXT", "", "", "100", "", "NULLABLE", "NON_REQUIRED", "")
+        arcpy.AddField_management(CVTable, "CV_FOLDS", "LONG", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
+        arcpy.AddField_management(CVTable, "CV_COUNT", "LONG", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
+        arcpy.AddField_management(CVTable, "CV_RMSE", "FLOAT", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
+        arcpy.AddField_management(CVTable, "CV_BIAS", "FLOAT", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
+        arcpy.AddField_management(CVTable, "CV_LOG_RMSE", "FLOAT", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
+        arcpy.AddIndex_management(CVTable, "COC_NAME", "CCV_NAM_IDX", "NON_UNIQUE", "NON_ASCENDING")
+
+
+def _nullable(value):
+    if value is None or value != value:
+        return None
+    return value
+
+
+# Store the winning setting in COC_INVENTORY and every setting's scores in COC_CROSSVALIDATION
+def store_results(geoDB, COCName, results, folds):
+    import arcpy
+    ensure_schema(geoDB)
+    where = "[COC_NAME] = '" + COCName + "'"
+    best = results[0]
+    fields = ("CV_SETTINGS", "CV_RMSE", "CV_BIAS", "CV_LOG_RMSE")
+    with arcpy.da.UpdateCursor(geoDB + "\\COC_INVENTORY", fields, where) as cursor:
+        for row in cursor:
+            cursor.updateRow((best["label"], _nullable(best["rmse"]), _nullable(best["bias"]),
+                              _nullable(best["logRmse"])))
+    CVTable = geoDB + "\\COC_CROSSVALIDATION"
+    with arcpy.da.UpdateCursor(CVTable, ("COC_NAME",), where) as cursor:
+        for row in cursor:
+            cursor.deleteRow()
+    fields = ("COC_NAME", "CV_RANK", "CV_SETTINGS", "CV_FOLDS", "CV_COUNT", "CV_RMSE", "CV_BIAS", "CV_LOG_RMSE")
+    with arcpy.da.InsertCursor(CVTable, fields) as cursor:
+        for rank, result in enumerate(results):
+            cursor.insertRow((COCName, rank + 1, result["label"], int(folds), result["count"],
+                              _nullable(result["rmse"]), _nullable(result["bias"]),
+                              _nullable(result["logRmse"])))
@@ -0,0 +1,232 @@
+# ---------------------------------------------------------------------------
+# NAME: ARD_HEA_DSAYCube.py
+# Version: 2.0 (ArcGIS 10.2)
+# Author: Research Planning, Inc.
+#
+# Usage: import ARD_HEA_DSAYCube
+#        cube = ARD_HEA_DSAYCube.build(geoDB, grid, resDB + "\\ANALYSIS_DSAY_By_Grid_Year")
+#        cube = ARD_HEA_DSAYCube.DSAYCube(ARD_HEA_DSAYCube.cube_folder(geoDB), grid)
+#        values = cube.time_slice("DSAY_Injury", 1, 2030)
+#        years, values = cube.trajectory("DSAY_Injury", 1, gridID)
+#        values = cube.cumulative("DSAY_Injury", 1, 2030)
+#
+# Description: Per year DSAY cube of the HEA results.  ANALYSIS_DSAY_By_Grid_Year is
+#              read once, in chunks of rows, into memory-mapped float32 grids, one
+#              file per result field, scenario and year, so the cube is the chunked
+#              equivalent of a [scenario, year, row, col] array.  Time slices,
+#              per-cell trajectories and cumulative-to-year totals are then read from
+#              the files without querying the results table again.
+#
+# Notes:  The cube is kept in a <geodatabase>_DSAY_CUBE folder next to the analysis
+#         geodatabase with an index.json describing its scenarios, years and fields.
+#         Building with a list of scenarios replaces only those scenarios.  Cells
+#         without a result row hold 0.  At most OPEN_FILES grid files are kept open
+#         while building or reading a cube; the least recently used one is flushed
+#         and closed first.
+#
+# Date Created: October 19, 2026
+#
+# ---------------------------------------------------------------------------
+
+import os
+import json
+import collections
+import numpy
+
+FIELDS = ("DSAY_Injury", "SAY_Injury")
+RESULTS_TABLE = "ANALYSIS_DSAY_By_Grid_Year"
+CHUNK_ROWS = 250000
+OPEN_FILES = 32
+
+# Scenario and year are combined into one key, Scenario_ID * YEAR_KEY + ExpYear
+YEAR_KEY = 100000
+
+
+class nocube(Exception):
+    pass
+
+
+def cube_folder(geoDB):
+    return os.path.splitext(geoDB)[0] + "_DSAY_CUBE"
+
+
+def _chunk_file(folder, field, scenario, year):
+    return os.path.join(folder, field + "_SC" + str(int(scenario)) + "_" + str(int(year)) + ".f32")
+
+
+# Memory-mapped grid files of a cube, keyed by (field, scenario, year), keeping
+# the most recently used maxOpen files open.  Read only grids ("r" mode) are None
+# for files that do not exist.
+class OpenGrids(object):
+
+    def __init__(self, folder, shape, maxOpen=OPEN_FILES, mode="r+"):
+        self.folder = folder
+        self.shape = shape
+        self.maxOpen = maxOpen
+        self.mode = mode
+        self.grids = collections.OrderedDict()
+
+    def _release(self):
+        data = self.grids.popitem(last=False)[1]
+        if self.mode != "r":
+            data.flush()
+
+    def get(self, fileKey):
+        if fileKey in self.grids:
+            data = self.grids.pop(fileKey)
+        else:
+            filename = _chunk_file(self.folder, *fileKey)
+            if self.mode == "r" and not os.path.exists(filename):
+                return None
+            while len(self.grids) >= self.maxOpen:
+                self._release()
+            if self.mode == "r":
+                data = numpy.memmap(filename, numpy.float32, "r", shape=self.shape)
+            else:
+                data = numpy.memmap(filename, numpy.float32, "r+" if os.path.exists(filename) else "w+",
+                                    shape=self.shape)
+        self.grids[fileKey] = data
+        return data
+
+    def close(self):
+        while self.grids:
+            self._release()
+
+
+class DSAYCube(object):
+
+    def __init__(self, folder, grid):
+        self.folder = folder
+        self.grid = grid
+        filename = os.path.join(folder, "index.json")
+        if not os.path.exists(filename):
+            raise nocube("No DSAY cube in " + folder)
+        with open(filename, "r") as f:
+            info = json.load(f)
+        if tuple(info["shape"]) != tuple(grid.shape):
+            raise nocube("DSAY cube " + folder + " does not match the analysis grid, rebuild it")
+        self.fields = [str(f) for f in info["fields"]]
+        # {scenario: [years]}
+        self.years = dict((int(s), sorted(int(y) for y in years)) for s, years in info["years"].items())
+        self.opened = OpenGrids(folder, self.grid.shape, OPEN_FILES, "r")
+
+    @property
+    def scenarios(self):
+        return sorted(self.years)
+
+    def _open(self, field, scenario, year):
+        return self.opened.get((field, int(scenario), int(year)))
+
+    def _check(self, field, scenario):
+        if field not in self.fields:
+            raise nocube("Field " + field + " is not in the DSAY cube")
+        if int(scenario) not in self.years:
+            raise nocube("Scenario " + str(scenario) + " is not in the DSAY cube")
+
+    # Grid of one scenario and year
+    def time_slice(self, field, scenario, year):
+        self._check(field, scenario)
+        data = self._open(field, scenario, year)
+        if data is None:
+            return numpy.zeros(self.grid.shape, dtype=numpy.float32)
+        return numpy.array(data)
+
+    # Years of a scenario and the values of GRID_IDs in each year, shape
+    # (years,) for one GRID_ID or (years, n) for a list
+    def trajectory(self, field, scenario, gridID):
+        self._check(field, scenario)
+        idx = self.grid.index(gridID)
+        years = self.years[int(scenario)]
+        out = numpy.zeros((len(years),) + numpy.shape(idx), dtype=numpy.float32)
+        for i, year in enumerate(years):
+            data = self._open(field, scenario, year)
+            if data is not None:
+                out[i] = numpy.where(idx >= 0, data.reshape(-1)[numpy.maximum(idx, 0)], 0)
+        return numpy.array(years), out
+
+    # Sum of every year up to and including year
+    def cumulative(self, field, scenario, year):
+        self._check(field, scenario)
+        out = numpy.zeros(self.grid.shape, dtype=numpy.float64)
+        for y in self.years[int(scenario)]:
+            data = self._open(field, scenario, y)
+            if y <= int(year) and data is not None:
+                out += data
+        return out
+
+    def close(self):
+        self.opened.close()
+
+
+# Build the cube from chunks of result rows, structured arrays with Scenario_ID,
+# ExpYear, Grid_ID and the result fields.  Only the scenarios in the rows are
+# replaced; the index keeps the other scenarios of an existing cube.
+def build_from_chunks(folder, grid, chunks, fields=FIELDS, scenarios=None):
+    if not os.path.isdir(folder):
+        os.makedirs(folder)
+    indexFile = os.path.join(folder, "index.json")
+    years = {}
+    if os.path.exists(indexFile):
+        with open(indexFile, "r") as f:
+            info = json.load(f)
+        if tuple(info["shape"]) == tuple(grid.shape) and list(info["fields"]) == list(fields):
+            years = dict((int(s), set(int(y) for y in ys)) for s, ys in info["years"].items())
+    # Scenarios being replaced start from empty grids
+    replaced = set(int(s) for s in scenarios) if scenarios is not None else set(years)
+    for name in os.listdir(folder):
+        if name.endswith(".f32") and (scenarios is None or
+                                      int(name.rsplit("_SC", 1)[1].split("_")[0]) in replaced):
+            os.remove(os.path.join(folder, name))
+    for scenario in replaced:
+        years.pop(scenario, None)
+    opened = OpenGrids(folder, grid.shape)
+    rows = 0
+    for chunk in chunks:
+        if not len(chunk):
+            continue
+        rows += len(chunk)
+        idx = grid.index(chunk["Grid_ID"])
+        keys = chunk["Scenario_ID"].astype(numpy.int64) * YEAR_KEY + chunk["ExpYear"].astype(numpy.int64)
+        uniqueKeys, inverse = numpy.unique(keys, return_inverse=True)
+        for k, key in enumerate(uniqueKeys.tolist()):
+            scenario, year = divmod(key, YEAR_KEY)
+            keep = (inverse == k) & (idx >= 0)
+            years.setdefault(scenario, set()).add(year)
+            for field in fields:
+                values = numpy.nan_to_num(numpy.asarray(chunk[field][keep], dtype=numpy.float64))
+                numpy.add.at(opened.get((field, scenario, year)).reshape(-1), idx[keep], values.astype(numpy.float32))
+    opened.close()
+    info = {"shape": list(grid.shape), "fields": list(fields),
+            "years": dict((str(s), sorted(ys)) for s, ys in years.items())}
+    with open(indexFile, "w") as f:
+        json.dump(info, f)
+    return rows
+
+
+# Stream a results table into chunks of rows
+def read_chunks(table, fields=FIELDS, where=None, chunkRows=CHUNK_ROWS):
+    import arcpy
+    names = ("Scenario_ID", "ExpYear", "Grid_ID") + tuple(fields)
+    dtype = [("Scenario_ID", numpy.int32), ("ExpYear", numpy.int32), ("Grid_ID", numpy.int64)]
+    dtype += [(field, numpy.float64) for field in fields]
+    buffer = []
+    with arcpy.da.SearchCursor(table, names, where) as cursor:
+        for row in cursor:
+            buffer.append(tuple(0 if v is None else v for v in row))
+            if len(buffer) >= chunkRows:
+                yield numpy.array(buffer, dtype=dtype)
+                buffer = []
+    if buffer:
+        yield numpy.array(buffer, dtype=dtype)
+
+
+# Build or refresh the cube of an analysis geodatabase from a results table
+def build(geoDB, grid, table, fields=FIELDS, scenarios=None):
+    import arcpy
+    where = None
+    if scenarios is not None:
+        where = (arcpy.AddFieldDelimiters(table, "Scenario_ID") + " IN (" +
+                 ", ".join(str(int(s)) for s in scenarios) + ")")
+    folder = cube_folder(geoDB)
+    build_from_chunks(folder, grid, read_chunks(table, fields, where), fields, scenarios)
+    return DSAYCube(folder, grid)
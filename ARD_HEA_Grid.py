@@ -0,0 +1,334 @@
+# ---------------------------------------------------------------------------
+# NAME: ARD_HEA_Grid.py
+# Version: 2.0 (ArcGIS 10.2)
+# Author: Research Planning, Inc.
+#
+# Usage: import ARD_HEA_Grid
+#        grid = ARD_HEA_Grid.load_grid(geoDB)
+#
+# Description: Implicit description of the analysis grid.  The grid is held as an
+#              origin, cell size, shape and validity mask instead of the ANALYSIS_PNTS
+#              point feature class.  GRID_ID maps to (row, col) arithmetically so any
+#              grid keyed join is an array index, and point features are only built
+#              when a caller needs real geometry.
+#
+# Notes:  GRID_ID = row * ncols + col + 1 with row 0 at the top of the grid, the same
+#         orientation returned by RasterToNumPyArray.  Projects whose ANALYSIS_PNTS
+#         were numbered differently keep their original GRID_IDs in a lookup array.
+#         arcpy is only imported by the functions that read or write datasets.
+#
+# Date Created: October 19, 2026
+#
+# ---------------------------------------------------------------------------
+
+import os
+import math
+import numpy
+
+# Sentinel used for NoData when rasters are read into arrays, exactly
+# representable in both int32 and float32 rasters
+NODATA = -2147483648
+
+
+class AnalysisGrid(object):
+
+    def __init__(self, xmin, ymin, cellsize, nrows, ncols, mask=None, ids=None, srs=""):
+        self.xmin = float(xmin)
+        self.ymin = float(ymin)
+        self.cellsize = float(cellsize)
+        self.nrows = int(nrows)
+        self.ncols = int(ncols)
+        self.srs = srs or ""
+        if mask is None:
+            mask = numpy.ones((self.nrows, self.ncols), dtype=bool)
+        self.mask = numpy.asarray(mask, dtype=bool).reshape(self.nrows, self.ncols)
+        self.ids = None
+        self._sortedIDs = None
+        self._sortedIdx = None
+        if ids is not None:
+            self.set_ids(ids)
+
+    @property
+    def shape(self):
+        return (self.nrows, self.ncols)
+
+    @property
+    def size(self):
+        return self.nrows * self.ncols
+
+    @property
+    def total_cells(self):
+        return int(self.mask.sum())
+
+    @property
+    def xmax(self):
+        return self.xmin + self.ncols * self.cellsize
+
+    @property
+    def ymax(self):
+        return self.ymin + self.nrows * self.cellsize
+
+    # Keep a legacy GRID_ID numbering (-1 marks cells without a GRID_ID)
+    def set_ids(self, ids):
+        ids = numpy.asarray(ids, dtype=numpy.int32).reshape(self.nrows, self.ncols)
+        if numpy.array_equal(ids[self.mask], self.arithmetic_ids()[self.mask]):
+            self.ids = None
+            self._sortedIDs = None
+            self._sortedIdx = None
+            return
+        self.ids = ids
+        flat = ids.ravel()
+        valid = numpy.flatnonzero(flat >= 0)
+        order = numpy.argsort(flat[valid], kind="mergesort")
+        self._sortedIDs = flat[valid][order]
+        self._sortedIdx = valid[order]
+
+    def arithmetic_ids(self):
+        return numpy.arange(1, self.size + 1, dtype=numpy.int32).reshape(self.shape)
+
+    # GRID_ID of (row, col)
+    def grid_id(self, row, col):
+        row = numpy.asarray(row)
+        col = numpy.asarray(col)
+        if self.ids is not None:
+            return self.ids[row, col]
+        return row * self.ncols + col + 1
+
+    # Flat cell index of GRID_ID, -1 where the GRID_ID is not on the grid
+    def index(self, gridID):
+        gridID = numpy.asarray(gridID, dtype=numpy.int64)
+        if self.ids is None:
+            idx = gridID - 1
+            return numpy.where((idx >= 0) & (idx < self.size), idx, -1)
+        if len(self._sortedIDs) == 0:
+            return numpy.full(gridID.shape, -1, dtype=numpy.int64)
+        pos = numpy.searchsorted(self._sortedIDs, gridID)
+        pos = numpy.clip(pos, 0, len(self._sortedIDs) - 1)
+        found = self._sortedIDs[pos] == gridID
+        return numpy.where(found, self._sortedIdx[pos], -1)
+
+    # (row, col) of GRID_ID, (-1, -1) where the GRID_ID is not on the grid
+    def row_col(self, gridID):
+        idx = self.index(gridID)
+        row = numpy.where(idx >= 0, idx // self.ncols, -1)
+        col = numpy.where(idx >= 0, idx % self.ncols, -1)
+        return row, col
+
+    # Map coordinates of cell centres
+    def centers(self, row, col):
+        x = self.xmin + (numpy.asarray(col) + 0.5) * self.cellsize
+        y = self.ymax - (numpy.asarray(row) + 0.5) * self.cellsize
+        return x, y
+
+    # (row, col) containing map coordinates, (-1, -1) outside the grid
+    def locate(self, x, y):
+        col = numpy.floor((numpy.asarray(x, dtype=float) - self.xmin) / self.cellsize).astype(numpy.int64)
+        row = numpy.floor((self.ymax - numpy.asarray(y, dtype=float)) / self.cellsize).astype(numpy.int64)
+        inside = (col >= 0) & (col < self.ncols) & (row >= 0) & (row < self.nrows)
+        return numpy.where(inside, row, -1), numpy.where(inside, col, -1)
+
+    def valid_index(self):
+        return numpy.flatnonzero(self.mask.ravel())
+
+    def valid_ids(self):
+        idx = self.valid_index()
+        return self.grid_id(idx // self.ncols, idx % self.ncols)
+
+    # Lazily yield (GRID_ID, x, y) arrays for the valid cells, chunk cells at a time
+    def iter_points(self, chunk=250000):
+        idx = self.valid_index()
+        for start in range(0, len(idx), chunk):
+            part = idx[start:start + chunk]
+            row = part // self.ncols
+            col = part % self.ncols
+            x, y = self.centers(row, col)
+            yield self.grid_id(row, col), x, y
+
+    # Values of a grid shaped array at the valid cells, in valid_ids() order
+    def gather(self, values):
+        return numpy.asarray(values).ravel()[self.valid_index()]
+
+    # Grid shaped float array built from GRID_ID keyed values.  how is "last",
+    # "sum", "max" or "min"; cells without values take fill, cells off the mask NaN.
+    def scatter(self, gridID, values, how="last", fill=0.0):
+        out = numpy.full(self.size, fill, dtype=numpy.float64)
+        idx = self.index(gridID)
+        keep = idx >= 0
+        idx = idx[keep]
+        values = numpy.asarray(values, dtype=numpy.float64)[keep]
+        if how == "sum":
+            numpy.add.at(out, idx, values)
+        elif how == "max":
+            out[idx] = -numpy.inf
+            numpy.maximum.at(out, idx, values)
+        elif how == "min":
+            out[idx] = numpy.inf
+            numpy.minimum.at(out, idx, values)
+        else:
+            out[idx] = values
+        out[~self.mask.ravel()] = numpy.nan
+        return out.reshape(self.shape)
+
+    # GRID_ID and value pairs for valid cells whose value passes the >= minimum filter
+    def records(self, values, minimum=0):
+        flat = self.gather(values)
+        ids = self.valid_ids()
+        with numpy.errstate(invalid="ignore"):
+            keep = numpy.isfinite(flat) & (flat >= minimum)
+        return ids[keep], flat[keep]
+
+    # Sparse GRID_ID and value pairs of the valid cells holding a value other than
+    # zero, e.g. the injured cells of a footprint.  scatter(gridIDs, values) densifies.
+    def sparse(self, values, zero=0):
+        flat = self.gather(values)
+        ids = self.valid_ids()
+        with numpy.errstate(invalid="ignore"):
+            keep = numpy.isfinite(flat) & (flat != zero)
+        return ids[keep], flat[keep]
+
+    # Nearest cell sampling of an array whose upper left corner is (xleft, ytop)
+    def sample_array(self, src, xleft, ytop, cellx, celly=None, nodata=NODATA):
+        if celly is None:
+            celly = cellx
+        src = numpy.asarray(src)
+        x, y = self.centers(numpy.arange(self.nrows), numpy.arange(self.ncols))
+        col = numpy.floor((x - xleft) / cellx).astype(numpy.int64)
+        row = numpy.floor((ytop - y) / celly).astype(numpy.int64)
+        okCol = numpy.flatnonzero((col >= 0) & (col < src.shape[1]))
+        okRow = numpy.flatnonzero((row >= 0) & (row < src.shape[0]))
+        out = numpy.full(self.shape, numpy.nan, dtype=numpy.float64)
+        if len(okRow) and len(okCol):
+            out[numpy.ix_(okRow, okCol)] = src[numpy.ix_(row[okRow], col[okCol])]
+        if nodata is not None:
+            out[out == nodata] = numpy.nan
+        out[~self.mask] = numpy.nan
+        return out
+
+    # Read a raster onto the grid (NaN for NoData).  The default NEAREST method is
+    # equivalent to extracting values to the cell centre points without
+    # interpolation, BILINEAR and MEAN resample through ARD_HEA_Resample.  With an
+    # ARD_HEA_RasterCache.RasterCache only the cached tiles under the grid are read.
+    def sample_raster(self, raster, cache=None, method="NEAREST"):
+        if cache is not None:
+            src = cache.open(raster)
+            xleft, ytop, cellx, celly = src.xleft, src.ytop, src.cellx, src.celly
+            height, width = src.shape
+        else:
+            import arcpy
+            desc = arcpy.Describe(raster)
+            xleft = float(desc.extent.XMin)
+            ytop = float(desc.extent.YMax)
+            cellx = float(desc.meanCellWidth)
+            celly = float(desc.meanCellHeight)
+            width = int(desc.width)
+            height = int(desc.height)
+        # BILINEAR needs the source cells just outside the grid as well
+        pad = 0 if str(method).upper() == "NEAREST" else 1
+        c0 = max(0, int(math.floor((self.xmin - xleft) / cellx)) - pad)
+        c1 = min(width, int(math.ceil((self.xmax - xleft) / cellx)) + pad)
+        r0 = max(0, int(math.floor((ytop - self.ymax) / celly)) - pad)
+        r1 = min(height, int(math.ceil((ytop - self.ymin) / celly)) + pad)
+        if c1 <= c0 or r1 <= r0:
+            return numpy.full(self.shape, numpy.nan, dtype=numpy.float64)
+        if cache is not None:
+            window = src.read(r0, c0, r1 - r0, c1 - c0)
+        else:
+            corner = arcpy.Point(xleft + c0 * cellx, ytop - r1 * celly)
+            window = arcpy.RasterToNumPyArray(raster, corner, c1 - c0, r1 - r0, NODATA)
+        if pad:
+            import ARD_HEA_Resample
+            return ARD_HEA_Resample.resample(self, window, xleft + c0 * cellx, ytop - r0 * celly, cellx, celly, method)
+        return self.sample_array(window, xleft + c0 * cellx, ytop - r0 * celly, cellx, celly)
+
+    def spatial_reference(self):
+        import arcpy
+        sr = arcpy.SpatialReference()
+        if self.srs:
+            sr.loadFromString(self.srs)
+        return sr
+
+    # Save a grid shaped array as a raster aligned with the analysis grid.  Any
+    # copy of outRaster held by the raster cache is dropped.
+    def write_raster(self, values, outRaster, nodata=None, cache=None):
+        import arcpy
+        if cache is not None:
+            cache.invalidate(outRaster)
+        values = numpy.asarray(values).reshape(self.shape)
+        if nodata is None:
+            nodata = NODATA if values.dtype.kind in "iu" else -3.4028235e+38
+        if values.dtype.kind == "f":
+            values = numpy.where(numpy.isnan(values), nodata, values).astype(numpy.float32)
+        ras = arcpy.NumPyArrayToRaster(values, arcpy.Point(self.xmin, self.ymin), self.cellsize, self.cellsize, nodata)
+        ras.save(outRaster)
+        if self.srs:
+            arcpy.DefineProjection_management(outRaster, self.spatial_reference())
+        return outRaster
+
+    # Materialize the valid cells as point features with a GRID_ID field
+    def to_points(self, outFC):
+        import arcpy
+        path, name = os.path.split(outFC)
+        if path == "":
+            path = "in_memory"
+        outFC = path + "\\" + name
+        if arcpy.Exists(outFC):
+            arcpy.Delete_management(outFC)
+        arcpy.CreateFeatureclass_management(path, name, "POINT", "", "", "", self.spatial_reference())
+        arcpy.AddField_management(outFC, "GRID_ID", "LONG", "", "", "", "", "NON_NULLABLE", "REQUIRED", "")
+        with arcpy.da.InsertCursor(outFC, ("SHAPE@XY", "GRID_ID")) as cursor:
+            for ids, xs, ys in self.iter_points():
+                for gid, x, y in zip(ids.tolist(), xs.tolist(), ys.tolist()):
+                    cursor.insertRow(((x, y), gid))
+        return outFC
+
+    def save(self, filename):
+        ids = self.ids if self.ids is not None else numpy.zeros(0, dtype=numpy.int32)
+        header = numpy.array([self.xmin, self.ymin, self.cellsize, self.nrows, self.ncols], dtype=numpy.float64)
+        with open(filename, "wb") as f:
+            numpy.savez_compressed(f, header=header, mask=self.mask, ids=ids, srs=numpy.array(self.srs))
+
+    @classmethod
+    def load(cls, filename):
+        data = numpy.load(filename)
+        header = data["header"]
+        ids = data["ids"]
+        return cls(header[0], header[1], header[2], int(header[3]), int(header[4]),
+                   mask=data["mask"], ids=ids if ids.size else None, srs=str(data["srs"]))
+
+
+# Build a grid from the ANALYSIS_GRID raster.  When a point feature class is given
+# its GRID_IDs are kept if they differ from the arithmetic numbering.
+def from_raster(raster, pointsFC=None):
+    import arcpy
+    desc = arcpy.Describe(raster)
+    ext = desc.extent
+    cellsize = float(desc.meanCellHeight)
+    nrows = int(desc.height)
+    ncols = int(desc.width)
+    values = arcpy.RasterToNumPyArray(raster, arcpy.Point(ext.XMin, ext.YMin), ncols, nrows, NODATA)
+    srs = desc.spatialReference.exportToString()
+    grid = AnalysisGrid(ext.XMin, ext.YMin, cellsize, nrows, ncols, mask=(values != NODATA), srs=srs)
+    if pointsFC is not None and arcpy.Exists(pointsFC):
+        pts = arcpy.da.FeatureClassToNumPyArray(pointsFC, ("GRID_ID", "SHAPE@X", "SHAPE@Y"))
+        row, col = grid.locate(pts["SHAPE@X"], pts["SHAPE@Y"])
+        inside = row >= 0
+        ids = numpy.full(grid.shape, -1, dtype=numpy.int32)
+        ids[row[inside], col[inside]] = pts["GRID_ID"][inside]
+        grid.mask = ids >= 0
+        grid.set_ids(ids)
+    return grid
+
+
+# Location of the cached grid description for an analysis geodatabase
+def grid_file(geoDB):
+    return os.path.splitext(geoDB)[0] + "_GRID.npz"
+
+
+# Load the analysis grid for a geodatabase, building and caching it on first use
+def load_grid(geoDB, refresh=False):
+    filename = grid_file(geoDB)
+    if not refresh and os.path.exists(filename):
+        return AnalysisGrid.load(filename)
+    grid = from_raster(geoDB + "\\ANALYSIS_GRID", geoDB + "\\ANALYSIS_PNTS")
+    grid.save(filename)
+    return grid
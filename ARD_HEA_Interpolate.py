@@ -0,0 +1,172 @@
+# ---------------------------------------------------------------------------
+# NAME: ARD_HEA_Interpolate.py
+# Version: 2.0 (ArcGIS 10.2)
+# Author: Research Planning, Inc.
+#
+# Usage: import ARD_HEA_Interpolate
+#        surface = ARD_HEA_Interpolate.interpolate_grid(grid, x, y, values, power=2, neighbors=12)
+#
+# Description: Inverse distance weighted (IDW) interpolation of filtered contaminant
+#              samples onto the analysis grid.  A KD-tree is built over the samples
+#              and the k-nearest (optionally radius limited) neighbourhood of every
+#              grid cell is evaluated in chunks spread over a process pool.  Also holds
+#              the helpers that read the _filtered samples of a COC and register an
+#              interpolated surface in the COC_INVENTORY table.
+#
+# Notes:  Requires numpy and scipy.  Log transformed interpolation follows the
+#         HEA convention of multiplying values by 1000 and flooring at 1 before
+#         taking the natural log.
+#
+# Date Created: October 19, 2026
+#
+# ---------------------------------------------------------------------------
+
+import numpy
+from scipy.spatial import cKDTree
+import ARD_HEA_Parallel
+
+class nosamples(Exception):
+    pass
+
+# Per-process interpolation state set up by the pool initializer
+_state = {}
+
+
+def log_transform(values):
+    return numpy.log(numpy.maximum(numpy.asarray(values, dtype=numpy.float64) * 1000.0, 1.0))
+
+
+def back_transform(values):
+    return numpy.exp(values) / 1000.0
+
+
+# Distances and indices of the nearest samples to points (px, py).  Neighbours beyond
+# the radius have an infinite distance and an index of 0.
+def query_neighbors(tree, px, py, neighbors=12, radius=None):
+    k = min(int(neighbors), tree.n)
+    bound = float(radius) if radius else numpy.inf
+    dist, idx = tree.query(numpy.column_stack((px, py)), k=k, distance_upper_bound=bound)
+    if k == 1:
+        dist = dist[:, None]
+        idx = idx[:, None]
+    idx = numpy.where(numpy.isfinite(dist), idx, 0)
+    return dist, idx
+
+
+# IDW estimates from neighbourhoods returned by query_neighbors
+def idw_estimate(dist, idx, values, power=2.0):
+    found = numpy.isfinite(dist)
+    exact = found & (dist == 0)
+    safe = numpy.where(found & ~exact, dist, 1.0)
+    weights = numpy.where(found & ~exact, safe ** -float(power), 0.0)
+    total = weights.sum(axis=1)
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        out = (weights * values[idx]).sum(axis=1) / total
+    out[total == 0] = numpy.nan
+    hit = exact.any(axis=1)
+    if hit.any():
+        out[hit] = values[idx[hit, numpy.argmax(exact[hit], axis=1)]]
+    return out
+
+
+# IDW estimates at points (px, py) from the samples indexed by tree
+def idw_points(tree, values, px, py, power=2.0, neighbors=12, radius=None):
+    dist, idx = query_neighbors(tree, px, py, neighbors, radius)
+    return idw_estimate(dist, idx, values, power)
+
+
+# Centres of flat grid cell indices for the grid geometry in params
+def cell_centers(cells, params):
+    xmin, ymax, cellsize, ncols = params[:4]
+    x = xmin + (cells % ncols + 0.5) * cellsize
+    y = ymax - (cells // ncols + 0.5) * cellsize
+    return x, y
+
+
+def _init_idw(x, y, values, params):
+    _state["tree"] = cKDTree(numpy.column_stack((x, y)))
+    _state["values"] = values
+    _state["params"] = params
+
+
+def _idw_chunk(cells):
+    params = _state["params"]
+    x, y = cell_centers(cells, params)
+    power, neighbors, radius = params[4:7]
+    return idw_points(_state["tree"], _state["values"], x, y, power, neighbors, radius)
+
+
+# Drop samples without a usable location or value
+def clean_samples(x, y, values):
+    x = numpy.asarray(x, dtype=numpy.float64)
+    y = numpy.asarray(y, dtype=numpy.float64)
+    values = numpy.asarray(values, dtype=numpy.float64)
+    keep = numpy.isfinite(x) & numpy.isfinite(y) & numpy.isfinite(values) & (values > -999.99)
+    return x[keep], y[keep], values[keep]
+
+
+# Interpolate samples onto every valid cell of an ARD_HEA_Grid.AnalysisGrid
+def interpolate_grid(grid, x, y, values, power=2.0, neighbors=12, radius=None, logTransform=False,
+                     chunk=65536, processes=None):
+    x, y, values = clean_samples(x, y, values)
+    if len(values) == 0:
+        raise nosamples
+    if logTransform:
+        values = log_transform(values)
+    cells = grid.valid_index()
+    chunks = [cells[start:stop] for start, stop in ARD_HEA_Parallel.chunk_ranges(len(cells), chunk)]
+    params = (grid.xmin, grid.ymax, grid.cellsize, grid.ncols, power, neighbors, radius)
+    parts = ARD_HEA_Parallel.map_chunks(_idw_chunk, chunks, processes, _init_idw, (x, y, values, params))
+    out = numpy.full(grid.size, numpy.nan, dtype=numpy.float64)
+    if parts:
+        out[cells] = numpy.concatenate(parts)
+    if logTransform:
+        out = back_transform(out)
+    return out.reshape(grid.shape)
+
+
+# Name of the statistic field written to the _filtered layer by FilterAnalyzeSamples
+def filtered_value_field(filteredFC, statType):
+    import arcpy
+    prefix = str(statType).upper() + "_"
+    for field in arcpy.ListFields(filteredFC):
+        if field.name.upper().startswith(prefix):
+            return field.name
+    raise nosamples
+
+
+# COC_INVENTORY record and _filtered sample locations and values for a contaminant
+def read_samples(geoDB, COCName):
+    import arcpy
+    fields = ("FILTER_LAYER_NAME", "STAT_TYPE", "AVG_DIST", "MAX_DIST", "LOG_TRANSFORM")
+    where = "[COC_NAME] = '" + COCName + "'"
+    record = None
+    with arcpy.da.SearchCursor(geoDB + "\\COC_INVENTORY", fields, where) as cursor:
+        for row in cursor:
+            record = dict(zip(fields, row))
+    if record is None or not record["FILTER_LAYER_NAME"]:
+        raise nosamples
+    filteredFC = geoDB + "\\" + record["FILTER_LAYER_NAME"]
+    if not arcpy.Exists(filteredFC):
+        raise nosamples
+    valueField = filtered_value_field(filteredFC, record["STAT_TYPE"])
+    samples = arcpy.da.FeatureClassToNumPyArray(filteredFC, ("SHAPE@X", "SHAPE@Y", valueField), null_value=-999.99)
+    x, y, values = clean_samples(samples["SHAPE@X"], samples["SHAPE@Y"], samples[valueField])
+    return x, y, values, record
+
+
+# Point COC_INVENTORY at an interpolated surface, clearing the SOURCE_PATH and
+# SOURCE_CHECKSUM of a raster registered by reference
+def register_surface(geoDB, COCName, layerName, interpType, logTransform):
+    import arcpy
+    table = geoDB + "\\COC_INVENTORY"
+    fields = ["INTERP_LAYER_NAME", "INTERP_TYPE", "LOG_TRANSFORM"]
+    values = [layerName, interpType, "TRUE" if logTransform else "FALSE"]
+    for field in ("SOURCE_PATH", "SOURCE_CHECKSUM"):
+        if arcpy.ListFields(table, field):
+            fields.append(field)
+            values.append(None)
+    where = "[COC_NAME] = '" + COCName + "'"
+    with arcpy.da.UpdateCursor(table, fields, where) as cursor:
+        for row in cursor:
+            cursor.updateRow(values)
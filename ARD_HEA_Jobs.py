@@ -0,0 +1,383 @@
+# ---------------------------------------------------------------------------
+# NAME: ARD_HEA_Jobs.py
+# Version: 2.0 (ArcGIS 10.2)
+# Author: Research Planning, Inc.
+#
+# Usage: python ARD_HEA_Jobs.py start [processes] [port]
+#        python ARD_HEA_Jobs.py submit <project_config_file> [stage ...]
+#        python ARD_HEA_Jobs.py jobs
+#        python ARD_HEA_Jobs.py watch [job]
+#        python ARD_HEA_Jobs.py stop
+#
+# Description: Job server for running the pipelines of many projects at once.  Jobs
+#              are project configuration files (see RunPipeline) submitted over a
+#              local socket.  The asyncio server queues them and runs each pipeline
+#              in a pool of worker processes, one job per process, so a batch node
+#              stays busy across projects.  Jobs for the same analysis geodatabase
+#              wait for each other (PROJECT_LIMIT running at a time) so their table
+#              writes never overlap.  Job, stage and message events are streamed to
+#              clients watching the server.
+#
+# Notes:  Requires Python 3.5 or later (ArcGIS Pro, or the local backend).  The server
+#         only listens on localhost and clients must present the key written to
+#         ~/.ard_hea_jobs when it started.  A job runs all of its stages in one worker
+#         process so surfaces and footprints are still handed between stages in
+#         memory; the pipeline "processes" option is set to JOB_PROCESSES so jobs do
+#         not oversubscribe the cores the pool is already using.
+#
+# Date Created: October 19, 2026
+#
+# ---------------------------------------------------------------------------
+
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import threading
+import multiprocessing
+import concurrent.futures
+import ARD_HEA_Parallel
+import ARD_HEA_Pipeline
+import ARD_HEA_Worker
+
+PORT = 6730
+KEY_FILE = ".ard_hea_jobs"
+PROJECT_LIMIT = 1
+JOB_PROCESSES = 1
+
+# Events kept for clients that start watching after a job began
+HISTORY = 1000
+
+
+class nojobserver(Exception):
+    pass
+
+
+# Analysis geodatabase of a project configuration, the key jobs are serialized on
+def project_key(configFile):
+    config = ARD_HEA_Pipeline.read_config(configFile)
+    if not config.has_option("project", "geodatabase"):
+        raise ARD_HEA_Pipeline.stagefailed(configFile + ": no geodatabase under [project]")
+    geoDB = config.get("project", "geodatabase").strip().replace("\\", os.sep)
+    return os.path.normcase(os.path.abspath(geoDB))
+
+
+# Run one pipeline job in a pool worker, sending progress events to the server
+def run_pipeline(jobID, configFile, stages, processes, events):
+    def progress(event):
+        event = dict(event)
+        event["job"] = jobID
+        events.put(event)
+    config = ARD_HEA_Pipeline.read_config(configFile)
+    if processes:
+        if not config.has_section("project"):
+            config.add_section("project")
+        config.set("project", "processes", str(processes))
+    pipeline = ARD_HEA_Pipeline.Pipeline(config, progress=progress)
+    timings = pipeline.run(stages or None)
+    return [[stage, seconds] for stage, seconds in timings]
+
+
+class Job(object):
+
+    def __init__(self, jobID, configFile, project, stages):
+        self.id = jobID
+        self.config = configFile
+        self.project = project
+        self.stages = list(stages or [])
+        self.state = "queued"
+        self.stage = None
+        self.error = None
+        self.timings = []
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+
+    def status(self):
+        return {"job": self.id, "config": self.config, "project": self.project, "stages": self.stages,
+                "state": self.state, "stage": self.stage, "error": self.error, "timings": self.timings,
+                "submitted": self.submitted, "started": self.started, "finished": self.finished}
+
+
+class JobServer(object):
+
+    def __init__(self, processes=None, projectLimit=PROJECT_LIMIT, jobProcesses=JOB_PROCESSES):
+        self.processes = ARD_HEA_Parallel.process_count(processes)
+        self.projectLimit = projectLimit
+        self.jobProcesses = jobProcesses
+        self.jobs = {}
+        self.count = 0
+        self.limits = {}
+        self.watchers = set()
+        self.clients = set()
+        self.history = []
+        self.loop = None
+        self.pool = None
+        self.manager = None
+        self.events = None
+        self.stopping = None
+        self.key = ARD_HEA_Worker.auth_key(create=True, name=KEY_FILE).decode("ascii")
+
+    def publish(self, event):
+        event.setdefault("time", time.time())
+        job = self.jobs.get(event.get("job"))
+        if job is not None and event.get("event") == "stage" and event.get("state") == "started":
+            job.stage = event["stage"]
+        self.history.append(event)
+        del self.history[:-HISTORY]
+        for queue in list(self.watchers):
+            queue.put_nowait(event)
+
+    # Move events from the worker processes onto the event loop
+    def _forward(self):
+        while True:
+            event = self.events.get()
+            if event is None:
+                break
+            self.loop.call_soon_threadsafe(self.publish, event)
+
+    def submit(self, configFile, stages=None):
+        ARD_HEA_Pipeline.check_stages(stages or [])
+        configFile = os.path.abspath(configFile)
+        project = project_key(configFile)
+        self.count += 1
+        job = Job(self.count, configFile, project, stages)
+        self.jobs[job.id] = job
+        self.publish({"event": "job", "job": job.id, "state": job.state, "project": project})
+        self.loop.create_task(self._run(job))
+        return job
+
+    async def _run(self, job):
+        if job.project not in self.limits:
+            self.limits[job.project] = asyncio.Semaphore(self.projectLimit)
+        async with self.limits[job.project]:
+            job.state = "running"
+            job.started = time.time()
+            self.publish({"event": "job", "job": job.id, "state": job.state})
+            try:
+                job.timings = await self.loop.run_in_executor(self.pool, run_pipeline, job.id, job.config, job.stages,
+                                                              self.jobProcesses, self.events)
+                job.state = "done"
+            except Exception as e:
+                job.state = "failed"
+                job.error = str(e)
+            job.finished = time.time()
+            job.stage = None
+            self.publish({"event": "job", "job": job.id, "state": job.state, "error": job.error,
+                          "seconds": job.finished - job.started})
+
+    async def _watch(self, writer, jobID):
+        queue = asyncio.Queue()
+        for event in self.history:
+            queue.put_nowait(event)
+        self.watchers.add(queue)
+        try:
+            while True:
+                event = await queue.get()
+                if jobID is not None and event.get("job") != jobID:
+                    continue
+                writer.write((json.dumps(event) + "\n").encode("utf-8"))
+                await writer.drain()
+                if jobID is not None and event.get("event") == "job" and event["state"] in ("done", "failed"):
+                    break
+        finally:
+            self.watchers.discard(queue)
+
+    # One JSON request per line, each answered with one JSON line, except watch
+    # which streams events until the job ends or the client disconnects
+    async def handle(self, reader, writer):
+        self.clients.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line.decode("utf-8"))
+                except ValueError:
+                    reply = {"ok": False, "error": "Bad request"}
+                else:
+                    if request.get("key") != self.key:
+                        writer.write((json.dumps({"ok": False, "error": "Bad key"}) + "\n").encode("utf-8"))
+                        break
+                    command = request.get("command")
+                    if command == "watch":
+                        await self._watch(writer, request.get("job"))
+                        break
+                    reply = self.command(command, request)
+                writer.write((json.dumps(reply) + "\n").encode("utf-8"))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.clients.discard(writer)
+            writer.close()
+
+    def command(self, command, request):
+        try:
+            if command == "submit":
+                job = self.submit(request["config"], request.get("stages"))
+                return {"ok": True, "job": job.id}
+            if command == "jobs":
+                return {"ok": True, "jobs": [self.jobs[j].status() for j in sorted(self.jobs)]}
+            if command == "status":
+                return {"ok": True, "job": self.jobs[int(request["job"])].status()}
+            if command == "ping":
+                return {"ok": True, "processes": self.processes}
+            if command == "stop":
+                self.stopping.set()
+                return {"ok": True}
+            return {"ok": False, "error": "Unknown command: " + str(command)}
+        except (KeyError, ValueError, IOError, ARD_HEA_Pipeline.stagefailed) as e:
+            return {"ok": False, "error": str(e)}
+
+    async def serve(self, port=PORT):
+        self.loop = asyncio.get_event_loop()
+        self.stopping = asyncio.Event()
+        server = await asyncio.start_server(self.handle, "localhost", int(port))
+        print("ARD HEA job server (" + str(self.processes) + " processes) listening on localhost:" + str(port))
+        await self.stopping.wait()
+        server.close()
+        # Let running jobs finish, then disconnect the clients still watching
+        running = [j for j in self.jobs.values() if j.state in ("queued", "running")]
+        if running:
+            print("Waiting for " + str(len(running)) + " job(s) to finish...")
+        while any(j.state in ("queued", "running") for j in self.jobs.values()):
+            await asyncio.sleep(0.5)
+        for writer in list(self.clients):
+            writer.close()
+        await asyncio.sleep(0.1)
+        await server.wait_closed()
+
+    def run(self, port=PORT):
+        self.manager = multiprocessing.Manager()
+        self.events = self.manager.Queue()
+        self.pool = concurrent.futures.ProcessPoolExecutor(self.processes)
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self.loop = loop
+        forward = threading.Thread(target=self._forward)
+        forward.daemon = True
+        forward.start()
+        try:
+            loop.run_until_complete(self.serve(port))
+        finally:
+            self.events.put(None)
+            self.pool.shutdown()
+            self.manager.shutdown()
+            loop.close()
+
+
+class JobClient(object):
+
+    def __init__(self, port=PORT):
+        try:
+            self.key = ARD_HEA_Worker.auth_key(name=KEY_FILE).decode("ascii")
+            self.sock = socket.create_connection(("localhost", int(port)))
+        except (ARD_HEA_Worker.noworker, IOError, OSError):
+            raise nojobserver
+        self.file = self.sock.makefile("rwb")
+
+    def _send(self, request):
+        request = dict(request)
+        request["key"] = self.key
+        self.file.write((json.dumps(request) + "\n").encode("utf-8"))
+        self.file.flush()
+
+    def _receive(self):
+        line = self.file.readline()
+        if not line:
+            raise nojobserver
+        return json.loads(line.decode("utf-8"))
+
+    def request(self, command, **kwargs):
+        kwargs["command"] = command
+        self._send(kwargs)
+        return self._receive()
+
+    def submit(self, configFile, stages=None):
+        return self.request("submit", config=os.path.abspath(configFile), stages=list(stages or []))
+
+    def jobs(self):
+        return self.request("jobs")["jobs"]
+
+    def stop(self):
+        return self.request("stop")
+
+    # Yield events until the job ends, or forever without a job
+    def watch(self, job=None):
+        self._send({"command": "watch", "job": job})
+        while True:
+            line = self.file.readline()
+            if not line:
+                return
+            yield json.loads(line.decode("utf-8"))
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+
+def _format(event):
+    text = "[job " + str(event.get("job")) + "] "
+    if event["event"] == "message":
+        return text + event["text"]
+    if event["event"] == "stage":
+        text += "stage " + event["stage"] + " " + event["state"]
+        if "seconds" in event:
+            text += " (" + "%.1f" % event["seconds"] + " s)"
+        return text
+    text += event["state"]
+    if event.get("error"):
+        text += ": " + event["error"]
+    return text
+
+
+def main(argv):
+    commands = ("start", "submit", "jobs", "watch", "stop")
+    if len(argv) < 2 or argv[1] not in commands:
+        print("Usage: ARD_HEA_Jobs.py start [processes] [port] | submit <config> [stage ...] | jobs | watch [job] | stop")
+        return 2
+    command = argv[1]
+    port = int(os.environ.get("HEA_JOBS_PORT", PORT))
+    if command == "start":
+        processes = int(argv[2]) if len(argv) > 2 else None
+        if len(argv) > 3:
+            port = int(argv[3])
+        JobServer(processes).run(port)
+        return 0
+    try:
+        client = JobClient(port)
+    except nojobserver:
+        print("No ARD HEA job server is running")
+        return 1
+    try:
+        if command == "submit":
+            if len(argv) < 3:
+                print("Usage: ARD_HEA_Jobs.py submit <config> [stage ...]")
+                return 2
+            reply = client.submit(argv[2], argv[3:])
+            if not reply["ok"]:
+                print(reply["error"])
+                return 1
+            print("Submitted job " + str(reply["job"]))
+        elif command == "jobs":
+            for job in client.jobs():
+                print(str(job["job"]) + "  " + job["state"].ljust(8) + " " + (job["stage"] or "").ljust(20) + " " +
+                      job["config"])
+        elif command == "watch":
+            for event in client.watch(int(argv[2]) if len(argv) > 2 else None):
+                print(_format(event))
+        else:
+            client.stop()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,237 @@
+# ---------------------------------------------------------------------------
+# NAME: ARD_HEA_Kriging.py
+# Version: 2.0 (ArcGIS 10.2)
+# Author: Research Planning, Inc.
+#
+# Usage: import ARD_HEA_Kriging
+#        surface, variance, model = ARD_HEA_Kriging.krige_grid(grid, x, y, values, lagSize=avgDist, maxDist=maxDist)
+#
+# Description: Local neighbourhood ordinary kriging of filtered contaminant samples
+#              onto the analysis grid.  A variogram model (spherical, exponential or
+#              gaussian) is fitted to the empirical semivariogram of the samples, then
+#              a small kriging system is solved for every grid cell over its KD-tree
+#              neighbourhood.  Systems are solved in NumPy batches, chunks of cells
+#              are spread over a process pool, and both the prediction and the
+#              kriging variance are returned.
+#
+# Notes:  Lag defaults follow the distance bands FilterAnalyzeSamples records in
+#         COC_INVENTORY: the lag size is AVG_DIST and the variogram is fitted out to
+#         the larger of lags * AVG_DIST and MAX_DIST.  With log transformed values the
+#         prediction is back transformed and the variance is left in log units.
+#
+# Date Created: October 19, 2026
+#
+# ---------------------------------------------------------------------------
+
+import math
+import numpy
+from scipy.spatial import cKDTree
+from scipy.optimize import curve_fit
+import ARD_HEA_Parallel
+import ARD_HEA_Interpolate
+
+MODELS = ("SPHERICAL", "EXPONENTIAL", "GAUSSIAN")
+
+# Per-process kriging state set up by the pool initializer
+_state = {}
+
+
+def _spherical(h, nugget, sill, rng):
+    r = numpy.minimum(h / rng, 1.0)
+    return numpy.where(h > 0, nugget + sill * (1.5 * r - 0.5 * r ** 3), 0.0)
+
+
+def _exponential(h, nugget, sill, rng):
+    return numpy.where(h > 0, nugget + sill * (1.0 - numpy.exp(-3.0 * h / rng)), 0.0)
+
+
+def _gaussian(h, nugget, sill, rng):
+    return numpy.where(h > 0, nugget + sill * (1.0 - numpy.exp(-3.0 * (h / rng) ** 2)), 0.0)
+
+
+_functions = {"SPHERICAL": _spherical, "EXPONENTIAL": _exponential, "GAUSSIAN": _gaussian}
+
+
+class Variogram(object):
+
+    def __init__(self, model, nugget, sill, rng):
+        self.model = str(model).upper()
+        self.nugget = float(nugget)
+        self.sill = float(sill)
+        self.range = float(rng)
+
+    def __call__(self, h):
+        return _functions[self.model](numpy.asarray(h, dtype=numpy.float64), self.nugget, self.sill, self.range)
+
+    def covariance(self, h):
+        h = numpy.asarray(h, dtype=numpy.float64)
+        return self.nugget + self.sill - self(h)
+
+    def params(self):
+        return (self.model, self.nugget, self.sill, self.range)
+
+    def __repr__(self):
+        return "%s nugget=%g sill=%g range=%g" % self.params()
+
+
+# Default lag size and fitting distance from the sample layout and the COC_INVENTORY distance bands
+def lag_defaults(x, y, lagSize=None, maxDist=None, lags=12):
+    if not lagSize or lagSize <= 0:
+        tree = cKDTree(numpy.column_stack((x, y)))
+        dist = tree.query(numpy.column_stack((x, y)), k=2)[0][:, 1]
+        lagSize = float(numpy.mean(dist[numpy.isfinite(dist)])) or 1.0
+    maxLag = lags * float(lagSize)
+    if maxDist and maxDist > maxLag:
+        maxLag = float(maxDist)
+    return float(lagSize), maxLag
+
+
+# Empirical semivariogram binned by lag.  Large sample sets are subsampled for the pair search.
+def empirical_variogram(x, y, values, lagSize, maxLag, maxSamples=3000, seed=0):
+    x = numpy.asarray(x, dtype=numpy.float64)
+    y = numpy.asarray(y, dtype=numpy.float64)
+    values = numpy.asarray(values, dtype=numpy.float64)
+    if len(values) > maxSamples:
+        pick = numpy.random.RandomState(seed).choice(len(values), maxSamples, replace=False)
+        x, y, values = x[pick], y[pick], values[pick]
+    tree = cKDTree(numpy.column_stack((x, y)))
+    pairs = tree.query_pairs(maxLag, output_type="ndarray")
+    nbins = max(1, int(math.ceil(maxLag / lagSize)))
+    if len(pairs) == 0:
+        return numpy.zeros(0), numpy.zeros(0), numpy.zeros(0, dtype=numpy.int64)
+    i, j = pairs[:, 0], pairs[:, 1]
+    h = numpy.hypot(x[i] - x[j], y[i] - y[j])
+    sq = 0.5 * (values[i] - values[j]) ** 2
+    bins = numpy.minimum((h / lagSize).astype(numpy.int64), nbins - 1)
+    counts = numpy.bincount(bins, minlength=nbins)
+    sumH = numpy.bincount(bins, h, minlength=nbins)
+    sumSq = numpy.bincount(bins, sq, minlength=nbins)
+    keep = counts > 0
+    return sumH[keep] / counts[keep], sumSq[keep] / counts[keep], counts[keep]
+
+
+# Weighted least squares fit of one model, returns (Variogram, weighted error)
+def _fit_model(model, lags, gamma, counts, maxLag):
+    func = _functions[model]
+    sill0 = max(float(gamma.max()), 1e-12)
+    p0 = (float(gamma.min()) * 0.5, sill0, maxLag * 0.5)
+    sigma = 1.0 / numpy.sqrt(counts.astype(numpy.float64))
+    try:
+        popt = curve_fit(func, lags, gamma, p0=p0, sigma=sigma,
+                         bounds=([0.0, 0.0, lags.min() * 0.5 + 1e-12], [sill0 * 2, sill0 * 4, maxLag * 4]))[0]
+    except (RuntimeError, ValueError):
+        popt = p0
+    fit = Variogram(model, *popt)
+    error = float(numpy.sum(counts * (fit(lags) - gamma) ** 2))
+    return fit, error
+
+
+# Fit a variogram model, model "AUTO" keeps the best fitting of MODELS
+def fit_variogram(x, y, values, lagSize=None, maxDist=None, lags=12, model="AUTO"):
+    lagSize, maxLag = lag_defaults(x, y, lagSize, maxDist, lags)
+    hs, gamma, counts = empirical_variogram(x, y, values, lagSize, maxLag)
+    if len(gamma) < 3:
+        var = float(numpy.var(values))
+        return Variogram(MODELS[0] if model == "AUTO" else model, 0.0, max(var, 1e-12), maxLag)
+    models = MODELS if str(model).upper() == "AUTO" else (str(model).upper(),)
+    best = None
+    for name in models:
+        fit, error = _fit_model(name, hs, gamma, counts, maxLag)
+        if best is None or error < best[1]:
+            best = (fit, error)
+    return best[0]
+
+
+# Ordinary kriging prediction and variance from neighbourhoods returned by
+# ARD_HEA_Interpolate.query_neighbors.  coords holds the sample locations.
+def krige_estimate(coords, values, variogram, dist, idx):
+    k = dist.shape[1]
+    found = numpy.isfinite(dist)
+    m = len(dist)
+    near = coords[idx]
+    pairDist = numpy.sqrt(((near[:, :, None, :] - near[:, None, :, :]) ** 2).sum(axis=3))
+    c0 = variogram.nugget + variogram.sill
+
+    # Covariance form of the kriging system, missing neighbours are given zero weight
+    A = numpy.zeros((m, k + 1, k + 1))
+    A[:, :k, :k] = variogram.covariance(pairDist)
+    both = found[:, :, None] & found[:, None, :]
+    A[:, :k, :k] = numpy.where(both, A[:, :k, :k], 0.0)
+    diag = numpy.arange(k)
+    A[:, diag, diag] = numpy.where(found, c0 * (1.0 + 1e-10), 1.0)
+    A[:, :k, k] = found
+    A[:, k, :k] = found
+    b = numpy.zeros((m, k + 1))
+    b[:, :k] = numpy.where(found, variogram.covariance(numpy.where(found, dist, 0.0)), 0.0)
+    b[:, k] = 1.0
+
+    empty = ~found.any(axis=1)
+    A[empty, k, k] = 1.0
+    try:
+        sol = numpy.linalg.solve(A, b[:, :, None])[:, :, 0]
+    except numpy.linalg.LinAlgError:
+        sol = numpy.array([numpy.linalg.lstsq(A[i], b[i], rcond=None)[0] for i in range(m)])
+    weights = sol[:, :k]
+    mu = sol[:, k]
+    prediction = (weights * values[idx]).sum(axis=1)
+    variance = numpy.maximum(c0 - (weights * b[:, :k]).sum(axis=1) - mu, 0.0)
+    prediction[empty] = numpy.nan
+    variance[empty] = numpy.nan
+
+    # Samples that coincide with a cell centre are honoured exactly
+    exact = found & (dist == 0)
+    hit = exact.any(axis=1)
+    if hit.any():
+        prediction[hit] = values[idx[hit, numpy.argmax(exact[hit], axis=1)]]
+        variance[hit] = variogram.nugget
+    return prediction, variance
+
+
+# Ordinary kriging prediction and variance at points from neighbourhoods indexed by tree
+def krige_points(tree, values, variogram, px, py, neighbors=16, radius=None):
+    dist, idx = ARD_HEA_Interpolate.query_neighbors(tree, px, py, neighbors, radius)
+    return krige_estimate(tree.data, values, variogram, dist, idx)
+
+
+def _init_krige(x, y, values, variogram, params):
+    _state["tree"] = cKDTree(numpy.column_stack((x, y)))
+    _state["values"] = values
+    _state["variogram"] = Variogram(*variogram)
+    _state["params"] = params
+
+
+def _krige_chunk(cells):
+    params = _state["params"]
+    x, y = ARD_HEA_Interpolate.cell_centers(cells, params)
+    neighbors, radius, batch = params[4:7]
+    parts = [krige_points(_state["tree"], _state["values"], _state["variogram"], x[a:b], y[a:b], neighbors, radius)
+             for a, b in ARD_HEA_Parallel.chunk_ranges(len(cells), batch)]
+    if not parts:
+        return numpy.zeros(0), numpy.zeros(0)
+    return numpy.concatenate([p[0] for p in parts]), numpy.concatenate([p[1] for p in parts])
+
+
+# Krige samples onto every valid cell of an ARD_HEA_Grid.AnalysisGrid.
+# Returns grid shaped prediction and variance arrays and the variogram used.
+def krige_grid(grid, x, y, values, variogram=None, neighbors=16, radius=None, logTransform=False,
+               lagSize=None, maxDist=None, model="AUTO", chunk=65536, batch=4096, processes=None):
+    x, y, values = ARD_HEA_Interpolate.clean_samples(x, y, values)
+    if len(values) == 0:
+        raise ARD_HEA_Interpolate.nosamples
+    if logTransform:
+        values = ARD_HEA_Interpolate.log_transform(values)
+    if variogram is None:
+        variogram = fit_variogram(x, y, values, lagSize, maxDist, model=model)
+    cells = grid.valid_index()
+    chunks = [cells[start:stop] for start, stop in ARD_HEA_Parallel.chunk_ranges(len(cells), chunk)]
+    params = (grid.xmin, grid.ymax, grid.cellsize, grid.ncols, neighbors, radius, batch)
+    parts = ARD_HEA_Parallel.map_chunks(_krige_chunk, chunks, processes, _init_krige,
+                                        (x, y, values, variogram.params(), params))
+    prediction = numpy.full(grid.size, numpy.nan, dtype=numpy.float64)
+    variance = numpy.full(grid.size, numpy.nan, dtype=numpy.float64)
+    if parts:
+        prediction[cells] = numpy.concatenate([p[0] for p in parts])
+        variance[cells] = numpy.concatenate([p[1] for p in parts])
+    if logTransform:
+        prediction = ARD_HEA_Interpolate.back_transform(prediction)
+    return prediction.reshape(grid.shape), variance.reshape(grid.shape), variogram
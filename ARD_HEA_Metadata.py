@@ -0,0 +1,60 @@
+# ---------------------------------------------------------------------------
+# NAME: ARD_HEA_Metadata.py
+# Version: 2.0 (ArcGIS 10.2)
+# Author: Research Planning, Inc.
+#
+# Usage: import ARD_HEA_Metadata
+#        metadata = ARD_HEA_Metadata.MetadataQueue()
+#        metadata.add(xmlTemp, outDSAY)
+#        ...
+#        metadata.flush()
+#
+# Description: Deferred metadata writing for derived datasets.  Tools queue each
+#              output with its FGDC template while they run and the queue writes all
+#              of the metadata in one batch at the end of the run.  Each template is
+#              translated from FGDC once, into the first output queued with it; the
+#              other outputs of that template get a copy of the translated metadata
+#              (MetadataImporter) instead of translating the template again.
+#
+# Notes:  Set HEA_SKIP_METADATA=1 (or pass skip=True) for scratch runs that do not
+#         need metadata; queued outputs are then dropped.
+#
+# Date Created: October 19, 2026
+#
+# ---------------------------------------------------------------------------
+
+import os
+
+
+def skip_metadata():
+    return os.environ.get("HEA_SKIP_METADATA", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+class MetadataQueue(object):
+
+    def __init__(self, skip=None, fmt="FROM_FGDC"):
+        self.skip = skip_metadata() if skip is None else skip
+        self.fmt = fmt
+        self.pending = []
+
+    def add(self, template, dataset):
+        if not self.skip:
+            self.pending.append((template, dataset))
+
+    # Import each queued template once and copy it to its other outputs
+    def flush(self, message=None):
+        import arcpy
+        pending = self.pending
+        self.pending = []
+        if self.skip or not pending:
+            return 0
+        if message is not None:
+            message("Writing metadata for " + str(len(pending)) + " output(s)...")
+        imported = {}
+        for template, dataset in pending:
+            if template in imported:
+                arcpy.MetadataImporter_conversion(imported[template], dataset)
+            else:
+                arcpy.ImportMetadata_conversion(template, self.fmt, dataset, "ENABLED")
+                imported[template] = dataset
+        return len(pending)
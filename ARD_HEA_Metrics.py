@@ -0,0 +1,214 @@
+# ---------------------------------------------------------------------------
+# NAME: ARD_HEA_Metrics.py
+# Version: 2.0 (ArcGIS 10.2)
+# Author: Research Planning, Inc.
+#
+# Usage: import ARD_HEA_Metrics
+#        metrics = ARD_HEA_Metrics.project_metrics(geoDB, "LoadContaminantSurfaces")
+#        with metrics.stage("surface extract", cells=grid.total_cells) as step:
+#            ...
+#            step.rows = len(gridIDs)
+#        for line in metrics.summary():
+#            arcpy.AddMessage(line)
+#
+# Description: Timing, throughput and memory instrumentation for the HEA tools.  Each
+#              stage records its wall time, rows and cells processed per second, the
+#              process peak resident memory and the bytes read and written while it
+#              ran.  Records are appended as JSON lines to <project>_metrics.jsonl next
+#              to the analysis geodatabase and summarized on the console.
+#
+# Notes:  Peak RSS is the high water mark of the process at the end of the stage.
+#         Bytes read and written come from the process I/O counters (GetProcessIoCounters
+#         on Windows, /proc/self/io on Linux) and are left empty where unavailable.
+#
+# Date Created: October 19, 2026
+#
+# ---------------------------------------------------------------------------
+
+import os
+import sys
+import json
+import time
+import datetime
+
+
+def _windows_stats():
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+    class IO_COUNTERS(ctypes.Structure):
+        _fields_ = [("ReadOperationCount", ctypes.c_ulonglong), ("WriteOperationCount", ctypes.c_ulonglong),
+                    ("OtherOperationCount", ctypes.c_ulonglong), ("ReadTransferCount", ctypes.c_ulonglong),
+                    ("WriteTransferCount", ctypes.c_ulonglong), ("OtherTransferCount", ctypes.c_ulonglong)]
+
+    process = ctypes.windll.kernel32.GetCurrentProcess()
+    stats = {"rss": None, "peak_rss": None, "read_bytes": None, "write_bytes": None}
+    memory = PROCESS_MEMORY_COUNTERS()
+    memory.cb = ctypes.sizeof(memory)
+    if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(memory), memory.cb):
+        stats["rss"] = memory.WorkingSetSize
+        stats["peak_rss"] = memory.PeakWorkingSetSize
+    io = IO_COUNTERS()
+    if ctypes.windll.kernel32.GetProcessIoCounters(process, ctypes.byref(io)):
+        stats["read_bytes"] = io.ReadTransferCount
+        stats["write_bytes"] = io.WriteTransferCount
+    return stats
+
+
+def _posix_stats():
+    import resource
+    stats = {"rss": None, "peak_rss": None, "read_bytes": None, "write_bytes": None}
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on Mac OS
+    stats["peak_rss"] = peak if sys.platform == "darwin" else peak * 1024
+    try:
+        with open("/proc/self/statm") as f:
+            stats["rss"] = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (IOError, OSError, ValueError):
+        pass
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                name, value = line.split(":")
+                if name == "rchar":
+                    stats["read_bytes"] = int(value)
+                elif name == "wchar":
+                    stats["write_bytes"] = int(value)
+    except (IOError, OSError, ValueError):
+        pass
+    return stats
+
+
+# Current memory and I/O counters of this process
+def process_stats():
+    try:
+        if sys.platform == "win32":
+            return _windows_stats()
+        return _posix_stats()
+    except Exception:
+        return {"rss": None, "peak_rss": None, "read_bytes": None, "write_bytes": None}
+
+
+def _delta(after, before):
+    if after is None or before is None:
+        return None
+    return after - before
+
+
+def _rate(count, seconds):
+    if count is None:
+        return None
+    return count / seconds if seconds > 0 else None
+
+
+def _mb(value):
+    if value is None:
+        return None
+    return round(value / 1048576.0, 2)
+
+
+class Stage(object):
+
+    def __init__(self, metrics, name, rows=None, cells=None):
+        self.metrics = metrics
+        self.name = name
+        self.rows = rows
+        self.cells = cells
+        self.depth = 0
+        self.parent = None
+        self.order = 0
+        self.start = None
+        self.before = None
+
+    def __enter__(self):
+        stack = self.metrics.stack
+        self.depth = len(stack)
+        self.parent = stack[-1].name if stack else None
+        self.order = self.metrics.started
+        self.metrics.started += 1
+        stack.append(self)
+        self.before = process_stats()
+        self.start = time.time()
+        return self
+
+    def __exit__(self, excType, excValue, tb):
+        seconds = time.time() - self.start
+        after = process_stats()
+        self.metrics.stack.remove(self)
+        self.metrics.record({
+            "stage": self.name,
+            "order": self.order,
+            "parent": self.parent,
+            "depth": self.depth,
+            "status": "failed" if excType is not None else "ok",
+            "seconds": round(seconds, 4),
+            "rows": self.rows,
+            "cells": self.cells,
+            "rows_per_s": _rate(self.rows, seconds),
+            "cells_per_s": _rate(self.cells, seconds),
+            "rss_mb": _mb(after["rss"]),
+            "peak_rss_mb": _mb(after["peak_rss"]),
+            "read_mb": _mb(_delta(after["read_bytes"], self.before["read_bytes"])),
+            "write_mb": _mb(_delta(after["write_bytes"], self.before["write_bytes"]))})
+        return False
+
+
+class Metrics(object):
+
+    def __init__(self, filename, tool):
+        self.filename = filename
+        self.tool = tool
+        self.run = datetime.datetime.now().strftime("%Y%m%d%H%M%S") + "-" + str(os.getpid())
+        self.stack = []
+        self.records = []
+        self.started = 0
+
+    def stage(self, name, rows=None, cells=None):
+        return Stage(self, name, rows, cells)
+
+    def record(self, values):
+        values = dict(values)
+        values["tool"] = self.tool
+        values["run"] = self.run
+        values["time"] = datetime.datetime.now().isoformat()
+        self.records.append(values)
+        if self.filename:
+            try:
+                with open(self.filename, "a") as f:
+                    f.write(json.dumps(values, sort_keys=True) + "\n")
+            except (IOError, OSError):
+                pass
+
+    # Console summary of the stages recorded so far, nested stages indented
+    def summary(self):
+        def fmt(value, pattern):
+            return pattern % value if value is not None else "-"
+        lines = ["%-34s %9s %12s %12s %9s %9s %9s" % ("Stage", "Seconds", "Rows/s", "Cells/s",
+                                                       "Peak MB", "Read MB", "Write MB")]
+        ordered = sorted(self.records, key=lambda r: r["order"])
+        for record in ordered:
+            name = "  " * record["depth"] + record["stage"]
+            if record["status"] != "ok":
+                name += " (failed)"
+            lines.append("%-34s %9s %12s %12s %9s %9s %9s" % (
+                name[:34], fmt(record["seconds"], "%.2f"), fmt(record["rows_per_s"], "%.0f"),
+                fmt(record["cells_per_s"], "%.0f"), fmt(record["peak_rss_mb"], "%.1f"),
+                fmt(record["read_mb"], "%.1f"), fmt(record["write_mb"], "%.1f")))
+        return lines
+
+
+# Location of the metrics log for an analysis geodatabase
+def metrics_file(geoDB):
+    return os.path.splitext(geoDB)[0] + "_metrics.jsonl"
+
+
+# Metrics recorder for a tool run against an analysis geodatabase
+def project_metrics(geoDB, tool):
+    return Metrics(metrics_file(geoDB), tool)
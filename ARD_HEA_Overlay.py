@@ -0,0 +1,113 @@
+# ---------------------------------------------------------------------------
+# NAME: ARD_HEA_Overlay.py
+# Version: 2.0 (ArcGIS 10.2)
+# Author: Research Planning, Inc.
+#
+# Usage: import ARD_HEA_Overlay
+#        injury, dominant, count = ARD_HEA_Overlay.overlay([lead, zinc], "MAX")
+#        records = ARD_HEA_Overlay.injury_records(grid, scenario, ["Lead", "Zinc"], injury, dominant, count)
+#
+# Description: Combines the percent injury class arrays of every contaminant sliced
+#              for a scenario (the _SC<n> rasters or the pipeline footprints) into one
+#              injury per grid cell.  The class arrays are stacked and reduced in one
+#              pass over blocks of grid rows with a combination rule:
+#                MAX         - highest percent injury of any contaminant
+#                SUM         - sum of the percent injuries, capped at 100
+#                INDEPENDENT - 100 * (1 - product of (1 - injury / 100)), treating the
+#                              contaminants as independent stressors
+#              The dominant contaminant of a cell is the one with the highest percent
+#              injury.  Results are kept in SCENARIO_INJURY keyed by GRID_ID and
+#              SCENARIO_ID, with rows only for injured cells.
+#
+# Notes:  NoData class cells do not contribute.  A cell with no contaminant data is
+#         NoData in the combined injury; a cell with data but no injury is 0.
+#
+# Date Created: October 19, 2026
+#
+# ---------------------------------------------------------------------------
+
+import numpy
+import ARD_HEA_Tables
+from ARD_HEA_Grid import NODATA
+
+RULES = ("MAX", "SUM", "INDEPENDENT")
+INJURY_TABLE = "SCENARIO_INJURY"
+
+# Grid cells reduced at a time
+BLOCK_CELLS = 1048576
+
+
+class badrule(Exception):
+    pass
+
+
+def rule_name(rule):
+    name = str(rule or "MAX").strip().upper()
+    if name not in RULES:
+        raise badrule("Unknown overlay rule " + str(rule) + ", use one of " + ", ".join(RULES))
+    return name
+
+
+def _reduce(stack, rule):
+    valid = numpy.isfinite(stack)
+    filled = numpy.where(valid, stack, 0.0)
+    if rule == "MAX":
+        injury = filled.max(axis=0)
+    elif rule == "SUM":
+        injury = numpy.minimum(filled.sum(axis=0), 100.0)
+    else:
+        injury = 100.0 * (1.0 - numpy.prod(1.0 - numpy.clip(filled, 0.0, 100.0) / 100.0, axis=0))
+    dominant = filled.argmax(axis=0)
+    count = (filled > 0).sum(axis=0)
+    anyValid = valid.any(axis=0)
+    injury = numpy.where(anyValid, injury, numpy.nan)
+    dominant = numpy.where(anyValid & (injury > 0), dominant, -1)
+    return injury, dominant, count
+
+
+# Combined percent injury (NaN for NoData), index of the dominant class array
+# (-1 for cells without injury) and number of contaminants injuring each cell
+def overlay(classes, rule="MAX", nodata=NODATA, block=BLOCK_CELLS):
+    rule = rule_name(rule)
+    if not len(classes):
+        raise badrule("No contaminant footprints to overlay")
+    shape = numpy.shape(classes[0])
+    size = int(numpy.prod(shape))
+    flats = [numpy.asarray(c).reshape(-1) for c in classes]
+    injury = numpy.empty(size, dtype=numpy.float32)
+    dominant = numpy.empty(size, dtype=numpy.int16)
+    count = numpy.empty(size, dtype=numpy.int16)
+    for start in range(0, size, block):
+        end = min(size, start + block)
+        stack = numpy.empty((len(flats), end - start), dtype=numpy.float32)
+        for i, flat in enumerate(flats):
+            part = flat[start:end]
+            stack[i] = numpy.where(part == nodata, numpy.nan, part)
+        injury[start:end], dominant[start:end], count[start:end] = _reduce(stack, rule)
+    return injury.reshape(shape), dominant.reshape(shape), count.reshape(shape)
+
+
+# SCENARIO_INJURY rows of the injured cells
+def injury_records(grid, scenario, COCNames, injury, dominant, count):
+    flat = grid.gather(injury)
+    with numpy.errstate(invalid="ignore"):
+        keep = numpy.isfinite(flat) & (flat > 0)
+    names = numpy.array(list(COCNames) + [""], dtype=object)
+    return ARD_HEA_Tables.TypedTable.from_columns(INJURY_TABLE, GRID_ID=grid.valid_ids()[keep], SCENARIO_ID=scenario,
+                                                  PERCENT_INJURY=flat[keep],
+                                                  DOMINANT_COC=names[grid.gather(dominant)[keep]],
+                                                  COC_COUNT=grid.gather(count)[keep])
+
+
+def create_table(geoDB):
+    import arcpy
+    table = geoDB + "\\" + INJURY_TABLE
+    if not arcpy.Exists(table):
+        arcpy.CreateTable_management(geoDB, INJURY_TABLE, "", "")
+        arcpy.AddField_management(table, "GRID_ID", "LONG", "", "", "", "", "NON_NULLABLE", "REQUIRED", "")
+        arcpy.AddField_management(table, "SCENARIO_ID", "SHORT", "", "", "", "", "NON_NULLABLE", "REQUIRED", "")
+        arcpy.AddField_management(table, "PERCENT_INJURY", "FLOAT", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
+        arcpy.AddField_management(table, "DOMINANT_COC", "TEXT", "", "", "20", "", "NULLABLE", "NON_REQUIRED", "")
+        arcpy.AddField_management(table, "COC_COUNT", "SHORT", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
+        arcpy.AddIndex_management(table, "GRID_ID", "SINJ_GID_IDX", "NON_UNIQUE", "ASCENDING")
+        arcpy.AddIndex_management(table, "SCENARIO_ID", "SINJ_SID_IDX", "NON_UNIQUE", "ASCENDING")
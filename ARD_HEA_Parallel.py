@@ -0,0 +1,75 @@
+# ---------------------------------------------------------------------------
+# NAME: ARD_HEA_Parallel.py
+# Version: 2.0 (ArcGIS 10.2)
+# Author: Research Planning, Inc.
+#
+# Usage: import ARD_HEA_Parallel
+#        parts = ARD_HEA_Parallel.map_chunks(func, chunks, processes, initializer, initargs)
+#
+# Description: Process pool helpers shared by the interpolation and analysis modules.
+#              Work is split into chunks which are mapped across a pool of worker
+#              processes, or run in-process when a single process is requested.
+#
+# Notes:  When running inside ArcMap/ArcCatalog the pool is started with pythonw.exe
+#         so the workers do not launch further copies of the application.
+#
+# Date Created: October 19, 2026
+#
+# ---------------------------------------------------------------------------
+
+import os
+import sys
+import multiprocessing
+
+
+def cpu_count():
+    try:
+        return multiprocessing.cpu_count()
+    except NotImplementedError:
+        return 1
+
+
+# Number of worker processes to use for a requested count (None or <= 0 uses all cores)
+def process_count(processes=None):
+    if processes is None or int(processes) <= 0:
+        return cpu_count()
+    return int(processes)
+
+
+def make_pool(processes=None, initializer=None, initargs=()):
+    if sys.platform != "win32":
+        return multiprocessing.Pool(process_count(processes), initializer, initargs)
+    exe = os.path.basename(sys.executable).lower()
+    if exe not in ("python.exe", "pythonw.exe"):
+        multiprocessing.set_executable(os.path.join(sys.exec_prefix, "pythonw.exe"))
+    # Workers only need the library modules, so keep them from re-running the tool script
+    main = sys.modules["__main__"]
+    mainFile = getattr(main, "__file__", None)
+    if mainFile is not None:
+        del main.__file__
+    try:
+        return multiprocessing.Pool(process_count(processes), initializer, initargs)
+    finally:
+        if mainFile is not None:
+            main.__file__ = mainFile
+
+
+# (start, stop) pairs covering n items in blocks of size
+def chunk_ranges(n, size):
+    size = max(1, int(size))
+    return [(start, min(start + size, n)) for start in range(0, n, size)]
+
+
+# Apply func to every chunk and return the results in order
+def map_chunks(func, chunks, processes=None, initializer=None, initargs=()):
+    chunks = list(chunks)
+    if process_count(processes) == 1 or len(chunks) <= 1:
+        if initializer is not None:
+            initializer(*initargs)
+        return [func(chunk) for chunk in chunks]
+    pool = make_pool(min(process_count(processes), len(chunks)), initializer, initargs)
+    try:
+        return list(pool.imap(func, chunks))
+    finally:
+        pool.close()
+        pool.join()
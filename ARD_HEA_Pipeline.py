@@ -0,0 +1,379 @@
+# ---------------------------------------------------------------------------
+# NAME: ARD_HEA_Pipeline.py
+# Version: 2.0 (ArcGIS 10.2)
+# Author: Research Planning, Inc.
+#
+# Usage: import ARD_HEA_Pipeline
+#        pipeline = ARD_HEA_Pipeline.Pipeline(ARD_HEA_Pipeline.read_config("site.ini"))
+#        pipeline.run()
+#
+# Description: Runs the HEA GIS stages (create database, filter samples, interpolate,
+#              load surfaces, load site attributes, slice, load footprints, overlay,
+#              import results) in one process from a project configuration file.
+#              Surfaces and footprints are handed from stage to stage as grid arrays,
+#              so the USER_THRESHOLDS, TEMP_THRES and _SC<n> intermediates are not
+#              written.  Only the final COC_DATA and FOOTPRINTS tables (and
+#              SCENARIO_INJURY from the overlay stage) are persisted, each at the end
+#              of the last stage of the run that changes it.
+#
+# Notes:  Stages that wrap a tool script (create_database, filter_samples,
+#         load_site_attributes, import_results) run that script in-process on the
+#         backend, once for every section named after the stage, e.g.
+#         [filter_samples Lead].  Their "arguments" option lists the tool arguments
+#         one per line, "-" standing for a blank optional argument.  progress, when
+#         given, is called with a dictionary for every message and stage start and finish.
+#
+# Date Created: October 19, 2026
+#
+# ---------------------------------------------------------------------------
+
+import os
+import time
+import numpy
+try:
+    from ConfigParser import RawConfigParser
+except ImportError:
+    from configparser import RawConfigParser
+import ARD_HEA_Backend
+import ARD_HEA_Grid
+import ARD_HEA_Thresholds
+import ARD_HEA_Interpolate
+import ARD_HEA_Kriging
+import ARD_HEA_Metrics
+import ARD_HEA_Tables
+import ARD_HEA_Resample
+import ARD_HEA_Overlay
+
+STAGES = ("create_database", "filter_samples", "interpolate", "load_surfaces", "load_site_attributes",
+          "slice", "load_footprints", "overlay", "import_results")
+
+SCRIPTS = {"create_database": "CreateAnalysisDatabase.py",
+           "filter_samples": "FilterAnalyzeSamples.py",
+           "load_site_attributes": "LoadSiteAttributes.py",
+           "import_results": "ImportAnalysisResults.py"}
+
+THRESHOLD_TABLE = "USER_Contaminant_Injury_Thresholds"
+
+# Tables held in memory by each stage until they are flushed
+DIRTIES = {"load_surfaces": ("COC_DATA",),
+           "load_footprints": ("COC_DATA", "FOOTPRINTS")}
+
+
+class stagefailed(Exception):
+    pass
+
+
+def read_config(filename):
+    config = RawConfigParser()
+    if not config.read(filename):
+        raise IOError("Cannot read pipeline configuration " + filename)
+    return config
+
+
+# Stage names checked against STAGES, so only pipeline stages can be run
+def check_stages(stages):
+    for stage in stages:
+        if stage not in STAGES:
+            raise stagefailed("Unknown stage: " + str(stage) + ", use one of " + ", ".join(STAGES))
+    return list(stages)
+
+
+def _list(value):
+    return [v.strip() for v in value.replace(";", ",").split(",") if v.strip()]
+
+
+class Pipeline(object):
+
+    def __init__(self, config, backend=None, progress=None):
+        self.config = config
+        self.progress = progress
+        self.backend = backend or ARD_HEA_Backend.get_backend(self.option("project", "backend"))
+        self.geoDB = self.option("project", "geodatabase")
+        self.resDB = self.option("project", "threshold_database")
+        self.processes = self.option("project", "processes", int)
+        self.keepRasters = self.option("project", "keep_rasters", self._bool, False)
+        self.grid = None
+        self.surfaces = {}
+        self.footprints = {}
+        self.unsaved = set()
+        self.timings = []
+        self.metrics = ARD_HEA_Metrics.project_metrics(self.geoDB, "RunPipeline")
+
+    @staticmethod
+    def _bool(value):
+        return str(value).strip().lower() in ("1", "true", "yes", "on")
+
+    # Config value, default when the section or option is missing or blank
+    def option(self, section, name, cast=str, default=None):
+        if not self.config.has_section(section) or not self.config.has_option(section, name):
+            return default
+        value = self.config.get(section, name).strip()
+        if value == "":
+            return default
+        return cast(value)
+
+    # Stages to run, from [project] stages or every stage with a section
+    def stages(self):
+        stages = self.option("project", "stages", _list)
+        if stages:
+            return check_stages(stages)
+        return [stage for stage in STAGES if self.sections(stage)]
+
+    def sections(self, stage):
+        return [s for s in self.config.sections() if s == stage or s.startswith(stage + " ")]
+
+    def message(self, text):
+        self.backend.message(text)
+        if self.progress is not None:
+            self.progress({"event": "message", "text": text})
+
+    def load_grid(self):
+        if self.grid is None:
+            self.grid = self.backend.load_grid(self.geoDB)
+        return self.grid
+
+    def table(self, name):
+        return self.geoDB + "\\" + name
+
+    def run(self, stages=None):
+        stages = check_stages(stages) if stages else self.stages()
+        self.backend.initialize()
+        for n, stage in enumerate(stages):
+            start = time.time()
+            self.message("Running stage " + stage + "...")
+            if self.progress is not None:
+                self.progress({"event": "stage", "stage": stage, "state": "started"})
+            with self.metrics.stage(stage):
+                if stage in SCRIPTS:
+                    self.run_script(stage)
+                else:
+                    getattr(self, stage)()
+                # Write the tables no later stage of the run changes again
+                later = set(table for s in stages[n + 1:] for table in DIRTIES.get(s, ()))
+                self.flush([table for table in DIRTIES.get(stage, ()) if table not in later])
+            self.timings.append((stage, time.time() - start))
+            if self.progress is not None:
+                self.progress({"event": "stage", "stage": stage, "state": "finished", "seconds": time.time() - start})
+        if self.unsaved:
+            with self.metrics.stage("flush"):
+                self.flush()
+        return self.timings
+
+    # Run the tool script of a stage once for every section named after it
+    def run_script(self, stage):
+        for section in self.sections(stage):
+            args = [("#" if a == "-" else a) for a in self.option(section, "arguments", str, "").splitlines()]
+            args = [a.strip() for a in args if a.strip()]
+            result, output, error = self.backend.run_script(SCRIPTS[stage], args)
+            if output.strip():
+                self.message(output.rstrip())
+            if error is not None:
+                raise stagefailed(section + ": " + error)
+            if stage == "create_database":
+                self.grid = None
+
+    # COC_INVENTORY records as {COC_NAME: surface raster}, the SOURCE_PATH of
+    # rasters registered by reference or the INTERP_LAYER_NAME raster
+    def inventory(self):
+        table = self.table("COC_INVENTORY")
+        fields = ["COC_NAME", "INTERP_LAYER_NAME"]
+        if self.backend.has_field(table, "SOURCE_PATH"):
+            fields.append("SOURCE_PATH")
+        layers = {}
+        for row in self.backend.read_table(table, fields, null_value="").tolist():
+            name, layer = str(row[0]), str(row[1])
+            if len(row) > 2 and row[2]:
+                layers[name] = str(row[2])
+            elif layer:
+                layers[name] = self.table(layer)
+            else:
+                layers[name] = ""
+        return layers
+
+    def contaminants(self, section):
+        names = self.option(section, "contaminants", _list)
+        if names:
+            return names
+        if self.surfaces:
+            return sorted(self.surfaces)
+        return sorted(name for name, layer in self.inventory().items() if layer)
+
+    # Interpolate filtered samples onto the grid in memory
+    def interpolate(self):
+        grid = self.load_grid()
+        method = self.option("interpolate", "method", str.upper, "IDW")
+        power = self.option("interpolate", "power", float, 2.0)
+        neighbors = self.option("interpolate", "neighbors", int, 12 if method == "IDW" else 16)
+        radius = self.option("interpolate", "radius", float)
+        logTransform = self.option("interpolate", "log_transform", self._bool, False)
+        for COCName in self.option("interpolate", "contaminants", _list, []):
+            x, y, values, record = self.backend.read_samples(self.geoDB, COCName)
+            self.message("Interpolating " + str(len(values)) + " " + COCName + " samples onto the analysis grid...")
+            with self.metrics.stage("interpolate " + COCName, rows=len(values), cells=grid.total_cells):
+                if method == "OK":
+                    surface = ARD_HEA_Kriging.krige_grid(grid, x, y, values, None, neighbors, radius, logTransform,
+                                                         record["AVG_DIST"], record["MAX_DIST"],
+                                                         processes=self.processes)[0]
+                else:
+                    surface = ARD_HEA_Interpolate.interpolate_grid(grid, x, y, values, power, neighbors, radius,
+                                                                   logTransform, processes=self.processes)
+            self.surfaces[COCName] = surface
+            if self.keepRasters:
+                import ARD_HEA_Tools
+                outName = ARD_HEA_Tools.sanitize(COCName) + "_" + method
+                self.backend.write_raster(self.geoDB, grid, surface, self.table(outName))
+                self.backend.register_surface(self.geoDB, COCName, outName, method, logTransform)
+                self.backend.record_resample(self.geoDB, COCName, "NONE")
+
+    # Resampling method for registered rasters that do not line up with the grid
+    def resample_method(self):
+        return ARD_HEA_Resample.method_name(self.option("load_surfaces", "resample", str, "NEAREST"))
+
+    # Methods the registered surfaces were loaded with as {COC_NAME: method}
+    def resample_methods(self):
+        table = self.table("COC_INVENTORY")
+        if not self.backend.has_field(table, "RESAMPLE_METHOD"):
+            return {}
+        rows = self.backend.read_table(table, ["COC_NAME", "RESAMPLE_METHOD"], null_value="")
+        return dict((str(name), ARD_HEA_Resample.recorded_method(method)) for name, method in rows.tolist())
+
+    # Surfaces not interpolated in this run are read from their registered rasters
+    def load_surfaces(self):
+        grid = self.load_grid()
+        method = self.resample_method()
+        layers = None
+        for COCName in self.contaminants("load_surfaces"):
+            if COCName not in self.surfaces:
+                if layers is None:
+                    layers = self.inventory()
+                if not layers.get(COCName):
+                    raise stagefailed("No interpolated surface registered for contaminant " + COCName)
+                self.message("Extracting " + COCName + " data from " + layers[COCName])
+                with self.metrics.stage("surface extract", cells=grid.total_cells):
+                    self.surfaces[COCName] = self.backend.read_raster(self.geoDB, grid, layers[COCName], method)
+                self.backend.record_resample(self.geoDB, COCName, method)
+            count = len(grid.records(self.surfaces[COCName])[0])
+            if count != grid.total_cells:
+                self.message("Warning: the number of contaminant surface cells: " + str(count) +
+                             ", does not match the number of analysis grid cells: " + str(grid.total_cells))
+            self.unsaved.add(("COC_DATA", COCName))
+
+    # Reclass surfaces by the injury thresholds, keeping footprints in memory
+    def slice(self):
+        grid = self.load_grid()
+        table = self.option("slice", "threshold_table", str, None)
+        if table is None:
+            table = self.resDB + "\\" + THRESHOLD_TABLE
+        fields = ARD_HEA_Thresholds.fields()
+        thresholds = self.backend.read_table(table, fields, null_value=dict((f, numpy.nan) for f in fields[2:]))
+        # Registered surfaces and their methods, read once for the stage when needed
+        layers = methods = None
+        for row in thresholds.tolist():
+            record = dict((f, None if isinstance(v, float) and v != v else v) for f, v in zip(fields, row))
+            COCName = str(record["COC_NAME"])
+            scenario = int(record["Scenario_ID"])
+            if COCName not in self.surfaces:
+                if layers is None:
+                    layers = self.inventory()
+                    methods = self.resample_methods()
+                layer = layers.get(COCName)
+                if not layer:
+                    self.message("Cannot reclass: " + COCName + " for scenario: " + str(scenario))
+                    continue
+                method = methods.get(COCName, "NEAREST")
+                self.surfaces[COCName] = self.backend.read_raster(self.geoDB, grid, layer, method)
+            values = self.surfaces[COCName]
+            if not numpy.isfinite(values).any():
+                self.message("Cannot reclass: " + COCName + " for scenario: " + str(scenario))
+                continue
+            ranges, levels, errFlag = ARD_HEA_Thresholds.threshold_ranges(
+                record, float(numpy.nanmin(values)), float(numpy.nanmax(values)))
+            if errFlag or not ranges:
+                self.message("Cannot reclass: " + COCName + " for scenario: " + str(scenario) +
+                             ", missing or incorrect values in threshold table")
+                continue
+            self.message("Reclassifying " + COCName + " for scenario " + str(scenario))
+            with self.metrics.stage("reclass", cells=grid.total_cells):
+                self.footprints[(scenario, COCName)] = ARD_HEA_Thresholds.reclass(values, ranges)
+            if self.keepRasters:
+                import ARD_HEA_Tools
+                outName = ARD_HEA_Tools.sanitizetext(COCName.upper()) + "_SC" + str(scenario)
+                self.backend.write_raster(self.geoDB, grid, self.footprints[(scenario, COCName)], self.table(outName))
+
+    def load_footprints(self):
+        scenarios = self.option("load_footprints", "scenarios", _list)
+        if scenarios:
+            scenarios = set(int(s) for s in scenarios)
+        for scenario, COCName in sorted(self.footprints):
+            if scenarios and scenario not in scenarios:
+                continue
+            self.message("Loading scenario " + str(scenario) + " footprint for contaminant " + COCName)
+            self.unsaved.add(("FOOTPRINTS", (scenario, COCName)))
+            if COCName in self.surfaces:
+                self.unsaved.add(("COC_DATA", COCName))
+
+    # Footprint of the last scenario loaded for a contaminant, as COC_DATA carries it
+    def _coc_footprint(self, COCName):
+        loaded = [key for table, key in self.unsaved if table == "FOOTPRINTS" and key[1] == COCName]
+        if not loaded:
+            return None
+        return self.footprints[max(loaded)]
+
+    # Combine the footprints of each scenario into one injury per cell and write
+    # the injured cells to SCENARIO_INJURY
+    def overlay(self):
+        grid = self.load_grid()
+        rule = ARD_HEA_Overlay.rule_name(self.option("overlay", "rule", str, "MAX"))
+        scenarios = self.option("overlay", "scenarios", _list)
+        if scenarios:
+            scenarios = set(int(s) for s in scenarios)
+        table = self.table(ARD_HEA_Overlay.INJURY_TABLE)
+        self.backend.create_injury_table(self.geoDB)
+        for scenario in sorted(set(key[0] for key in self.footprints)):
+            if scenarios and scenario not in scenarios:
+                continue
+            names = sorted(COCName for s, COCName in self.footprints if s == scenario)
+            self.message("Combining " + str(len(names)) + " contaminant(s) for scenario " + str(scenario) +
+                         " (" + rule + ")")
+            with self.metrics.stage("combine", cells=grid.total_cells * len(names)):
+                injury, dominant, count = ARD_HEA_Overlay.overlay([self.footprints[(scenario, n)] for n in names], rule)
+                records = ARD_HEA_Overlay.injury_records(grid, scenario, names, injury, dominant, count)
+            with self.metrics.stage("SCENARIO_INJURY append", rows=len(records)):
+                if self.backend.exists(table):
+                    self.backend.delete_rows(table, {"SCENARIO_ID": scenario})
+                self.backend.append_rows(table, records)
+
+    # Write the final tables (default every table) for everything loaded since
+    # they were last flushed
+    def flush(self, tables=None):
+        flushing = set(item for item in self.unsaved if tables is None or item[0] in tables)
+        if not flushing:
+            return
+        grid = self.grid
+        for table, key in sorted(flushing, key=str):
+            if table == "COC_DATA":
+                gridIDs, values = grid.records(self.surfaces[key])
+                records = ARD_HEA_Tables.TypedTable.from_columns("COC_DATA", GRID_ID=gridIDs, COC_NAME=key,
+                                                                 COC_VALUE=values)
+                footprint = self._coc_footprint(key)
+                if footprint is not None:
+                    flat = grid.gather(self.surfaces[key])
+                    with numpy.errstate(invalid="ignore"):
+                        keep = numpy.isfinite(flat) & (flat >= 0)
+                    ids = grid.gather(footprint)[keep]
+                    records.set_column("FOOTPRINT_ID", numpy.where(ids == ARD_HEA_Grid.NODATA, numpy.nan, ids))
+                self.message("Updating COC value table with " + key + " data...")
+                with self.metrics.stage("COC_DATA append", rows=len(records)):
+                    self.backend.delete_rows(self.table("COC_DATA"), {"COC_NAME": key})
+                    self.backend.append_rows(self.table("COC_DATA"), records)
+        for table, key in sorted(flushing, key=str):
+            if table == "FOOTPRINTS":
+                scenario, COCName = key
+                footprint = self.footprints[key]
+                gridIDs, ids = grid.sparse(numpy.where(footprint == ARD_HEA_Grid.NODATA, 0, footprint))
+                records = ARD_HEA_Tables.TypedTable.from_columns("FOOTPRINTS", GRID_ID=gridIDs, SCENARIO_ID=scenario,
+                                                                 COC_NAME=COCName, FOOTPRINT_ID=ids)
+                with self.metrics.stage("FOOTPRINTS append", rows=len(records)):
+                    self.backend.delete_rows(self.table("FOOTPRINTS"), {"SCENARIO_ID": scenario, "COC_NAME": COCName})
+                    self.backend.append_rows(self.table("FOOTPRINTS"), records)
+        self.unsaved -= flushing
@@ -0,0 +1,198 @@
+# ---------------------------------------------------------------------------
+# NAME: ARD_HEA_Provenance.py
+# Version: 2.0 (ArcGIS 10.2)
+# Author: Research Planning, Inc.
+#
+# Usage: import ARD_HEA_Provenance
+#        newLinks = ARD_HEA_Provenance.record(geoDB, UNFRaster, history, replace=True)
+#        row.COC_XML = ARD_HEA_Provenance.reference(geoDB, (UNFRaster,), row.COC_XML)
+#        text = ARD_HEA_Provenance.coc_lineage(geoDB, COCName)
+#
+# Description: Provenance store for the geoprocessing history of project datasets.
+#              Each geoprocessing step (a <Process> element of the history returned
+#              by ARD_HEA_Tools.get_process_history) is kept once in PROV_STEPS under
+#              the SHA-1 of its text, and PROV_LINKS ties each dataset to its steps in
+#              order.  COC_INVENTORY.COC_XML holds a short "PROV:" reference to the
+#              datasets instead of the history text, so reloading a contaminant adds
+#              only the new steps and cursors over COC_INVENTORY stay small.
+#
+# Notes:  A lineage query reads the links of the datasets asked for and then only
+#         the steps they point to.  COC_XML values written before the store existed
+#         are moved into it the first time the contaminant is reloaded.  Tools that
+#         recreate a dataset record it with replace=True, dropping the links of the
+#         previous run so its lineage is only the history of the new dataset.
+#
+# Date Created: October 19, 2026
+#
+# ---------------------------------------------------------------------------
+
+import re
+import hashlib
+
+PREFIX = "PROV:"
+STEPS_TABLE = "PROV_STEPS"
+LINKS_TABLE = "PROV_LINKS"
+STEP_SIZE = 25000
+QUERY_CHUNK = 100
+
+# Geodatabases whose provenance tables are known to exist
+_ready = set()
+
+
+# Split a geoprocessing history into its steps
+def split_steps(history):
+    if not history:
+        return []
+    steps = re.findall(r"<Process\b.*?</Process>", history, re.S)
+    if not steps:
+        steps = [history]
+    return [step.strip() for step in steps if step.strip()]
+
+
+def step_id(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+# Name a dataset is linked under, its name within the geodatabase
+def dataset_name(dataset):
+    return str(dataset).replace("/", "\\").rstrip("\\").split("\\")[-1]
+
+
+def is_reference(text):
+    return text is not None and str(text).startswith(PREFIX)
+
+
+# Dataset names of a COC_XML reference
+def referenced(text):
+    if not is_reference(text):
+        return []
+    return [name for name in str(text)[len(PREFIX):].split(";") if name]
+
+
+def _quote(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def create_tables(geoDB):
+    import arcpy
+    steps = geoDB + "\\" + STEPS_TABLE
+    links = geoDB + "\\" + LINKS_TABLE
+    if not arcpy.Exists(steps):
+        arcpy.CreateTable_management(geoDB, STEPS_TABLE, "", "")
+        arcpy.AddField_management(steps, "STEP_ID", "TEXT", "", "", "40", "", "NON_NULLABLE", "REQUIRED", "")
+        arcpy.AddField_management(steps, "STEP_TEXT", "TEXT", "", "", str(STEP_SIZE), "", "NULLABLE", "NON_REQUIRED", "")
+        arcpy.AddIndex_management(steps, "STEP_ID", "PSTP_SID_IDX", "UNIQUE", "NON_ASCENDING")
+    if not arcpy.Exists(links):
+        arcpy.CreateTable_management(geoDB, LINKS_TABLE, "", "")
+        arcpy.AddField_management(links, "DATASET", "TEXT", "", "", "100", "", "NON_NULLABLE", "REQUIRED", "")
+        arcpy.AddField_management(links, "STEP_ID", "TEXT", "", "", "40", "", "NON_NULLABLE", "REQUIRED", "")
+        arcpy.AddField_management(links, "SEQ", "LONG", "", "", "", "", "NON_NULLABLE", "REQUIRED", "")
+        arcpy.AddIndex_management(links, "DATASET", "PLNK_DST_IDX", "NON_UNIQUE", "NON_ASCENDING")
+    _ready.add(geoDB)
+
+
+def _ensure_tables(geoDB):
+    if geoDB not in _ready:
+        create_tables(geoDB)
+
+
+# {STEP_ID: STEP_TEXT} of the given steps, read in chunks with IN queries
+def _read_steps(geoDB, ids, fields=("STEP_ID", "STEP_TEXT")):
+    import arcpy
+    table = geoDB + "\\" + STEPS_TABLE
+    found = {}
+    ids = sorted(set(ids))
+    for start in range(0, len(ids), QUERY_CHUNK):
+        chunk = ids[start:start + QUERY_CHUNK]
+        where = arcpy.AddFieldDelimiters(table, "STEP_ID") + " IN (" + ", ".join(_quote(i) for i in chunk) + ")"
+        with arcpy.da.SearchCursor(table, fields, where) as cursor:
+            for row in cursor:
+                found[row[0]] = row[-1]
+    return found
+
+
+# (SEQ, STEP_ID) links of a dataset in order
+def _read_links(geoDB, dataset):
+    import arcpy
+    table = geoDB + "\\" + LINKS_TABLE
+    where = arcpy.AddFieldDelimiters(table, "DATASET") + " = " + _quote(dataset_name(dataset))
+    with arcpy.da.SearchCursor(table, ("SEQ", "STEP_ID"), where) as cursor:
+        return sorted((int(row[0]), str(row[1])) for row in cursor)
+
+
+# Delete the links of a dataset
+def _delete_links(geoDB, dataset):
+    import arcpy
+    table = geoDB + "\\" + LINKS_TABLE
+    where = arcpy.AddFieldDelimiters(table, "DATASET") + " = " + _quote(dataset_name(dataset))
+    with arcpy.da.UpdateCursor(table, ("OID@",), where) as cursor:
+        for row in cursor:
+            cursor.deleteRow()
+
+
+# Store the steps of a history and link them to dataset.  Steps already stored
+# or already linked to the dataset are skipped; with replace the links of a
+# dataset that was recreated are dropped first.  Returns the number of new links.
+def record(geoDB, dataset, history, replace=False):
+    import arcpy
+    steps = split_steps(history)
+    if replace and arcpy.Exists(geoDB + "\\" + LINKS_TABLE):
+        _delete_links(geoDB, dataset)
+    if not steps:
+        return 0
+    _ensure_tables(geoDB)
+    ids = [step_id(step) for step in steps]
+    stored = _read_steps(geoDB, ids, ("STEP_ID",))
+    with arcpy.da.InsertCursor(geoDB + "\\" + STEPS_TABLE, ("STEP_ID", "STEP_TEXT")) as cursor:
+        for sid, step in zip(ids, steps):
+            if sid not in stored:
+                cursor.insertRow((sid, step[:STEP_SIZE]))
+                stored[sid] = None
+    links = _read_links(geoDB, dataset)
+    linked = set(sid for seq, sid in links)
+    seq = links[-1][0] if links else 0
+    newLinks = 0
+    with arcpy.da.InsertCursor(geoDB + "\\" + LINKS_TABLE, ("DATASET", "STEP_ID", "SEQ")) as cursor:
+        for sid in ids:
+            if sid not in linked:
+                seq += 1
+                cursor.insertRow((dataset_name(dataset), sid, seq))
+                linked.add(sid)
+                newLinks += 1
+    return newLinks
+
+
+# COC_XML reference to datasets.  A history text left in previous by older
+# versions is stored under the first dataset before it is replaced.
+def reference(geoDB, datasets, previous=None):
+    if previous and not is_reference(previous):
+        record(geoDB, datasets[0], previous)
+    names = referenced(previous)
+    for dataset in datasets:
+        if dataset_name(dataset) not in names:
+            names.append(dataset_name(dataset))
+    return PREFIX + ";".join(names)
+
+
+# Geoprocessing history of a dataset, its steps in the order they were recorded
+def lineage(geoDB, dataset):
+    import arcpy
+    if not arcpy.Exists(geoDB + "\\" + LINKS_TABLE):
+        return []
+    links = _read_links(geoDB, dataset)
+    texts = _read_steps(geoDB, [sid for seq, sid in links])
+    return [texts[sid] for seq, sid in links if sid in texts]
+
+
+# History text of a contaminant, following its COC_XML reference
+def coc_lineage(geoDB, COCName):
+    import arcpy
+    table = geoDB + "\\COC_INVENTORY"
+    where = arcpy.AddFieldDelimiters(table, "COC_NAME") + " = " + _quote(COCName)
+    text = None
+    with arcpy.da.SearchCursor(table, ("COC_XML",), where) as cursor:
+        for row in cursor:
+            text = row[0]
+    if not is_reference(text):
+        return text or ""
+    return "".join("".join(lineage(geoDB, name)) for name in referenced(text))
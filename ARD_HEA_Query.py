@@ -0,0 +1,562 @@
+# ---------------------------------------------------------------------------
+# NAME: ARD_HEA_Query.py
+# Version: 2.0 (ArcGIS 10.2)
+# Author: Research Planning, Inc.
+#
+# Usage: python ARD_HEA_Query.py <input_analysis_database> [arcpy|local] [port]
+#        http://localhost:6720/point?grid_id=1234
+#        http://localhost:6720/point?x=512345&y=4001234&table=COC_DATA
+#        http://localhost:6720/aggregate?table=ANALYSIS_RESULTS&field=DSAY_Injury&op=sum&Scenario_ID=3&SUBSITE_ID=NORTH
+#        http://localhost:6720/window?raster=SC3_BASE_DSAY&xmin=512000&ymin=4001000&xmax=513000&ymax=4002000
+#        http://localhost:6720/threshold?coc=Lead&value=25,50&habitat=MARSH
+#        http://localhost:6720/curve?coc=Lead&points=100
+#
+# Description: Read-only HTTP/JSON query service over one analysis geodatabase.  The
+#              COC_DATA, SITE_ATTRIBUTES, FOOTPRINTS, SCENARIO_INJURY and imported
+#              ANALYSIS_RESULTS tables are read once into memory and filtered through
+#              sorted column indexes built the first time a field is queried, and
+#              rasters are read onto the analysis grid through the project raster
+#              cache.  Responses are kept in an LRU cache, so repeated questions are
+#              answered without touching the tables again.
+#                /tables     - tables and row counts
+#                /point      - rows of each table at a GRID_ID or x, y coordinate
+#                /aggregate  - count, sum, mean, min or max of a field, optionally
+#                              by group, for rows matching the filters
+#                /window     - raster values of a block of grid rows and columns
+#                /threshold  - cells and area of a COC above threshold values, or in
+#                              each level of Thres_ fields, optionally in one HABITAT_ID
+#                /curve      - area versus threshold curve of a COC
+#                /refresh    - drop the loaded tables and cached responses
+#              Any other parameter is a filter field=value[,value...]; a
+#              SITE_ATTRIBUTES field filters the cells of other tables through GRID_ID.
+#              Threshold questions use a sorted value index of each COC
+#              (ARD_HEA_ThresholdIndex), the one saved by BuildThresholdIndex when it
+#              was built from the same COC_DATA rows or else built from COC_DATA when
+#              first asked.
+#
+# Notes:  The service only listens on localhost.  Tables are a snapshot taken when
+#         first queried; call /refresh after running tools against the project.
+#
+# Date Created: October 19, 2026
+#
+# ---------------------------------------------------------------------------
+
+import os
+import sys
+import json
+import threading
+import collections
+import numpy
+import ARD_HEA_Backend
+import ARD_HEA_Thresholds
+import ARD_HEA_ThresholdIndex
+from ARD_HEA_Tables import NULL_INT
+try:
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+    from SocketServer import ThreadingMixIn
+    from urlparse import urlparse, parse_qs
+except ImportError:
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+    from socketserver import ThreadingMixIn
+    from urllib.parse import urlparse, parse_qs
+
+PORT = 6720
+HOST = "localhost"
+CACHE_ENTRIES = 512
+RASTER_ENTRIES = 4
+MAX_ROWS = 10000
+MAX_WINDOW_CELLS = 1048576
+OPERATIONS = ("count", "sum", "mean", "min", "max")
+
+# Fields served for each table with the value NULLs are read as
+TABLES = collections.OrderedDict((
+    ("COC_DATA", (("GRID_ID", 0), ("COC_NAME", ""), ("COC_VALUE", numpy.nan), ("FOOTPRINT_ID", NULL_INT))),
+    ("SITE_ATTRIBUTES", (("GRID_ID", 0), ("HABITAT_ID", ""), ("CONDITION_ID", ""), ("REMEDIATION_ID", ""),
+                         ("SUBSITE_ID", ""), ("DEPTH_ID", ""))),
+    ("FOOTPRINTS", (("GRID_ID", 0), ("SCENARIO_ID", NULL_INT), ("COC_NAME", ""), ("FOOTPRINT_ID", NULL_INT))),
+    ("SCENARIO_INJURY", (("GRID_ID", 0), ("SCENARIO_ID", NULL_INT), ("PERCENT_INJURY", numpy.nan),
+                         ("DOMINANT_COC", ""), ("COC_COUNT", NULL_INT))),
+    ("ANALYSIS_RESULTS", (("Grid_ID", 0), ("Scenario_ID", NULL_INT), ("ExpYear", NULL_INT),
+                          ("DSAY_Injury", numpy.nan), ("PERCENT_INJURY", numpy.nan))),
+))
+
+# Query parameters that are not filters
+RESERVED = ("table", "field", "op", "group", "limit", "grid_id", "x", "y", "raster",
+            "row", "col", "nrows", "ncols", "xmin", "ymin", "xmax", "ymax")
+
+
+class badquery(Exception):
+    pass
+
+
+class LRUCache(object):
+
+    def __init__(self, maxEntries):
+        self.maxEntries = maxEntries
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+            self.hits += 1
+            value = self.entries.pop(key)
+            self.entries[key] = value
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries.pop(key, None)
+            self.entries[key] = value
+            while len(self.entries) > self.maxEntries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+# Row positions of a column sorted by value, for equality lookups by binary search
+class ColumnIndex(object):
+
+    def __init__(self, values):
+        self.order = numpy.argsort(values, kind="mergesort")
+        self.values = values[self.order]
+
+    def lookup(self, values):
+        if not len(values):
+            return numpy.zeros(0, dtype=numpy.int64)
+        values = numpy.unique(numpy.asarray(values))
+        lo = numpy.searchsorted(self.values, values, "left")
+        hi = numpy.searchsorted(self.values, values, "right")
+        lengths = hi - lo
+        starts = numpy.repeat(lo - (numpy.cumsum(lengths) - lengths), lengths)
+        return numpy.sort(self.order[starts + numpy.arange(lengths.sum())])
+
+
+class QueryTable(object):
+
+    def __init__(self, name, rows, nulls):
+        self.name = name
+        self.rows = rows
+        self.nulls = nulls
+        self.gridField = rows.dtype.names[0]
+        self.indexes = {}
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def index(self, field):
+        with self.lock:
+            if field not in self.indexes:
+                self.indexes[field] = ColumnIndex(self.rows[field])
+            return self.indexes[field]
+
+    # Query string values cast to the type of a field
+    def cast(self, field, values):
+        if field not in self.rows.dtype.names:
+            raise badquery("Field " + field + " is not in " + self.name)
+        kind = self.rows.dtype[field].kind
+        try:
+            if kind in "US":
+                return [str(v) for v in values]
+            if kind in "iu":
+                return [int(float(v)) for v in values]
+            return [float(v) for v in values]
+        except ValueError:
+            raise badquery("Bad value for " + field + ": " + ",".join(values))
+
+    # Sorted row positions matching every {field: [values]} filter, None for all rows
+    def select(self, filters):
+        positions = None
+        for field, values in sorted(filters.items(), key=lambda item: len(item[1])):
+            rows = self.index(field).lookup(values)
+            positions = rows if positions is None else numpy.intersect1d(positions, rows, assume_unique=True)
+            if not len(positions):
+                break
+        return positions
+
+    # JSON ready rows, NULLs as None
+    def records(self, positions, limit=MAX_ROWS):
+        rows = self.rows if positions is None else self.rows[positions]
+        out = []
+        for row in rows[:limit].tolist():
+            record = collections.OrderedDict()
+            for field, value in zip(self.rows.dtype.names, row):
+                null = self.nulls[field]
+                if isinstance(value, float) and value != value or (null == NULL_INT and value == NULL_INT):
+                    value = None
+                record[field] = value
+            out.append(record)
+        return out
+
+
+def _values(values):
+    return [v for value in values for v in value.split(",") if v != ""]
+
+
+def _nulls(values):
+    return [None if v != v else v for v in values.tolist()]
+
+
+# Aggregate of values by group key, (keys, results, counts)
+def _reduce(values, keys, op):
+    if keys is None:
+        keys = numpy.zeros(len(values), dtype=numpy.int64)
+    unique, inverse = numpy.unique(keys, return_inverse=True)
+    valid = ~numpy.isnan(values)
+    counts = numpy.bincount(inverse[valid], minlength=len(unique))
+    if op == "count":
+        return unique, counts, counts
+    sums = numpy.bincount(inverse[valid], weights=values[valid], minlength=len(unique))
+    if op == "sum":
+        return unique, sums, counts
+    if op == "mean":
+        with numpy.errstate(invalid="ignore", divide="ignore"):
+            return unique, numpy.where(counts > 0, sums / numpy.maximum(counts, 1), numpy.nan), counts
+    out = numpy.full(len(unique), numpy.nan)
+    if valid.any():
+        order = numpy.argsort(inverse[valid], kind="mergesort")
+        groups = inverse[valid][order]
+        starts = numpy.flatnonzero(numpy.r_[True, groups[1:] != groups[:-1]])
+        reduce = numpy.minimum if op == "min" else numpy.maximum
+        out[groups[starts]] = reduce.reduceat(values[valid][order], starts)
+    return unique, out, counts
+
+
+class QueryService(object):
+
+    def __init__(self, geoDB, backend=None, cacheEntries=CACHE_ENTRIES):
+        self.geoDB = geoDB
+        self.backend = backend or ARD_HEA_Backend.get_backend()
+        self.grid = self.backend.load_grid(geoDB)
+        self.tables = {}
+        self.indexes = {}
+        self.lock = threading.Lock()
+        self.responses = LRUCache(cacheEntries)
+        self.rasters = LRUCache(RASTER_ENTRIES)
+
+    # Table loaded on first use, None when the project does not have it
+    def table(self, name):
+        with self.lock:
+            if name not in self.tables:
+                dataset = self.geoDB + "\\" + name
+                rows = None
+                if self.backend.exists(dataset):
+                    fields = [(f, null) for f, null in TABLES[name] if self.backend.has_field(dataset, f)]
+                    rows = QueryTable(name, self.backend.read_table(dataset, [f for f, null in fields],
+                                                                    null_value=dict(fields)), dict(fields))
+                self.tables[name] = rows
+            return self.tables[name]
+
+    def _table(self, name):
+        if name not in TABLES:
+            raise badquery("Unknown table " + str(name) + ", use one of " + ", ".join(TABLES))
+        table = self.table(name)
+        if table is None:
+            raise badquery("Table " + name + " does not exist in " + self.geoDB)
+        return table
+
+    # Row positions of a table matching the filters of a query
+    def _select(self, table, params):
+        filters = {}
+        cells = {}
+        for field, values in params.items():
+            if field in RESERVED:
+                continue
+            values = _values(values)
+            if field in table.rows.dtype.names:
+                filters[field] = table.cast(field, values)
+            elif field in dict(TABLES["SITE_ATTRIBUTES"]):
+                cells[field] = values
+            else:
+                raise badquery("Field " + field + " is not in " + table.name)
+        if cells:
+            site = self._table("SITE_ATTRIBUTES")
+            siteRows = site.select(dict((f, site.cast(f, v)) for f, v in cells.items()))
+            ids = site.rows["GRID_ID"] if siteRows is None else site.rows["GRID_ID"][siteRows]
+            filters[table.gridField] = numpy.unique(ids).tolist()
+        return table.select(filters)
+
+    def _grid_id(self, params):
+        if "grid_id" in params:
+            try:
+                return int(params["grid_id"][0])
+            except ValueError:
+                raise badquery("Bad grid_id " + params["grid_id"][0])
+        if "x" not in params or "y" not in params:
+            raise badquery("Give grid_id or x and y")
+        try:
+            row, col = self.grid.locate(float(params["x"][0]), float(params["y"][0]))
+        except ValueError:
+            raise badquery("Bad coordinate " + params["x"][0] + ", " + params["y"][0])
+        if int(row) < 0 or not self.grid.mask[int(row), int(col)]:
+            raise badquery("Coordinate is outside the analysis grid")
+        return int(self.grid.grid_id(row, col))
+
+    def tables_query(self, params):
+        out = collections.OrderedDict()
+        for name in TABLES:
+            table = self.table(name)
+            if table is not None:
+                out[name] = {"rows": len(table), "fields": list(table.rows.dtype.names)}
+        return {"geodatabase": self.geoDB, "tables": out}
+
+    def point_query(self, params):
+        gridID = self._grid_id(params)
+        row, col = self.grid.row_col(gridID)
+        names = _values(params["table"]) if "table" in params else list(TABLES)
+        out = collections.OrderedDict()
+        for name in names:
+            table = self._table(name) if "table" in params else self.table(name)
+            if table is None:
+                continue
+            query = dict(params)
+            query[table.gridField] = [str(gridID)]
+            try:
+                out[name] = table.records(self._select(table, query))
+            except badquery:
+                if "table" in params:
+                    raise
+        return {"grid_id": gridID, "row": int(row), "col": int(col), "tables": out}
+
+    def aggregate_query(self, params):
+        table = self._table(params.get("table", ["ANALYSIS_RESULTS"])[0])
+        op = params.get("op", ["sum"])[0].lower()
+        if op not in OPERATIONS:
+            raise badquery("Unknown op " + op + ", use one of " + ", ".join(OPERATIONS))
+        field = params.get("field", [table.gridField])[0]
+        table.cast(field, [])
+        positions = self._select(table, params)
+        rows = table.rows if positions is None else table.rows[positions]
+        values = rows[field].astype(numpy.float64) if rows.dtype[field].kind in "iuf" else numpy.zeros(len(rows))
+        if table.nulls[field] == NULL_INT:
+            # Nullable integers may be stored as floats, the sentinel is NULL either way
+            values[values == NULL_INT] = numpy.nan
+        if op != "count" and rows.dtype[field].kind not in "iuf":
+            raise badquery("Field " + field + " is not numeric")
+        out = {"table": table.name, "field": field, "op": op, "rows": len(rows)}
+        if "group" not in params:
+            keys, results, counts = _reduce(values, None, op)
+            out["value"] = _nulls(results)[0] if len(results) else (0 if op in ("count", "sum") else None)
+            return out
+        group = params["group"][0]
+        table.cast(group, [])
+        keys, results, counts = _reduce(values, rows[group], op)
+        out["group"] = group
+        out["groups"] = [collections.OrderedDict(((group, k), ("value", v), ("rows", int(c))))
+                         for k, v, c in zip(keys.tolist(), _nulls(results), counts.tolist())]
+        return out
+
+    def window_query(self, params):
+        if "raster" not in params:
+            raise badquery("Give a raster name")
+        name = params["raster"][0]
+        if not name or any(c in name for c in "\\/:") or ".." in name:
+            raise badquery("Bad raster name " + name)
+        try:
+            if "xmin" in params:
+                rows, cols = self.grid.locate([float(params["xmin"][0]), float(params["xmax"][0])],
+                                              [float(params["ymax"][0]), float(params["ymin"][0])])
+                row0, col0 = max(int(rows[0]), 0), max(int(cols[0]), 0)
+                row1 = int(rows[1]) if rows[1] >= 0 else self.grid.nrows - 1
+                col1 = int(cols[1]) if cols[1] >= 0 else self.grid.ncols - 1
+                nrows, ncols = row1 - row0 + 1, col1 - col0 + 1
+            else:
+                row0, col0 = int(params.get("row", [0])[0]), int(params.get("col", [0])[0])
+                nrows, ncols = int(params.get("nrows", [1])[0]), int(params.get("ncols", [1])[0])
+        except (KeyError, ValueError):
+            raise badquery("Give row, col, nrows and ncols or xmin, ymin, xmax and ymax")
+        if nrows <= 0 or ncols <= 0 or row0 >= self.grid.nrows or col0 >= self.grid.ncols:
+            raise badquery("Window is outside the analysis grid")
+        if nrows * ncols > MAX_WINDOW_CELLS:
+            raise badquery("Window is larger than " + str(MAX_WINDOW_CELLS) + " cells")
+        values = self.rasters.get(name)
+        if values is None:
+            raster = self.geoDB + "\\" + name
+            if not self.backend.exists(raster):
+                raise badquery("Raster " + name + " does not exist in " + self.geoDB)
+            values = self.backend.read_raster(self.geoDB, self.grid, raster)
+            self.rasters.put(name, values)
+        block = numpy.asarray(values[row0:row0 + nrows, col0:col0 + ncols], dtype=numpy.float64)
+        x, y = self.grid.centers(row0, col0)
+        return {"raster": name, "row": row0, "col": col0, "nrows": block.shape[0], "ncols": block.shape[1],
+                "cellsize": self.grid.cellsize, "x": float(x), "y": float(y),
+                "values": [_nulls(line) for line in block]}
+
+    # Index of a COC saved by BuildThresholdIndex, None when there is none or the
+    # rows it was built from differ from the COC_DATA snapshot
+    def saved_index(self, COCName, rows, habitats=None):
+        filename = ARD_HEA_ThresholdIndex.index_file(ARD_HEA_ThresholdIndex.index_folder(self.geoDB), COCName)
+        if not os.path.exists(filename):
+            return None
+        index = ARD_HEA_ThresholdIndex.ThresholdIndex.load(filename)
+        if habitats is not None and index.habitatValues is None:
+            return None
+        if index.source != ARD_HEA_ThresholdIndex.source_marker(rows["GRID_ID"], rows["COC_VALUE"], habitats):
+            return None
+        return index
+
+    # Sorted value index of a COC, the saved one when it is current or else built
+    # from COC_DATA, split by HABITAT_ID when asked for
+    def threshold_index(self, COCName, byHabitat=False):
+        key = (COCName, byHabitat)
+        index = self.indexes.get(key)
+        if index is None:
+            data = self._table("COC_DATA")
+            rows = data.rows[data.select({"COC_NAME": data.cast("COC_NAME", [COCName])})]
+            if not len(rows):
+                raise badquery("No COC_DATA rows for contaminant " + COCName)
+            habitats = None
+            if byHabitat:
+                site = self._table("SITE_ATTRIBUTES")
+                habitats = ARD_HEA_ThresholdIndex.habitat_ids(self.grid, site.rows["GRID_ID"],
+                                                              site.rows["HABITAT_ID"], rows["GRID_ID"])
+            index = self.saved_index(COCName, rows, habitats)
+            if index is None:
+                index = ARD_HEA_ThresholdIndex.ThresholdIndex(COCName, rows["GRID_ID"], rows["COC_VALUE"], habitats,
+                                                              self.grid.cellsize ** 2)
+            with self.lock:
+                self.indexes[key] = index
+        return index
+
+    def _index(self, params):
+        if "coc" not in params:
+            raise badquery("Give a coc")
+        habitat = params["habitat"][0] if "habitat" in params else ARD_HEA_ThresholdIndex.ALL
+        index = self.threshold_index(params["coc"][0], habitat is not ARD_HEA_ThresholdIndex.ALL)
+        return index, habitat
+
+    def threshold_query(self, params):
+        index, habitat = self._index(params)
+        record = dict((f, None) for f in ARD_HEA_Thresholds.fields()[2:])
+        try:
+            levels = dict((f, float(v[0])) for f, v in params.items() if f in record)
+            values = [float(v) for v in _values(params.get("value", []))]
+        except ValueError:
+            raise badquery("Bad threshold value")
+        try:
+            limit = int(params.get("limit", [MAX_ROWS])[0])
+        except ValueError:
+            raise badquery("Bad limit " + params["limit"][0])
+        out = {"coc": index.COCName, "habitat": habitat, "cellArea": index.cellArea}
+        try:
+            if levels:
+                record.update(levels)
+                out["levels"] = [collections.OrderedDict((("category", c), ("from", f), ("to", t), ("percent", p),
+                                                          ("cells", n), ("area", n * index.cellArea)))
+                                 for c, f, t, p, n in index.level_cells(record, habitat)]
+            elif not values:
+                raise badquery("Give threshold values or Thres_ level fields")
+            cells = index.cells_above(values, habitat)
+        except ARD_HEA_ThresholdIndex.noindex as e:
+            raise badquery(str(e))
+        out["thresholds"] = [collections.OrderedDict((("value", v), ("cells", int(n)), ("area", n * index.cellArea)))
+                             for v, n in zip(values, cells.tolist())]
+        if len(values) == 1 and params.get("cells", ["false"])[0].lower() == "true":
+            out["grid_ids"] = index.grid_ids_above(values[0], habitat)[::-1][:min(limit, MAX_ROWS)].tolist()
+        return out
+
+    def curve_query(self, params):
+        index, habitat = self._index(params)
+        try:
+            values = [float(v) for v in _values(params["values"])] if "values" in params else None
+            points = int(params.get("points", [ARD_HEA_ThresholdIndex.CURVE_POINTS])[0])
+            thresholds, cells = index.curve(values, points, habitat)
+        except ValueError:
+            raise badquery("Bad curve values or points")
+        except ARD_HEA_ThresholdIndex.noindex as e:
+            raise badquery(str(e))
+        return {"coc": index.COCName, "habitat": habitat, "cellArea": index.cellArea,
+                "thresholds": thresholds.tolist(), "cells": cells.tolist(),
+                "area": (cells * index.cellArea).tolist()}
+
+    def refresh(self):
+        with self.lock:
+            self.tables = {}
+            self.indexes = {}
+        self.responses.clear()
+        self.rasters.clear()
+        return {"refreshed": True}
+
+    def stats(self):
+        return {"cached": len(self.responses.entries), "hits": self.responses.hits,
+                "misses": self.responses.misses, "tables": sorted(n for n, t in self.tables.items() if t)}
+
+    # JSON text of a query, served from the response cache when it has been asked before
+    def query(self, path, params):
+        path = path.rstrip("/") or "/tables"
+        if path == "/refresh":
+            return json.dumps(self.refresh())
+        if path == "/stats":
+            return json.dumps(self.stats())
+        handlers = {"/tables": self.tables_query, "/point": self.point_query,
+                    "/aggregate": self.aggregate_query, "/window": self.window_query,
+                    "/threshold": self.threshold_query, "/curve": self.curve_query}
+        if path not in handlers:
+            raise badquery("Unknown query " + path + ", use one of " + ", ".join(sorted(handlers)))
+        key = (path, tuple(sorted((k, tuple(v)) for k, v in params.items())))
+        text = self.responses.get(key)
+        if text is None:
+            text = json.dumps(handlers[path](params))
+            self.responses.put(key, text)
+        return text
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        try:
+            text = self.server.service.query(url.path, parse_qs(url.query))
+            status = 200
+        except badquery as e:
+            text, status = json.dumps({"error": str(e)}), 400
+        except Exception as e:
+            text, status = json.dumps({"error": str(e)}), 500
+        data = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class QueryServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, service, port=PORT):
+        HTTPServer.__init__(self, (HOST, int(port)), QueryHandler)
+        self.service = service
+
+
+def serve(geoDB, port=PORT, backend=None):
+    server = QueryServer(QueryService(geoDB, backend), port)
+    print("ARD HEA query service for " + geoDB + " listening on " + HOST + ":" + str(port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv):
+    if len(argv) < 2:
+        print("Usage: ARD_HEA_Query.py <input_analysis_database> [arcpy|local] [port]")
+        return 2
+    port = int(argv[3]) if len(argv) > 3 else int(os.environ.get("HEA_QUERY_PORT", PORT))
+    serve(argv[1], port, ARD_HEA_Backend.get_backend(argv[2] if len(argv) > 2 else None))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
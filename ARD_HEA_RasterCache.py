@@ -0,0 +1,412 @@
+# ---------------------------------------------------------------------------
+# NAME: ARD_HEA_RasterCache.py
+# Version: 2.0 (ArcGIS 10.2)
+# Author: Research Planning, Inc.
+#
+# Usage: import ARD_HEA_RasterCache
+#        cache = ARD_HEA_RasterCache.project_cache(geoDB)
+#        values = cache.open(raster).read(row0, col0, nrows, ncols)
+#
+# Description: Local tiled cache of the rasters read by the HEA tools (interpolated
+#              surfaces, UNF_ rasters and _SC<n> reclass outputs).  Rasters are split
+#              into fixed size tiles which are stored zlib compressed in a cache folder
+#              next to the analysis geodatabase.  Tiles are decoded on demand into a
+#              memory-mapped scratch array so windowed reads only touch the tiles they
+#              need, and a raster is only read from the geodatabase once across tool
+#              runs.  Least recently used rasters are evicted when the cache grows past
+#              its size cap.
+#
+# Notes:  Cache entries are keyed on the raster path, its geometry, pixel type and
+#         band statistics (plus the file time stamp for rasters outside a
+#         geodatabase, and the size and time stamp of the geodatabase holding a
+#         raster without statistics).  Tools that overwrite a raster call invalidate() for it, and
+#         open() rechecks the signature of rasters it already holds.
+#         At most MAX_OPEN rasters stay open per process, the least recently opened
+#         one is closed (dropping its scratch array) when another is opened.  The
+#         size cap is enforced after every tile fetch, only the raster being read is
+#         protected; an evicted raster that is read again is reopened from its source.
+#
+# Date Created: October 19, 2026
+#
+# ---------------------------------------------------------------------------
+
+import os
+import json
+import atexit
+import collections
+import time
+import zlib
+import shutil
+import hashlib
+import tempfile
+import numpy
+from ARD_HEA_Grid import NODATA
+
+# Default cache size cap in bytes
+MAX_BYTES = 2 * 1024 ** 3
+TILE_SIZE = 256
+# Rasters kept open (each holds a full size scratch array) per cache
+MAX_OPEN = 8
+
+# Caches opened by this process, keyed by folder
+_caches = {}
+
+
+def _atomic_write(filename, data):
+    tmp = filename + ".%d.tmp" % os.getpid()
+    with open(tmp, "wb") as f:
+        f.write(data)
+    try:
+        os.rename(tmp, filename)
+    except OSError:
+        # Windows will not rename over an existing file
+        if os.path.exists(filename):
+            os.remove(filename)
+        os.rename(tmp, filename)
+
+
+def _key(path):
+    return hashlib.sha1(os.path.normcase(str(path)).encode("utf-8")).hexdigest()
+
+
+def _cache_dtype(dtype):
+    dtype = numpy.dtype(dtype)
+    if dtype.kind == "f":
+        return dtype
+    return numpy.dtype(numpy.int32)
+
+
+# Raster already held in memory (used by local backends and the pipeline)
+class ArraySource(object):
+
+    def __init__(self, path, array, xleft, ytop, cellx, celly=None, nodata=NODATA):
+        self.path = path
+        self.array = numpy.asarray(array)
+        self.shape = self.array.shape
+        self.dtype = _cache_dtype(self.array.dtype)
+        self.xleft = float(xleft)
+        self.ytop = float(ytop)
+        self.cellx = float(cellx)
+        self.celly = float(celly if celly is not None else cellx)
+        self.nodata = nodata
+
+    def signature(self):
+        digest = hashlib.sha1(numpy.ascontiguousarray(self.array).tobytes()).hexdigest()
+        return [self.path, list(self.shape), self.xleft, self.ytop, self.cellx, self.celly, digest]
+
+    def read(self, row0, col0, nrows, ncols):
+        return self.array[row0:row0 + nrows, col0:col0 + ncols]
+
+
+# Nearest existing file or folder of a dataset path, the geodatabase of a raster in one
+def _workspace(path):
+    while path and not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+
+# Raster dataset read with arcpy.RasterToNumPyArray
+class ArcpyRasterSource(object):
+
+    def __init__(self, raster):
+        import arcpy
+        self.path = raster
+        desc = arcpy.Describe(raster)
+        ext = desc.extent
+        self.shape = (int(desc.height), int(desc.width))
+        self.xleft = float(ext.XMin)
+        self.ytop = float(ext.YMax)
+        self.cellx = float(desc.meanCellWidth)
+        self.celly = float(desc.meanCellHeight)
+        self.pixelType = str(getattr(desc, "pixelType", ""))
+        if self.pixelType.startswith("F64"):
+            self.dtype = numpy.dtype(numpy.float64)
+        elif self.pixelType.startswith("F"):
+            self.dtype = numpy.dtype(numpy.float32)
+        else:
+            self.dtype = numpy.dtype(numpy.int32)
+        self.nodata = NODATA
+
+    def signature(self):
+        import arcpy
+        sig = [self.path, list(self.shape), self.xleft, self.ytop, self.cellx, self.celly, self.pixelType]
+        for prop in ("MINIMUM", "MAXIMUM", "MEAN", "STD"):
+            try:
+                sig.append(arcpy.GetRasterProperties_management(self.path, prop).getOutput(0))
+            except Exception:
+                sig.append(None)
+        if os.path.isfile(self.path):
+            sig.extend([os.path.getmtime(self.path), os.path.getsize(self.path)])
+        elif None in sig[-4:]:
+            # Without statistics two rasters of the same geometry look alike, so
+            # stamp the workspace that holds the raster
+            import ARD_HEA_Checkpoint
+            sig.append(ARD_HEA_Checkpoint.stamp(_workspace(self.path)))
+        return sig
+
+    def read(self, row0, col0, nrows, ncols):
+        import arcpy
+        corner = arcpy.Point(self.xleft + col0 * self.cellx, self.ytop - (row0 + nrows) * self.celly)
+        return arcpy.RasterToNumPyArray(self.path, corner, ncols, nrows, self.nodata)
+
+
+class CachedRaster(object):
+
+    def __init__(self, cache, source, signature=None):
+        self.cache = cache
+        self.source = source
+        self.path = source.path
+        self.shape = tuple(source.shape)
+        self.dtype = numpy.dtype(source.dtype)
+        self.xleft = source.xleft
+        self.ytop = source.ytop
+        self.cellx = source.cellx
+        self.celly = source.celly
+        self.nodata = source.nodata
+        self.tileSize = cache.tileSize
+        self.folder = os.path.join(cache.folder, _key(self.path))
+        self.tileRows = -(-self.shape[0] // self.tileSize)
+        self.tileCols = -(-self.shape[1] // self.tileSize)
+        self.decoded = numpy.zeros((self.tileRows, self.tileCols), dtype=bool)
+        self.signature = json.loads(json.dumps(source.signature() if signature is None else signature))
+        self.data = None
+        self._prepare(self.signature)
+        self._attach()
+
+    # Scratch array the tiles are decoded into
+    def _attach(self):
+        fd, self.scratch = tempfile.mkstemp(".mmap", "tiles_", self.cache.scratch)
+        os.close(fd)
+        self.data = numpy.memmap(self.scratch, self.dtype, "w+", shape=self.shape)
+        self.decoded[:] = False
+        if os.name != "nt":
+            # The mapping stays valid after the file is unlinked
+            os.remove(self.scratch)
+
+    # Start a new cache entry unless the cached one matches the source
+    def _prepare(self, signature):
+        header = os.path.join(self.folder, "header.json")
+        info = {"path": str(self.path), "signature": signature, "shape": list(self.shape),
+                "dtype": self.dtype.str, "tileSize": self.tileSize}
+        if os.path.exists(header):
+            try:
+                with open(header, "r") as f:
+                    current = json.load(f)
+            except ValueError:
+                current = None
+            if current == json.loads(json.dumps(info)):
+                self.touch()
+                return
+            shutil.rmtree(self.folder, True)
+        if not os.path.isdir(self.folder):
+            os.makedirs(self.folder)
+        _atomic_write(header, json.dumps(info).encode("utf-8"))
+        self.touch()
+
+    def touch(self):
+        _atomic_write(os.path.join(self.folder, "used"), str(time.time()).encode("utf-8"))
+
+    def _tile_file(self, tr, tc):
+        return os.path.join(self.folder, "t%d_%d.z" % (tr, tc))
+
+    def _bounds(self, tr, tc):
+        r0 = tr * self.tileSize
+        c0 = tc * self.tileSize
+        return r0, c0, min(self.tileSize, self.shape[0] - r0), min(self.tileSize, self.shape[1] - c0)
+
+    # Decode the tiles in a block of tile rows/cols, fetching missing tiles from the source
+    def _load(self, tr0, tr1, tc0, tc1):
+        missing = []
+        for tr in range(tr0, tr1):
+            for tc in range(tc0, tc1):
+                if self.decoded[tr, tc]:
+                    continue
+                r0, c0, nr, nc = self._bounds(tr, tc)
+                filename = self._tile_file(tr, tc)
+                if os.path.exists(filename):
+                    with open(filename, "rb") as f:
+                        tile = numpy.frombuffer(zlib.decompress(f.read()), self.dtype).reshape(nr, nc)
+                    self.data[r0:r0 + nr, c0:c0 + nc] = tile
+                    self.decoded[tr, tc] = True
+                else:
+                    missing.append((tr, tc))
+        if not missing:
+            return
+        if not os.path.isdir(self.folder):
+            # Evicted while open
+            self._prepare(self.signature)
+        rows = [t[0] for t in missing]
+        cols = [t[1] for t in missing]
+        r0 = min(rows) * self.tileSize
+        c0 = min(cols) * self.tileSize
+        r1 = min(self.shape[0], (max(rows) + 1) * self.tileSize)
+        c1 = min(self.shape[1], (max(cols) + 1) * self.tileSize)
+        block = numpy.asarray(self.source.read(r0, c0, r1 - r0, c1 - c0)).astype(self.dtype)
+        for tr, tc in missing:
+            tr0_, tc0_, nr, nc = self._bounds(tr, tc)
+            tile = numpy.ascontiguousarray(block[tr0_ - r0:tr0_ - r0 + nr, tc0_ - c0:tc0_ - c0 + nc])
+            _atomic_write(self._tile_file(tr, tc), zlib.compress(tile.tobytes(), self.cache.level))
+            self.data[tr0_:tr0_ + nr, tc0_:tc0_ + nc] = tile
+            self.decoded[tr, tc] = True
+        self.cache.check_size(_key(self.path))
+
+    # Window of the raster, only the tiles overlapping the window are read
+    def read(self, row0=0, col0=0, nrows=None, ncols=None):
+        if nrows is None:
+            nrows = self.shape[0] - row0
+        if ncols is None:
+            ncols = self.shape[1] - col0
+        row0 = max(0, int(row0))
+        col0 = max(0, int(col0))
+        row1 = min(self.shape[0], row0 + int(nrows))
+        col1 = min(self.shape[1], col0 + int(ncols))
+        if row1 <= row0 or col1 <= col0:
+            return numpy.zeros((0, 0), dtype=self.dtype)
+        if self.data is None:
+            self._attach()
+        self._load(row0 // self.tileSize, (row1 - 1) // self.tileSize + 1,
+                   col0 // self.tileSize, (col1 - 1) // self.tileSize + 1)
+        return numpy.array(self.data[row0:row1, col0:col1])
+
+    def read_all(self):
+        return self.read()
+
+    def close(self):
+        if self.data is not None:
+            del self.data
+            self.data = None
+            try:
+                os.remove(self.scratch)
+            except OSError:
+                pass
+
+
+class RasterCache(object):
+
+    def __init__(self, folder, maxBytes=MAX_BYTES, tileSize=TILE_SIZE, level=1, maxOpen=MAX_OPEN):
+        self.folder = folder
+        self.maxBytes = int(maxBytes)
+        self.tileSize = int(tileSize)
+        self.level = int(level)
+        self.maxOpen = max(1, int(maxOpen))
+        self.scratch = os.path.join(folder, "scratch")
+        # Open rasters, least recently opened first
+        self.opened = collections.OrderedDict()
+        if not os.path.isdir(self.scratch):
+            os.makedirs(self.scratch)
+
+    # Cached view of a raster path or source object.  A raster opened earlier is
+    # reused only while its source signature is unchanged, so long lived worker
+    # processes see rasters rewritten by other tools.
+    def open(self, source):
+        if not hasattr(source, "read"):
+            source = ArcpyRasterSource(source)
+        key = _key(source.path)
+        signature = json.loads(json.dumps(source.signature()))
+        raster = self.opened.pop(key, None)
+        if raster is not None and raster.signature == signature:
+            self.opened[key] = raster
+            return raster
+        if raster is not None:
+            raster.close()
+        while len(self.opened) >= self.maxOpen:
+            self.opened.popitem(last=False)[1].close()
+        raster = CachedRaster(self, source, signature)
+        self.opened[key] = raster
+        return raster
+
+    # Drop a raster from the cache, called when a tool overwrites it
+    def invalidate(self, path):
+        key = _key(path)
+        raster = self.opened.pop(key, None)
+        if raster is not None:
+            raster.close()
+        shutil.rmtree(os.path.join(self.folder, key), True)
+
+    def entries(self):
+        out = []
+        for name in os.listdir(self.folder):
+            folder = os.path.join(self.folder, name)
+            if name == "scratch" or not os.path.isdir(folder):
+                continue
+            size = 0
+            for filename in os.listdir(folder):
+                size += os.path.getsize(os.path.join(folder, filename))
+            try:
+                with open(os.path.join(folder, "used"), "r") as f:
+                    used = float(f.read())
+            except (IOError, OSError, ValueError):
+                used = 0.0
+            out.append((used, size, name))
+        return out
+
+    def size(self):
+        return sum(entry[1] for entry in self.entries())
+
+    # Evict least recently used rasters until the cache is under its size cap.  Only
+    # the raster being read (key) is kept; other open rasters are closed as well.
+    def check_size(self, key=None):
+        entries = sorted(self.entries())
+        total = sum(entry[1] for entry in entries)
+        for used, size, name in entries:
+            if total <= self.maxBytes:
+                break
+            if name == key:
+                continue
+            raster = self.opened.pop(name, None)
+            if raster is not None:
+                raster.close()
+            shutil.rmtree(os.path.join(self.folder, name), True)
+            total -= size
+
+    def close(self):
+        for raster in self.opened.values():
+            raster.close()
+        self.opened = collections.OrderedDict()
+
+
+# SHA-1 of a raster referenced from outside the geodatabase: the raster file, or
+# every file of a raster folder such as an Esri grid.  Rasters with no files of
+# their own (inside a geodatabase) are checksummed on their cache signature.
+def checksum(path):
+    path = str(path).strip("'")
+    digest = hashlib.sha1()
+    if os.path.isfile(path):
+        filenames = [path]
+    elif os.path.isdir(path):
+        filenames = []
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            filenames.extend(os.path.join(root, name) for name in sorted(files))
+    else:
+        digest.update(json.dumps(ArcpyRasterSource(path).signature()).encode("utf-8"))
+        return digest.hexdigest()
+    for filename in filenames:
+        digest.update(os.path.relpath(filename, os.path.dirname(path)).encode("utf-8"))
+        with open(filename, "rb") as f:
+            for block in iter(lambda: f.read(1024 ** 2), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+# Cache folder for an analysis geodatabase
+def cache_folder(geoDB):
+    return os.path.splitext(geoDB)[0] + "_CACHE"
+
+
+# Shared cache for an analysis geodatabase.  The HEA_CACHE_MB environment variable
+# overrides the size cap.
+def project_cache(geoDB):
+    folder = cache_folder(geoDB)
+    cache = _caches.get(folder)
+    if cache is None:
+        maxBytes = MAX_BYTES
+        if os.environ.get("HEA_CACHE_MB"):
+            maxBytes = int(float(os.environ["HEA_CACHE_MB"]) * 1024 ** 2)
+        cache = RasterCache(folder, maxBytes)
+        _caches[folder] = cache
+        atexit.register(cache.close)
+    return cache
@@ -0,0 +1,167 @@
+# ---------------------------------------------------------------------------
+# NAME: ARD_HEA_Resample.py
+# Version: 2.0 (ArcGIS 10.2)
+# Author: Research Planning, Inc.
+#
+# Usage: import ARD_HEA_Resample
+#        src = cache.open(COCRaster)
+#        problems = ARD_HEA_Resample.mismatches(grid, src.xleft, src.ytop, src.cellx, src.celly, src.shape)
+#        values = grid.sample_raster(COCRaster, cache, "BILINEAR")
+#
+# Description: Alignment of contaminant surfaces with the analysis grid.  mismatches()
+#              reports cell size, origin and extent differences between a raster and
+#              the grid, and resample() moves a raster window onto the grid with one
+#              of three methods:
+#                NEAREST  - value of the source cell under each grid cell centre
+#                BILINEAR - distance weighted value of the four source cells around
+#                           each grid cell centre
+#                MEAN     - mean of the source cells under each grid cell, weighted by
+#                           the area each one covers
+#              The grid is processed in blocks of BLOCK x BLOCK cells so only the
+#              source cells under a block are converted at any time.
+#
+# Notes:  NoData source cells are left out of BILINEAR and MEAN; a grid cell is NoData
+#         only when every source cell contributing to it is.  Grid cells outside the
+#         analysis grid mask are always NoData.
+#
+# Date Created: October 19, 2026
+#
+# ---------------------------------------------------------------------------
+
+import math
+import numpy
+from ARD_HEA_Grid import NODATA
+
+METHODS = ("NEAREST", "BILINEAR", "MEAN")
+BLOCK = 256
+
+# Fraction of the grid cell size two rasters may differ by and still line up
+TOLERANCE = 1e-6
+
+
+class badmethod(Exception):
+    pass
+
+
+def method_name(method):
+    name = str(method or "NEAREST").strip().upper()
+    if name not in METHODS:
+        raise badmethod("Unknown resampling method " + str(method) + ", use one of " + ", ".join(METHODS))
+    return name
+
+
+# Method a surface was loaded with from its COC_INVENTORY RESAMPLE_METHOD, NONE
+# (the surface lines up with the grid) and unset are NEAREST
+def recorded_method(value):
+    name = str(value or "").strip().upper()
+    if name in ("", "NONE"):
+        return "NEAREST"
+    return method_name(name)
+
+
+def _offset(cells):
+    frac = cells - math.floor(cells)
+    return min(frac, 1.0 - frac)
+
+
+# Ways a raster does not line up with the grid, empty when it matches cell for cell
+def mismatches(grid, xleft, ytop, cellx, celly, shape, tolerance=TOLERANCE):
+    tol = tolerance * grid.cellsize
+    height, width = shape
+    out = []
+    if abs(cellx - grid.cellsize) > tol or abs(celly - grid.cellsize) > tol:
+        out.append("cell size " + str(cellx) + " x " + str(celly) + " does not match the analysis grid cell size " +
+                   str(grid.cellsize))
+    else:
+        dx = _offset((xleft - grid.xmin) / grid.cellsize) * grid.cellsize
+        dy = _offset((grid.ymax - ytop) / grid.cellsize) * grid.cellsize
+        if dx > tol or dy > tol:
+            out.append("origin is offset " + str(round(dx, 6)) + ", " + str(round(dy, 6)) +
+                       " from the analysis grid cells")
+    if (xleft > grid.xmin + tol or ytop < grid.ymax - tol or
+            xleft + width * cellx < grid.xmax - tol or ytop - height * celly > grid.ymin + tol):
+        out.append("extent does not cover the analysis grid")
+    return out
+
+
+def _float(window, nodata):
+    values = numpy.asarray(window, dtype=numpy.float64)
+    if nodata is not None:
+        values = numpy.where(values == nodata, numpy.nan, values)
+    return values
+
+
+# Overlap of the intervals [start + i * size, start + (i + 1) * size) with the
+# source cells [j * cell, (j + 1) * cell) for j in j0..j1, as weights
+def _overlap(start, size, count, cell, j0, j1):
+    lo = start + numpy.arange(count) * size
+    edges = numpy.arange(j0, j1 + 1) * cell
+    left = numpy.maximum(lo[:, None], edges[None, :-1])
+    right = numpy.minimum(lo[:, None] + size, edges[None, 1:])
+    return numpy.clip(right - left, 0, None)
+
+
+def _bilinear(src, fr, fc, nodata):
+    height, width = src.shape
+    r0 = numpy.floor(fr).astype(numpy.int64)
+    c0 = numpy.floor(fc).astype(numpy.int64)
+    tr = fr - r0
+    tc = fc - c0
+    total = numpy.zeros((len(fr), len(fc)))
+    weight = numpy.zeros((len(fr), len(fc)))
+    for dr, wr in ((0, 1.0 - tr), (1, tr)):
+        rows = r0 + dr
+        okRow = (rows >= 0) & (rows < height)
+        for dc, wc in ((0, 1.0 - tc), (1, tc)):
+            cols = c0 + dc
+            okCol = (cols >= 0) & (cols < width)
+            values = _float(src[numpy.ix_(numpy.clip(rows, 0, height - 1), numpy.clip(cols, 0, width - 1))], nodata)
+            w = wr[:, None] * wc[None, :]
+            ok = okRow[:, None] & okCol[None, :] & numpy.isfinite(values) & (w > 0)
+            total += numpy.where(ok, values * w, 0.0)
+            weight += numpy.where(ok, w, 0.0)
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        return numpy.where(weight > 0, total / weight, numpy.nan)
+
+
+# Grid shaped values of a raster window whose upper left corner is (xleft, ytop)
+def resample(grid, src, xleft, ytop, cellx, celly=None, method="NEAREST", nodata=NODATA, block=BLOCK):
+    method = method_name(method)
+    if celly is None:
+        celly = cellx
+    if method == "NEAREST":
+        return grid.sample_array(src, xleft, ytop, cellx, celly, nodata)
+    src = numpy.asarray(src)
+    height, width = src.shape
+    size = grid.cellsize
+    out = numpy.full(grid.shape, numpy.nan, dtype=numpy.float64)
+    for r0 in range(0, grid.nrows, block):
+        r1 = min(grid.nrows, r0 + block)
+        # Distance below the top of the source of the top edge of the block
+        top = ytop - grid.ymax + r0 * size
+        for c0 in range(0, grid.ncols, block):
+            c1 = min(grid.ncols, c0 + block)
+            left = grid.xmin + c0 * size - xleft
+            if method == "BILINEAR":
+                fr = (top + (numpy.arange(r1 - r0) + 0.5) * size) / celly - 0.5
+                fc = (left + (numpy.arange(c1 - c0) + 0.5) * size) / cellx - 0.5
+                inside = ((fr > -0.5) & (fr < height - 0.5))[:, None] & ((fc > -0.5) & (fc < width - 0.5))[None, :]
+                values = _bilinear(src, fr, fc, nodata)
+                out[r0:r1, c0:c1] = numpy.where(inside, values, numpy.nan)
+            else:
+                i0 = max(0, int(math.floor(top / celly)))
+                i1 = min(height, int(math.ceil((top + (r1 - r0) * size) / celly)))
+                j0 = max(0, int(math.floor(left / cellx)))
+                j1 = min(width, int(math.ceil((left + (c1 - c0) * size) / cellx)))
+                if i1 <= i0 or j1 <= j0:
+                    continue
+                window = _float(src[i0:i1, j0:j1], nodata)
+                valid = numpy.isfinite(window)
+                wy = _overlap(top, size, r1 - r0, celly, i0, i1)
+                wx = _overlap(left, size, c1 - c0, cellx, j0, j1)
+                total = wy.dot(numpy.where(valid, window, 0.0)).dot(wx.T)
+                weight = wy.dot(valid.astype(numpy.float64)).dot(wx.T)
+                with numpy.errstate(invalid="ignore", divide="ignore"):
+                    out[r0:r1, c0:c1] = numpy.where(weight > 0, total / weight, numpy.nan)
+    out[~grid.mask] = numpy.nan
+    return out
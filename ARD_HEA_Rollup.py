@@ -0,0 +1,202 @@
+# ---------------------------------------------------------------------------
+# NAME: ARD_HEA_Rollup.py
+# Version: 2.0 (ArcGIS 10.2)
+# Author: Research Planning, Inc.
+#
+# Usage: import ARD_HEA_Rollup
+#        rows = ARD_HEA_Rollup.refresh(geoDB, grid, cube, scenarios=[3])
+#        rows = ARD_HEA_Rollup.lookup(geoDB, 3, HABITAT_ID="MARSH", SUBSITE_ID="NORTH")
+#
+# Description: Precomputed DSAY rollup by site attributes.  SITE_ATTRIBUTES is joined
+#              to the analysis grid once on GRID_ID, giving each cell the group of its
+#              HABITAT_ID, CONDITION_ID, REMEDIATION_ID and SUBSITE_ID values.  The
+#              per year DSAY cube (ARD_HEA_DSAYCube) is then summed by group for each
+#              scenario and year and rolled up to every combination of the four
+#              dimensions, so a damage summary is a lookup in the DSAY_ROLLUP table
+#              instead of a join of the results against SITE_ATTRIBUTES.
+#
+# Notes:  GROUPING_ID is a bit mask of the dimensions summed over, in DIMENSIONS order
+#         (1 HABITAT_ID, 2 CONDITION_ID, 4 REMEDIATION_ID, 8 SUBSITE_ID); those
+#         dimensions are NULL in the row, so GROUPING_ID 15 is the scenario total.
+#         Cells without site attributes are grouped under an empty value.  Refreshing
+#         a list of scenarios replaces only their rows.
+#
+# Date Created: October 19, 2026
+#
+# ---------------------------------------------------------------------------
+
+import numpy
+import ARD_HEA_Tables
+
+DIMENSIONS = ("HABITAT_ID", "CONDITION_ID", "REMEDIATION_ID", "SUBSITE_ID")
+ROLLUP_TABLE = "DSAY_ROLLUP"
+
+
+class norollup(Exception):
+    pass
+
+
+# Group of site attribute values for each valid grid cell
+class SiteGroups(object):
+
+    def __init__(self, grid, site):
+        self.grid = grid
+        self.valid = grid.valid_index()
+        self.names = []
+        idx = grid.index(site.column("GRID_ID"))
+        keep = idx >= 0
+        codes = numpy.empty((len(self.valid), len(DIMENSIONS)), dtype=numpy.int64)
+        for d, dim in enumerate(DIMENSIONS):
+            categories = site.categories[dim]
+            cells = numpy.full(grid.size, categories.code(""), dtype=numpy.int64)
+            cells[idx[keep]] = site.data[dim][keep]
+            codes[:, d] = cells[self.valid]
+            self.names.append(list(categories.names))
+        self.groups, self.group = _unique_rows(codes, [len(n) for n in self.names])
+        self.cells = numpy.bincount(self.group, minlength=len(self.groups))
+        # (GROUPING_ID, codes of the rolled up groups, -1 for summed dimensions,
+        # rolled up group of each group)
+        self.sets = []
+        for mask in range(2 ** len(DIMENSIONS)):
+            rolled = self.groups.copy()
+            for d in range(len(DIMENSIONS)):
+                if mask & (1 << d):
+                    rolled[:, d] = -1
+            setGroups, inverse = _unique_rows(rolled + 1, [len(n) + 1 for n in self.names])
+            self.sets.append((mask, setGroups - 1, inverse))
+
+    # Sum of grid shaped values in each group
+    def sums(self, values):
+        flat = numpy.nan_to_num(numpy.asarray(values, dtype=numpy.float64).ravel()[self.valid])
+        return numpy.bincount(self.group, weights=flat, minlength=len(self.groups))
+
+    # Injured cells in each group
+    def injured(self, values):
+        flat = numpy.asarray(values).ravel()[self.valid]
+        with numpy.errstate(invalid="ignore"):
+            return numpy.bincount(self.group, weights=(flat > 0).astype(numpy.float64), minlength=len(self.groups))
+
+
+# Unique rows of small non-negative integer codes and the row of each input row
+def _unique_rows(codes, sizes):
+    key = numpy.zeros(len(codes), dtype=numpy.int64)
+    for d, size in enumerate(sizes):
+        key = key * max(size, 1) + codes[:, d]
+    uniqueKeys, first, inverse = numpy.unique(key, return_index=True, return_inverse=True)
+    return codes[first], inverse
+
+
+def site_groups(geoDB, grid):
+    import arcpy
+    table = geoDB + "\\SITE_ATTRIBUTES"
+    if not arcpy.Exists(table):
+        raise norollup("No SITE_ATTRIBUTES table in " + geoDB)
+    site = ARD_HEA_Tables.read("SITE_ATTRIBUTES", table, fields=("GRID_ID",) + DIMENSIONS)
+    return SiteGroups(grid, site)
+
+
+# DSAY_ROLLUP rows of one scenario of the cube
+def scenario_records(groups, cube, scenario):
+    years = cube.years[int(scenario)]
+    DSAY = numpy.zeros((len(years), len(groups.groups)))
+    SAY = numpy.zeros((len(years), len(groups.groups)))
+    injured = numpy.zeros((len(years), len(groups.groups)))
+    for i, year in enumerate(years):
+        values = cube.time_slice("DSAY_Injury", scenario, year)
+        DSAY[i] = groups.sums(values)
+        injured[i] = groups.injured(values)
+        if "SAY_Injury" in cube.fields:
+            SAY[i] = groups.sums(cube.time_slice("SAY_Injury", scenario, year))
+    columns = dict((field, []) for field in ("EXPYEAR", "GROUPING_ID", "DSAY_INJURY", "SAY_INJURY",
+                                             "DSAY_CUMULATIVE", "INJURED_CELLS", "TOTAL_CELLS") + DIMENSIONS)
+    for mask, setGroups, inverse in groups.sets:
+        size = len(setGroups)
+        rolled = []
+        for values in (DSAY, SAY, injured):
+            out = numpy.zeros((size, len(years)))
+            numpy.add.at(out, inverse, values.T)
+            rolled.append(out)
+        cells = numpy.bincount(inverse, weights=groups.cells, minlength=size)
+        for i, year in enumerate(years):
+            columns["EXPYEAR"].append(numpy.full(size, year))
+            columns["GROUPING_ID"].append(numpy.full(size, mask))
+            columns["DSAY_INJURY"].append(rolled[0][:, i])
+            columns["SAY_INJURY"].append(rolled[1][:, i])
+            columns["DSAY_CUMULATIVE"].append(rolled[0][:, :i + 1].sum(axis=1))
+            columns["INJURED_CELLS"].append(rolled[2][:, i])
+            columns["TOTAL_CELLS"].append(cells)
+            for d, dim in enumerate(DIMENSIONS):
+                columns[dim].append(numpy.where(setGroups[:, d] < 0, len(groups.names[d]), setGroups[:, d]))
+    # Group codes are the category codes, with NULL for the summed dimensions
+    categories = dict((dim, ARD_HEA_Tables.Categories(groups.names[d] + [None])) for d, dim in enumerate(DIMENSIONS))
+    columns = dict((field, numpy.concatenate(values)) for field, values in columns.items())
+    codes = dict((dim, columns.pop(dim)) for dim in DIMENSIONS)
+    records = ARD_HEA_Tables.TypedTable.from_columns(ROLLUP_TABLE, categories, SCENARIO_ID=scenario, **columns)
+    for dim in DIMENSIONS:
+        records.data[dim] = codes[dim]
+    return records
+
+
+def create_table(geoDB):
+    import arcpy
+    table = geoDB + "\\" + ROLLUP_TABLE
+    if not arcpy.Exists(table):
+        arcpy.CreateTable_management(geoDB, ROLLUP_TABLE, "", "")
+        arcpy.AddField_management(table, "SCENARIO_ID", "SHORT", "", "", "", "", "NON_NULLABLE", "REQUIRED", "")
+        arcpy.AddField_management(table, "EXPYEAR", "SHORT", "", "", "", "", "NON_NULLABLE", "REQUIRED", "")
+        arcpy.AddField_management(table, "GROUPING_ID", "SHORT", "", "", "", "", "NON_NULLABLE", "REQUIRED", "")
+        arcpy.AddField_management(table, "HABITAT_ID", "TEXT", "", "", "50", "", "NULLABLE", "NON_REQUIRED", "")
+        arcpy.AddField_management(table, "CONDITION_ID", "TEXT", "", "", "2", "", "NULLABLE", "NON_REQUIRED", "")
+        arcpy.AddField_management(table, "REMEDIATION_ID", "TEXT", "", "", "50", "", "NULLABLE", "NON_REQUIRED", "")
+        arcpy.AddField_management(table, "SUBSITE_ID", "TEXT", "", "", "50", "", "NULLABLE", "NON_REQUIRED", "")
+        arcpy.AddField_management(table, "DSAY_INJURY", "DOUBLE", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
+        arcpy.AddField_management(table, "SAY_INJURY", "DOUBLE", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
+        arcpy.AddField_management(table, "DSAY_CUMULATIVE", "DOUBLE", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
+        arcpy.AddField_management(table, "INJURED_CELLS", "LONG", "", "", "", "", "NON_NULLABLE", "REQUIRED", "")
+        arcpy.AddField_management(table, "TOTAL_CELLS", "LONG", "", "", "", "", "NON_NULLABLE", "REQUIRED", "")
+        arcpy.AddIndex_management(table, "SCENARIO_ID;GROUPING_ID", "ROLL_SID_IDX", "NON_UNIQUE", "ASCENDING")
+    return table
+
+
+# Rebuild the rollup rows of the scenarios in the cube, default every scenario
+def refresh(geoDB, grid, cube, scenarios=None, groups=None):
+    import arcpy
+    table = create_table(geoDB)
+    scenarios = cube.scenarios if scenarios is None else [int(s) for s in scenarios]
+    groups = groups or site_groups(geoDB, grid)
+    rows = 0
+    for scenario in scenarios:
+        if scenario not in cube.years:
+            raise norollup("Scenario " + str(scenario) + " is not in the DSAY cube, run ExportDSAYCube first")
+        records = scenario_records(groups, cube, scenario)
+        expression = arcpy.AddFieldDelimiters(table, "SCENARIO_ID") + " = " + str(scenario)
+        with arcpy.da.UpdateCursor(table, ("OID@",), expression) as cursor:
+            for row in cursor:
+                cursor.deleteRow()
+        with arcpy.da.InsertCursor(table, records.fields) as cursor:
+            for row in records.rows():
+                cursor.insertRow(row)
+        rows += len(records)
+    return rows
+
+
+# Rollup rows of a scenario for the given dimension values, dimensions not given
+# are summed over.  year limits the rows to one ExpYear.
+def lookup(geoDB, scenario, year=None, **values):
+    import arcpy
+    table = geoDB + "\\" + ROLLUP_TABLE
+    if not arcpy.Exists(table):
+        raise norollup("No " + ROLLUP_TABLE + " table in " + geoDB)
+    for dim in values:
+        if dim not in DIMENSIONS:
+            raise norollup("Unknown rollup dimension " + dim + ", use " + ", ".join(DIMENSIONS))
+    mask = sum(1 << d for d, dim in enumerate(DIMENSIONS) if dim not in values)
+    clauses = [arcpy.AddFieldDelimiters(table, "SCENARIO_ID") + " = " + str(int(scenario)),
+               arcpy.AddFieldDelimiters(table, "GROUPING_ID") + " = " + str(mask)]
+    if year is not None:
+        clauses.append(arcpy.AddFieldDelimiters(table, "EXPYEAR") + " = " + str(int(year)))
+    for dim, value in values.items():
+        clauses.append(arcpy.AddFieldDelimiters(table, dim) + " = '" + str(value).replace("'", "''") + "'")
+    fields = ("EXPYEAR",) + DIMENSIONS + ("DSAY_INJURY", "SAY_INJURY", "DSAY_CUMULATIVE", "INJURED_CELLS", "TOTAL_CELLS")
+    rows = arcpy.da.TableToNumPyArray(table, fields, " AND ".join(clauses), null_value=dict((dim, "") for dim in DIMENSIONS))
+    return numpy.sort(rows, order="EXPYEAR")
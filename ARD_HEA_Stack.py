@@ -0,0 +1,150 @@
+# ---------------------------------------------------------------------------
+# NAME: ARD_HEA_Stack.py
+# Version: 2.0 (ArcGIS 10.2)
+# Author: Research Planning, Inc.
+#
+# Usage: import ARD_HEA_Stack
+#        stack = ARD_HEA_Stack.BandStack(grid, geoDB, cache)
+#        stack.add(DSAYValues, scen, scname, "DSAY")
+#        stack.save()
+#        DSAYValues = ARD_HEA_Stack.read_band(geoDB, grid, scen, "DSAY", cache)
+#
+# Description: Multi-band raster stack of the scenario results written by
+#              ImportAnalysisResults.  Each scenario result (DSAY, PCT_INJ) is one band
+#              of the SCENARIO_STACK raster, and the SCENARIO_BANDS table maps
+#              Scenario_ID, Scenario_Name and result type to the band number, so a
+#              project with many scenarios produces one dataset instead of two rasters
+#              per scenario and comparing scenarios is a band read.
+#
+# Notes:  Bands are written to the analysis geodatabase as they are computed, named
+#         after their scenario and result type so projects never share them, and
+#         combined with Composite Bands when the stack is saved, with LZ77
+#         compression and 128 x 128 tiles.  Saving replaces the whole stack and band
+#         table and deletes the band rasters.
+#
+# Date Created: October 19, 2026
+#
+# ---------------------------------------------------------------------------
+
+STACK_RASTER = "SCENARIO_STACK"
+BAND_PREFIX = "HEA_STACK_SC"
+RESULT_TYPES = ("DSAY", "PCT_INJ")
+BAND_TABLE = "SCENARIO_BANDS"
+COMPRESSION = "LZ77"
+TILE_SIZE = "128 128"
+MODES = ("RASTERS", "STACK")
+
+
+class nostack(Exception):
+    pass
+
+
+class badmode(Exception):
+    pass
+
+
+def output_mode(mode):
+    name = str(mode or "RASTERS").strip().upper()
+    if name in ("#", ""):
+        return "RASTERS"
+    if name not in MODES:
+        raise badmode("Unknown output mode " + str(mode) + ", use one of " + ", ".join(MODES))
+    return name
+
+
+def create_table(geoDB):
+    import arcpy
+    table = geoDB + "\\" + BAND_TABLE
+    if arcpy.Exists(table):
+        arcpy.Delete_management(table)
+    arcpy.CreateTable_management(geoDB, BAND_TABLE, "", "")
+    arcpy.AddField_management(table, "BAND", "SHORT", "", "", "", "", "NON_NULLABLE", "REQUIRED", "")
+    arcpy.AddField_management(table, "SCENARIO_ID", "SHORT", "", "", "", "", "NON_NULLABLE", "REQUIRED", "")
+    arcpy.AddField_management(table, "SCENARIO_NAME", "TEXT", "", "", "50", "", "NULLABLE", "NON_REQUIRED", "")
+    arcpy.AddField_management(table, "RESULT_TYPE", "TEXT", "", "", "10", "", "NON_NULLABLE", "REQUIRED", "")
+    return table
+
+
+class BandStack(object):
+
+    def __init__(self, grid, geoDB, cache=None):
+        self.grid = grid
+        self.geoDB = geoDB
+        self.cache = cache
+        self.outRaster = geoDB + "\\" + STACK_RASTER
+        self.bands = []
+
+    # Band raster of a scenario result until the stack is saved
+    def band_raster(self, scenario, resultType):
+        return self.geoDB + "\\" + BAND_PREFIX + str(int(scenario)) + "_" + resultType
+
+    # True when the band rasters an earlier run recorded for a scenario are this
+    # project's bands
+    def owns(self, scenario, bandRasters):
+        return all(str(bandRaster).lower() == self.band_raster(scenario, resultType).lower()
+                   for bandRaster, resultType in zip(bandRasters, RESULT_TYPES))
+
+    # Write one result band to the analysis geodatabase
+    def add(self, values, scenario, name, resultType):
+        band = len(self.bands) + 1
+        bandRaster = self.band_raster(scenario, resultType)
+        self.grid.write_raster(values, bandRaster)
+        self.bands.append((band, int(scenario), name, resultType, bandRaster))
+        return band
+
+    # Add a band already written by an earlier, unfinished run
+    def reuse(self, bandRaster, scenario, name, resultType):
+        band = len(self.bands) + 1
+        self.bands.append((band, int(scenario), name, resultType, bandRaster))
+        return band
+
+    # Combine the bands into the stack raster and write the band table
+    def save(self):
+        import arcpy
+        if not self.bands:
+            return None
+        if self.cache is not None:
+            for band in self.bands:
+                self.cache.invalidate(self.outRaster + "\\Band_" + str(band[0]))
+        if arcpy.Exists(self.outRaster):
+            arcpy.Delete_management(self.outRaster)
+        compression, tileSize = arcpy.env.compression, arcpy.env.tileSize
+        arcpy.env.compression = COMPRESSION
+        arcpy.env.tileSize = TILE_SIZE
+        try:
+            arcpy.CompositeBands_management(";".join(band[4] for band in self.bands), self.outRaster)
+        finally:
+            arcpy.env.compression, arcpy.env.tileSize = compression, tileSize
+        table = create_table(self.geoDB)
+        with arcpy.da.InsertCursor(table, ("BAND", "SCENARIO_ID", "SCENARIO_NAME", "RESULT_TYPE")) as cursor:
+            for band, scenario, name, resultType, bandRaster in self.bands:
+                cursor.insertRow((band, scenario, name, resultType))
+        for band in self.bands:
+            arcpy.Delete_management(band[4])
+        return self.outRaster
+
+
+# {(SCENARIO_ID, RESULT_TYPE): (BAND, SCENARIO_NAME)} of a saved stack
+def band_index(geoDB):
+    import arcpy
+    table = geoDB + "\\" + BAND_TABLE
+    if not arcpy.Exists(table):
+        raise nostack("No scenario stack in " + geoDB)
+    index = {}
+    with arcpy.da.SearchCursor(table, ("SCENARIO_ID", "RESULT_TYPE", "BAND", "SCENARIO_NAME")) as cursor:
+        for scenario, resultType, band, name in cursor:
+            index[(int(scenario), str(resultType))] = (int(band), name)
+    return index
+
+
+def band_raster(geoDB, scenario, resultType="DSAY"):
+    index = band_index(geoDB)
+    key = (int(scenario), resultType)
+    if key not in index:
+        raise nostack("No " + resultType + " band for scenario " + str(scenario))
+    return geoDB + "\\" + STACK_RASTER + "\\Band_" + str(index[key][0])
+
+
+# Grid shaped values of one scenario result
+def read_band(geoDB, grid, scenario, resultType="DSAY", cache=None):
+    return grid.sample_raster(band_raster(geoDB, scenario, resultType), cache)
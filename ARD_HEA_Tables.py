@@ -0,0 +1,254 @@
+# ---------------------------------------------------------------------------
+# NAME: ARD_HEA_Tables.py
+# Version: 2.0 (ArcGIS 10.2)
+# Author: Research Planning, Inc.
+#
+# Usage: import ARD_HEA_Tables
+#        data = ARD_HEA_Tables.TypedTable.from_columns("COC_DATA", GRID_ID=gridIDs, COC_NAME=COCName,
+#                                                     COC_VALUE=values)
+#        with arcpy.da.InsertCursor(geoDB + "\\COC_DATA", data.fields) as cursor:
+#            for row in data.rows():
+#                cursor.insertRow(row)
+#
+# Description: Compact, array backed views of the core HEA tables (COC_DATA,
+#              FOOTPRINTS, SITE_ATTRIBUTES, SCENARIO_INJURY,
+#              DSAY_ROLLUP, SCENARIO_UNCERTAINTY, UNCERTAINTY_SUMMARY).  Each table is a NumPy structured array
+#              with the narrowest type its CreateAnalysisDatabase schema allows:
+#              GRID_ID and FOOTPRINT_ID (LONG) int32, SCENARIO_ID (SHORT) int16,
+#              COC_VALUE float32 and text fields as int16 codes into a per table
+#              category list.  One COC
+#              on a 5 million cell grid takes about 60 MB instead of the gigabytes
+#              held by rows of boxed Python objects.
+#
+# Notes:  NULL is NaN in float fields and the smallest value of the type in integer
+#         fields (NULL_INT, -32768, in int16 fields).  Integer values outside the
+#         range of their field raise badvalue instead of wrapping.  rows() decodes
+#         chunks at a time for cursors, to_array() returns the plain (text and float)
+#         layout used by the backends, with NULL text as empty strings.
+#
+# Date Created: October 19, 2026
+#
+# ---------------------------------------------------------------------------
+
+import numpy
+
+NULL_INT = -32768
+CHUNK = 65536
+
+# (field, type, text length) for each table, "text" fields are stored as codes
+SCHEMAS = {
+    "COC_DATA": (("GRID_ID", numpy.int32, None), ("COC_NAME", "text", 20),
+                 ("COC_VALUE", numpy.float32, None), ("FOOTPRINT_ID", numpy.int32, None)),
+    "FOOTPRINTS": (("GRID_ID", numpy.int32, None), ("SCENARIO_ID", numpy.int16, None),
+                   ("COC_NAME", "text", 20), ("FOOTPRINT_ID", numpy.int32, None)),
+    "SITE_ATTRIBUTES": (("GRID_ID", numpy.int32, None), ("HABITAT_ID", "text", 50), ("CONDITION_ID", "text", 2),
+                        ("REMEDIATION_ID", "text", 50), ("SUBSITE_ID", "text", 50), ("DEPTH_ID", "text", 20)),
+    "SCENARIO_INJURY": (("GRID_ID", numpy.int32, None), ("SCENARIO_ID", numpy.int16, None),
+                        ("PERCENT_INJURY", numpy.float32, None), ("DOMINANT_COC", "text", 20),
+                        ("COC_COUNT", numpy.int16, None)),
+    "DSAY_ROLLUP": (("SCENARIO_ID", numpy.int16, None), ("EXPYEAR", numpy.int16, None), ("GROUPING_ID", numpy.int16, None),
+                    ("HABITAT_ID", "text", 50), ("CONDITION_ID", "text", 2), ("REMEDIATION_ID", "text", 50),
+                    ("SUBSITE_ID", "text", 50), ("DSAY_INJURY", numpy.float64, None), ("SAY_INJURY", numpy.float64, None),
+                    ("DSAY_CUMULATIVE", numpy.float64, None), ("INJURED_CELLS", numpy.int32, None),
+                    ("TOTAL_CELLS", numpy.int32, None)),
+    "SCENARIO_UNCERTAINTY": (("GRID_ID", numpy.int32, None), ("SCENARIO_ID", numpy.int16, None),
+                             ("MEAN_DSAY", numpy.float32, None), ("SD_DSAY", numpy.float32, None),
+                             ("Q05_DSAY", numpy.float32, None), ("Q50_DSAY", numpy.float32, None),
+                             ("Q95_DSAY", numpy.float32, None), ("P_INJURED", numpy.float32, None)),
+    "UNCERTAINTY_SUMMARY": (("SCENARIO_ID", numpy.int16, None), ("REALIZATIONS", numpy.int32, None),
+                            ("METHOD", "text", 10), ("SEED", numpy.int32, None), ("DSAY_MEAN", numpy.float64, None),
+                            ("DSAY_SD", numpy.float64, None), ("DSAY_Q05", numpy.float64, None),
+                            ("DSAY_Q50", numpy.float64, None), ("DSAY_Q95", numpy.float64, None)),
+}
+
+
+class badvalue(Exception):
+    pass
+
+
+# NULL of an integer field type, None for other fields
+def null_value(kind):
+    if kind != "text" and numpy.dtype(kind).kind == "i":
+        return int(numpy.iinfo(kind).min)
+    return None
+
+
+class Categories(object):
+    __slots__ = ("names", "index")
+
+    def __init__(self, names=()):
+        self.names = []
+        self.index = {}
+        for name in names:
+            self.code(name)
+
+    def code(self, name):
+        if name not in self.index:
+            self.index[name] = len(self.names)
+            self.names.append(name)
+        return self.index[name]
+
+    def encode(self, values):
+        if isinstance(values, (str, type(u""))) or values is None:
+            return self.code(values)
+        values = numpy.asarray(values)
+        if values.dtype == object:
+            # May hold None, which does not sort with text
+            return numpy.array([self.code(v) for v in values.tolist()], dtype=numpy.int16)
+        unique, inverse = numpy.unique(values, return_inverse=True)
+        codes = numpy.array([self.code(v) for v in unique.tolist()], dtype=numpy.int16)
+        return codes[inverse]
+
+    def decode(self, codes):
+        return numpy.array(self.names, dtype=object)[numpy.asarray(codes)]
+
+
+class Record(object):
+    __slots__ = ("table", "index")
+
+    def __init__(self, table, index):
+        self.table = table
+        self.index = index
+
+    def __getattr__(self, field):
+        return self.getValue(field)
+
+    def getValue(self, field):
+        return self.table.value(field, self.index)
+
+
+class TypedTable(object):
+    __slots__ = ("name", "fields", "kinds", "data", "categories")
+
+    def __init__(self, name, size=0, categories=None):
+        self.name = name
+        schema = SCHEMAS[name]
+        self.fields = tuple(field for field, kind, length in schema)
+        self.kinds = dict((field, (kind, length)) for field, kind, length in schema)
+        dtype = [(field, numpy.int16 if kind == "text" else kind) for field, kind, length in schema]
+        self.data = numpy.zeros(size, dtype=dtype)
+        for field, kind, length in schema:
+            if null_value(kind) is not None:
+                self.data[field] = null_value(kind)
+            elif kind == numpy.float32:
+                self.data[field] = numpy.nan
+        self.categories = categories or {}
+        for field, kind, length in schema:
+            if kind == "text" and field not in self.categories:
+                self.categories[field] = Categories()
+
+    # Table of columns, a scalar fills its whole column.  NaN and None in an
+    # integer column become NULL, values outside its range raise badvalue.
+    @classmethod
+    def from_columns(cls, name, categories=None, **columns):
+        size = None
+        for value in columns.values():
+            if numpy.ndim(value) > 0:
+                size = len(value)
+                break
+        table = cls(name, size or 0, categories)
+        for field, value in columns.items():
+            table.set_column(field, value)
+        return table
+
+    def set_column(self, field, values):
+        kind, length = self.kinds[field]
+        if kind == "text":
+            self.data[field] = self.categories[field].encode(values)
+        elif null_value(kind) is not None:
+            values = numpy.asarray(values if values is not None else numpy.nan, dtype=numpy.float64)
+            null = numpy.isnan(values)
+            outside = ~null & ((values <= null_value(kind)) | (values > numpy.iinfo(kind).max))
+            if outside.any():
+                raise badvalue(self.name + "." + field + " value " + str(values[outside].flat[0]) +
+                               " is outside the " + numpy.dtype(kind).name + " range of the field")
+            self.data[field] = numpy.where(null, null_value(kind), values).astype(kind)
+        else:
+            self.data[field] = values
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes
+
+    def column(self, field):
+        kind, length = self.kinds[field]
+        if kind == "text":
+            return self.categories[field].decode(self.data[field])
+        return self.data[field]
+
+    def value(self, field, index):
+        kind, length = self.kinds[field]
+        value = self.data[field][index]
+        if kind == "text":
+            return self.categories[field].names[value]
+        value = value.item()
+        if value == null_value(kind) or value != value:
+            return None
+        return value
+
+    def record(self, index):
+        return Record(self, index)
+
+    # Python tuples for cursors, NULL as None
+    def rows(self, fields=None):
+        fields = fields or self.fields
+        for start in range(0, len(self.data), CHUNK):
+            chunk = self.data[start:start + CHUNK]
+            columns = []
+            for field in fields:
+                kind, length = self.kinds[field]
+                if kind == "text":
+                    names = self.categories[field].names
+                    columns.append([names[c] for c in chunk[field].tolist()])
+                elif null_value(kind) is not None:
+                    null = null_value(kind)
+                    columns.append([None if v == null else v for v in chunk[field].tolist()])
+                else:
+                    columns.append([None if v != v else v for v in chunk[field].tolist()])
+            for row in zip(*columns):
+                yield row
+
+    # Plain structured array: text as strings (NULL as ""), integers with NULLs as float NaN
+    def to_array(self):
+        dtype = []
+        for field in self.fields:
+            kind, length = self.kinds[field]
+            if kind == "text":
+                dtype.append((field, "U" + str(length)))
+            elif null_value(kind) is not None and (self.data[field] == null_value(kind)).any():
+                dtype.append((field, numpy.float64))
+            else:
+                dtype.append((field, self.data[field].dtype))
+        out = numpy.zeros(len(self.data), dtype=dtype)
+        for field in self.fields:
+            kind, length = self.kinds[field]
+            if kind == "text":
+                names = numpy.array(["" if name is None else name for name in self.categories[field].names], dtype=object)
+                out[field] = names[self.data[field]]
+            elif out.dtype[field].kind == "f" and null_value(kind) is not None:
+                out[field] = numpy.where(self.data[field] == null_value(kind), numpy.nan, self.data[field])
+            else:
+                out[field] = self.data[field]
+        return out
+
+
+# Read a table into a TypedTable, where is an SQL where clause
+def read(name, table, where=None, fields=None):
+    import arcpy
+    fields = fields or [field for field, kind, length in SCHEMAS[name]]
+    nulls = {}
+    for field, kind, length in SCHEMAS[name]:
+        if field in fields:
+            nulls[field] = "" if kind == "text" else (null_value(kind) if null_value(kind) is not None else numpy.nan)
+    rows = arcpy.da.TableToNumPyArray(table, fields, where, null_value=nulls)
+    out = TypedTable(name, len(rows))
+    for field in fields:
+        values = rows[field]
+        if null_value(out.kinds[field][0]) is not None:
+            # The NULL sentinel asked for above is outside the range set_column accepts
+            values = numpy.where(values == nulls[field], numpy.nan, values.astype(numpy.float64))
+        out.set_column(field, values)
+    return out
@@ -0,0 +1,255 @@
+# ---------------------------------------------------------------------------
+# NAME: ARD_HEA_ThresholdIndex.py
+# Version: 2.0 (ArcGIS 10.2)
+# Author: Research Planning, Inc.
+#
+# Usage: import ARD_HEA_ThresholdIndex
+#        index = ARD_HEA_ThresholdIndex.build(geoDB, grid, "Lead", byHabitat=True)
+#        cells = index.cells_above(25.0, habitat="MARSH")
+#        thresholds, cells = index.curve(points=100)
+#        levels = index.level_cells(record)
+#
+# Description: Sorted value index of a contaminant for threshold negotiation.  The
+#              COC_VALUE of every cell in COC_DATA is sorted once, overall and within
+#              each HABITAT_ID, and kept with the GRID_IDs in the same order.  The
+#              cumulative count of cells above a value is its distance from the end of
+#              the sorted values, so the cells and area above any threshold, the cells
+#              of each injury level of a USER_Contaminant_Injury_Thresholds record and
+#              whole area versus threshold curves are binary searches instead of a
+#              slice and reload run.  BuildThresholdIndex saves the indexes to a
+#              <geodatabase>_THRESHOLD_INDEX folder and writes their curves to the
+#              THRESHOLD_CURVES table; the query service loads a saved index that was
+#              built from the COC_DATA rows it holds, or builds one from its COC_DATA
+#              snapshot, to answer /threshold and /curve requests.
+#
+# Notes:  NULL and negative (NoData) values are left out, as SliceContaminantSurface
+#         leaves them out of the footprints.  Level boundaries follow
+#         ARD_HEA_Thresholds.reclass: a value on the boundary of two levels is in the
+#         lower one.  Cells without site attributes, or with a NULL HABITAT_ID, have
+#         an empty HABITAT_ID.
+#         A saved index keeps the row count and checksum of the COC_DATA rows (and
+#         habitats) it was built from, so it is only served while they are unchanged.
+#         Rebuild the index after COC_DATA is reloaded.
+#
+# Date Created: October 19, 2026
+#
+# ---------------------------------------------------------------------------
+
+import os
+import re
+import hashlib
+import numpy
+import ARD_HEA_Tables
+import ARD_HEA_Thresholds
+
+CURVE_TABLE = "THRESHOLD_CURVES"
+CURVE_POINTS = 100
+ALL = None
+
+
+class noindex(Exception):
+    pass
+
+
+def index_folder(geoDB):
+    return os.path.splitext(geoDB)[0] + "_THRESHOLD_INDEX"
+
+
+# Index file of a contaminant, named without arcpy so the query service can find it
+def index_file(folder, COCName):
+    return os.path.join(folder, re.sub(r"[^A-Z0-9_]", "_", str(COCName).upper()) + ".npz")
+
+
+# Row count and checksum of the COC_DATA rows (and habitats) an index is built from.
+# Values left out of the index all hash alike, so NULL read as NaN or as a sentinel match.
+def source_marker(gridIDs, values, habitats=None):
+    values = numpy.asarray(values, dtype=numpy.float64)
+    with numpy.errstate(invalid="ignore"):
+        values = numpy.where(numpy.isfinite(values) & (values >= 0), values, -1.0)
+    digest = hashlib.sha1(numpy.ascontiguousarray(numpy.asarray(gridIDs, dtype=numpy.int64)).tobytes())
+    digest.update(numpy.ascontiguousarray(values).tobytes())
+    if habitats is not None:
+        digest.update("\n".join(str(h) for h in numpy.asarray(habitats).tolist()).encode("utf-8"))
+    return str(len(values)) + ":" + digest.hexdigest()
+
+
+class ThresholdIndex(object):
+
+    def __init__(self, COCName, gridIDs, values, habitats=None, cellArea=1.0):
+        self.COCName = COCName
+        self.cellArea = float(cellArea)
+        values = numpy.asarray(values, dtype=numpy.float64)
+        gridIDs = numpy.asarray(gridIDs)
+        self.source = source_marker(gridIDs, values, habitats)
+        with numpy.errstate(invalid="ignore"):
+            keep = numpy.isfinite(values) & (values >= 0)
+        order = numpy.argsort(values[keep], kind="mergesort")
+        self.values = values[keep][order]
+        self.gridIDs = gridIDs[keep][order]
+        # Values sorted within each habitat, habitat h runs from offsets[h] to offsets[h + 1]
+        self.habitats = []
+        self.offsets = numpy.zeros(1, dtype=numpy.int64)
+        self.habitatValues = self.habitatIDs = None
+        if habitats is not None:
+            names, codes = numpy.unique(numpy.asarray(habitats)[keep][order], return_inverse=True)
+            byHabitat = numpy.argsort(codes, kind="mergesort")
+            self.habitats = [str(name) for name in names.tolist()]
+            self.offsets = numpy.r_[0, numpy.cumsum(numpy.bincount(codes, minlength=len(names)))]
+            self.habitatValues = self.values[byHabitat]
+            self.habitatIDs = self.gridIDs[byHabitat]
+
+    def __len__(self):
+        return len(self.values)
+
+    # Sorted values and GRID_IDs of all cells or of one habitat
+    def _sorted(self, habitat=ALL):
+        if habitat is ALL:
+            return self.values, self.gridIDs
+        if str(habitat) not in self.habitats:
+            raise noindex("No HABITAT_ID " + str(habitat) + " in the " + self.COCName + " index")
+        h = self.habitats.index(str(habitat))
+        start, stop = self.offsets[h], self.offsets[h + 1]
+        return self.habitatValues[start:stop], self.habitatIDs[start:stop]
+
+    # Cells with a value above each threshold
+    def cells_above(self, thresholds, habitat=ALL):
+        values = self._sorted(habitat)[0]
+        return len(values) - numpy.searchsorted(values, thresholds, "right")
+
+    def area_above(self, thresholds, habitat=ALL):
+        return self.cells_above(thresholds, habitat) * self.cellArea
+
+    # GRID_IDs of the cells above a threshold, highest values last
+    def grid_ids_above(self, threshold, habitat=ALL):
+        values, gridIDs = self._sorted(habitat)
+        return gridIDs[numpy.searchsorted(values, threshold, "right"):]
+
+    # Thresholds at evenly spaced cell ranks and the cells above each, or the cells
+    # above the given thresholds
+    def curve(self, thresholds=None, points=CURVE_POINTS, habitat=ALL):
+        values = self._sorted(habitat)[0]
+        if thresholds is None:
+            if not len(values):
+                return numpy.zeros(0), numpy.zeros(0, dtype=numpy.int64)
+            ranks = numpy.unique(numpy.linspace(0, len(values) - 1, max(int(points), 2)).astype(numpy.int64))
+            thresholds = numpy.unique(values[ranks])
+        thresholds = numpy.asarray(thresholds, dtype=numpy.float64)
+        return thresholds, self.cells_above(thresholds, habitat)
+
+    # Cells of each injury level of a threshold record as (category, from, to,
+    # percent, cells) tuples, with the levels skipped for the index value range
+    # as SliceContaminantSurface skips them for the surface
+    def level_cells(self, record, habitat=ALL):
+        values = self._sorted(habitat)[0]
+        if not len(values):
+            return []
+        ranges, levels, errFlag = ARD_HEA_Thresholds.threshold_ranges(record, float(self.values[0]),
+                                                                       float(self.values[-1]))
+        if errFlag:
+            raise noindex("Missing or incorrect threshold values for contaminant " + self.COCName)
+        out = []
+        for n, (fromValue, toValue, percent) in enumerate(ranges):
+            side = "left" if n == 0 else "right"
+            cells = numpy.searchsorted(values, toValue, "right") - numpy.searchsorted(values, fromValue, side)
+            category = [level[0] for level in levels if not level[4]][n]
+            out.append((category, fromValue, toValue, percent, int(cells)))
+        return out
+
+    def save(self, filename):
+        folder = os.path.dirname(filename)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder)
+        arrays = {"values": self.values, "gridIDs": self.gridIDs, "info": numpy.array([self.cellArea]),
+                  "name": numpy.array([self.COCName]), "source": numpy.array([self.source])}
+        if self.habitatValues is not None:
+            arrays.update(habitats=numpy.array(self.habitats), offsets=self.offsets,
+                          habitatValues=self.habitatValues, habitatIDs=self.habitatIDs)
+        with open(filename, "wb") as f:
+            numpy.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, filename):
+        if not os.path.exists(filename):
+            raise noindex("No threshold index " + filename + ", run BuildThresholdIndex first")
+        data = numpy.load(filename)
+        index = cls(str(data["name"][0]), numpy.zeros(0, dtype=numpy.int32), numpy.zeros(0),
+                    cellArea=float(data["info"][0]))
+        index.values = data["values"]
+        index.gridIDs = data["gridIDs"]
+        index.source = str(data["source"][0]) if "source" in data.files else None
+        if "habitats" in data.files:
+            index.habitats = [str(name) for name in data["habitats"].tolist()]
+            index.offsets = data["offsets"]
+            index.habitatValues = data["habitatValues"]
+            index.habitatIDs = data["habitatIDs"]
+        return index
+
+
+# HABITAT_ID of each GRID_ID from the SITE_ATTRIBUTES GRID_IDs and HABITAT_IDs, empty
+# for cells without attributes
+def habitat_ids(grid, siteIDs, siteHabitats, gridIDs):
+    cells = numpy.full(grid.size, "", dtype=object)
+    idx = grid.index(siteIDs)
+    keep = idx >= 0
+    siteHabitats = numpy.array(["" if h is None else h for h in numpy.asarray(siteHabitats, dtype=object).tolist()],
+                               dtype=object)
+    cells[idx[keep]] = siteHabitats[keep]
+    idx = grid.index(gridIDs)
+    return numpy.where(idx >= 0, cells[numpy.maximum(idx, 0)], "").astype(str)
+
+
+# Index of a contaminant built from COC_DATA, optionally split by HABITAT_ID
+def build(geoDB, grid, COCName, byHabitat=False):
+    import arcpy
+    table = geoDB + "\\COC_DATA"
+    where = arcpy.AddFieldDelimiters(table, "COC_NAME") + " = '" + str(COCName).replace("'", "''") + "'"
+    data = ARD_HEA_Tables.read("COC_DATA", table, where, fields=("GRID_ID", "COC_VALUE"))
+    if not len(data):
+        raise noindex("No COC_DATA rows for contaminant " + str(COCName))
+    habitats = None
+    if byHabitat:
+        siteTable = geoDB + "\\SITE_ATTRIBUTES"
+        if not arcpy.Exists(siteTable):
+            raise noindex("No SITE_ATTRIBUTES table in " + geoDB)
+        site = ARD_HEA_Tables.read("SITE_ATTRIBUTES", siteTable, fields=("GRID_ID", "HABITAT_ID"))
+        habitats = habitat_ids(grid, site.column("GRID_ID"), site.column("HABITAT_ID"), data.column("GRID_ID"))
+    return ThresholdIndex(COCName, data.column("GRID_ID"), data.column("COC_VALUE"), habitats, grid.cellsize ** 2)
+
+
+# THRESHOLD_CURVES rows of the overall and habitat curves of an index
+def curve_rows(index, points=CURVE_POINTS):
+    rows = []
+    for habitat in [ALL] + index.habitats:
+        thresholds, cells = index.curve(points=points, habitat=habitat)
+        for threshold, count in zip(thresholds.tolist(), cells.tolist()):
+            rows.append((index.COCName, habitat, threshold, int(count), count * index.cellArea))
+    return rows
+
+
+def create_table(geoDB):
+    import arcpy
+    table = geoDB + "\\" + CURVE_TABLE
+    if not arcpy.Exists(table):
+        arcpy.CreateTable_management(geoDB, CURVE_TABLE, "", "")
+        arcpy.AddField_management(table, "COC_NAME", "TEXT", "", "", "20", "", "NON_NULLABLE", "REQUIRED", "")
+        arcpy.AddField_management(table, "HABITAT_ID", "TEXT", "", "", "50", "", "NULLABLE", "NON_REQUIRED", "")
+        arcpy.AddField_management(table, "THRESHOLD", "DOUBLE", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
+        arcpy.AddField_management(table, "CELLS_ABOVE", "LONG", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
+        arcpy.AddField_management(table, "AREA_ABOVE", "DOUBLE", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
+        arcpy.AddIndex_management(table, "COC_NAME", "TCRV_NAM_IDX", "NON_UNIQUE", "ASCENDING")
+    return table
+
+
+# Replace the curves of a contaminant in THRESHOLD_CURVES
+def write_curves(geoDB, index, points=CURVE_POINTS):
+    import arcpy
+    table = create_table(geoDB)
+    where = arcpy.AddFieldDelimiters(table, "COC_NAME") + " = '" + str(index.COCName).replace("'", "''") + "'"
+    with arcpy.da.UpdateCursor(table, ("OID@",), where) as cursor:
+        for row in cursor:
+            cursor.deleteRow()
+    rows = curve_rows(index, points)
+    with arcpy.da.InsertCursor(table, ("COC_NAME", "HABITAT_ID", "THRESHOLD", "CELLS_ABOVE", "AREA_ABOVE")) as cursor:
+        for row in rows:
+            cursor.insertRow(row)
+    return len(rows)
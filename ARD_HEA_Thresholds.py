@@ -0,0 +1,75 @@
+# ---------------------------------------------------------------------------
+# NAME: ARD_HEA_Thresholds.py
+# Version: 2.0 (ArcGIS 10.2)
+# Author: Research Planning, Inc.
+#
+# Usage: import ARD_HEA_Thresholds
+#        ranges, levels, errFlag = ARD_HEA_Thresholds.threshold_ranges(record, rasMIN, rasMAX)
+#        classes = ARD_HEA_Thresholds.reclass(values, ranges)
+#
+# Description: Injury threshold handling shared by SliceContaminantSurface and the
+#              pipeline runner.  A USER_Contaminant_Injury_Thresholds record is turned
+#              into (from, to, percent injury) reclass ranges clipped to the range of
+#              the contaminant surface, and surfaces are reclassed in NumPy.
+#
+# Notes:  Level F has no upper threshold and runs to the surface maximum.
+#
+# Date Created: October 19, 2026
+#
+# ---------------------------------------------------------------------------
+
+import numpy
+from ARD_HEA_Grid import NODATA
+
+CATEGORIES = ["A", "B", "C", "D", "E", "F"]
+
+
+# Threshold table fields read for each contaminant and scenario
+def fields():
+    out = ["COC_NAME", "Scenario_ID"]
+    for cat in CATEGORIES:
+        if cat != CATEGORIES[-1]:
+            out.append("Thres_" + cat + "_High")
+        out.append("Thres_" + cat + "_Perc")
+    return out
+
+
+# Reclass ranges for a threshold record (a mapping of field name to value).  Returns
+# the ranges, a (category, from, to, percent, skipped) tuple for each level and a flag
+# set when the record is missing values.
+def threshold_ranges(record, rasMIN, rasMAX):
+    ranges = []
+    levels = []
+    errFlag = False
+    for cat in range(len(CATEGORIES)):
+        skipFlag = False
+        if cat != len(CATEGORIES) - 1:
+            high = record["Thres_" + CATEGORIES[cat] + "_High"]
+            if high is not None and high > rasMAX:
+                high = rasMAX
+        else:
+            high = rasMAX
+        if cat != 0:
+            prevhigh = record["Thres_" + CATEGORIES[cat - 1] + "_High"]
+        else:
+            prevhigh = 0
+        perc = record["Thres_" + CATEGORIES[cat] + "_Perc"]
+        if high is None or perc is None or prevhigh is None:
+            errFlag = True
+            skipFlag = True
+        elif prevhigh >= high or high < rasMIN or prevhigh > rasMAX:
+            skipFlag = True
+        if not skipFlag:
+            ranges.append((prevhigh, high, int(perc)))
+        levels.append((CATEGORIES[cat], prevhigh, high, perc, skipFlag))
+    return ranges, levels, errFlag
+
+
+# Equivalent of ReclassByTable with NoData for unmatched values, a value on the
+# boundary of two ranges takes the lower range
+def reclass(values, ranges, nodata=NODATA):
+    out = numpy.full(numpy.shape(values), nodata, dtype=numpy.int32)
+    with numpy.errstate(invalid="ignore"):
+        for fromValue, toValue, label in reversed(ranges):
+            out[(values >= fromValue) & (values <= toValue)] = label
+    return out
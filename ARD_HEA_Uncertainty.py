@@ -0,0 +1,290 @@
+# ---------------------------------------------------------------------------
+# NAME: ARD_HEA_Uncertainty.py
+# Version: 2.0 (ArcGIS 10.2)
+# Author: Research Planning, Inc.
+#
+# Usage: import ARD_HEA_Uncertainty
+#        factor = ARD_HEA_Uncertainty.dsay_factor(grid.cellsize, 2005, 2030, 2005, 0.03)
+#        result = ARD_HEA_Uncertainty.propagate(grid, contaminants, factor, realizations=200, seed=1)
+#        records = ARD_HEA_Uncertainty.cell_records(grid, scenario, result)
+#
+# Description: Monte Carlo propagation of sampling uncertainty from the _filtered
+#              samples of a scenario's contaminants to per cell DSAY.  Each realization
+#              bootstraps the samples (resampling them with replacement) or perturbs their
+#              values with lognormal noise, re-interpolates every contaminant by IDW,
+#              reclasses the surfaces by the injury thresholds and overlays them into one
+#              percent injury per cell, scaled to DSAY by a discounted service year factor.
+#              Grid cells are split into chunks run across a process pool.  A chunk finds
+#              the IDW neighbourhoods of its cells once and then runs every realization as
+#              a vectorized pass over them, folding each into running per cell statistics:
+#              the mean and variance (Welford) and a 1% percent injury histogram from
+#              which the QUANTILES are read.  Realizations are never stored.
+#
+# Notes:  Realization n of a contaminant draws from a random state seeded by the seed, n
+#         and the contaminant name, so results do not depend on the chunking or number of
+#         processes and a contaminant varies the same way in every scenario.  A bootstrap
+#         realization reweights the fixed neighbourhood of each cell by how often its
+#         samples were drawn instead of searching the resampled set again.  Surfaces are
+#         always re-interpolated by IDW, whatever method made the registered surface.
+#         dsay_factor assumes a constant injury over the injury years, without recovery;
+#         NoData cells count as uninjured.
+#
+# Date Created: October 19, 2026
+#
+# ---------------------------------------------------------------------------
+
+import zlib
+import numpy
+from scipy.spatial import cKDTree
+import ARD_HEA_Parallel
+import ARD_HEA_Interpolate
+import ARD_HEA_Thresholds
+import ARD_HEA_Overlay
+import ARD_HEA_Tables
+
+METHODS = ("BOOTSTRAP", "PERTURB")
+QUANTILES = (5, 50, 95)
+UNCERTAINTY_TABLE = "SCENARIO_UNCERTAINTY"
+SUMMARY_TABLE = "UNCERTAINTY_SUMMARY"
+ACRES_PER_SQUARE_METER = 1.0 / 4046.8564224
+
+# Percent injury histogram bins (0 to 100) kept for each cell
+BINS = 101
+
+# Per-process realization state set up by the pool initializer
+_state = {}
+
+
+class badmethod(Exception):
+    pass
+
+
+def method_name(method):
+    name = str(method or "BOOTSTRAP").strip().upper()
+    if name not in METHODS:
+        raise badmethod("Unknown uncertainty method " + str(method) + ", use one of " + ", ".join(METHODS))
+    return name
+
+
+# DSAY of a fully injured cell: its area in acres times the service years from
+# startYear to endYear discounted to baseYear at rate
+def dsay_factor(cellsize, startYear, endYear, baseYear=None, rate=0.03, areaScale=ACRES_PER_SQUARE_METER):
+    baseYear = startYear if baseYear is None else baseYear
+    years = numpy.arange(int(startYear), int(endYear) + 1)
+    discount = (1.0 + float(rate)) ** (int(baseYear) - years)
+    return float(cellsize) ** 2 * areaScale * float(discount.sum())
+
+
+# Random state of one realization of a contaminant
+def random_state(seed, realization, COCName):
+    return numpy.random.RandomState([int(seed) & 0xffffffff, int(realization),
+                                     zlib.crc32(str(COCName).encode("utf-8")) & 0xffffffff])
+
+
+# Sample values and draw counts of one realization
+def realization_samples(values, method, cv, seed, realization, COCName):
+    rs = random_state(seed, realization, COCName)
+    n = len(values)
+    if method == "BOOTSTRAP":
+        return values, numpy.bincount(rs.randint(0, n, n), minlength=n).astype(numpy.float64)
+    sigma = numpy.sqrt(numpy.log(1.0 + float(cv) ** 2))
+    noise = numpy.exp(sigma * rs.standard_normal(n) - sigma ** 2 / 2.0)
+    return values * noise, numpy.ones(n)
+
+
+# IDW neighbourhoods of a block of cells, re-evaluated for each realization
+class Neighborhood(object):
+
+    def __init__(self, tree, px, py, power=2.0, neighbors=12, radius=None):
+        dist, self.idx = ARD_HEA_Interpolate.query_neighbors(tree, px, py, neighbors, radius)
+        found = numpy.isfinite(dist)
+        exact = found & (dist == 0)
+        safe = numpy.where(found & ~exact, dist, 1.0)
+        self.weights = numpy.where(found & ~exact, safe ** -float(power), 0.0)
+        self.hit = exact.any(axis=1)
+        self.exact = self.idx[self.hit, numpy.argmax(exact[self.hit], axis=1)]
+
+    # IDW estimates from sample values drawn counts times.  A cell on a sample
+    # takes its value when it was drawn, otherwise the estimate of its neighbours.
+    def estimate(self, values, counts):
+        weights = self.weights * counts[self.idx]
+        total = weights.sum(axis=1)
+        with numpy.errstate(invalid="ignore", divide="ignore"):
+            out = (weights * values[self.idx]).sum(axis=1) / total
+        out[total == 0] = numpy.nan
+        if len(self.exact):
+            drawn = counts[self.exact] > 0
+            rows = numpy.flatnonzero(self.hit)[drawn]
+            out[rows] = values[self.exact[drawn]]
+        return out
+
+
+# Running per cell statistics of a block of cells
+class CellStatistics(object):
+
+    def __init__(self, size):
+        self.count = 0
+        self.mean = numpy.zeros(size)
+        self.m2 = numpy.zeros(size)
+        self.injured = numpy.zeros(size, dtype=numpy.int32)
+        self.histogram = numpy.zeros((size, BINS), dtype=numpy.int32)
+        self.rows = numpy.arange(size)
+
+    # Fold in one realization of percent injury
+    def add(self, injury):
+        self.count += 1
+        delta = injury - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (injury - self.mean)
+        self.injured += injury > 0
+        self.histogram[self.rows, numpy.clip(numpy.rint(injury), 0, BINS - 1).astype(numpy.intp)] += 1
+
+    def variance(self):
+        if self.count < 2:
+            return numpy.zeros_like(self.m2)
+        return self.m2 / (self.count - 1)
+
+    # Percent injury at percentile q, the lowest value reached by q% of the realizations
+    def quantile(self, q):
+        rank = max(1, int(numpy.ceil(self.count * q / 100.0)))
+        return numpy.argmax(numpy.cumsum(self.histogram, axis=1) >= rank, axis=1).astype(numpy.float64)
+
+
+def _init_mc(contaminants, params):
+    _state["params"] = params
+    _state["contaminants"] = []
+    for COCName, x, y, values, logTransform, ranges in contaminants:
+        tree = cKDTree(numpy.column_stack((x, y)))
+        _state["contaminants"].append((COCName, tree, values, logTransform, ranges))
+
+
+# Per cell mean, variance, quantiles and probability of injury, and the total
+# percent injury of each realization, for a block of cells
+def _mc_chunk(cells):
+    params = _state["params"]
+    power, neighbors, radius, method, cv, seed, realizations, rule = params[4:12]
+    x, y = ARD_HEA_Interpolate.cell_centers(cells, params)
+    neighborhoods = [Neighborhood(tree, x, y, power, neighbors, radius)
+                     for COCName, tree, values, logTransform, ranges in _state["contaminants"]]
+    stats = CellStatistics(len(cells))
+    totals = numpy.zeros(realizations)
+    for n in range(realizations):
+        classes = []
+        for neighborhood, (COCName, tree, values, logTransform, ranges) in zip(neighborhoods, _state["contaminants"]):
+            drawn, counts = realization_samples(values, method, cv, seed, n, COCName)
+            if logTransform:
+                surface = ARD_HEA_Interpolate.back_transform(
+                    neighborhood.estimate(ARD_HEA_Interpolate.log_transform(drawn), counts))
+            else:
+                surface = neighborhood.estimate(drawn, counts)
+            classes.append(ARD_HEA_Thresholds.reclass(surface, ranges))
+        injury = numpy.nan_to_num(ARD_HEA_Overlay.overlay(classes, rule)[0].astype(numpy.float64))
+        stats.add(injury)
+        totals[n] = injury.sum()
+    quantiles = numpy.array([stats.quantile(q) for q in QUANTILES])
+    return stats.mean, stats.variance(), quantiles, stats.injured / float(realizations), totals
+
+
+# Reclass ranges of a threshold record that hold for any surface
+def realization_ranges(record):
+    ranges, levels, errFlag = ARD_HEA_Thresholds.threshold_ranges(record, -numpy.inf, numpy.inf)
+    return ranges, errFlag
+
+
+# Propagate the samples of contaminants, a list of (COC_NAME, x, y, values,
+# logTransform, threshold record), to DSAY on every valid cell of the grid
+def propagate(grid, contaminants, factor, realizations=200, method="BOOTSTRAP", cv=0.3, seed=0, rule="MAX",
+              power=2.0, neighbors=12, radius=None, chunk=16384, processes=None):
+    method = method_name(method)
+    rule = ARD_HEA_Overlay.rule_name(rule)
+    realizations = int(realizations)
+    if realizations < 1:
+        raise badmethod("At least one realization is needed")
+    prepared = []
+    for COCName, x, y, values, logTransform, record in contaminants:
+        x, y, values = ARD_HEA_Interpolate.clean_samples(x, y, values)
+        if len(values) == 0:
+            raise ARD_HEA_Interpolate.nosamples
+        ranges, errFlag = realization_ranges(record)
+        if errFlag or not ranges:
+            raise badmethod("Missing or incorrect threshold values for contaminant " + COCName)
+        prepared.append((COCName, x, y, values, bool(logTransform), ranges))
+    if not prepared:
+        raise ARD_HEA_Interpolate.nosamples
+    cells = grid.valid_index()
+    chunks = [cells[start:stop] for start, stop in ARD_HEA_Parallel.chunk_ranges(len(cells), chunk)]
+    params = (grid.xmin, grid.ymax, grid.cellsize, grid.ncols, power, neighbors, radius, method, cv, seed,
+              realizations, rule)
+    parts = ARD_HEA_Parallel.map_chunks(_mc_chunk, chunks, processes, _init_mc, (prepared, params))
+    scale = float(factor) / 100.0
+    totals = sum(part[4] for part in parts) * scale if parts else numpy.zeros(realizations)
+    return {"mean": numpy.concatenate([part[0] for part in parts]) * scale,
+            "sd": numpy.sqrt(numpy.concatenate([part[1] for part in parts])) * scale,
+            "quantiles": numpy.concatenate([part[2] for part in parts], axis=1) * scale,
+            "pInjured": numpy.concatenate([part[3] for part in parts]),
+            "totals": totals, "realizations": realizations, "method": method, "seed": int(seed)}
+
+
+def quantile_field(q):
+    return "Q%02d_DSAY" % q
+
+
+# SCENARIO_UNCERTAINTY rows of the cells injured in any realization
+def cell_records(grid, scenario, result):
+    keep = result["pInjured"] > 0
+    columns = {"MEAN_DSAY": result["mean"][keep], "SD_DSAY": result["sd"][keep], "P_INJURED": result["pInjured"][keep]}
+    for q, values in zip(QUANTILES, result["quantiles"]):
+        columns[quantile_field(q)] = values[keep]
+    return ARD_HEA_Tables.TypedTable.from_columns(UNCERTAINTY_TABLE, GRID_ID=grid.valid_ids()[keep],
+                                                  SCENARIO_ID=scenario, **columns)
+
+
+# UNCERTAINTY_SUMMARY row of the scenario total DSAY
+def summary_records(scenario, result):
+    totals = result["totals"]
+    columns = {"DSAY_MEAN": [totals.mean()], "DSAY_SD": [totals.std(ddof=1) if len(totals) > 1 else 0.0]}
+    for q in QUANTILES:
+        columns["DSAY_" + quantile_field(q)[:3]] = [numpy.percentile(totals, q)]
+    return ARD_HEA_Tables.TypedTable.from_columns(SUMMARY_TABLE, SCENARIO_ID=[scenario],
+                                                  REALIZATIONS=result["realizations"], METHOD=result["method"],
+                                                  SEED=result["seed"], **columns)
+
+
+def create_tables(geoDB):
+    import arcpy
+    table = geoDB + "\\" + UNCERTAINTY_TABLE
+    if not arcpy.Exists(table):
+        arcpy.CreateTable_management(geoDB, UNCERTAINTY_TABLE, "", "")
+        arcpy.AddField_management(table, "GRID_ID", "LONG", "", "", "", "", "NON_NULLABLE", "REQUIRED", "")
+        arcpy.AddField_management(table, "SCENARIO_ID", "SHORT", "", "", "", "", "NON_NULLABLE", "REQUIRED", "")
+        arcpy.AddField_management(table, "MEAN_DSAY", "FLOAT", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
+        arcpy.AddField_management(table, "SD_DSAY", "FLOAT", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
+        for q in QUANTILES:
+            arcpy.AddField_management(table, quantile_field(q), "FLOAT", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
+        arcpy.AddField_management(table, "P_INJURED", "FLOAT", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
+        arcpy.AddIndex_management(table, "GRID_ID", "SUNC_GID_IDX", "NON_UNIQUE", "ASCENDING")
+        arcpy.AddIndex_management(table, "SCENARIO_ID", "SUNC_SID_IDX", "NON_UNIQUE", "ASCENDING")
+    table = geoDB + "\\" + SUMMARY_TABLE
+    if not arcpy.Exists(table):
+        arcpy.CreateTable_management(geoDB, SUMMARY_TABLE, "", "")
+        arcpy.AddField_management(table, "SCENARIO_ID", "SHORT", "", "", "", "", "NON_NULLABLE", "REQUIRED", "")
+        arcpy.AddField_management(table, "REALIZATIONS", "LONG", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
+        arcpy.AddField_management(table, "METHOD", "TEXT", "", "", "10", "", "NULLABLE", "NON_REQUIRED", "")
+        arcpy.AddField_management(table, "SEED", "LONG", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
+        arcpy.AddField_management(table, "DSAY_MEAN", "DOUBLE", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
+        arcpy.AddField_management(table, "DSAY_SD", "DOUBLE", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
+        for q in QUANTILES:
+            arcpy.AddField_management(table, "DSAY_" + quantile_field(q)[:3], "DOUBLE", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
+
+
+# Replace the rows of a scenario in a table with records
+def replace_rows(geoDB, name, scenario, records):
+    import arcpy
+    table = geoDB + "\\" + name
+    expression = arcpy.AddFieldDelimiters(table, "SCENARIO_ID") + " = " + str(int(scenario))
+    with arcpy.da.UpdateCursor(table, ("OID@",), expression) as cursor:
+        for row in cursor:
+            cursor.deleteRow()
+    with arcpy.da.InsertCursor(table, records.fields) as cursor:
+        for row in records.rows():
+            cursor.insertRow(row)
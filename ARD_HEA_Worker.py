@@ -0,0 +1,211 @@
+# ---------------------------------------------------------------------------
+# NAME: ARD_HEA_Worker.py
+# Version: 2.0 (ArcGIS 10.2)
+# Author: Research Planning, Inc.
+#
+# Usage: python ARD_HEA_Worker.py start [arcpy|local] [port]
+#        python ARD_HEA_Worker.py run <tool_script_or_job> <arguments...>
+#        python ARD_HEA_Worker.py stop
+#
+# Description: Long lived local worker for chaining HEA tool runs.  The worker loads
+#              the geoprocessing environment once (toolboxes, licences, ARD HEA
+#              version) and then takes jobs over a local socket, running each tool
+#              script in-process with its arguments and returning the tool's
+#              messages.  Jobs may also call a public ARD_HEA_ library function by
+#              "module:function" name, which is all the local (non-arcpy) backend
+#              supports.
+#
+# Notes:  The worker only listens on localhost and clients must present the key
+#         written to ~/.ard_hea_worker (readable by its owner only) when the worker
+#         started.  Jobs run one at a
+#         time in the order they arrive.
+#
+# Date Created: October 19, 2026
+#
+# ---------------------------------------------------------------------------
+
+import os
+import sys
+import time
+import binascii
+from multiprocessing.connection import Listener, Client
+import ARD_HEA_Backend
+
+PORT = 6710
+
+# Short job names for the pipeline tool scripts
+JOBS = {"create_database": "CreateAnalysisDatabase.py",
+        "filter_samples": "FilterAnalyzeSamples.py",
+        "interpolate": "InterpolateSurface.py",
+        "cross_validate": "CrossValidateSurface.py",
+        "load_surfaces": "LoadContaminantSurfaces.py",
+        "load_unfiltered": "LoadUnfilteredContaminantSurfaces.py",
+        "load_site_attributes": "LoadSiteAttributes.py",
+        "slice": "SliceContaminantSurface.py",
+        "load_footprints": "LoadFootprints.py",
+        "import_results": "ImportAnalysisResults.py"}
+
+
+class noworker(Exception):
+    pass
+
+
+def key_file(name=".ard_hea_worker"):
+    return os.path.join(os.path.expanduser("~"), name)
+
+
+# Key shared by the worker and its clients, a new one is made when the worker starts.
+# The key file is only readable by its owner.
+def auth_key(create=False, name=".ard_hea_worker"):
+    filename = key_file(name)
+    if create:
+        key = binascii.hexlify(os.urandom(16))
+        if os.path.exists(filename):
+            os.remove(filename)
+        fd = os.open(filename, os.O_CREAT | os.O_WRONLY | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(key)
+        return key
+    if not os.path.exists(filename):
+        raise noworker
+    with open(filename, "rb") as f:
+        return f.read().strip()
+
+
+# Run one job dictionary on a backend and build the reply dictionary
+def run_job(backend, job):
+    start = time.time()
+    kind = job.get("job")
+    if kind == "script":
+        script = JOBS.get(job["script"], job["script"])
+        try:
+            result, output, error = backend.run_script(script, job.get("args", ()))
+        except ARD_HEA_Backend.unsupported as e:
+            result, output, error = (None, "", str(e))
+    elif kind == "call":
+        result, output, error = backend.call(job["name"], job.get("args", ()), job.get("kwargs"))
+    elif kind == "ping":
+        result, output, error = (backend.name, "", None)
+    else:
+        result, output, error = (None, "", "Unknown job: " + str(kind))
+    return {"ok": error is None, "result": result, "output": output, "error": error,
+            "messages": list(backend.messages), "seconds": time.time() - start}
+
+
+# Serve jobs until a client sends a stop job
+def serve(port=PORT, backend=None):
+    backend = backend or ARD_HEA_Backend.get_backend()
+    if ARD_HEA_Backend.HOME not in sys.path:
+        sys.path.insert(0, ARD_HEA_Backend.HOME)
+    backend.initialize()
+    listener = Listener(("localhost", int(port)), authkey=auth_key(create=True))
+    print("ARD HEA worker (" + backend.name + " backend) listening on localhost:" + str(port))
+    running = True
+    try:
+        while running:
+            try:
+                conn = listener.accept()
+            except Exception:
+                # Failed authentication or a dropped client
+                continue
+            try:
+                while True:
+                    try:
+                        job = conn.recv()
+                    except EOFError:
+                        break
+                    if job.get("job") == "stop":
+                        conn.send({"ok": True, "result": None, "output": "", "error": None,
+                                   "messages": [], "seconds": 0.0})
+                        running = False
+                        break
+                    try:
+                        reply = run_job(backend, job)
+                        conn.send(reply)
+                    except Exception as e:
+                        conn.send({"ok": False, "result": None, "output": "", "error": str(e),
+                                   "messages": [], "seconds": 0.0})
+            finally:
+                conn.close()
+    finally:
+        listener.close()
+
+
+class WorkerClient(object):
+
+    def __init__(self, port=PORT):
+        try:
+            self.conn = Client(("localhost", int(port)), authkey=auth_key())
+        except (IOError, OSError):
+            raise noworker
+
+    def submit(self, job):
+        self.conn.send(job)
+        return self.conn.recv()
+
+    def run_script(self, script, *args):
+        return self.submit({"job": "script", "script": script, "args": [str(a) for a in args]})
+
+    def call(self, name, *args, **kwargs):
+        return self.submit({"job": "call", "name": name, "args": list(args), "kwargs": kwargs})
+
+    def ping(self):
+        return self.submit({"job": "ping"})["result"]
+
+    def stop(self):
+        return self.submit({"job": "stop"})
+
+    def close(self):
+        self.conn.close()
+
+
+# Run a tool script on the worker, or in this process when no worker is running
+def run_tool(script, args=(), port=PORT):
+    try:
+        client = WorkerClient(port)
+    except noworker:
+        return run_job(ARD_HEA_Backend.get_backend(), {"job": "script", "script": script, "args": list(args)})
+    try:
+        return client.run_script(script, *args)
+    finally:
+        client.close()
+
+
+def main(argv):
+    if len(argv) < 2 or argv[1] not in ("start", "run", "stop", "ping"):
+        print("Usage: ARD_HEA_Worker.py start [arcpy|local] [port] | run <script> <args...> | stop | ping")
+        return 2
+    command = argv[1]
+    port = int(os.environ.get("HEA_WORKER_PORT", PORT))
+    if command == "start":
+        if len(argv) > 3:
+            port = int(argv[3])
+        serve(port, ARD_HEA_Backend.get_backend(argv[2] if len(argv) > 2 else None))
+        return 0
+    if command == "run":
+        reply = run_tool(argv[2], argv[3:], port)
+        for level, message in reply["messages"]:
+            print(message)
+        if reply["output"]:
+            print(reply["output"].rstrip())
+        if not reply["ok"]:
+            print(reply["error"])
+            return 1
+        return 0
+    try:
+        client = WorkerClient(port)
+    except noworker:
+        print("No ARD HEA worker is running")
+        return 1
+    try:
+        if command == "ping":
+            print("ARD HEA worker running with the " + client.ping() + " backend")
+        else:
+            client.stop()
+    finally:
+        client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,73 @@
+# ---------------------------------------------------------------------------
+# NAME: BenchmarkPipeline.py
+# Version: 2.0 (ArcGIS 10.2)
+# Author: Research Planning, Inc.
+#
+# Usage: BenchmarkPipeline [--cells n,n,...] [--cocs n,...] [--samples n,...] [--scenarios n,...]
+#                          [--vertices n,...] [--label name] [--output results_file]
+#                          [--processes n] [--seed n] [--metric name] [--report results_file ...]
+#
+# Optional Arguments:
+#   cells - Analysis grid cells, one scale point for each value (default 10000)
+#   cocs - Contaminants of concern (default 2)
+#   samples - Filtered samples for each contaminant (default 200)
+#   scenarios - Injury threshold scenarios (default 3)
+#   vertices - Vertices in each habitat polygon (default 50)
+#   label - Name recorded with the results, e.g. the version or branch measured
+#   output - JSON lines file the stage results are appended to
+#   processes - Worker processes used for interpolation
+#   seed - Random seed for the synthetic projects (default 0)
+#   metric - Reported figure: seconds, rows_per_s or cells_per_s (default seconds)
+#   report - Report earlier results files instead of running the benchmark
+#
+# Description: Builds synthetic HEA projects for every combination of the given
+#              values and times the pipeline stages on each of them with the local
+#              backend, so no ArcGIS installation or client data is needed.
+#              Example: BenchmarkPipeline --cells 10000,40000,160000 --label v2.0
+#              --output bench.jsonl, then the same with --label of another version,
+#              then BenchmarkPipeline --report bench.jsonl --metric cells_per_s.
+#
+# Notes:  The other stages run the product pipeline code.  The spatial join and
+#         scenario import steps of the LoadSiteAttributes and ImportAnalysisResults
+#         tools are emulated in NumPy and marked with * in the report, so their times
+#         show how the work scales rather than what the ArcGIS tools take on a given
+#         machine.
+#
+# Date Created: October 19, 2026
+#
+# ---------------------------------------------------------------------------
+
+# Import system modules
+import ARD_HEA_Benchmark
+import argparse
+import itertools
+import sys
+
+def main (argv):
+    parser = argparse.ArgumentParser(prog="BenchmarkPipeline")
+    for name in ARD_HEA_Benchmark.PARAMETERS:
+        parser.add_argument("--" + name, default=str(ARD_HEA_Benchmark.DEFAULTS[name]))
+    parser.add_argument("--label", default="")
+    parser.add_argument("--output")
+    parser.add_argument("--processes", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--metric", default="seconds", choices=("seconds", "rows_per_s", "cells_per_s"))
+    parser.add_argument("--report", nargs="+")
+    args = parser.parse_args(argv[1:])
+
+    if args.report:
+        results = []
+        for filename in args.report:
+            results.extend(ARD_HEA_Benchmark.read_results(filename))
+    else:
+        # One scale point for every combination of the listed values
+        values = [[int(v) for v in getattr(args, name).split(",")] for name in ARD_HEA_Benchmark.PARAMETERS]
+        points = [dict(zip(ARD_HEA_Benchmark.PARAMETERS, combo)) for combo in itertools.product(*values)]
+        results = ARD_HEA_Benchmark.run_benchmarks(points, args.label, args.output, args.seed, args.processes)
+
+    for line in ARD_HEA_Benchmark.report(results, args.metric):
+        print(line)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,130 @@
+# ---------------------------------------------------------------------------
+# NAME: BuildDSAYRollup.py
+# Version: 2.0 (ArcGIS 10.2)
+# Author: Research Planning, Inc.
+#
+# Usage: BuildDSAYRollup <input_analysis_database> {input_analysis_table} {list_of_scenarios}
+#
+# Required Arguments:
+#   input_analysis_database - Name of analysis geodatabase
+#
+# Optional Arguments:
+#   input_analysis_table - Name and location of the HEA calculation database, the DSAY cube
+#                          of the scenarios is refreshed from ANALYSIS_DSAY_By_Grid_Year first
+#   list_of_scenarios - List of Scenario_IDs to refresh, default all scenarios
+#
+# Description: Builds the DSAY_ROLLUP table of DSAY, SAY and injured cells by scenario,
+#              year and every combination of HABITAT_ID, CONDITION_ID, REMEDIATION_ID
+#              and SUBSITE_ID (ARD_HEA_Rollup).  SITE_ATTRIBUTES is joined to the grid
+#              once and the per year results are read from the DSAY cube.
+#
+# Notes:  Currently the tool is designed to only be run via the ARD HEA Toolbox.
+#         Run LoadSiteAttributes and ExportDSAYCube, or give the HEA calculation
+#         database, first.  Rerun for a scenario after it is reimported.
+#
+# Date Created: October 19, 2026
+#
+# ---------------------------------------------------------------------------
+
+class noresults(Exception):
+    pass
+
+# Import system modules
+import ARD_HEA_Tools
+import ARD_HEA_Backend
+import ARD_HEA_Grid
+import ARD_HEA_Metrics
+import ARD_HEA_DSAYCube
+import ARD_HEA_Rollup
+import sys
+import string
+import os
+import traceback
+import arcpy
+from arcpy import env
+
+# Check out any necessary licenses and load required toolboxes...
+ARD_HEA_Backend.initialize(("Data Management Tools.tbx",), ())
+
+try:
+    # Report version...
+    ver = ARD_HEA_Backend.version()
+    arcpy.AddMessage("ARD HEA Tools Version: " + ver)
+
+    # Script arguments...
+    geoDB = sys.argv[1]
+    resDB = None
+    if len(sys.argv) > 2 and sys.argv[2] not in ("", "#"):
+        resDB = sys.argv[2]
+    scenarios = None
+    if len(sys.argv) > 3 and sys.argv[3] not in ("", "#"):
+        scenarios = [int(v.strip("'")) for v in sys.argv[3].split(";")]
+
+    # Describe the analysis grid
+    grid = ARD_HEA_Grid.load_grid(geoDB)
+    metrics = ARD_HEA_Metrics.project_metrics(geoDB, "BuildDSAYRollup")
+
+    # Process: Refresh the DSAY cube from the results table...
+    if resDB is not None:
+        resTbl = resDB + "\\" + ARD_HEA_DSAYCube.RESULTS_TABLE
+        if arcpy.Exists(resTbl) == False:
+            raise noresults
+        arcpy.AddMessage("Refreshing DSAY cube...")
+        with metrics.stage("cube export"):
+            cube = ARD_HEA_DSAYCube.build(geoDB, grid, resTbl, scenarios=scenarios)
+    else:
+        cube = ARD_HEA_DSAYCube.DSAYCube(ARD_HEA_DSAYCube.cube_folder(geoDB), grid)
+
+    # Process: Join the site attributes to the grid...
+    with metrics.stage("site join", cells=grid.total_cells):
+        groups = ARD_HEA_Rollup.site_groups(geoDB, grid)
+    arcpy.AddMessage(str(len(groups.groups)) + " site attribute combinations")
+
+    # Process: Roll up the scenarios...
+    with metrics.stage("DSAY_ROLLUP update") as step:
+        step.rows = ARD_HEA_Rollup.refresh(geoDB, grid, cube, scenarios, groups)
+    arcpy.AddMessage(str(step.rows) + " rollup rows written")
+
+    # Report stage timings
+    for line in metrics.summary():
+        arcpy.AddMessage(line)
+
+except noresults:
+    arcpy.AddError("\n*** ERROR *** " + resTbl + ": Cannot find results table.  Make sure you have selected a valid HEA calculation database.\n")
+    print "\n*** ERROR *** " + resTbl + ": Cannot find results table.  Make sure you have selected a valid HEA calculation database.\n"
+
+except (ARD_HEA_DSAYCube.nocube, ARD_HEA_Rollup.norollup) as e:
+    arcpy.AddError("\n*** ERROR ***\n" + str(e))
+    print "\n*** ERROR ***\n" + str(e)
+
+except arcpy.ExecuteError:
+    # Get the tool error messages
+    msgs = arcpy.GetMessage(0)
+    msgs += arcpy.GetMessages(2)
+
+    # Return tool error messages for use with a script tool
+    arcpy.AddError(msgs)
+
+    # Print tool error messages for use in Python/PythonWin
+    print msgs
+
+except:
+    # Get the traceback object
+    #
+    tb = sys.exc_info()[2]
+    tbinfo = traceback.format_tb(tb)[0]
+
+    # Concatenate information together concerning the error into a message string
+    #
+    pymsg = "PYTHON ERRORS:\nTraceback info:\n" + tbinfo + "\nError Info:\n" + str(sys.exc_info()[1])
+    msgs = "ArcPy ERRORS:\n" + arcpy.GetMessages(2) + "\n"
+
+    # Return python error messages for use in script tool or Python Window
+    #
+    arcpy.AddError(pymsg)
+    arcpy.AddError(msgs)
+
+    # Print Python error messages for use in Python / Python Window
+    #
+    print pymsg + "\n"
+    print msgs
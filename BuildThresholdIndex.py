@@ -0,0 +1,130 @@
+# ---------------------------------------------------------------------------
+# NAME: BuildThresholdIndex.py
+# Version: 2.0 (ArcGIS 10.2)
+# Author: Research Planning, Inc.
+#
+# Usage: BuildThresholdIndex <input_analysis_database> {list_of_contaminants} {boolean_by_habitat}
+#   {curve_points}
+#
+# Required Arguments:
+#   input_analysis_database - Name of analysis geodatabase
+#
+# Optional Arguments:
+#   list_of_contaminants - List of contaminant names loaded into COC_DATA, default all
+#                          contaminants in COC_INVENTORY
+#   boolean_by_habitat - Boolean flag indicating if the index is also split by HABITAT_ID
+#                        from SITE_ATTRIBUTES (default false)
+#   curve_points - Number of points on each area versus threshold curve (default 100)
+#
+# Description: Builds the sorted value index of each contaminant from COC_DATA
+#              (ARD_HEA_ThresholdIndex), saves it to the <geodatabase>_THRESHOLD_INDEX
+#              folder and writes its area versus threshold curves, overall and for each
+#              habitat, to the THRESHOLD_CURVES table.  The cells and area above any
+#              threshold can then be looked up without slicing the surfaces again.
+#
+# Notes:  Currently the tool is designed to only be run via the ARD HEA Toolbox.
+#         Run LoadContaminantSurfaces first, and again after reloading a contaminant.
+#         Existing curves of a contaminant are replaced.
+#
+# Date Created: October 19, 2026
+#
+# ---------------------------------------------------------------------------
+
+# Import system modules
+import ARD_HEA_Tools
+import ARD_HEA_Backend
+import ARD_HEA_Grid
+import ARD_HEA_Metrics
+import ARD_HEA_ThresholdIndex
+import sys
+import string
+import os
+import traceback
+import arcpy
+from arcpy import env
+
+# Check out any necessary licenses and load required toolboxes...
+ARD_HEA_Backend.initialize(("Data Management Tools.tbx",), ())
+
+try:
+    # Report version...
+    ver = ARD_HEA_Backend.version()
+    arcpy.AddMessage("ARD HEA Tools Version: " + ver)
+
+    # Script arguments...
+    geoDB = sys.argv[1]
+    COCNameList = None
+    if len(sys.argv) > 2 and sys.argv[2] not in ("", "#"):
+        COCNameList = [v.strip("'") for v in sys.argv[2].split(";")]
+    byHabitat = len(sys.argv) > 3 and str(sys.argv[3]) == 'true'
+    points = ARD_HEA_ThresholdIndex.CURVE_POINTS
+    if len(sys.argv) > 4 and sys.argv[4] not in ("", "#"):
+        points = int(sys.argv[4])
+
+    # Local variables...
+    COCInvent = geoDB + "\\COC_INVENTORY"
+    folder = ARD_HEA_ThresholdIndex.index_folder(geoDB)
+    if COCNameList is None:
+        with arcpy.da.SearchCursor(COCInvent, ("COC_NAME",)) as cursor:
+            COCNameList = sorted(set(str(row[0]) for row in cursor))
+
+    # Describe the analysis grid
+    grid = ARD_HEA_Grid.load_grid(geoDB)
+    metrics = ARD_HEA_Metrics.project_metrics(geoDB, "BuildThresholdIndex")
+
+    # Process each contaminant
+    for COCName in COCNameList:
+        # Process: Sort the contaminant values...
+        arcpy.AddMessage("Indexing " + COCName + " values...")
+        with metrics.stage("index build", cells=grid.total_cells) as step:
+            index = ARD_HEA_ThresholdIndex.build(geoDB, grid, COCName, byHabitat)
+            index.save(ARD_HEA_ThresholdIndex.index_file(folder, COCName))
+            step.rows = len(index)
+        if byHabitat:
+            arcpy.AddMessage(str(len(index)) + " cells in " + str(len(index.habitats)) + " habitat(s)")
+        else:
+            arcpy.AddMessage(str(len(index)) + " cells")
+
+        # Process: Replace the contaminant curves...
+        with metrics.stage("THRESHOLD_CURVES update") as step:
+            step.rows = ARD_HEA_ThresholdIndex.write_curves(geoDB, index, points)
+
+    # Report stage timings
+    for line in metrics.summary():
+        arcpy.AddMessage(line)
+
+except ARD_HEA_ThresholdIndex.noindex as e:
+    arcpy.AddError("\n*** ERROR ***\n" + str(e))
+    print "\n*** ERROR ***\n" + str(e)
+
+except arcpy.ExecuteError:
+    # Get the tool error messages
+    msgs = arcpy.GetMessage(0)
+    msgs += arcpy.GetMessages(2)
+
+    # Return tool error messages for use with a script tool
+    arcpy.AddError(msgs)
+
+    # Print tool error messages for use in Python/PythonWin
+    print msgs
+
+except:
+    # Get the traceback object
+    #
+    tb = sys.exc_info()[2]
+    tbinfo = traceback.format_tb(tb)[0]
+
+    # Concatenate information together concerning the error into a message string
+    #
+    pymsg = "PYTHON ERRORS:\nTraceback info:\n" + tbinfo + "\nError Info:\n" + str(sys.exc_info()[1])
+    msgs = "ArcPy ERRORS:\n" + arcpy.GetMessages(2) + "\n"
+
+    # Return python error messages for use in script tool or Python Window
+    #
+    arcpy.AddError(pymsg)
+    arcpy.AddError(msgs)
+
+    # Print Python error messages for use in Python / Python Window
+    #
+    print pymsg + "\n"
+    print msgs
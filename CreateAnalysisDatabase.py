@@ -26,26 +26,42 @@
 #                July 21, 2014      - Added a FOOTPRINTS table for contaminant slices
 #                March 4, 2015      - Added FOOTPRINT_ID field back into COC_DATA table
 #                March 6, 2015      - Changed some fields to REQUIRED and NON_NULLABLE
+#                October 19, 2026   - Added cross-validation fields to COC_INVENTORY and a COC_CROSSVALIDATION table
+#                October 19, 2026   - Initialize toolboxes and licences once per process through ARD_HEA_Backend
+#                October 19, 2026   - Added PROV_STEPS and PROV_LINKS provenance tables
+#                October 19, 2026   - Added DOC_BLOBS table for the documentation texts
+#                October 19, 2026   - Added SOURCE_PATH and SOURCE_CHECKSUM fields to COC_INVENTORY for referenced rasters
+#                October 19, 2026   - Added RESAMPLE_METHOD field to COC_INVENTORY
+#                October 19, 2026   - Added SCENARIO_INJURY table for the combined scenario injury
+#                October 19, 2026   - Added DSAY_ROLLUP table for the site attribute DSAY rollup
+#                October 19, 2026   - Added SCENARIO_UNCERTAINTY and UNCERTAINTY_SUMMARY Monte Carlo tables
+#                October 19, 2026   - Added THRESHOLD_CURVES table for the area versus threshold curves
+#                October 19, 2026   - Remove a cached analysis grid left by an earlier database of the same name
 #
 # ---------------------------------------------------------------------------
 
 # Import system modules
 import ARD_HEA_Tools
+import ARD_HEA_Backend
+import ARD_HEA_Grid
+import ARD_HEA_Provenance
+import ARD_HEA_Blobs
+import ARD_HEA_Overlay
+import ARD_HEA_Rollup
+import ARD_HEA_Uncertainty
+import ARD_HEA_ThresholdIndex
 import sys
 import string
 import os
 import traceback
 import arcpy
 
-# Load required toolboxes...
-sub_folder = "ArcToolbox/Toolboxes/"
-install_dir = arcpy.GetInstallInfo("desktop")['InstallDir'].replace("\\","/")
-tbx_home = os.path.join(install_dir, sub_folder)
-arcpy.AddToolbox(tbx_home+"Data Management Tools.tbx")
+# Check out any necessary licenses and load required toolboxes...
+ARD_HEA_Backend.initialize(("Data Management Tools.tbx",))
 
 try:
     # Report version...
-    ver = ARD_HEA_Tools.version()
+    ver = ARD_HEA_Backend.version()
     arcpy.AddMessage("ARD HEA Tools Version: " + ver)
 
     # Script arguments...
@@ -64,6 +80,7 @@ try:
     SiteAttr = geoDB + "\\SITE_ATTRIBUTES"
     COCAnalysis = geoDB + "\\ANALYSIS_TABLE"
     Footprint = geoDB + "\\FOOTPRINTS"
+    COCCrossVal = geoDB + "\\COC_CROSSVALIDATION"
 
     # Create analysis folder
     arcpy.CreateFolder_management(projDir, projName)
@@ -71,6 +88,10 @@ try:
     # Create analysis database
     arcpy.CreatePersonalGDB_management(geoDBfolder, geoDBname)
 
+    # Drop any grid cached for an earlier database at this path, it is rebuilt on first use
+    if os.path.exists(ARD_HEA_Grid.grid_file(geoDB)):
+        os.remove(ARD_HEA_Grid.grid_file(geoDB))
+
     # Create project data table
     arcpy.CreateTable_management(geoDB, "PROJECT_ATTRIBUTES", "", "")
 
@@ -120,6 +141,13 @@ try:
     arcpy.AddField_management(COCInvent, "SAPVALUE", "FLOAT", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
     arcpy.AddField_management(COCInvent, "INTERP_LAYER_NAME", "TEXT", "", "", "50", "", "NULLABLE", "NON_REQUIRED", "")
     arcpy.AddField_management(COCInvent, "INTERP_TYPE", "TEXT", "", "", "5", "", "NULLABLE", "NON_REQUIRED", "")
+    arcpy.AddField_management(COCInvent, "CV_SETTINGS", "TEXT", "", "", "100", "", "NULLABLE", "NON_REQUIRED", "")
+    arcpy.AddField_management(COCInvent, "CV_RMSE", "FLOAT", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
+    arcpy.AddField_management(COCInvent, "CV_BIAS", "FLOAT", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
+    arcpy.AddField_management(COCInvent, "CV_LOG_RMSE", "FLOAT", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
+    arcpy.AddField_management(COCInvent, "SOURCE_PATH", "TEXT", "", "", "255", "", "NULLABLE", "NON_REQUIRED", "")
+    arcpy.AddField_management(COCInvent, "SOURCE_CHECKSUM", "TEXT", "", "", "40", "", "NULLABLE", "NON_REQUIRED", "")
+    arcpy.AddField_management(COCInvent, "RESAMPLE_METHOD", "TEXT", "", "", "10", "", "NULLABLE", "NON_REQUIRED", "")
     arcpy.AddIndex_management(COCInvent, "COC_NAME", "CDAT_NAM_IDX", "NON_UNIQUE", "NON_ASCENDING")
 
     # Create site attribute table
@@ -151,6 +179,38 @@ try:
     arcpy.AddField_management(Footprint, "SCENARIO_ID", "SHORT", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
     arcpy.AddField_management(Footprint, "COC_NAME", "TEXT", "", "", "20", "", "NULLABLE", "NON_REQUIRED", "")
     arcpy.AddField_management(Footprint, "FOOTPRINT_ID", "LONG", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
+
+    # Create interpolation cross-validation table
+    arcpy.CreateTable_management(geoDB, "COC_CROSSVALIDATION", "", "")
+
+    # Add fields and indexes to cross-validation table
+    arcpy.AddField_management(COCCrossVal, "COC_NAME", "TEXT", "", "", "20", "", "NON_NULLABLE", "REQUIRED", "")
+    arcpy.AddField_management(COCCrossVal, "CV_RANK", "SHORT", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
+    arcpy.AddField_management(COCCrossVal, "CV_SETTINGS", "TEXT", "", "", "100", "", "NULLABLE", "NON_REQUIRED", "")
+    arcpy.AddField_management(COCCrossVal, "CV_FOLDS", "LONG", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
+    arcpy.AddField_management(COCCrossVal, "CV_COUNT", "LONG", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
+    arcpy.AddField_management(COCCrossVal, "CV_RMSE", "FLOAT", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
+    arcpy.AddField_management(COCCrossVal, "CV_BIAS", "FLOAT", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
+    arcpy.AddField_management(COCCrossVal, "CV_LOG_RMSE", "FLOAT", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
+    arcpy.AddIndex_management(COCCrossVal, "COC_NAME", "CCV_NAM_IDX", "NON_UNIQUE", "NON_ASCENDING")
+
+    # Create geoprocessing provenance tables (PROV_STEPS and PROV_LINKS)
+    ARD_HEA_Provenance.create_tables(geoDB)
+
+    # Create documentation blob table (DOC_BLOBS)
+    ARD_HEA_Blobs.create_table(geoDB)
+
+    # Create combined scenario injury table (SCENARIO_INJURY)
+    ARD_HEA_Overlay.create_table(geoDB)
+
+    # Create site attribute DSAY rollup table (DSAY_ROLLUP)
+    ARD_HEA_Rollup.create_table(geoDB)
+
+    # Create Monte Carlo DSAY uncertainty tables (SCENARIO_UNCERTAINTY and UNCERTAINTY_SUMMARY)
+    ARD_HEA_Uncertainty.create_tables(geoDB)
+
+    # Create area versus threshold curve table (THRESHOLD_CURVES)
+    ARD_HEA_ThresholdIndex.create_table(geoDB)
     
     arcpy.AddMessage("Created analysis database "+geoDB)
     arcpy.AddMessage("Updating project attributes...")
@@ -0,0 +1,127 @@
+# ---------------------------------------------------------------------------
+# NAME: CrossValidateSurface.py
+# Version: 2.0 (ArcGIS 10.2)
+# Author: Research Planning, Inc.
+#
+# Usage: CrossValidateSurface <input_analysis_database> <list_of_contaminants> <folds> <methods>
+#   <powers> <neighbors> <log_transform> <processes>
+#
+# Required Arguments:
+#   input_analysis_database - Name of analysis geodatabase
+#   list_of_contaminants - List of contaminant names filtered with FilterAnalyzeSamples
+#   folds - Number of cross-validation folds, 0 for leave-one-out
+#   methods - List of interpolation methods to compare limited to: (IDW, OK)
+#   powers - List of IDW weight exponents to compare (default 2)
+#   neighbors - List of neighbor counts to compare (default 12)
+#   log_transform - Log transform option limited to: (true, false, both)
+#   processes - Optional number of processes to use (default all cores)
+#
+# Description: Cross-validates every combination of the interpolation settings against
+#              the _filtered samples of each contaminant.  RMSE, bias and log scale RMSE of
+#              every setting are written to the COC_CROSSVALIDATION table and the winning
+#              setting is stored with the contaminant's COC_INVENTORY record.
+#
+# Notes:  Currently the tool is designed to only be run via the ARD HEA Toolbox.
+#
+# Date Created: October 19, 2026
+#
+# ---------------------------------------------------------------------------
+
+# Import system modules
+import ARD_HEA_Tools
+import ARD_HEA_Backend
+import ARD_HEA_Interpolate
+import ARD_HEA_CrossValidate
+import sys
+import string
+import os
+import traceback
+import arcpy
+from arcpy import env
+
+# Check out any necessary licenses and load required toolboxes...
+ARD_HEA_Backend.initialize(("Data Management Tools.tbx",))
+
+# Optional list argument, default when left blank
+def optionallist (value, cast, default):
+    if value is None or str(value).strip() in ("", "#"):
+        return default
+    return [cast(v.strip("' ")) for v in str(value).split(";")]
+
+try:
+    # Report version...
+    ver = ARD_HEA_Backend.version()
+    arcpy.AddMessage("ARD HEA Tools Version: " + ver)
+
+    # Script arguments...
+    geoDB = sys.argv[1]
+    COCNames = sys.argv[2]
+    folds = int(optionallist(sys.argv[3], int, [0])[0])
+    methods = optionallist(sys.argv[4], str.upper, ["IDW"])
+    powers = optionallist(sys.argv[5], float, [2.0])
+    neighbors = optionallist(sys.argv[6], int, [12])
+    logOption = str(sys.argv[7]).lower()
+    processes = optionallist(sys.argv[8], int, [None])[0]
+
+    # Local variables...
+    COCNameList = [v.strip("'") for v in COCNames.split(";")]
+    if logOption == "both":
+        logTransforms = (False, True)
+    else:
+        logTransforms = (logOption == "true",)
+    settings = ARD_HEA_CrossValidate.settings_grid(methods, powers, neighbors, None, ("AUTO",), logTransforms)
+
+    # Set the geoprocessing environment
+    env.overwriteOutput = 1
+
+    # Process each contaminant
+    for COCName in COCNameList:
+        x, y, values, record = ARD_HEA_Interpolate.read_samples(geoDB, COCName)
+        if folds > 1:
+            arcpy.AddMessage("\n" + str(folds) + "-fold cross-validation of " + str(len(settings)) + " settings for " + COCName + "...")
+        else:
+            arcpy.AddMessage("\nLeave-one-out cross-validation of " + str(len(settings)) + " settings for " + COCName + "...")
+        results = ARD_HEA_CrossValidate.cross_validate(x, y, values, settings, folds, record["AVG_DIST"],
+                                                       record["MAX_DIST"], processes=processes)
+        for result in results:
+            arcpy.AddMessage(result["label"] + ": RMSE " + str(result["rmse"]) + ", bias " + str(result["bias"]) + ", log RMSE " + str(result["logRmse"]))
+        arcpy.AddMessage("Best setting for " + COCName + ": " + results[0]["label"])
+
+        # Process: Update contaminant inventory and cross-validation tables...
+        ARD_HEA_CrossValidate.store_results(geoDB, COCName, results, folds)
+
+except ARD_HEA_Interpolate.nosamples:
+    arcpy.AddError("\n*** ERROR ***\nNo filtered samples found for contaminant " + COCName + ".  Run FilterAnalyzeSamples first.\n")
+    print "\n*** ERROR ***\nNo filtered samples found for contaminant " + COCName + ".  Run FilterAnalyzeSamples first.\n"
+
+except arcpy.ExecuteError:
+    # Get the tool error messages
+    msgs = arcpy.GetMessage(0)
+    msgs += arcpy.GetMessages(2)
+
+    # Return tool error messages for use with a script tool
+    arcpy.AddError(msgs)
+
+    # Print tool error messages for use in Python/PythonWin
+    print msgs
+
+except:
+    # Get the traceback object
+    #
+    tb = sys.exc_info()[2]
+    tbinfo = traceback.format_tb(tb)[0]
+
+    # Concatenate information together concerning the error into a message string
+    #
+    pymsg = "PYTHON ERRORS:\nTraceback info:\n" + tbinfo + "\nError Info:\n" + str(sys.exc_info()[1])
+    msgs = "ArcPy ERRORS:\n" + arcpy.GetMessages(2) + "\n"
+
+    # Return python error messages for use in script tool or Python Window
+    #
+    arcpy.AddError(pymsg)
+    arcpy.AddError(msgs)
+
+    # Print Python error messages for use in Python / Python Window
+    #
+    print pymsg + "\n"
+    print msgs
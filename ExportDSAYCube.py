@@ -0,0 +1,113 @@
+# ---------------------------------------------------------------------------
+# NAME: ExportDSAYCube.py
+# Version: 2.0 (ArcGIS 10.2)
+# Author: Research Planning, Inc.
+#
+# Usage: ExportDSAYCube <input_analysis_database> <input_analysis_table> <list_of_scenarios>
+#
+# Required Arguments:
+#   input_analysis_database - Name of analysis geodatabase
+#   input_analysis_table - Name and location of the HEA calculation database containing
+#                          ANALYSIS_DSAY_By_Grid_Year
+#   list_of_scenarios - Optional list of Scenario_IDs to refresh, default all scenarios
+#
+# Description: Exports the per year DSAY_Injury and SAY_Injury results of every scenario
+#              to the memory-mapped DSAY cube next to the analysis geodatabase
+#              (ARD_HEA_DSAYCube) in one pass over the results table, so per year
+#              injury maps, cell trajectories and cumulative totals are read from the
+#              cube instead of querying the results table.
+#
+# Notes:  Currently the tool is designed to only be run via the ARD HEA Toolbox.
+#
+# Date Created: October 19, 2026
+#
+# ---------------------------------------------------------------------------
+
+class noresults(Exception):
+    pass
+
+# Import system modules
+import ARD_HEA_Tools
+import ARD_HEA_Backend
+import ARD_HEA_Grid
+import ARD_HEA_Metrics
+import ARD_HEA_DSAYCube
+import sys
+import string
+import os
+import traceback
+import arcpy
+from arcpy import env
+
+# Check out any necessary licenses and load required toolboxes...
+ARD_HEA_Backend.initialize(("Data Management Tools.tbx",), ())
+
+try:
+    # Report version...
+    ver = ARD_HEA_Backend.version()
+    arcpy.AddMessage("ARD HEA Tools Version: " + ver)
+
+    # Script arguments...
+    geoDB = sys.argv[1]
+    resDB = sys.argv[2]
+    scenarios = None
+    if len(sys.argv) > 3 and sys.argv[3] not in ("", "#"):
+        scenarios = [int(v.strip("'")) for v in sys.argv[3].split(";")]
+
+    # Local variables...
+    resTbl = resDB + "\\" + ARD_HEA_DSAYCube.RESULTS_TABLE
+    if arcpy.Exists(resTbl) == False:
+        raise noresults
+
+    # Describe the analysis grid
+    grid = ARD_HEA_Grid.load_grid(geoDB)
+    metrics = ARD_HEA_Metrics.project_metrics(geoDB, "ExportDSAYCube")
+
+    # Process: Stream the results table into the cube...
+    arcpy.AddMessage("Writing DSAY cube to " + ARD_HEA_DSAYCube.cube_folder(geoDB))
+    with metrics.stage("cube export") as step:
+        cube = ARD_HEA_DSAYCube.build(geoDB, grid, resTbl, scenarios=scenarios)
+        step.cells = grid.total_cells * sum(len(years) for years in cube.years.values())
+    for scen in cube.scenarios:
+        years = cube.years[scen]
+        arcpy.AddMessage("Scenario " + str(scen) + ": years " + str(years[0]) + " to " + str(years[-1]))
+
+    # Report stage timings
+    for line in metrics.summary():
+        arcpy.AddMessage(line)
+
+except noresults:
+    arcpy.AddError("\n*** ERROR *** " + resTbl + ": Cannot find results table.  Make sure you have selected a valid HEA calculation database.\n")
+    print "\n*** ERROR *** " + resTbl + ": Cannot find results table.  Make sure you have selected a valid HEA calculation database.\n"
+
+except arcpy.ExecuteError:
+    # Get the tool error messages
+    msgs = arcpy.GetMessage(0)
+    msgs += arcpy.GetMessages(2)
+
+    # Return tool error messages for use with a script tool
+    arcpy.AddError(msgs)
+
+    # Print tool error messages for use in Python/PythonWin
+    print msgs
+
+except:
+    # Get the traceback object
+    #
+    tb = sys.exc_info()[2]
+    tbinfo = traceback.format_tb(tb)[0]
+
+    # Concatenate information together concerning the error into a message string
+    #
+    pymsg = "PYTHON ERRORS:\nTraceback info:\n" + tbinfo + "\nError Info:\n" + str(sys.exc_info()[1])
+    msgs = "ArcPy ERRORS:\n" + arcpy.GetMessages(2) + "\n"
+
+    # Return python error messages for use in script tool or Python Window
+    #
+    arcpy.AddError(pymsg)
+    arcpy.AddError(msgs)
+
+    # Print Python error messages for use in Python / Python Window
+    #
+    print pymsg + "\n"
+    print msgs
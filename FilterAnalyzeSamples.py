@@ -38,6 +38,12 @@
 #                      September 15, 2012 - Changed to utilize user supplied contaminant name, Additional bug fixes
 # Date V 2.0 Modified: September 17, 2013 - Converted to arcpy for V2.0 and upgraded metadata xml files
 #                      February 16, 2015  - Added code to sanitize the contaminant name if it starts with spaces or numbers
+#                      October 19, 2026   - Initialize toolboxes and licences once per process through ARD_HEA_Backend
+#                      October 19, 2026   - Keep geoprocessing history in the provenance store, COC_XML holds a reference
+#                      October 19, 2026   - Store the Query Manager document in the DOC_BLOBS table, COC_QMDOC holds a reference
+#                      October 19, 2026   - Keep the Query Manager document as text unless HEA_DOC_BLOBS is set
+#                      October 19, 2026   - Defer the metadata import to the end of the run through ARD_HEA_Metadata
+#                      October 19, 2026   - Clear the SOURCE_PATH and SOURCE_CHECKSUM of a replaced referenced raster
 #                      
 # ---------------------------------------------------------------------------
 
@@ -46,6 +52,10 @@ class unprojected(Exception):
 
 # Import system modules
 import ARD_HEA_Tools
+import ARD_HEA_Backend
+import ARD_HEA_Provenance
+import ARD_HEA_Blobs
+import ARD_HEA_Metadata
 import sys
 import string
 import os
@@ -54,17 +64,12 @@ import math
 import arcpy
 from arcpy import env
 
-# Load required toolboxes...
-sub_folder = "ArcToolbox/Toolboxes/"
-install_dir = arcpy.GetInstallInfo("desktop")['InstallDir'].replace("\\","/")
-tbx_home = os.path.join(install_dir, sub_folder)
-arcpy.AddToolbox(tbx_home+"Spatial Statistics Tools.tbx")
-arcpy.AddToolbox(tbx_home+"Data Management Tools.tbx")
-arcpy.AddToolbox(tbx_home+"Analysis Tools.tbx")
+# Check out any necessary licenses and load required toolboxes...
+ARD_HEA_Backend.initialize(("Spatial Statistics Tools.tbx", "Data Management Tools.tbx", "Analysis Tools.tbx"))
 
 try:
     # Report version...
-    ver = ARD_HEA_Tools.version()
+    ver = ARD_HEA_Backend.version()
     arcpy.AddMessage("ARD HEA Tools Version: " + ver)
     
     # Script arguments...
@@ -128,15 +133,16 @@ try:
     arcpy.MakeXYEventLayer_management(COCStats, "POINT_X", "POINT_Y", COCStatsLyr, SpatRef)
     arcpy.CopyFeatures_management(COCStatsLyr, COCFiltered)
 
-    # Process: Capture geoprocessing history...
-    history = ARD_HEA_Tools.get_process_history(currDir, COCStats)
+    # Process: Record geoprocessing history in the provenance store...
+    statsHistory = ARD_HEA_Tools.get_process_history(currDir, COCStats)
+    ARD_HEA_Provenance.record(geoDB, COCStats, statsHistory, replace=True)
 
     # Cleanup intermediate files
     # arcpy.Delete_management(COCStats)
 
-    #Import metadata template...
-    arcpy.AddMessage("Updating metadata...")
-    arcpy.ImportMetadata_conversion(xmlTemp, "FROM_FGDC", COCFiltered)
+    #Queue metadata template, written at the end of the run...
+    metadata = ARD_HEA_Metadata.MetadataQueue()
+    metadata.add(xmlTemp, COCFiltered)
     # arcpy.MetadataImporter_conversion(xmlTemp, COCFiltered)
 
     # Process: Average Nearest Neighbor...
@@ -160,18 +166,23 @@ try:
     arcpy.AddMessage("The average distance band is: " + CDBOutput.getOutput(1))
     arcpy.AddMessage("The maximum distance band is: " + CDBOutput.getOutput(2) + "\n")
 
-    # Process: Capture geoprocessing history...
-    history = history + ARD_HEA_Tools.get_process_history(currDir, COCFiltered)
+    # Process: Record geoprocessing history in the provenance store...
+    filteredHistory = ARD_HEA_Tools.get_process_history(currDir, COCFiltered)
+    newSteps = ARD_HEA_Provenance.record(geoDB, COCFiltered, filteredHistory, replace=True)
+    history = ARD_HEA_Provenance.reference(geoDB, (COCStats, COCFiltered))
 
     #Read in query manager document
     if arcpy.Exists(qmDoc):
         f = open(qmDoc, "r")
-        qmText = f.read()
+        qmText = ARD_HEA_Blobs.put(geoDB, f.read())
         f.close()
     else:
         qmText = None
+    ARD_HEA_Blobs.expand(geoDB)
     
-    #Process: Update contaminant inventory table...
+    #Process: Update contaminant inventory table, the new samples replace any surface
+    #registered by reference...
+    refFields = [field for field in ("SOURCE_PATH", "SOURCE_CHECKSUM") if arcpy.ListFields(InventTable, field)]
     rows = arcpy.UpdateCursor(InventTable, "[COC_NAME] = '" + COCName + "'")
     row = rows.next()
     if row:
@@ -197,6 +208,8 @@ try:
             row.LOG_TRANSFORM = ""
             row.INTERP_LAYER_NAME = ""
             row.INTERP_TYPE = ""
+            for field in refFields:
+                row.setNull(field)
             rows.updateRow(row)
             row = rows.next()
     else:
@@ -225,6 +238,8 @@ try:
         row.LOG_TRANSFORM = ""
         row.INTERP_LAYER_NAME = ""
         row.INTERP_TYPE = ""
+        for field in refFields:
+            row.setNull(field)
         rows.insertRow(row)
     del row
     del rows
@@ -232,8 +247,12 @@ try:
     # Process: Make feature layer
     arcpy.MakeFeatureLayer_management(COCFiltered, COCFilteredLyr, "", "", "")
 
-    # Set ouptut geoprocessing history
-    ARD_HEA_Tools.set_process_history (currDir, COCFiltered, history)
+    #Import metadata template...
+    written = metadata.flush(arcpy.AddMessage)
+
+    # Set ouptut geoprocessing history, unchanged metadata is not rewritten
+    if newSteps > 0 or written > 0:
+        ARD_HEA_Tools.set_process_history (currDir, COCFiltered, statsHistory + filteredHistory)
 
 except unprojected:
     arcpy.AddError("\n*** ERROR ***\nCannot import COC sample data with an unprojected coordinate system.\n")
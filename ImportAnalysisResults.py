@@ -3,12 +3,19 @@
 # Version: 2.0 (ArcGIS 10.2)
 # Author: Research Planning, Inc.
 #
-# Usage: ImportAnalysisResults <input_analysis_database> <input_analysis_table>
+# Usage: ImportAnalysisResults <input_analysis_database> <input_analysis_table> {output_mode} {checkpoint_mode}
 #
 # Required Arguments: 
 #   input_analysis_database - Name of analysis geodatabase
 #   input_analysis_table - Name and location of table containing analysis results
 #
+# Optional Arguments:
+#   output_mode - RASTERS (default) writes SC<n>_<name>_DSAY and _PCT_INJ rasters for each
+#                 scenario, STACK writes every scenario as a band of one SCENARIO_STACK
+#                 raster indexed by the SCENARIO_BANDS table
+#   checkpoint_mode - RESUME (default) skips the results import and scenarios completed by an
+#                     earlier run from the same results, RESTART imports everything again
+#
 # Description:  Import HEA results from analysis database results table and create output grid 
 #              contaminant threshold table
 #
@@ -18,6 +25,15 @@
 # Date Modified: June 1, 2011       - Added symbology layer application
 #                September 15, 2012 - Changed to utilize user supplied contaminant name, Additional bug fixes
 #                March 11, 2014     - updated to arcpy for V2.0
+#                October 19, 2026   - Build scenario rasters on the implicit analysis grid instead of joining to ANALYSIS_PNTS
+#                October 19, 2026   - Drop replaced scenario rasters from the raster cache
+#                October 19, 2026   - Initialize toolboxes and licences once per process through ARD_HEA_Backend
+#                October 19, 2026   - Record stage timing, throughput and memory metrics
+#                October 19, 2026   - Write scenario raster metadata in one batch after the scenario loop
+#                October 19, 2026   - Keep only injured rows in ANALYSIS_RESULTS
+#                October 19, 2026   - Added STACK output mode writing all scenarios to one multi-band raster
+#                October 19, 2026   - Checkpoint the results import and each scenario so a failed run resumes
+#                October 19, 2026   - Write stack bands to the analysis geodatabase and only resume this project's bands
 # 
 # ---------------------------------------------------------------------------
 
@@ -26,6 +42,13 @@ class noresults(Exception):
 
 # Import system modules
 import ARD_HEA_Tools
+import ARD_HEA_Backend
+import ARD_HEA_Grid
+import ARD_HEA_RasterCache
+import ARD_HEA_Metrics
+import ARD_HEA_Metadata
+import ARD_HEA_Stack
+import ARD_HEA_Checkpoint
 import sys
 import string
 import os
@@ -33,23 +56,25 @@ import traceback
 import arcpy
 from arcpy import env
 
-# Check out any necessary licenses
-arcpy.CheckOutExtension("spatial")
+# Check out any necessary licenses and load required toolboxes...
+ARD_HEA_Backend.initialize(("Spatial Analyst Tools.tbx", "Data Management Tools.tbx", "Conversion Tools.tbx"), ("spatial",))
 
-# Load required toolboxes...
-sub_folder = "ArcToolbox/Toolboxes/"
-install_dir = arcpy.GetInstallInfo("desktop")['InstallDir'].replace("\\","/")
-tbx_home = os.path.join(install_dir, sub_folder)
-arcpy.AddToolbox(tbx_home+"Spatial Analyst Tools.tbx")
-arcpy.AddToolbox(tbx_home+"Data Management Tools.tbx")
-arcpy.AddToolbox(tbx_home+"Conversion Tools.tbx")
+# Where clause for result rows without injury: every result field is zero or NULL.
+# ANALYSIS_RESULTS keeps only the other rows, those with a nonzero DSAY_Injury or
+# (when imported) PERCENT_INJURY, and cells without a row have no injury
+def noInjuryClause (table, fields):
+    clauses = []
+    for field in fields:
+        fieldName = arcpy.AddFieldDelimiters(table, field)
+        clauses.append("(" + fieldName + " = 0 OR " + fieldName + " IS NULL)")
+    return " AND ".join(clauses)
 
 # Assign scratch workspace 
 scratchWS = env.scratchWorkspace
 
 try:
     # Report version...
-    ver = ARD_HEA_Tools.version()
+    ver = ARD_HEA_Backend.version()
     arcpy.AddMessage("ARD HEA Tools Version: " + ver)
 
     # Script arguments...
@@ -57,9 +82,14 @@ try:
     resDB = sys.argv[2]
     scnDB = sys.argv[3]
     ischecked = sys.argv[4]
+    outputMode = "RASTERS"
+    if len(sys.argv) > 5:
+        outputMode = ARD_HEA_Stack.output_mode(sys.argv[5])
+    restart = False
+    if len(sys.argv) > 6:
+        restart = ARD_HEA_Checkpoint.restart_mode(sys.argv[6])
 
     # Local variables...
-    inPts = geoDB + "\\ANALYSIS_PNTS"
     usrTbl = geoDB + "\\ANALYSIS_RESULTS"
     scnTbl = geoDB + "\\ANALYSIS_SCENARIOS"
     tmpDSAYTbl = geoDB + "\\DSAY_RESULTS"
@@ -69,7 +99,6 @@ try:
     injTbl = resDB + "\\ANALYSIS_Perc_Injury_Summary_by_Grid"
     genTbl = scnDB + "\\USER_General_Inputs"
 
-    AnalysisGrid = geoDB + "\\ANALYSIS_GRID"
     scriptPath = sys.path[0]
     xmlTemp = scriptPath + "\\result_dsays_metadata_template.xml"
     layerFile = scriptPath + "\\DSAY_5CL.lyr"
@@ -79,8 +108,19 @@ try:
     if str(ischecked) == 'true' and arcpy.Exists(injTbl) == False:
         raise nopctinjury
     
-    desc = arcpy.Describe(AnalysisGrid)
-    grdCellSize = desc.MeanCellHeight
+    grid = ARD_HEA_Grid.load_grid(geoDB)
+    cache = ARD_HEA_RasterCache.project_cache(geoDB)
+    metrics = ARD_HEA_Metrics.project_metrics(geoDB, "ImportAnalysisResults")
+    metadata = ARD_HEA_Metadata.MetadataQueue()
+    checkpoints = ARD_HEA_Checkpoint.project_checkpoints(geoDB, "ImportAnalysisResults", restart, arcpy.Exists)
+    resultsSig = ARD_HEA_Checkpoint.signature(resDB, scnDB, str(ischecked), ARD_HEA_Checkpoint.stamp(resDB),
+                                              ARD_HEA_Checkpoint.stamp(scnDB))
+    resultFields = ["DSAY_Injury"]
+    if str(ischecked) == 'true':
+        resultFields.append("PERCENT_INJURY")
+    stack = None
+    if outputMode == "STACK":
+        stack = ARD_HEA_Stack.BandStack(grid, geoDB, cache)
 
     # Set the geoprocessing environment
     env.overwriteOutput = 1
@@ -91,11 +131,13 @@ try:
         arcpy.Delete_management(scnTbl)
     arcpy.TableToTable_conversion(genTbl, geoDB, "ANALYSIS_SCENARIOS")    
 
-    # Process: Import analysis results table...
-    arcpy.AddMessage("Getting analysis results...")
-    if arcpy.Exists(usrTbl):
-        arcpy.Delete_management(usrTbl)
-    if str(ischecked) == 'true':
+    # Process: Import analysis results table, unless an earlier run imported the same results...
+    if checkpoints.done(("ANALYSIS_RESULTS",), resultsSig):
+        arcpy.AddMessage("Analysis results already imported by an earlier run.")
+    elif str(ischecked) == 'true':
+        arcpy.AddMessage("Getting analysis results...")
+        if arcpy.Exists(usrTbl):
+            arcpy.Delete_management(usrTbl)
         arcpy.TableToTable_conversion(resTbl, geoDB, "DSAY_RESULTS")
         arcpy.TableToTable_conversion(injTbl, geoDB, "PERCENT_INJURY_RESULTS")
         arcpy.AddField_management(tmpDSAYTbl, "TMPJOIN", "TEXT")
@@ -107,27 +149,35 @@ try:
         arcpy.DeleteField_management(usrTbl, "TMPJOIN")
         arcpy.Delete_management(tmpDSAYTbl)
         arcpy.Delete_management(tmpInjTbl)
+
+        # Keep only the injured rows
+        arcpy.MakeTableView_management(usrTbl, "ZERO_RESULTS_view", noInjuryClause(usrTbl, resultFields))
+        arcpy.DeleteRows_management("ZERO_RESULTS_view")
+        arcpy.Delete_management("ZERO_RESULTS_view")
+        checkpoints.complete(("ANALYSIS_RESULTS",), resultsSig, (usrTbl,))
     else:
-	arcpy.TableToTable_conversion(resTbl, geoDB, "ANALYSIS_RESULTS")
+        arcpy.AddMessage("Getting analysis results...")
+        if arcpy.Exists(usrTbl):
+            arcpy.Delete_management(usrTbl)
+        # Copy only the injured rows
+        arcpy.TableToTable_conversion(resTbl, geoDB, "ANALYSIS_RESULTS", "NOT (" + noInjuryClause(resTbl, resultFields) + ")")
+        checkpoints.complete(("ANALYSIS_RESULTS",), resultsSig, (usrTbl,))
 
-    # Search results table for scenarios count and maximum year
+    # Search results table for scenarios count and maximum year, scenarios
+    # without injury are only in the full results table
     valueList = []
     maxyear = 0
     field = "Scenario_ID"
-    rows = arcpy.SearchCursor(usrTbl)
-    row = rows.next()
-    while row:
-        valueList.append(row.getValue(field))
-        row = rows.next()
+    with arcpy.da.SearchCursor(resTbl, (field,)) as rows:
+        for row in rows:
+            valueList.append(row[0])
     uniqueSet = set(valueList)
     uniqueScen = list(uniqueSet)
     uniqueScen.sort()
-    del rows
-    del row
     arcpy.AddMessage("Scenarios with results: "+str(uniqueScen))
     env.qualifiedFieldNames = "UNQUALIFIED"
 
-    # Make a point layer for each scenario by copying ANALYSIS_POINTS and cursoring through results table for each grid cell
+    # Make the output rasters for each scenario from the results table
     for scen in uniqueScen:
         scname = ARD_HEA_Tools.sanitizetext(str(scen))
         rows = arcpy.SearchCursor(scnTbl, "[Scenario_ID] = " + str(scen))
@@ -140,71 +190,84 @@ try:
         del rows
         del row
         
-        #Setup temp and output files
-        outTbl = geoDB + "\\SC" + str(scen) + "_" + scname + "_RESULT_TBL"
-        if arcpy.Exists(outTbl):
-            arcpy.Delete_management(outTbl)
-        outPts = geoDB + "\\SC" + str(scen) + "_" + scname + "_RESULT_PNTS"
-        if arcpy.Exists(outPts):
-            arcpy.Delete_management(outPts)               
+        #Setup output files
         outDSAY = geoDB + "\\SC" + str(scen) + "_" + scname + "_DSAY"
-	outPCT = geoDB + "\\SC" + str(scen) + "_" + scname + "_PCT_INJ"
-        if arcpy.Exists(outDSAY):
+        outPCT = geoDB + "\\SC" + str(scen) + "_" + scname + "_PCT_INJ"
+
+        #Skip scenarios completed by an earlier run from the same results...
+        unit = ("SCENARIO", scen)
+        unitSig = ARD_HEA_Checkpoint.signature(resultsSig, scname, outputMode)
+        bandRasters = checkpoints.artifacts(unit)
+        if checkpoints.done(unit, unitSig) and (stack is None or stack.owns(scen, bandRasters)):
+            arcpy.AddMessage("Scenario #:" + str(scen) + ", Name: " + scname + " completed by an earlier run.")
+            if stack is not None:
+                for bandRaster, resultType in zip(bandRasters, ARD_HEA_Stack.RESULT_TYPES):
+                    stack.reuse(bandRaster, scen, scname, resultType)
+            else:
+                metadata.add(xmlTemp, outDSAY)
+            continue
+
+        if stack is None and arcpy.Exists(outDSAY):
             arcpy.Delete_management(outDSAY)
+        if stack is None and str(ischecked) == 'true' and arcpy.Exists(outPCT):
+            arcpy.Delete_management(outPCT)
 
-        #Make temp point layer with appropriate fields
+        #Summarize scenario results for each grid cell directly onto the analysis grid
         arcpy.AddMessage("Creating output for Scenario #:" + str(scen) + ", Name: " + scname )
-        arcpy.MakeTableView_management(usrTbl, "tmpTbl", "[Scenario_Id] = "+ str(scen))
+        fields = ["Grid_ID", "DSAY_Injury"]
         if str(ischecked) == 'true':
-            arcpy.Statistics_analysis("tmpTbl", outTbl, "DSAY_Injury SUM; SAY_Injury MAX; ExpYear MAX; PERCENT_INJURY MAX", "Grid_ID") 
-        else:
-            arcpy.Statistics_analysis("tmpTbl", outTbl, "DSAY_Injury SUM; SAY_Injury MAX; ExpYear MAX", "Grid_ID") 
-        arcpy.MakeFeatureLayer_management(inPts, "SiteJoinView")
-        arcpy.AddJoin_management("SiteJoinView", "GRID_ID", outTbl, "GRID_ID", "KEEP_ALL")
-        arcpy.CopyFeatures_management("SiteJoinView", outPts)
-        arcpy.AddField_management(outPts, "DSAY_INJ", "DOUBLE", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
-        arcpy.AddField_management(outPts, "SAY_INJ", "DOUBLE", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
-        if str(ischecked) == 'true':
-	    arcpy.AddField_management(outPts, "PCT_INJ", "DOUBLE", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
-        arcpy.AddField_management(outPts, "MAX_YEAR", "DOUBLE", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
-
-        #Update DSAY values
-        rows = arcpy.UpdateCursor(outPts)
-        row = rows.next()
-        while row:
-            if row.sum_DSAY_Injury is not None:
-                row.DSAY_INJ = row.SUM_DSAY_Injury
-                row.SAY_INJ = row.MAX_SAY_Injury
-                if str(ischecked) == 'true':
-                    row.PCT_INJ = row.MAX_PERCENT_INJURY
-                row.MAX_YEAR = row.MAX_ExpYear
+            fields.append("PERCENT_INJURY")
+        expression = arcpy.AddFieldDelimiters(usrTbl, "Scenario_ID") + " = " + str(scen)
+        with metrics.stage("scenario import " + str(scen), cells=grid.total_cells) as step:
+            results = arcpy.da.TableToNumPyArray(usrTbl, fields, expression, null_value=0)
+            step.rows = len(results)
+            DSAYValues = grid.scatter(results["Grid_ID"], results["DSAY_Injury"], "sum")
+            if stack is not None:
+                stack.add(DSAYValues, scen, scname, "DSAY")
             else:
-                row.DSAY_INJ = 0
-                row.SAY_INJ = 0
-                if str(ischecked) == 'true':
-                    row.PCT_INJ = 0
-            rows.updateRow(row)
-            row = rows.next()
-        del row
-        del rows
-        arcpy.DeleteField_management(outPts, "GRID_ID_1; FREQUENCY; SUM_DSAY_Injury; MAX_SAY_Injury; MAX_ExpYear")
-        if str(ischecked) == 'true':
-            arcpy.DeleteField_management(outPts, "MAX_PERCENT_INJURY")
-        arcpy.PointToRaster_conversion(outPts, "DSAY_INJ", outDSAY, "MAXIMUM", "", grdCellSize)
-        if str(ischecked) == 'true':
-            arcpy.PointToRaster_conversion(outPts, "PCT_INJ", outPCT, "MAXIMUM", "", grdCellSize)
+                grid.write_raster(DSAYValues, outDSAY, cache=cache)
+            if str(ischecked) == 'true':
+                PCTValues = grid.scatter(results["Grid_ID"], results["PERCENT_INJURY"], "max")
+                if stack is not None:
+                    stack.add(PCTValues, scen, scname, "PCT_INJ")
+                else:
+                    grid.write_raster(PCTValues, outPCT, cache=cache)
+            del results
+        if stack is not None:
+            checkpoints.complete(unit, unitSig, [band[4] for band in stack.bands if band[1] == int(scen)])
+        elif str(ischecked) == 'true':
+            checkpoints.complete(unit, unitSig, (outDSAY, outPCT))
+        else:
+            checkpoints.complete(unit, unitSig, (outDSAY,))
 
-        #Import metadata template...
-	arcpy.AddMessage("importing metadata from " + xmlTemp + " to " + outDSAY)
-        arcpy.ImportMetadata_conversion(xmlTemp, "FROM_FGDC", outDSAY, "ENABLED")
+        #Queue metadata template, written for all scenarios after the loop...
+        if stack is None:
+            metadata.add(xmlTemp, outDSAY)
         # arcpy.MetadataImporter_conversion(xmlTemp, outDSAY)
-        arcpy.Delete_management(outTbl)
-        arcpy.Delete_management(outPts)
+
+    #Combine the scenario bands into the stack raster...
+    if stack is not None:
+        arcpy.AddMessage("Writing " + str(len(stack.bands)) + " band(s) to " + stack.outRaster)
+        with metrics.stage("stack", cells=grid.total_cells * len(stack.bands)):
+            if stack.save() is not None:
+                metadata.add(xmlTemp, stack.outRaster)
+
+    #Import metadata template for the scenario rasters...
+    with metrics.stage("metadata"):
+        metadata.flush(arcpy.AddMessage)
+
+    # Report stage timings
+    for line in metrics.summary():
+        arcpy.AddMessage(line)
 
 except noresults:
     arcpy.AddError("\n*** ERROR *** " + resTbl + ": Cannot find results table(s).  Make sure you have selected a valid HEA calculation database.\n")
     print "\n*** ERROR *** " + resTbl + ": Cannot find results table(s).  Make sure you have selected a valid HEA calculation database.\n"    
 
+except (ARD_HEA_Stack.badmode, ARD_HEA_Checkpoint.badmode) as e:
+    arcpy.AddError("\n*** ERROR ***\n" + str(e))
+    print "\n*** ERROR ***\n" + str(e)
+
 except nopctinjury:
     arcpy.AddError("\n*** ERROR *** " + resTbl + ": Cannot find the ANALYSIS_Perc_Injury_Summary_by_Grid table.\n")
     print "\n*** ERROR *** " + resTbl + ": Cannot find the ANALYSIS_Perc_Injury_Summary_by_Grid table.\n"
@@ -0,0 +1,145 @@
+# ---------------------------------------------------------------------------
+# NAME: InterpolateSurface.py
+# Version: 2.0 (ArcGIS 10.2)
+# Author: Research Planning, Inc.
+#
+# Usage: InterpolateSurface <input_analysis_database> <list_of_contaminants> <power>
+#   <neighbors> <search_radius> <boolean_log_transform> <processes> <method>
+#
+# Required Arguments:
+#   input_analysis_database - Name of analysis geodatabase
+#   list_of_contaminants - List of contaminant names filtered with FilterAnalyzeSamples
+#   power - Exponent of the inverse distance weights (default 2)
+#   neighbors - Number of nearest samples used for each grid cell (default 12)
+#   search_radius - Optional maximum distance to neighboring samples, cells without
+#                   samples inside the radius are left as NoData
+#   boolean_log_transform - Boolean flag indicating if values are log transformed before interpolation
+#   processes - Optional number of processes to use (default all cores)
+#   method - Optional interpolation method limited to: (IDW, OK), default IDW.  OK fits a
+#            variogram using the AVG_DIST and MAX_DIST distance bands as lag defaults and
+#            ignores the power argument.
+#
+# Description: Interpolates the _filtered samples of each contaminant onto the analysis
+#              grid using inverse distance weighting or local ordinary kriging and
+#              registers the surface in the COC_INVENTORY table ready for
+#              LoadContaminantSurfaces.  Kriging also writes a <COC>_OK_VAR variance surface.
+#
+# Notes:  Currently the tool is designed to only be run via the ARD HEA Toolbox.
+#
+# Date Created: October 19, 2026
+#
+# ---------------------------------------------------------------------------
+
+# Import system modules
+import ARD_HEA_Tools
+import ARD_HEA_Backend
+import ARD_HEA_Grid
+import ARD_HEA_RasterCache
+import ARD_HEA_Interpolate
+import ARD_HEA_Kriging
+import sys
+import string
+import os
+import traceback
+import arcpy
+from arcpy import env
+
+# Check out any necessary licenses and load required toolboxes...
+ARD_HEA_Backend.initialize(("Data Management Tools.tbx",), ("spatial",))
+
+# Optional argument, default when left blank
+def optionalvalue (value, cast, default):
+    if value is None or str(value).strip() in ("", "#"):
+        return default
+    return cast(value)
+
+try:
+    # Report version...
+    ver = ARD_HEA_Backend.version()
+    arcpy.AddMessage("ARD HEA Tools Version: " + ver)
+
+    # Script arguments...
+    geoDB = sys.argv[1]
+    COCNames = sys.argv[2]
+    power = optionalvalue(sys.argv[3], float, 2.0)
+    neighbors = optionalvalue(sys.argv[4], int, 12)
+    radius = optionalvalue(sys.argv[5], float, None)
+    logTransform = str(sys.argv[6]) == 'true'
+    processes = optionalvalue(sys.argv[7], int, None)
+    if len(sys.argv) > 8:
+        method = optionalvalue(sys.argv[8], str.upper, "IDW")
+    else:
+        method = "IDW"
+
+    # Local variables...
+    COCNameList = [v.strip("'") for v in COCNames.split(";")]
+
+    # Set the geoprocessing environment
+    env.overwriteOutput = 1
+
+    # Describe the analysis grid
+    grid = ARD_HEA_Grid.load_grid(geoDB)
+    cache = ARD_HEA_RasterCache.project_cache(geoDB)
+
+    # Process each contaminant
+    for COCName in COCNameList:
+        x, y, values, record = ARD_HEA_Interpolate.read_samples(geoDB, COCName)
+        arcpy.AddMessage("Interpolating " + str(len(values)) + " " + COCName + " samples onto the analysis grid...")
+        outName = ARD_HEA_Tools.sanitize(COCName) + "_" + method
+        outRaster = geoDB + "\\" + outName
+        if method == "OK":
+            surface, variance, variogram = ARD_HEA_Kriging.krige_grid(grid, x, y, values, None, neighbors, radius,
+                                                                      logTransform, record["AVG_DIST"],
+                                                                      record["MAX_DIST"], processes=processes)
+            arcpy.AddMessage("Fitted variogram: " + str(variogram))
+        else:
+            surface = ARD_HEA_Interpolate.interpolate_grid(grid, x, y, values, power, neighbors, radius,
+                                                           logTransform, processes=processes)
+
+        # Process: Save surface and update contaminant inventory table...
+        if arcpy.Exists(outRaster):
+            arcpy.Delete_management(outRaster)
+        grid.write_raster(surface, outRaster, cache=cache)
+        if method == "OK":
+            varRaster = outRaster + "_VAR"
+            if arcpy.Exists(varRaster):
+                arcpy.Delete_management(varRaster)
+            grid.write_raster(variance, varRaster, cache=cache)
+        ARD_HEA_Interpolate.register_surface(geoDB, COCName, outName, method, logTransform)
+        arcpy.AddMessage("Created surface " + outRaster)
+
+except ARD_HEA_Interpolate.nosamples:
+    arcpy.AddError("\n*** ERROR ***\nNo filtered samples found for contaminant " + COCName + ".  Run FilterAnalyzeSamples first.\n")
+    print "\n*** ERROR ***\nNo filtered samples found for contaminant " + COCName + ".  Run FilterAnalyzeSamples first.\n"
+
+except arcpy.ExecuteError:
+    # Get the tool error messages
+    msgs = arcpy.GetMessage(0)
+    msgs += arcpy.GetMessages(2)
+
+    # Return tool error messages for use with a script tool
+    arcpy.AddError(msgs)
+
+    # Print tool error messages for use in Python/PythonWin
+    print msgs
+
+except:
+    # Get the traceback object
+    #
+    tb = sys.exc_info()[2]
+    tbinfo = traceback.format_tb(tb)[0]
+
+    # Concatenate information together concerning the error into a message string
+    #
+    pymsg = "PYTHON ERRORS:\nTraceback info:\n" + tbinfo + "\nError Info:\n" + str(sys.exc_info()[1])
+    msgs = "ArcPy ERRORS:\n" + arcpy.GetMessages(2) + "\n"
+
+    # Return python error messages for use in script tool or Python Window
+    #
+    arcpy.AddError(pymsg)
+    arcpy.AddError(msgs)
+
+    # Print Python error messages for use in Python / Python Window
+    #
+    print pymsg + "\n"
+    print msgs
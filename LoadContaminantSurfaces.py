@@ -3,12 +3,16 @@
 # Version: 2.0 (ArcGIS 10.2)
 # Author: Research Planning, Inc.
 #
-# Usage: LoadContaminantSurfaces <input_analysis_database> <list_of_surfaces>
+# Usage: LoadContaminantSurfaces <input_analysis_database> <list_of_surfaces> {resampling_method}
 #
 # Required Arguments: 
 #   input_analysis_database - Name of analysis geodatabase
 #   list_of_surfaces - List of interpolated surfaces to load into database
 #
+# Optional Arguments:
+#   resampling_method - NEAREST (default), BILINEAR or MEAN, used for surfaces that do not
+#                       line up with the analysis grid
+#
 # Description: Loads interpolated raster surfaces into a single data table for further
 #              data analysis.  Also updates associated metadata table for the raster
 #              surfaces
@@ -24,6 +28,13 @@
 #                March 10, 2014     - Fixed error handling when data have not been filtered
 #                March 5, 2015      - Added a check to see if contaminant surfaces match analysis grid
 #                March 19, 2015     - Fixed and modified check above to just give a warning
+#                October 19, 2026   - Sample surfaces onto the implicit analysis grid instead of copying ANALYSIS_PNTS
+#                October 19, 2026   - Read rasters through the tiled raster cache
+#                October 19, 2026   - Initialize toolboxes and licences once per process through ARD_HEA_Backend
+#                October 19, 2026   - Record stage timing, throughput and memory metrics
+#                October 19, 2026   - Build COC_DATA rows from compact ARD_HEA_Tables arrays
+#                October 19, 2026   - Check surfaces line up with the analysis grid and resample those that do not,
+#                                     recording the method in COC_INVENTORY
 #
 # ---------------------------------------------------------------------------
 
@@ -32,6 +43,12 @@ class filtered(Exception):
 
 # Import system modules
 import ARD_HEA_Tools
+import ARD_HEA_Backend
+import ARD_HEA_Grid
+import ARD_HEA_Metrics
+import ARD_HEA_Tables
+import ARD_HEA_Resample
+import ARD_HEA_RasterCache
 import sys
 import string
 import os
@@ -41,25 +58,20 @@ from arcpy.sa import *
 from arcpy import env
 
 
-# Check out any necessary licenses
-arcpy.CheckOutExtension("spatial")
-
-# Load required toolboxes...
-sub_folder = "ArcToolbox/Toolboxes/"
-install_dir = arcpy.GetInstallInfo("desktop")['InstallDir'].replace("\\","/")
-tbx_home = os.path.join(install_dir, sub_folder)
-arcpy.AddToolbox(tbx_home+"Spatial Analyst Tools.tbx")
-arcpy.AddToolbox(tbx_home+"Data Management Tools.tbx")
-arcpy.AddToolbox(tbx_home+"Conversion Tools.tbx")
+# Check out any necessary licenses and load required toolboxes...
+ARD_HEA_Backend.initialize(("Spatial Analyst Tools.tbx", "Data Management Tools.tbx", "Conversion Tools.tbx"), ("spatial",))
 
 try:
     # Report version...
-    ver = ARD_HEA_Tools.version()
+    ver = ARD_HEA_Backend.version()
     arcpy.AddMessage("ARD HEA Tools Version: " + ver)
 
     # Script arguments...
     geoDB = sys.argv[1]
     COCRasters = sys.argv[2]
+    resampleMethod = "NEAREST"
+    if len(sys.argv) > 3 and sys.argv[3] not in ("", "#"):
+        resampleMethod = ARD_HEA_Resample.method_name(sys.argv[3])
 
     # Local variables...
     COCRasterList = [v.strip("'") for v in COCRasters.split(";")]
@@ -72,6 +84,15 @@ try:
     # Set the geoprocessing environment
     arcpy.overwriteOutput = 1
 
+    # Describe the analysis grid
+    grid = ARD_HEA_Grid.load_grid(geoDB)
+    cache = ARD_HEA_RasterCache.project_cache(geoDB)
+    metrics = ARD_HEA_Metrics.project_metrics(geoDB, "LoadContaminantSurfaces")
+
+    # Older databases have no field for the resampling method
+    if len(arcpy.ListFields(COCInvent, "RESAMPLE_METHOD")) == 0:
+        arcpy.AddField_management(COCInvent, "RESAMPLE_METHOD", "TEXT", "", "", "10", "", "NULLABLE", "NON_REQUIRED", "")
+
     # Process each surface
     for COCRaster in COCRasterList:
 
@@ -81,8 +102,6 @@ try:
             COCRasterName = COCRaster.split(os.sep)[-1]
         else:
             COCRasterName = desc.Basename
-        COCExtract = geoDB + "\\" + COCRasterName + "_extract"
-        COCTable = COCRasterName + "_tbl"
         currentdir = os.path.dirname(geoDB)
         filename = currentdir + "\\temp.xml"
         
@@ -98,17 +117,24 @@ try:
         if COCField == "empty":
             raise filtered
 
-        # Process: Extract Values to Points...
+        # Process: Sample surface onto the analysis grid...
         arcpy.AddMessage("Extracting " + COCField + " data from " + str(COCRasterName))
-        arcpy.Copy_management(geoDB + "\\ANALYSIS_PNTS", COCExtract)
-        ExtractMultiValuesToPoints(COCExtract, [[COCRaster, "COC_VALUE"]], "NONE")
-        
-        # Process: Check for NULL values in COCExtract and provide warning
-        arcpy.MakeFeatureLayer_management(COCExtract, "COClyr")
-        expression = arcpy.AddFieldDelimiters(COCExtract, "COC_VALUE") + " >= 0"
-        arcpy.SelectLayerByAttribute_management("COClyr","NEW_SELECTION",expression)
-        result = arcpy.GetCount_management("COClyr")
-        COCcount = int(result.getOutput(0))
+        # Process: Check the surface lines up with the analysis grid...
+        src = cache.open(COCRaster)
+        problems = ARD_HEA_Resample.mismatches(grid, src.xleft, src.ytop, src.cellx, src.celly, src.shape)
+        method = "NONE"
+        if problems:
+            for problem in problems:
+                arcpy.AddMessage("Warning: " + str(COCRasterName) + " " + problem)
+            method = resampleMethod
+            arcpy.AddMessage("Resampling " + str(COCRasterName) + " onto the analysis grid using " + method)
+        with metrics.stage("surface extract", cells=grid.total_cells) as step:
+            COCValues = grid.sample_raster(COCRaster, cache, resampleMethod if problems else "NEAREST")
+            gridIDs, values = grid.records(COCValues)
+            step.rows = len(gridIDs)
+
+        # Process: Check for NULL values in surface and provide warning
+        COCcount = len(gridIDs)
         cursor = arcpy.da.SearchCursor(prjAttr, ("TOTAL_CELLS"))
         row = cursor.next()
         countGridCells = row[0]
@@ -118,33 +144,36 @@ try:
            
         # Process: Remove existing records in COC Data table...
         arcpy.AddMessage("\nRemove any pre-existing " + COCField + " records from data tables...")
-        rows = arcpy.UpdateCursor(geoDB + "\\COC_DATA", "[COC_NAME] = '" + COCField + "'")
-        for row in rows:
-            rows.deleteRow(row)
-        del rows
+        with metrics.stage("COC_DATA append", rows=len(gridIDs)):
+            rows = arcpy.UpdateCursor(geoDB + "\\COC_DATA", "[COC_NAME] = '" + COCField + "'")
+            for row in rows:
+                rows.deleteRow(row)
+            del rows
+
+            # Process: Append to COC Data Table...
+            arcpy.AddMessage("Updating COC value table with " + COCField + " data...")
+            records = ARD_HEA_Tables.TypedTable.from_columns("COC_DATA", GRID_ID=gridIDs, COC_NAME=COCField,
+                                                             COC_VALUE=values)
+            with arcpy.da.InsertCursor(geoDB + "\\COC_DATA", ("GRID_ID", "COC_NAME", "COC_VALUE")) as cursor:
+                for row in records.rows(("GRID_ID", "COC_NAME", "COC_VALUE")):
+                    cursor.insertRow(row)
+            del cursor, records
+
+        # Process: Record the resampling method in the inventory table...
+        expression = arcpy.AddFieldDelimiters(COCInvent, "COC_NAME") + " = '" + COCField + "'"
+        with arcpy.da.UpdateCursor(COCInvent, ("RESAMPLE_METHOD",), expression) as cursor:
+            for row in cursor:
+                cursor.updateRow((method,))
+        del cursor
+
+    # Report stage timings
+    for line in metrics.summary():
+        arcpy.AddMessage(line)
+
+except ARD_HEA_Resample.badmethod as e:
+    arcpy.AddError("\n*** ERROR ***\n" + str(e))
+    print "\n*** ERROR ***\n" + str(e)
 
-        # Process: Add Fields...
-        arcpy.AddField_management(COCExtract, "COC_NAME", "TEXT", "", "", "20", "", "NULLABLE", "REQUIRED", "")
-        arcpy.AddField_management(COCExtract, "FOOTPRINT_ID", "LONG", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
-
-        # Process: Calculate Fields...
-        rows = arcpy.UpdateCursor(COCExtract)
-        for row in rows:
-            row.COC_NAME = COCField
-            rows.updateRow(row)
-        del row
-        del rows
-
-        # Process: Make Table View...
-        filter_exp = "[COC_VALUE] >= 0"
-        arcpy.TableToTable_conversion(COCExtract, geoDB, COCTable, filter_exp)
-
-        # Process: Append to COC Data Table...
-        arcpy.AddMessage("Updating COC value table with " + COCField + " data...")
-        InTable = geoDB + "\\" + COCTable
-        arcpy.Append_management(InTable, geoDB + "\\COC_DATA", "NO_TEST")
-        arcpy.Delete_management(InTable)
-    
 except filtered:
     arcpy.AddError("\n*** ERROR ***\nInput features for raster layer " + COCRaster + " have not been filtered or entry is missing from COC_INVENTORY table")
     print "\n*** ERROR ***\nInput features for raster layer " + COCRaster + " have not been filtered or entry is missing from COC_INVENTORY table"
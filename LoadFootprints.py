@@ -15,33 +15,41 @@
 # Date Created: July 15, 2014
 #
 # Date Modified: March 5, 2015     - Added code to load footprints into COC_DATA table
+#                October 19, 2026  - Sample footprints onto the implicit analysis grid instead of ANALYSIS_PNTS,
+#                                    append every contaminant's footprint rather than only the last one
+#                October 19, 2026  - Read rasters through the tiled raster cache
+#                October 19, 2026  - Initialize toolboxes and licences once per process through ARD_HEA_Backend
+#                October 19, 2026  - Record stage timing, throughput and memory metrics
+#                October 19, 2026  - Store only the injured cells of each footprint in FOOTPRINTS
+#                October 19, 2026  - Hold FOOTPRINTS rows as compact ARD_HEA_Tables arrays
+#                October 19, 2026  - Look up the COC_DATA footprints of all GRID_IDs at once
+#                October 19, 2026  - Read the loaded footprints once before the contaminant loop
 #
 # ---------------------------------------------------------------------------
 
 # Import system modules
 import ARD_HEA_Tools
+import ARD_HEA_Backend
+import ARD_HEA_Grid
+import ARD_HEA_RasterCache
+import ARD_HEA_Metrics
+import ARD_HEA_Tables
 import sys
 import string
 import os
+import math
+import numpy
 import traceback
 import arcpy
 from arcpy.sa import *
 from arcpy import env
 
-# Check out any necessary licenses
-arcpy.CheckOutExtension("spatial")
-
-# Load required toolboxes...
-sub_folder = "ArcToolbox/Toolboxes/"
-install_dir = arcpy.GetInstallInfo("desktop")['InstallDir'].replace("\\","/")
-tbx_home = os.path.join(install_dir, sub_folder)
-arcpy.AddToolbox(tbx_home+"Spatial Analyst Tools.tbx")
-arcpy.AddToolbox(tbx_home+"Data Management Tools.tbx")
-arcpy.AddToolbox(tbx_home+"Conversion Tools.tbx")
+# Check out any necessary licenses and load required toolboxes...
+ARD_HEA_Backend.initialize(("Spatial Analyst Tools.tbx", "Data Management Tools.tbx", "Conversion Tools.tbx"), ("spatial",))
 
 try:
     # Report version...
-    ver = ARD_HEA_Tools.version()
+    ver = ARD_HEA_Backend.version()
     arcpy.AddMessage("ARD HEA Tools Version: " + ver)
     
     # Script arguments...
@@ -57,6 +65,11 @@ try:
     # Set the geoprocessing environment
     env.overwriteOutput = 1
 
+    # Describe the analysis grid
+    grid = ARD_HEA_Grid.load_grid(geoDB)
+    cache = ARD_HEA_RasterCache.project_cache(geoDB)
+    metrics = ARD_HEA_Metrics.project_metrics(geoDB, "LoadFootprints")
+
     # Check to see if FOOTPRINTS table already exists, and if it doesn't, create it
     if arcpy.Exists(footprints) == False:
 	arcpy.AddMessage("Creating the FOOTPRINTS table")
@@ -66,6 +79,12 @@ try:
         arcpy.AddField_management(footprints, "COC_NAME", "TEXT", "", "", "20", "", "NULLABLE", "NON_REQUIRED", "")
         arcpy.AddField_management(footprints, "FOOTPRINT_ID", "LONG", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
 
+    # Contaminants and scenarios already loaded into the FOOTPRINTS table
+    loaded = ARD_HEA_Tables.read("FOOTPRINTS", footprints, fields=["SCENARIO_ID", "COC_NAME"])
+    uniq_coc = set(loaded.categories["COC_NAME"].names)
+    uniq_scen = set(numpy.unique(loaded.data["SCENARIO_ID"]).tolist())
+    del loaded
+
     # Process: Loop through each record in subset of contaminant threshold table and load associated footprint
     expression = arcpy.AddFieldDelimiters(usrTbl, "Scenario_ID") + " = " + ScenID
     with arcpy.da.SearchCursor(usrTbl, ("Scenario_ID", "COC_NAME"), where_clause=expression) as cursor:
@@ -74,10 +93,6 @@ try:
             FPRaster = geoDB + "\\" + COCName + "_SC" + ScenID
 
 	    # Check to see if the footprint for this scenario and contaminant have already been loaded
-	    cocvals = [row[0] for row in arcpy.da.SearchCursor((footprints), ("COC_NAME"))]
-	    uniq_coc = set(cocvals)
-	    scvals = [row[0] for row in arcpy.da.SearchCursor((footprints), ("SCENARIO_ID"))]
-	    uniq_scen = set(scvals)
 	    if (COCName in uniq_coc) and (int(ScenID) in uniq_scen):
 		    arcpy.AddMessage("Scenario " +  ScenID + " footprint for contaminant " + COCName + " has already been loaded into the table.")
 		    continue
@@ -88,41 +103,46 @@ try:
 	    else:
 		    arcpy.AddMessage("Loading scenario " + ScenID + " footprint for contaminant " + COCName)
 	    
-            COC_FP = geoDB + "\\" + COCName + "SC" + ScenID + "_footprint"
-            arcpy.Copy_management(geoDB + "\\ANALYSIS_PNTS", COC_FP)
-            ExtractMultiValuesToPoints(COC_FP, [[FPRaster, "FOOTPRINT_ID"]], "NONE")
+            # Sample the footprint raster onto the analysis grid
+            with metrics.stage("footprint extract", cells=grid.total_cells):
+                FPValues = grid.sample_raster(FPRaster, cache).ravel()
 
             # Add footprints to COC_DATA table
             arcpy.AddMessage("Adding footprints to COC_DATA table")
-            joinfields = ['GRID_ID', 'FOOTPRINT_ID']
-            joindict = {}
-            with arcpy.da.SearchCursor(COC_FP, joinfields) as rows:
-                for arow in rows:
-                    joinval = arow[0]
-                    val1 = arow[1]
-                    joindict[joinval]=val1
-            del arow, rows
-            targetflds = ['GRID_ID', 'FOOTPRINT_ID']
             expression2 = arcpy.AddFieldDelimiters(COCTbl, "COC_NAME") + " = '" + COCName + "'"
-            with arcpy.da.UpdateCursor(COCTbl, targetflds, where_clause=expression2) as recs:
-                for rec in recs:
-                    keyval = rec[0]
-                    rec[1] = joindict[keyval]
-                    recs.updateRow(rec)
-            del rec, recs
-	    
-	    arcpy.AddField_management(COC_FP, "SCENARIO_ID", "SHORT", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
-	    arcpy.CalculateField_management(COC_FP, "SCENARIO_ID", ScenID)
-	    arcpy.AddField_management(COC_FP, "COC_NAME", "TEXT", "", "", "20", "", "NULLABLE", "NON_REQUIRED", "")
-	    arcpy.CalculateField_management(COC_FP, "COC_NAME", '"' + COCName + '"')
-                
-        # Make a table view of the points and append to FOOTPRINTS table
-        arcpy.MakeTableView_management(COC_FP, "fp_view") 
-        arcpy.Append_management("fp_view", footprints, "NO_TEST")
-        arcpy.Delete_management(COC_FP)
+            with metrics.stage("COC_DATA update") as step:
+                # Footprint of every COC_DATA row, looked up by OID in the cursor
+                cocRows = arcpy.da.TableToNumPyArray(COCTbl, ("OID@", "GRID_ID"), expression2)
+                idx = grid.index(cocRows["GRID_ID"])
+                ids = numpy.where(idx >= 0, FPValues[numpy.maximum(idx, 0)], numpy.nan)
+                FPByOID = dict(zip(cocRows["OID@"].tolist(), [None if v != v else int(v) for v in ids.tolist()]))
+                del cocRows, idx, ids
+                with arcpy.da.UpdateCursor(COCTbl, ("OID@", "FOOTPRINT_ID"), where_clause=expression2) as recs:
+                    for rec in recs:
+                        recs.updateRow((rec[0], FPByOID.get(rec[0])))
+                del recs
+                step.rows = len(FPByOID)
+                del FPByOID
+
+            # Append the injured cells of the footprint to FOOTPRINTS table, cells
+            # without a row have no injury
+            gridIDs, FPIDs = grid.sparse(FPValues)
+            records = ARD_HEA_Tables.TypedTable.from_columns("FOOTPRINTS", GRID_ID=gridIDs, SCENARIO_ID=int(ScenID),
+                                                             COC_NAME=COCName, FOOTPRINT_ID=FPIDs)
+            with metrics.stage("FOOTPRINTS append", rows=len(records)):
+                with arcpy.da.InsertCursor(footprints, records.fields) as recs:
+                    for rec in records.rows():
+                        recs.insertRow(rec)
+                del recs
+            del records
+            uniq_coc.add(COCName)
+            uniq_scen.add(int(ScenID))
 
     del row, cursor
-    
+
+    # Report stage timings
+    for line in metrics.summary():
+        arcpy.AddMessage(line)
 
 except arcpy.ExecuteError:
     # Get the tool error messages
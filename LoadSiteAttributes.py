@@ -32,6 +32,11 @@
 #                March 11, 2014     - updated to arcpy for V2.0
 #                March 6, 2015      - Added code to remove spaces from habitat feature layer name used as a base for temporary join feature class name
 #                March 11, 2015     - added code to check if depth field in the SITE_ATTRIBUTES table is called "DEPTH" (legacy) or "DEPTH_ID"
+#                October 19, 2026   - Join against in-memory points generated from the implicit analysis grid
+#                October 19, 2026   - Initialize toolboxes and licences once per process through ARD_HEA_Backend
+#                October 19, 2026   - Record stage timing, throughput and memory metrics
+#                October 19, 2026   - Store the site document once in the DOC_BLOBS table and reference it from PROJECT_ATTRIBUTES
+#                October 19, 2026   - Keep the site document as text unless HEA_DOC_BLOBS is set, expanding older references
 #
 # ---------------------------------------------------------------------------
 
@@ -43,6 +48,10 @@ class nofeatures(Exception):
 
 # Import system modules
 import ARD_HEA_Tools
+import ARD_HEA_Backend
+import ARD_HEA_Grid
+import ARD_HEA_Metrics
+import ARD_HEA_Blobs
 import sys
 import string
 import os
@@ -50,16 +59,8 @@ import traceback
 import arcpy
 from arcpy import env
 
-# Check out any necessary licenses
-arcpy.CheckOutExtension("spatial")
-
-# Load required toolboxes...
-sub_folder = "ArcToolbox/Toolboxes/"
-install_dir = arcpy.GetInstallInfo("desktop")['InstallDir'].replace("\\","/")
-tbx_home = os.path.join(install_dir, sub_folder)
-arcpy.AddToolbox(tbx_home+"Spatial Analyst Tools.tbx")
-arcpy.AddToolbox(tbx_home+"Data Management Tools.tbx")
-arcpy.AddToolbox(tbx_home+"Conversion Tools.tbx")
+# Check out any necessary licenses and load required toolboxes...
+ARD_HEA_Backend.initialize(("Spatial Analyst Tools.tbx", "Data Management Tools.tbx", "Conversion Tools.tbx"), ("spatial",))
 
 def updatecursorvalue (inputField, outputField, naValue):
     if row.getValue(inputField) is None or row.getValue(inputField) == " ":
@@ -92,7 +93,7 @@ def updateprojectdoc (inputText, outputField, projectTable):
 
 try:
     # Report version...
-    ver = ARD_HEA_Tools.version()
+    ver = ARD_HEA_Backend.version()
     arcpy.AddMessage("ARD HEA Tools Version: " + ver)
 
     # Script arguments...
@@ -111,8 +112,7 @@ try:
         inBase = ARD_HEA_Tools.sanitize(inLayer.split(os.sep)[-1])
     else:
         inBase = desc.BaseName
-    AnalysisGrid = geoDB + "\\ANALYSIS_GRID"
-    AnalysisPnts = geoDB + "\\ANALYSIS_PNTS"
+    AnalysisPnts = "in_memory\\ANALYSIS_PNTS"
 
     inJoin = geoDB + "\\" + inBase + "_ident"
     inJoinLyr = inBase + "_ident_lyr"
@@ -133,6 +133,11 @@ try:
     else:
         siteText = None    
 
+    # Store the site document once when the blob store is used, the project fields
+    # then hold a reference to it.  References readers cannot resolve are expanded.
+    siteRef = ARD_HEA_Blobs.put(geoDB, siteText)
+    ARD_HEA_Blobs.expand(geoDB)
+
     # Check for acceptable values...
     if conType <> "-not applicable-":
         arcpy.AddMessage("Checking for values...")
@@ -146,6 +151,12 @@ try:
         del rows
         del row
     
+    # Process: Generate analysis grid points for the spatial join...
+    grid = ARD_HEA_Grid.load_grid(geoDB)
+    metrics = ARD_HEA_Metrics.project_metrics(geoDB, "LoadSiteAttributes")
+    with metrics.stage("grid points", cells=grid.total_cells):
+        grid.to_points(AnalysisPnts)
+
     # Process: Check to see if polygons intersect with grid...
     arcpy.AddMessage("Intersecting with grid...")
     arcpy.MakeFeatureLayer_management(AnalysisPnts, "tmpLyr")
@@ -157,7 +168,8 @@ try:
     
     # Process: Spatial join with grid points
     arcpy.AddMessage("Joining...")
-    arcpy.SpatialJoin_analysis(AnalysisPnts, inLayer, inJoin, "JOIN_ONE_TO_ONE", "KEEP_ALL")
+    with metrics.stage("spatial join", cells=grid.total_cells):
+        arcpy.SpatialJoin_analysis(AnalysisPnts, inLayer, inJoin, "JOIN_ONE_TO_ONE", "KEEP_ALL")
     arcpy.AddMessage("finished join")
     
     # Determine what the depth field is called in the SITE_ATTRIBUTES table
@@ -174,87 +186,94 @@ try:
 
     # Update documentation..
     if habType <> "-not applicable-":
-        updateprojectdoc(siteText, "SITE_HABITAT_DOC", prjAttr)
+        updateprojectdoc(siteRef, "SITE_HABITAT_DOC", prjAttr)
     if conType <> "-not applicable-":
-        updateprojectdoc(siteText, "SITE_CONDITION_DOC", prjAttr)
+        updateprojectdoc(siteRef, "SITE_CONDITION_DOC", prjAttr)
     if remStat <> "-not applicable-":
-        updateprojectdoc(siteText, "SITE_REMEDIATION_DOC", prjAttr)
+        updateprojectdoc(siteRef, "SITE_REMEDIATION_DOC", prjAttr)
     if subSite <> "-not applicable-":
-        updateprojectdoc(siteText, "SITE_SUBSITE_DOC", prjAttr)
+        updateprojectdoc(siteRef, "SITE_SUBSITE_DOC", prjAttr)
     if depth <> "-not applicable-":
-        updateprojectdoc(siteText, "SITE_DEPTH_DOC", prjAttr)
-
-    if int(result.getOutput(0)) > 0:
-        arcpy.AddMessage("Adding records to database table...")
-        arcpy.AddIndex_management(inJoin, "GRID_ID", "STAT_GRD_IDX", "UNIQUE", "ASCENDING")
-        arcpy.MakeTableView_management(SiteAttr, "SiteJoinView")
-        arcpy.AddJoin_management("SiteJoinView", "GRID_ID", inJoin, "GRID_ID", "KEEP_ALL")
-        arcpy.CopyRows_management("SiteJoinView", tmpJoin)
-        arcpy.AddIndex_management(tmpJoin, "GRID_ID", "GRD_IDX", "UNIQUE", "ASCENDING")
-
-        # Get list of fields to delete later...
-        fldList = None
-        fldList = arcpy.ListFields(tmpJoin)
-        flds = []
-        for field in fldList:
-            flds.append(str(field.name))
-        last = len(flds)
-        delList = str(flds[7:last]).strip("[]").replace(",",";").replace("'","").strip(None)
-
-        # Update cursor
-        rows = arcpy.UpdateCursor(tmpJoin)
-        row = rows.next()
-        while row:
-            if habType <> "-not applicable-":
-                updatecursorvalue(habType, "HABITAT_ID", "NA")
-            if conType <> "-not applicable-":
-                updatecursorvalue(conType, "CONDITION_ID", "NA")
-            if remStat <> "-not applicable-":
-                updatecursorvalue(remStat, "REMEDIATION_ID", "NA")
-            if subSite <> "-not applicable-":
-                updatecursorvalue(subSite, "SUBSITE_ID", "NA")
-            if depth <> "-not applicable-":
-                updatecursorvalue(depth, DepthFld, "-999.9")
-            rows.updateRow(row)
+        updateprojectdoc(siteRef, "SITE_DEPTH_DOC", prjAttr)
+
+    with metrics.stage("SITE_ATTRIBUTES update", rows=int(arcpy.GetCount_management(inJoin).getOutput(0))):
+        if int(result.getOutput(0)) > 0:
+            arcpy.AddMessage("Adding records to database table...")
+            arcpy.AddIndex_management(inJoin, "GRID_ID", "STAT_GRD_IDX", "UNIQUE", "ASCENDING")
+            arcpy.MakeTableView_management(SiteAttr, "SiteJoinView")
+            arcpy.AddJoin_management("SiteJoinView", "GRID_ID", inJoin, "GRID_ID", "KEEP_ALL")
+            arcpy.CopyRows_management("SiteJoinView", tmpJoin)
+            arcpy.AddIndex_management(tmpJoin, "GRID_ID", "GRD_IDX", "UNIQUE", "ASCENDING")
+
+            # Get list of fields to delete later...
+            fldList = None
+            fldList = arcpy.ListFields(tmpJoin)
+            flds = []
+            for field in fldList:
+                flds.append(str(field.name))
+            last = len(flds)
+            delList = str(flds[7:last]).strip("[]").replace(",",";").replace("'","").strip(None)
+
+            # Update cursor
+            rows = arcpy.UpdateCursor(tmpJoin)
             row = rows.next()
-        del row
-        del rows
-        arcpy.DeleteField_management(tmpJoin, delList)
-        arcpy.CopyRows_management(tmpJoin, SiteAttr)
+            while row:
+                if habType <> "-not applicable-":
+                    updatecursorvalue(habType, "HABITAT_ID", "NA")
+                if conType <> "-not applicable-":
+                    updatecursorvalue(conType, "CONDITION_ID", "NA")
+                if remStat <> "-not applicable-":
+                    updatecursorvalue(remStat, "REMEDIATION_ID", "NA")
+                if subSite <> "-not applicable-":
+                    updatecursorvalue(subSite, "SUBSITE_ID", "NA")
+                if depth <> "-not applicable-":
+                    updatecursorvalue(depth, DepthFld, "-999.9")
+                rows.updateRow(row)
+                row = rows.next()
+            del row
+            del rows
+            arcpy.DeleteField_management(tmpJoin, delList)
+            arcpy.CopyRows_management(tmpJoin, SiteAttr)
         
-    else:
-        arcpy.AddMessage("Inserting records in database table...")
-        rowsJoin = arcpy.SearchCursor(inJoin)
-        rowJoin = rowsJoin.next()
-        rowsSite = arcpy.InsertCursor(SiteAttr)
-        rowSite = rowsSite.newRow()
-        while rowJoin:
-            rowSite.GRID_ID = rowJoin.GRID_ID
-            if habType <> "-not applicable-":
-                insertcursorvalue(habType, "HABITAT_ID", "NA")
-            if conType <> "-not applicable-":
-                insertcursorvalue(conType, "CONDITION_ID", "NA")              
-            if remStat <> "-not applicable-":
-                insertcursorvalue(remStat, "REMEDIATION_ID", "NA")            
-            if subSite <> "-not applicable-":
-                insertcursorvalue(subSite, "SUBSITE_ID", "NA")                  
-            if depth <> "-not applicable-":
-                insertcursorvalue(depth, DepthFld, "-999.9")  
-            rowsSite.insertRow(rowSite)
+        else:
+            arcpy.AddMessage("Inserting records in database table...")
+            rowsJoin = arcpy.SearchCursor(inJoin)
             rowJoin = rowsJoin.next()
-        del rowSite
-        del rowsSite
-        del rowJoin
-        del rowsJoin
+            rowsSite = arcpy.InsertCursor(SiteAttr)
+            rowSite = rowsSite.newRow()
+            while rowJoin:
+                rowSite.GRID_ID = rowJoin.GRID_ID
+                if habType <> "-not applicable-":
+                    insertcursorvalue(habType, "HABITAT_ID", "NA")
+                if conType <> "-not applicable-":
+                    insertcursorvalue(conType, "CONDITION_ID", "NA")              
+                if remStat <> "-not applicable-":
+                    insertcursorvalue(remStat, "REMEDIATION_ID", "NA")            
+                if subSite <> "-not applicable-":
+                    insertcursorvalue(subSite, "SUBSITE_ID", "NA")                  
+                if depth <> "-not applicable-":
+                    insertcursorvalue(depth, DepthFld, "-999.9")  
+                rowsSite.insertRow(rowSite)
+                rowJoin = rowsJoin.next()
+            del rowSite
+            del rowsSite
+            del rowJoin
+            del rowsJoin
 
     if arcpy.Exists(tmpJoin):
         arcpy.Delete_management(tmpJoin)
     if arcpy.Exists(inJoin):
         arcpy.Delete_management(inJoin)
+    if arcpy.Exists(AnalysisPnts):
+        arcpy.Delete_management(AnalysisPnts)
     
     # Process: Compact database
     arcpy.Compact_management(geoDB)
 
+    # Report stage timings
+    for line in metrics.summary():
+        arcpy.AddMessage(line)
+
 except badvalues:
     arcpy.AddError("\n*** ERROR *** " + inLayer + ": Incorrect condition values in input layer.\nAcceptable values include: FF, BA, D, or NA.\n")
     print "\n*** ERROR *** " + inLayer + ": Incorrect condition values in input layer.\nAcceptable values include: FF, BA, D, or NA.\n"
@@ -14,16 +14,39 @@
 #              for the raster surfaces
 #
 # Notes:  Currently the tool is designed to only be run via the ARD HEA Toolbox.
+#         An optional seventh argument, REFERENCE, registers the raster by path and
+#         checksum in COC_INVENTORY instead of copying it into the geodatabase as UNF_.
+#         An optional eighth argument, NEAREST (default), BILINEAR or MEAN, is the
+#         method used to resample a surface that does not line up with the analysis
+#         grid; the method used, or NONE, is recorded in COC_INVENTORY.
 #
 # Date Created: October 26, 2010
 # Date Modified: June 1, 2011       - Edited for Arc 10.0 functionality
 #                September 15, 2012 - Additional bug fixes
 #                March 10, 2014     - Updated to arcpy 10.2 for V2.0
+#                October 19, 2026   - Sample the surface onto the implicit analysis grid instead of ANALYSIS_PNTS
+#                October 19, 2026   - Read rasters through the tiled raster cache
+#                October 19, 2026   - Initialize toolboxes and licences once per process through ARD_HEA_Backend
+#                October 19, 2026   - Record stage timing, throughput and memory metrics
+#                October 19, 2026   - Keep geoprocessing history in the provenance store instead of appending to COC_XML
+#                October 19, 2026   - Store the Query Manager document in the DOC_BLOBS table, COC_QMDOC holds a reference
+#                October 19, 2026   - Keep the Query Manager document as text unless HEA_DOC_BLOBS is set
+#                October 19, 2026   - Added REFERENCE load mode that samples the raster in place instead of copying it
+#                October 19, 2026   - Check the surface lines up with the analysis grid and resample it if not,
+#                                     recording the method in COC_INVENTORY
 #
 # ---------------------------------------------------------------------------
 
 # Import system modules
 import ARD_HEA_Tools
+import ARD_HEA_Backend
+import ARD_HEA_Grid
+import ARD_HEA_Metrics
+import ARD_HEA_Provenance
+import ARD_HEA_Blobs
+import ARD_HEA_Tables
+import ARD_HEA_RasterCache
+import ARD_HEA_Resample
 import sys
 import string
 import os
@@ -31,20 +54,12 @@ import traceback
 import arcpy
 from arcpy import env
 
-# Check out any necessary licenses
-arcpy.CheckOutExtension("spatial")
-
-# Load required toolboxes...
-sub_folder = "ArcToolbox/Toolboxes/"
-install_dir = arcpy.GetInstallInfo("desktop")['InstallDir'].replace("\\","/")
-tbx_home = os.path.join(install_dir, sub_folder)
-arcpy.AddToolbox(tbx_home+"Spatial Analyst Tools.tbx")
-arcpy.AddToolbox(tbx_home+"Data Management Tools.tbx")
-arcpy.AddToolbox(tbx_home+"Conversion Tools.tbx")
+# Check out any necessary licenses and load required toolboxes...
+ARD_HEA_Backend.initialize(("Spatial Analyst Tools.tbx", "Data Management Tools.tbx", "Conversion Tools.tbx"), ("spatial",))
 
 try:
     # Report version...
-    ver = ARD_HEA_Tools.version()
+    ver = ARD_HEA_Backend.version()
     arcpy.AddMessage("ARD HEA Tools Version: " + ver)
 
     # Script arguments...
@@ -54,6 +69,13 @@ try:
     COCUnits = sys.argv[4]
     COCMetadata = sys.argv[5]
     COCStat = sys.argv[6]
+    loadMode = "COPY"
+    if len(sys.argv) > 7 and sys.argv[7] not in ("", "#"):
+        loadMode = sys.argv[7].upper()
+    reference = loadMode == "REFERENCE"
+    resampleMethod = "NEAREST"
+    if len(sys.argv) > 8 and sys.argv[8] not in ("", "#"):
+        resampleMethod = ARD_HEA_Resample.method_name(sys.argv[8])
 
     # Local variables...
     currDir = os.path.dirname(geoDB)
@@ -66,9 +88,6 @@ try:
     COCRasterN = COCRaster.strip("'")
     COCRasterName = COCRasterN.split(os.sep)[-1]
     arcpy.AddMessage("raster name: " + COCRasterName)
-    # COCExtract = geoDB + "\\" + COCRasterName + "_extract"
-    COCExtract = geoDB + "\\" + COCName + "_extract"
-    COCTable = COCName + "_tbl"
     currentdir = os.path.dirname(geoDB)
 
     # Remove any previous interpolated surfaces...
@@ -84,9 +103,29 @@ try:
     if arcpy.Exists(UNFRaster):
         arcpy.Delete_management(UNFRaster)
 
-    # Import raster into analysis geodatabase
-    arcpy.CopyRaster_management(COCRaster, UNFRaster)
+    if reference:
+        # Register the raster where it is, it is sampled directly from its source
+        sourcePath = desc.catalogPath
+        sourceChecksum = ARD_HEA_RasterCache.checksum(sourcePath)
+        arcpy.AddMessage("Registering " + sourcePath + " by reference (checksum " + sourceChecksum + ")")
+        UNFRaster = sourcePath
+    else:
+        # Import raster into analysis geodatabase
+        arcpy.CopyRaster_management(COCRaster, UNFRaster)
+        ARD_HEA_RasterCache.project_cache(geoDB).invalidate(UNFRaster)
+
+    # Older databases have no fields for referenced rasters
+    invFields = [field.name for field in arcpy.ListFields(COCInvent)]
+    if "SOURCE_PATH" not in invFields:
+        arcpy.AddField_management(COCInvent, "SOURCE_PATH", "TEXT", "", "", "255", "", "NULLABLE", "NON_REQUIRED", "")
+    if "SOURCE_CHECKSUM" not in invFields:
+        arcpy.AddField_management(COCInvent, "SOURCE_CHECKSUM", "TEXT", "", "", "40", "", "NULLABLE", "NON_REQUIRED", "")
+    if "RESAMPLE_METHOD" not in invFields:
+        arcpy.AddField_management(COCInvent, "RESAMPLE_METHOD", "TEXT", "", "", "10", "", "NULLABLE", "NON_REQUIRED", "")
     
+    # Expand document references left for readers that cannot resolve them
+    ARD_HEA_Blobs.expand(geoDB)
+
     # Update inventory table
     rows = arcpy.UpdateCursor(COCInvent, "[COC_NAME] = '" + COCName + "'")
     row = rows.next()
@@ -100,9 +139,15 @@ try:
         row.INTERP_LAYER_NAME = COCLayerBase
         if arcpy.Exists(COCMetadata):
             f = open(COCMetadata, "r")
-            qmText = f.read()
+            qmText = ARD_HEA_Blobs.put(geoDB, f.read())
             f.close()
             row.COC_QMDOC = qmText
+        if reference:
+            row.SOURCE_PATH = sourcePath
+            row.SOURCE_CHECKSUM = sourceChecksum
+        else:
+            row.setNull("SOURCE_PATH")
+            row.setNull("SOURCE_CHECKSUM")
         rows.updateRow(row)
     else:    
         rows = arcpy.InsertCursor(COCInvent)
@@ -116,9 +161,12 @@ try:
         row.INTERP_LAYER_NAME = COCLayerBase
         if arcpy.Exists(COCMetadata):
             f = open(COCMetadata, "r")
-            qmText = f.read()
+            qmText = ARD_HEA_Blobs.put(geoDB, f.read())
             f.close()
             row.COC_QMDOC = qmText
+        if reference:
+            row.SOURCE_PATH = sourcePath
+            row.SOURCE_CHECKSUM = sourceChecksum
         rows.insertRow(row)
     
     # Process: Remove existing records in COC Data table...
@@ -126,65 +174,75 @@ try:
     arcpy.MakeTableView_management(geoDB + "\\COC_DATA", "COC_DATA_view", "[COC_NAME] = '" + COCName + "'")
     arcpy.DeleteRows_management("COC_DATA_view")
         
-    # Process: Extract Values to Points...
-    arcpy.AddMessage("Preparing " + COCName + " data..." + COCExtract)
-    arcpy.ExtractValuesToPoints_sa(geoDB + "\\ANALYSIS_PNTS", COCRaster, COCExtract, "NONE", "VALUE_ONLY")
-
-    # Process: Add Fields...
-    arcpy.AddField_management(COCExtract, "COC_NAME", "TEXT", "", "", "20", "", "NULLABLE", "REQUIRED", "")
-    arcpy.AddField_management(COCExtract, "COC_VALUE", "FLOAT", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
-    arcpy.AddField_management(COCExtract, "FOOTPRINT_ID", "LONG", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
-
-    # Process: Calculate Fields...
-    rows = arcpy.UpdateCursor(COCExtract)
-    row = rows.next()
-    while row:
-        row.COC_NAME = COCName
-        row.COC_VALUE = row.RASTERVALU
-        rows.updateRow(row)
-        row = rows.next()
-    del row
-    del rows
-
-    # Process: Delete Fields...
-    arcpy.DeleteField_management(COCExtract, "RASTERVALU")
-
-    # Process: Make Table View...
-    filter_exp = "[COC_VALUE] >= 0"
-    arcpy.TableToTable_conversion(COCExtract, geoDB, COCTable, filter_exp)
+    # Process: Sample surface onto the analysis grid...
+    arcpy.AddMessage("Preparing " + COCName + " data...")
+    grid = ARD_HEA_Grid.load_grid(geoDB)
+    cache = ARD_HEA_RasterCache.project_cache(geoDB)
+    metrics = ARD_HEA_Metrics.project_metrics(geoDB, "LoadUnfilteredContaminantSurfaces")
+    # Process: Check the surface lines up with the analysis grid...
+    src = cache.open(COCRaster)
+    problems = ARD_HEA_Resample.mismatches(grid, src.xleft, src.ytop, src.cellx, src.celly, src.shape)
+    method = "NONE"
+    if problems:
+        for problem in problems:
+            arcpy.AddMessage("Warning: " + COCLayerBase + " " + problem)
+        method = resampleMethod
+        arcpy.AddMessage("Resampling " + COCLayerBase + " onto the analysis grid using " + method)
+    with metrics.stage("surface extract", cells=grid.total_cells) as step:
+        gridIDs, values = grid.records(grid.sample_raster(COCRaster, cache, resampleMethod if problems else "NEAREST"))
+        step.rows = len(gridIDs)
 
     # Process: Append to COC Data Table...
     arcpy.AddMessage("Updating table with " + COCName + " data...")
-    InTable = geoDB + "\\" + COCTable
-    arcpy.Append_management(InTable, geoDB + "\\COC_DATA", "NO_TEST")
-    arcpy.Delete_management(InTable)
+    records = ARD_HEA_Tables.TypedTable.from_columns("COC_DATA", GRID_ID=gridIDs, COC_NAME=COCName, COC_VALUE=values)
+    with metrics.stage("COC_DATA append", rows=len(records)):
+        with arcpy.da.InsertCursor(geoDB + "\\COC_DATA", ("GRID_ID", "COC_NAME", "COC_VALUE")) as cursor:
+            for row in records.rows(("GRID_ID", "COC_NAME", "COC_VALUE")):
+                cursor.insertRow(row)
+        del cursor, records
+
+    # Process: Record the resampling method in the inventory table...
+    expression = arcpy.AddFieldDelimiters(COCInvent, "COC_NAME") + " = '" + COCName + "'"
+    with arcpy.da.UpdateCursor(COCInvent, ("RESAMPLE_METHOD",), expression) as cursor:
+        for row in cursor:
+            cursor.updateRow((method,))
+    del cursor
 
     # Process: Update Metadata Tables...
-    history = ARD_HEA_Tools.get_process_history(currDir, COCExtract)
+    history = ARD_HEA_Tools.get_process_history(currDir, UNFRaster)
     rows = arcpy.UpdateCursor(COCInvent, "[COC_NAME] = '" + COCName + "'")
     row = rows.next()
     if row:
         if history is not None and history != "":
-            xmltxt = row.COC_XML
-            if xmltxt is not None:
-                row.COC_XML = xmltxt + history
-            else:
-                row.COC_XML = history
-            rows.updateRow(row)
+            xmltxt = ARD_HEA_Provenance.reference(geoDB, (UNFRaster,), row.COC_XML)
+            if xmltxt != row.COC_XML:
+                row.COC_XML = xmltxt
+                rows.updateRow(row)
     else:
         arcpy.AddMessage("\n***WARNING***\nError updating metadata record")
     del row
     del rows
+    newSteps = ARD_HEA_Provenance.record(geoDB, UNFRaster, history, replace=not reference)
 
     # Process: Make feature layer
     arcpy.MakeRasterLayer_management(UNFRaster, UNFLayer, "", "", "")
 
-    # Set ouptut geoprocessing history
-    ARD_HEA_Tools.set_process_history(currDir, UNFRaster, history)
+    # Set ouptut geoprocessing history, unchanged metadata is not rewritten and
+    # referenced rasters are left as they are
+    if newSteps > 0 and not reference:
+        ARD_HEA_Tools.set_process_history(currDir, UNFRaster, history)
 
     # Process: Compact database
     arcpy.Compact_management(geoDB)
+
+    # Report stage timings
+    for line in metrics.summary():
+        arcpy.AddMessage(line)
     
+except ARD_HEA_Resample.badmethod as e:
+    arcpy.AddError("\n*** ERROR ***\n" + str(e))
+    print "\n*** ERROR ***\n" + str(e)
+
 except arcpy.ExecuteError:
     # Get the geoprocessing error messages
     msgs = arcpy.GetMessage(0)
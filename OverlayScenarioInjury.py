@@ -0,0 +1,180 @@
+# ---------------------------------------------------------------------------
+# NAME: OverlayScenarioInjury.py
+# Version: 2.0 (ArcGIS 10.2)
+# Author: Research Planning, Inc.
+#
+# Usage: OverlayScenarioInjury <input_analysis_database> <list_of_scenarios> <rule>
+#
+# Required Arguments:
+#   input_analysis_database - Name of analysis geodatabase
+#   list_of_scenarios - List of Scenario_IDs to overlay
+#   rule - Optional combination rule limited to: (MAX, SUM, INDEPENDENT), default MAX
+#
+# Description: Combines the _SC<n> percent injury rasters of every contaminant in
+#              USER_THRESHOLDS for a scenario into one injury per grid cell, with the
+#              dominant contaminant, and writes the injured cells to the SCENARIO_INJURY
+#              table keyed by GRID_ID and SCENARIO_ID.
+#
+# Notes:  Currently the tool is designed to only be run via the ARD HEA Toolbox.
+#         Run SliceContaminantSurface first.  Existing rows of a scenario are replaced.
+#         Scenarios without footprints are skipped with a warning and listed at the end,
+#         and their old rows are removed.
+#
+# Date Created: October 19, 2026
+#
+# ---------------------------------------------------------------------------
+
+class nofootprints(Exception):
+    pass
+
+class noscenarios(Exception):
+    pass
+
+# Import system modules
+import ARD_HEA_Tools
+import ARD_HEA_Backend
+import ARD_HEA_Grid
+import ARD_HEA_RasterCache
+import ARD_HEA_Metrics
+import ARD_HEA_Overlay
+import numpy
+import sys
+import string
+import os
+import traceback
+import arcpy
+from arcpy import env
+
+# Check out any necessary licenses and load required toolboxes...
+ARD_HEA_Backend.initialize(("Data Management Tools.tbx",), ())
+
+# Remove the injury rows of a scenario
+def deletescenario(injTbl, ScenID):
+    expression = arcpy.AddFieldDelimiters(injTbl, "SCENARIO_ID") + " = " + str(ScenID)
+    with arcpy.da.UpdateCursor(injTbl, ("OID@",), expression) as cursor:
+        for row in cursor:
+            cursor.deleteRow()
+    del cursor
+
+try:
+    # Report version...
+    ver = ARD_HEA_Backend.version()
+    arcpy.AddMessage("ARD HEA Tools Version: " + ver)
+
+    # Script arguments...
+    geoDB = sys.argv[1]
+    ScenIDs = sys.argv[2]
+    rule = "MAX"
+    if len(sys.argv) > 3 and sys.argv[3] not in ("", "#"):
+        rule = ARD_HEA_Overlay.rule_name(sys.argv[3])
+
+    # Local variables...
+    ScenIDList = [int(v.strip("' ")) for v in ScenIDs.split(";") if v.strip("' ")]
+    if not ScenIDList:
+        raise noscenarios
+    usrTbl = geoDB + "\\USER_THRESHOLDS"
+    injTbl = geoDB + "\\" + ARD_HEA_Overlay.INJURY_TABLE
+
+    # Set the geoprocessing environment
+    env.overwriteOutput = 1
+
+    # Describe the analysis grid
+    grid = ARD_HEA_Grid.load_grid(geoDB)
+    cache = ARD_HEA_RasterCache.project_cache(geoDB)
+    metrics = ARD_HEA_Metrics.project_metrics(geoDB, "OverlayScenarioInjury")
+    ARD_HEA_Overlay.create_table(geoDB)
+
+    # Process each scenario
+    skipped = []
+    for ScenID in ScenIDList:
+        expression = arcpy.AddFieldDelimiters(usrTbl, "Scenario_ID") + " = " + str(ScenID)
+        with arcpy.da.SearchCursor(usrTbl, ("COC_NAME",), where_clause=expression) as cursor:
+            COCNames = sorted(set(str(row[0]) for row in cursor))
+
+        # Process: Read the percent injury class raster of each contaminant...
+        names = []
+        classes = []
+        for COCName in COCNames:
+            FPRaster = geoDB + "\\" + ARD_HEA_Tools.sanitizetext(COCName.upper()) + "_SC" + str(ScenID)
+            if not arcpy.Exists(FPRaster):
+                arcpy.AddMessage("Footprint for contaminant " + COCName + " does not exist.")
+                continue
+            with metrics.stage("footprint extract", cells=grid.total_cells):
+                values = grid.sample_raster(FPRaster, cache)
+            names.append(COCName)
+            classes.append(numpy.where(numpy.isnan(values), ARD_HEA_Grid.NODATA, values).astype(numpy.int32))
+        if not classes:
+            arcpy.AddWarning("No contaminant footprints found for scenario " + str(ScenID) + ", skipping it.")
+            deletescenario(injTbl, ScenID)
+            skipped.append(ScenID)
+            continue
+
+        # Process: Combine the contaminants...
+        arcpy.AddMessage("Combining " + str(len(names)) + " contaminant(s) for scenario " + str(ScenID) + " (" + rule + ")")
+        with metrics.stage("combine", cells=grid.total_cells * len(classes)):
+            injury, dominant, count = ARD_HEA_Overlay.overlay(classes, rule)
+            records = ARD_HEA_Overlay.injury_records(grid, ScenID, names, injury, dominant, count)
+        del classes
+
+        # Process: Replace the scenario in the injury table...
+        with metrics.stage("SCENARIO_INJURY append", rows=len(records)):
+            deletescenario(injTbl, ScenID)
+            with arcpy.da.InsertCursor(injTbl, records.fields) as cursor:
+                for row in records.rows():
+                    cursor.insertRow(row)
+            del cursor
+        arcpy.AddMessage(str(len(records)) + " injured cells written for scenario " + str(ScenID))
+
+    # Report the scenarios without footprints
+    if len(skipped) == len(ScenIDList):
+        raise nofootprints
+    if skipped:
+        arcpy.AddWarning("Skipped scenario(s) without footprints: " + ", ".join(str(s) for s in skipped) + ".  Run SliceContaminantSurface first.")
+
+    # Report stage timings
+    for line in metrics.summary():
+        arcpy.AddMessage(line)
+
+except noscenarios:
+    arcpy.AddError("\n*** ERROR ***\nNo scenarios given.  List the Scenario_IDs to overlay.\n")
+    print "\n*** ERROR ***\nNo scenarios given.  List the Scenario_IDs to overlay.\n"
+
+except nofootprints:
+    arcpy.AddError("\n*** ERROR ***\nNo contaminant footprints found for scenario(s) " + ", ".join(str(s) for s in skipped) + ".  Run SliceContaminantSurface first.\n")
+    print "\n*** ERROR ***\nNo contaminant footprints found for scenario(s) " + ", ".join(str(s) for s in skipped) + ".  Run SliceContaminantSurface first.\n"
+
+except ARD_HEA_Overlay.badrule as e:
+    arcpy.AddError("\n*** ERROR ***\n" + str(e))
+    print "\n*** ERROR ***\n" + str(e)
+
+except arcpy.ExecuteError:
+    # Get the tool error messages
+    msgs = arcpy.GetMessage(0)
+    msgs += arcpy.GetMessages(2)
+
+    # Return tool error messages for use with a script tool
+    arcpy.AddError(msgs)
+
+    # Print tool error messages for use in Python/PythonWin
+    print msgs
+
+except:
+    # Get the traceback object
+    #
+    tb = sys.exc_info()[2]
+    tbinfo = traceback.format_tb(tb)[0]
+
+    # Concatenate information together concerning the error into a message string
+    #
+    pymsg = "PYTHON ERRORS:\nTraceback info:\n" + tbinfo + "\nError Info:\n" + str(sys.exc_info()[1])
+    msgs = "ArcPy ERRORS:\n" + arcpy.GetMessages(2) + "\n"
+
+    # Return python error messages for use in script tool or Python Window
+    #
+    arcpy.AddError(pymsg)
+    arcpy.AddError(msgs)
+
+    # Print Python error messages for use in Python / Python Window
+    #
+    print pymsg + "\n"
+    print msgs
@@ -0,0 +1,184 @@
+# ---------------------------------------------------------------------------
+# NAME: PropagateUncertainty.py
+# Version: 2.0 (ArcGIS 10.2)
+# Author: Research Planning, Inc.
+#
+# Usage: PropagateUncertainty <input_analysis_database> <list_of_scenarios> {realizations} {method}
+#   {perturb_cv} {seed} {rule} {first_injury_year} {last_injury_year} {base_year} {discount_rate}
+#   {power} {neighbors} {processes}
+#
+# Required Arguments:
+#   input_analysis_database - Name of analysis geodatabase
+#   list_of_scenarios - List of Scenario_IDs to propagate
+#
+# Optional Arguments:
+#   realizations - Number of Monte Carlo realizations (default 200)
+#   method - Sample resampling limited to: (BOOTSTRAP, PERTURB), default BOOTSTRAP
+#   perturb_cv - Coefficient of variation of the PERTURB lognormal noise (default 0.3)
+#   seed - Random seed, the same seed reproduces the same results (default 0)
+#   rule - Combination rule limited to: (MAX, SUM, INDEPENDENT), default MAX
+#   first_injury_year - First year of injury (default 2000)
+#   last_injury_year - Last year of injury (default first_injury_year)
+#   base_year - Year DSAYs are discounted to (default first_injury_year)
+#   discount_rate - Annual discount rate (default 0.03)
+#   power - Exponent of the inverse distance weights (default 2)
+#   neighbors - Number of nearest samples used for each grid cell (default 12)
+#   processes - Number of processes to use (default all cores)
+#
+# Description: Monte Carlo uncertainty of the DSAY of each scenario (ARD_HEA_Uncertainty).
+#              The _filtered samples of every contaminant in USER_THRESHOLDS for the
+#              scenario are bootstrapped or perturbed, re-interpolated, reclassed by the
+#              thresholds and combined for each realization.  The per cell DSAY mean,
+#              standard deviation, 5th, 50th and 95th percentiles and probability of
+#              injury are written to SCENARIO_UNCERTAINTY and the distribution of the
+#              scenario total DSAY to UNCERTAINTY_SUMMARY.
+#
+# Notes:  Currently the tool is designed to only be run via the ARD HEA Toolbox.
+#         Run FilterAnalyzeSamples and SliceContaminantSurface first.  DSAYs assume a
+#         constant injury over the injury years on cells measured in metres.  Existing
+#         rows of a scenario are replaced.
+#
+# Date Created: October 19, 2026
+#
+# ---------------------------------------------------------------------------
+
+# Import system modules
+import ARD_HEA_Tools
+import ARD_HEA_Backend
+import ARD_HEA_Grid
+import ARD_HEA_Metrics
+import ARD_HEA_Interpolate
+import ARD_HEA_Thresholds
+import ARD_HEA_Overlay
+import ARD_HEA_Uncertainty
+import sys
+import string
+import os
+import traceback
+import arcpy
+from arcpy import env
+
+# Check out any necessary licenses and load required toolboxes...
+ARD_HEA_Backend.initialize(("Data Management Tools.tbx",), ())
+
+# Optional argument, default when left blank or not given
+def optionalvalue (index, cast, default):
+    if len(sys.argv) <= index or str(sys.argv[index]).strip() in ("", "#"):
+        return default
+    return cast(sys.argv[index])
+
+try:
+    # Report version...
+    ver = ARD_HEA_Backend.version()
+    arcpy.AddMessage("ARD HEA Tools Version: " + ver)
+
+    # Script arguments...
+    geoDB = sys.argv[1]
+    ScenIDs = sys.argv[2]
+    realizations = optionalvalue(3, int, 200)
+    method = optionalvalue(4, ARD_HEA_Uncertainty.method_name, "BOOTSTRAP")
+    cv = optionalvalue(5, float, 0.3)
+    seed = optionalvalue(6, int, 0)
+    rule = optionalvalue(7, ARD_HEA_Overlay.rule_name, "MAX")
+    firstYear = optionalvalue(8, int, 2000)
+    lastYear = optionalvalue(9, int, firstYear)
+    baseYear = optionalvalue(10, int, firstYear)
+    rate = optionalvalue(11, float, 0.03)
+    power = optionalvalue(12, float, 2.0)
+    neighbors = optionalvalue(13, int, 12)
+    processes = optionalvalue(14, int, None)
+
+    # Local variables...
+    ScenIDList = [int(v.strip("'")) for v in ScenIDs.split(";")]
+    usrTbl = geoDB + "\\USER_THRESHOLDS"
+
+    # Set the geoprocessing environment
+    env.overwriteOutput = 1
+
+    # Describe the analysis grid
+    grid = ARD_HEA_Grid.load_grid(geoDB)
+    metrics = ARD_HEA_Metrics.project_metrics(geoDB, "PropagateUncertainty")
+    ARD_HEA_Uncertainty.create_tables(geoDB)
+    factor = ARD_HEA_Uncertainty.dsay_factor(grid.cellsize, firstYear, lastYear, baseYear, rate)
+    arcpy.AddMessage("DSAY of a fully injured cell: " + str(factor))
+
+    # Process each scenario
+    samples = {}
+    for ScenID in ScenIDList:
+        expression = arcpy.AddFieldDelimiters(usrTbl, "Scenario_ID") + " = " + str(ScenID)
+        records = []
+        with arcpy.da.SearchCursor(usrTbl, ARD_HEA_Thresholds.fields(), where_clause=expression) as cursor:
+            for row in cursor:
+                records.append(dict(zip(ARD_HEA_Thresholds.fields(), row)))
+
+        # Process: Read the filtered samples of each contaminant...
+        contaminants = []
+        for record in sorted(records, key=lambda r: str(r["COC_NAME"])):
+            COCName = str(record["COC_NAME"])
+            if COCName not in samples:
+                with metrics.stage("sample read") as step:
+                    samples[COCName] = ARD_HEA_Interpolate.read_samples(geoDB, COCName)
+                    step.rows = len(samples[COCName][2])
+            x, y, values, inventory = samples[COCName]
+            logTransform = str(inventory["LOG_TRANSFORM"]).upper() == "TRUE"
+            contaminants.append((COCName, x, y, values, logTransform, record))
+
+        # Process: Run the realizations...
+        arcpy.AddMessage("Running " + str(realizations) + " " + method + " realizations of " + str(len(contaminants)) + " contaminant(s) for scenario " + str(ScenID) + " (" + rule + ")...")
+        with metrics.stage("realizations", cells=grid.total_cells * realizations * len(contaminants)):
+            result = ARD_HEA_Uncertainty.propagate(grid, contaminants, factor, realizations, method, cv, seed, rule,
+                                                   power, neighbors, processes=processes)
+        summary = ARD_HEA_Uncertainty.summary_records(ScenID, result)
+        arcpy.AddMessage("Scenario " + str(ScenID) + " total DSAY: mean " + str(summary.value("DSAY_MEAN", 0)) + ", 90% interval " + str(summary.value("DSAY_Q05", 0)) + " to " + str(summary.value("DSAY_Q95", 0)))
+
+        # Process: Replace the scenario in the uncertainty tables...
+        records = ARD_HEA_Uncertainty.cell_records(grid, ScenID, result)
+        with metrics.stage("SCENARIO_UNCERTAINTY append", rows=len(records)):
+            ARD_HEA_Uncertainty.replace_rows(geoDB, ARD_HEA_Uncertainty.UNCERTAINTY_TABLE, ScenID, records)
+            ARD_HEA_Uncertainty.replace_rows(geoDB, ARD_HEA_Uncertainty.SUMMARY_TABLE, ScenID, summary)
+        arcpy.AddMessage(str(len(records)) + " cells written for scenario " + str(ScenID))
+        del result
+
+    # Report stage timings
+    for line in metrics.summary():
+        arcpy.AddMessage(line)
+
+except ARD_HEA_Interpolate.nosamples:
+    arcpy.AddError("\n*** ERROR ***\nNo filtered samples found for contaminant " + COCName + ".  Run FilterAnalyzeSamples first.\n")
+    print "\n*** ERROR ***\nNo filtered samples found for contaminant " + COCName + ".  Run FilterAnalyzeSamples first.\n"
+
+except (ARD_HEA_Uncertainty.badmethod, ARD_HEA_Overlay.badrule) as e:
+    arcpy.AddError("\n*** ERROR ***\n" + str(e))
+    print "\n*** ERROR ***\n" + str(e)
+
+except arcpy.ExecuteError:
+    # Get the tool error messages
+    msgs = arcpy.GetMessage(0)
+    msgs += arcpy.GetMessages(2)
+
+    # Return tool error messages for use with a script tool
+    arcpy.AddError(msgs)
+
+    # Print tool error messages for use in Python/PythonWin
+    print msgs
+
+except:
+    # Get the traceback object
+    #
+    tb = sys.exc_info()[2]
+    tbinfo = traceback.format_tb(tb)[0]
+
+    # Concatenate information together concerning the error into a message string
+    #
+    pymsg = "PYTHON ERRORS:\nTraceback info:\n" + tbinfo + "\nError Info:\n" + str(sys.exc_info()[1])
+    msgs = "ArcPy ERRORS:\n" + arcpy.GetMessages(2) + "\n"
+
+    # Return python error messages for use in script tool or Python Window
+    #
+    arcpy.AddError(pymsg)
+    arcpy.AddError(msgs)
+
+    # Print Python error messages for use in Python / Python Window
+    #
+    print pymsg + "\n"
+    print msgs
@@ -0,0 +1,90 @@
+# ---------------------------------------------------------------------------
+# NAME: RunPipeline.py
+# Version: 2.0 (ArcGIS 10.2)
+# Author: Research Planning, Inc.
+#
+# Usage: RunPipeline <project_config_file> [stage ...]
+#
+# Required Arguments:
+#   project_config_file - Project configuration file (INI format) describing the stages to run
+#   stage - Optional stages to run instead of the ones listed in the configuration, from:
+#           (create_database, filter_samples, interpolate, load_surfaces, load_site_attributes,
+#            slice, load_footprints, overlay, import_results)
+#
+# Description: Runs the HEA GIS stages in one process, passing surfaces and footprints
+#              between stages in memory and writing only the final tables.  Example
+#              configuration:
+#
+#                [project]
+#                geodatabase = C:\HEA\Site\Site.mdb
+#                threshold_database = C:\HEA\Site\Thresholds.mdb
+#                stages = interpolate, load_surfaces, slice, load_footprints
+#                processes = 4
+#                keep_rasters = false
+#
+#                [interpolate]
+#                contaminants = Lead, Zinc
+#                method = IDW
+#                power = 2
+#                log_transform = true
+#
+#                [load_surfaces]
+#                resample = BILINEAR
+#
+#                [overlay]
+#                rule = MAX
+#
+#                [load_site_attributes habitat]
+#                arguments = C:\HEA\Site\Site.mdb
+#                            C:\HEA\Site\Habitat.shp
+#                            ...
+#
+# Notes:  Runs from the command line with the ArcGIS Python interpreter, or with the
+#         local backend (HEA_BACKEND=local or "backend = local" under [project]) for the
+#         NumPy only stages.
+#
+# Date Created: October 19, 2026
+#
+# ---------------------------------------------------------------------------
+
+# Import system modules
+import ARD_HEA_Pipeline
+import sys
+import traceback
+
+def main (argv):
+    if len(argv) < 2:
+        print("Usage: RunPipeline <project_config_file> [stage ...]")
+        return 2
+    for stage in argv[2:]:
+        if stage not in ARD_HEA_Pipeline.STAGES:
+            print("Unknown stage: " + stage)
+            print("Usage: RunPipeline <project_config_file> [stage ...]")
+            print("Stages: " + ", ".join(ARD_HEA_Pipeline.STAGES))
+            return 2
+    try:
+        pipeline = ARD_HEA_Pipeline.Pipeline(ARD_HEA_Pipeline.read_config(argv[1]))
+        pipeline.run(argv[2:] or None)
+
+    except ARD_HEA_Pipeline.stagefailed as e:
+        print("\n*** ERROR ***\nPipeline stage failed: " + str(e) + "\n")
+        return 1
+
+    except:
+        # Get the traceback object
+        tb = sys.exc_info()[2]
+        tbinfo = traceback.format_tb(tb)[0]
+
+        # Concatenate information together concerning the error into a message string
+        pymsg = "PYTHON ERRORS:\nTraceback info:\n" + tbinfo + "\nError Info:\n" + str(sys.exc_info()[1])
+        print(pymsg + "\n")
+        return 1
+
+    # Report the time, throughput and memory of each stage
+    print("")
+    for line in pipeline.metrics.summary():
+        print(line)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
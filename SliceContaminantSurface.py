@@ -3,12 +3,16 @@
 # Version: 2.0 (ArcGIS 10.2)
 # Author: Research Planning, Inc.
 #
-# Usage: SliceContaminantSurface <input_analysis_database> <input_threshold_table>
+# Usage: SliceContaminantSurface <input_analysis_database> <input_threshold_table> {checkpoint_mode}
 #
 # Required Arguments: 
 #   input_analysis_database - Name of analysis geodatabase
 #   input_threshold_table - Name and location of table containing contaminant thresholds
 #
+# Optional Arguments:
+#   checkpoint_mode - RESUME (default) skips contaminant and scenario pairs completed by an
+#                     earlier run with the same thresholds and surface, RESTART reclasses all
+#
 # Description: Reclass contaminant surfaces based on information contained in 
 #              contaminant threshold table
 #
@@ -19,11 +23,28 @@
 # Date Modified: March 8, 2010      - Use COC_INVENTORY table to determine raster to reclass
 #                June 1, 2011       - Edited for Arc 10.0 functionality
 #                September 15, 2012 - Additional bug fixes
+#                October 19, 2026   - Read surfaces through the raster cache and reclass
+#                                     on the analysis grid in NumPy
+#                October 19, 2026   - Initialize toolboxes and licences once per process through ARD_HEA_Backend
+#                October 19, 2026   - Record stage timing, throughput and memory metrics
+#                October 19, 2026   - Read surfaces registered by reference from their source path
+#                October 19, 2026   - Checkpoint each contaminant and scenario so a failed run resumes
+#                October 19, 2026   - Sample surfaces with the resampling method recorded in COC_INVENTORY
+#                October 19, 2026   - Compute each surface signature once, from its values when it has no statistics
 #
 # ---------------------------------------------------------------------------
 
 # Import system modules
 import ARD_HEA_Tools
+import ARD_HEA_Backend
+import ARD_HEA_Grid
+import ARD_HEA_RasterCache
+import ARD_HEA_Metrics
+import ARD_HEA_Thresholds
+import ARD_HEA_Checkpoint
+import ARD_HEA_Resample
+import numpy
+import hashlib
 import sys
 import string
 import os
@@ -31,41 +52,46 @@ import traceback
 import arcpy
 from arcpy import env
 
-# Check out any necessary licenses
-arcpy.CheckOutExtension("spatial")
-
-# Load required toolboxes...
-sub_folder = "ArcToolbox/Toolboxes/"
-install_dir = arcpy.GetInstallInfo("desktop")['InstallDir'].replace("\\","/")
-tbx_home = os.path.join(install_dir, sub_folder)
-arcpy.AddToolbox(tbx_home+"Spatial Analyst Tools.tbx")
-arcpy.AddToolbox(tbx_home+"Data Management Tools.tbx")
-arcpy.AddToolbox(tbx_home+"Conversion Tools.tbx")
+# Check out any necessary licenses and load required toolboxes...
+ARD_HEA_Backend.initialize(("Spatial Analyst Tools.tbx", "Data Management Tools.tbx", "Conversion Tools.tbx"), ("spatial",))
 
 try:
     # Report version...
-    ver = ARD_HEA_Tools.version()
+    ver = ARD_HEA_Backend.version()
     arcpy.AddMessage("ARD HEA Tools Version: " + ver)
     
     # Script arguments...
     geoDB = sys.argv[1]
     resDB = sys.argv[2]
+    restart = False
+    if len(sys.argv) > 3:
+        restart = ARD_HEA_Checkpoint.restart_mode(sys.argv[3])
 
     # Local variables...
     inTbl = resDB + "\\USER_Contaminant_Injury_Thresholds"
     usrTbl = geoDB + "\\USER_THRESHOLDS"
-    tmpTbl = geoDB + "\\TEMP_THRES"
-    catList = ["A", "B", "C", "D", "E", "F"]
     COCInvent = geoDB + "\\COC_INVENTORY"
 
     # Set the geoprocessing environment
     env.overwriteOutput = 1
 
+    # Describe the analysis grid and open the raster cache
+    grid = ARD_HEA_Grid.load_grid(geoDB)
+    cache = ARD_HEA_RasterCache.project_cache(geoDB)
+    metrics = ARD_HEA_Metrics.project_metrics(geoDB, "SliceContaminantSurface")
+    checkpoints = ARD_HEA_Checkpoint.project_checkpoints(geoDB, "SliceContaminantSurface", restart, arcpy.Exists)
+
     # Process: Import contaminant threshold table...
     if arcpy.Exists(usrTbl):
         arcpy.Delete_management(usrTbl)
     arcpy.TableToTable_conversion(inTbl, geoDB, "USER_THRESHOLDS")
 
+    # Surfaces registered by reference (LoadUnfilteredContaminantSurfaces) are read from their source
+    invFields = [field.name for field in arcpy.ListFields(COCInvent)]
+    refFields = "SOURCE_PATH" in invFields
+    checked = set()
+    sourceSigs = {}
+
     # Process: Loop through each record in contaminant threshold table...
     rows = arcpy.SearchCursor(usrTbl)
     row = rows.next()
@@ -75,60 +101,53 @@ try:
         rowCOCInvent = rowsCOCInvent.next()
         if rowCOCInvent:
             inRaster = geoDB + "\\" + rowCOCInvent.INTERP_LAYER_NAME
+            # Sample the surface the way LoadContaminantSurfaces did
+            method = "NEAREST"
+            if "RESAMPLE_METHOD" in invFields:
+                method = ARD_HEA_Resample.recorded_method(rowCOCInvent.RESAMPLE_METHOD)
+            if refFields and rowCOCInvent.SOURCE_PATH:
+                inRaster = rowCOCInvent.SOURCE_PATH
+                # Hash the source once per contaminant, not for every threshold record
+                if inRaster not in checked and arcpy.Exists(inRaster):
+                    checked.add(inRaster)
+                    if ARD_HEA_RasterCache.checksum(inRaster) != rowCOCInvent.SOURCE_CHECKSUM:
+                        arcpy.AddMessage("Warning: referenced surface " + inRaster + " has changed since it was loaded")
             
-            # Process: Check to see if raster layer exists
+            # Process: Check to see if raster layer exists, and whether an earlier run already reclassed it
+            values = None
+            done = False
             if arcpy.Exists(inRaster):
-                result = arcpy.GetRasterProperties_management(inRaster, "MINIMUM")
-                rasMIN = float(result.getOutput(0))
-                result = arcpy.GetRasterProperties_management(inRaster, "MAXIMUM")
-                rasMAX = float(result.getOutput(0))
+                record = dict((field, row.getValue(field)) for field in ARD_HEA_Thresholds.fields())
+                unit = (row.COC_NAME, row.Scenario_ID)
+                # Signature of the surface, once per contaminant.  A surface without
+                # statistics is identified by its sampled values instead.
+                if (inRaster, method) not in sourceSigs:
+                    sourceSig = ARD_HEA_RasterCache.ArcpyRasterSource(inRaster).signature()
+                    if None in sourceSig[7:11]:
+                        with metrics.stage("surface extract", cells=grid.total_cells):
+                            values = grid.sample_raster(inRaster, cache, method)
+                        sourceSig = [inRaster, hashlib.sha1(numpy.ascontiguousarray(values).tobytes()).hexdigest()]
+                    sourceSigs[(inRaster, method)] = sourceSig
+                unitSig = ARD_HEA_Checkpoint.signature(record, method, sourceSigs[(inRaster, method)])
+                done = checkpoints.done(unit, unitSig)
+                if not done and values is None:
+                    with metrics.stage("surface extract", cells=grid.total_cells):
+                        values = grid.sample_raster(inRaster, cache, method)
+            if done:
+                arcpy.AddMessage("Skipping " + row.COC_NAME + " for scenario " + str(row.Scenario_ID) + ", completed by an earlier run.")
+            elif values is not None and numpy.isfinite(values).any():
+                rasMIN = float(numpy.nanmin(values))
+                rasMAX = float(numpy.nanmax(values))
                 
-                # Process: Create temporary table used to reclass contaminant...
+                # Process: Build the ranges used to reclass contaminant...
                 arcpy.AddMessage("Preparing data to reclass the " + row.COC_NAME + " contaminant surface: " + inRaster + " for scenario " + str(row.Scenario_ID))
-                if arcpy.Exists(tmpTbl):
-                    arcpy.Delete_management(tmpTbl)
-                arcpy.CreateTable_management(geoDB, "TEMP_THRES", "", "")
-                arcpy.AddField_management(tmpTbl, "FROM_VALUE", "DOUBLE", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
-                arcpy.AddField_management(tmpTbl, "TO_VALUE", "DOUBLE", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
-                arcpy.AddField_management(tmpTbl, "LABEL", "SHORT", "", "", "", "", "NULLABLE", "NON_REQUIRED", "")
-                
-                # Process: Update temporary table with values for reclass
-                crows = arcpy.InsertCursor(tmpTbl)
-                errFlag = False
-                recs = 0
-                for cat in range(6):
-                    skipFlag = False
-                    crow = crows.newRow()
-                    if cat != 5:
-                        high = row.getValue("Thres_" + catList[cat] + "_High")
-                        if high > rasMAX:
-                            high = rasMAX
-                    else:
-                        high = rasMAX
-                    if cat != 0:
-                        prevhigh = row.getValue("Thres_" + catList[cat-1] + "_High")
-                    else:
-                        prevhigh = 0
-                    perc = row.getValue("Thres_" + catList[cat] + "_Perc")                         
-                    if high is None or perc is None:
-                        errFlag = True
-                    if prevhigh >= high:
-                        skipFlag = True        
-                    if high < rasMIN:
-                        skipFlag = True
-                    if prevhigh > rasMAX:
-                        skipFlag = True
-                    crow.FROM_VALUE = prevhigh
-                    crow.TO_VALUE = high
-                    crow.LABEL = int(perc)
+                ranges, levels, errFlag = ARD_HEA_Thresholds.threshold_ranges(record, rasMIN, rasMAX)
+                recs = len(ranges)
+                for cat, prevhigh, high, perc, skipFlag in levels:
                     if not skipFlag:
-                        crows.insertRow(crow)
-                        recs = recs + 1
-                        arcpy.AddMessage("Level: " + str(catList[cat])+" from: " + str(prevhigh) + " to: " + str(high) + " Pct Injury: " + str(perc) )
+                        arcpy.AddMessage("Level: " + str(cat)+" from: " + str(prevhigh) + " to: " + str(high) + " Pct Injury: " + str(perc) )
                     else:
-                        arcpy.AddMessage("Skipping level: "+ str(catList[cat]))
-                del crow
-                del crows
+                        arcpy.AddMessage("Skipping level: "+ str(cat))
                 
                 # Process: Reclass contaminant...
                 if not errFlag and recs > 0:
@@ -139,14 +158,14 @@ try:
                         arcpy.Delete_management(outRaster)
                     if arcpy.Exists(outPolygon):
                         arcpy.Delete_management(outPolygon)
-                    arcpy.ReclassByTable_sa(inRaster, tmpTbl, "FROM_VALUE", "TO_VALUE", "LABEL", outRaster, "NODATA")
-                    arcpy.RasterToPolygon_conversion(outRaster, outPolygon, "SIMPLIFY")
+                    with metrics.stage("reclass", cells=grid.total_cells):
+                        grid.write_raster(ARD_HEA_Thresholds.reclass(values, ranges), outRaster, cache=cache)
+                    with metrics.stage("polygonize", cells=grid.total_cells):
+                        arcpy.RasterToPolygon_conversion(outRaster, outPolygon, "SIMPLIFY")
+                    checkpoints.complete(unit, unitSig, (outRaster, outPolygon))
                 else:
                     arcpy.AddMessage("Cannot reclass: " + row.COC_NAME + " for scenario: " + str(row.Scenario_ID))
                     arcpy.AddMessage("Missing or incorrect values in threshold table.\n")
-
-                #Process: Remove temporary table used by reclass
-                arcpy.Delete_management(tmpTbl)
                 
             else:
                 arcpy.AddMessage("\nCannot reclass: " + row.COC_NAME + " for scenario: " + str(row.Scenario_ID))
@@ -160,6 +179,14 @@ try:
     del row
     del rows
 
+    # Report stage timings
+    for line in metrics.summary():
+        arcpy.AddMessage(line)
+
+except (ARD_HEA_Checkpoint.badmode, ARD_HEA_Resample.badmethod) as e:
+    arcpy.AddError("\n*** ERROR ***\n" + str(e))
+    print "\n*** ERROR ***\n" + str(e)
+
 except arcpy.ExecuteError:
     # Get the tool error messages
     msgs = arcpy.GetMessage(0)